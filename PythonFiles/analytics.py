@@ -0,0 +1,248 @@
+# analytics.py
+# -*- coding: utf-8 -*-
+"""
+FATURA ANALİZ MODÜLÜ
+
+Fatura tablolarının tarih, tutar, KDV ve firma sütunlarını bir kez belleğe
+alır; aylık, çeyreklik, yıllık, para birimi ve firma bazlı toplamları tek
+seferde hesaplar. NumPy kuruluysa toplamlar np.bincount ile vektörel,
+değilse aynı sonuçları veren saf Python döngüsüyle hesaplanır.
+
+Tüm toplamlar tam sayı kuruş/sent olarak döner; yuvarlama veritabanındaki
+_to_minor ile aynıdır (yarım sıfırdan uzağa), böylece sonuçlar aylık özet
+tablosu ve PeriodBuckets ile birebir tutar.
+"""
+
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+
+# Toplanan tutar sütunları (kovadaki sırayla) ve analiz için okunan sütunlar
+AMOUNT_FIELDS = ("toplam_tutar_tl", "kdv_tutari", "toplam_tutar_usd", "toplam_tutar_eur")
+ANALYTICS_COLUMNS = ("tarih_gun",) + AMOUNT_FIELDS + ("firma",)
+
+# Para birimi → tutar sütunu
+CURRENCY_FIELDS = {
+    "TRY": "toplam_tutar_tl",
+    "USD": "toplam_tutar_usd",
+    "EUR": "toplam_tutar_eur",
+}
+
+
+def _round_half_away(value):
+    return int(value + 0.5) if value >= 0 else -int(-value + 0.5)
+
+
+# ============================================================================
+# SÜTUN TOPLAMLARI
+# ============================================================================
+class ColumnTotals:
+    """
+    fetch_columns çıktısı üzerinde toplam hesapları.
+
+    Kova değerleri [tl, kdv, usd, eur, adet] sırasındadır (tutarlar kuruş/sent).
+    Tarihsiz satırlar (tarih_gun 0) tarih bazlı toplamlara girmez.
+    """
+
+    def __init__(self, columns, use_numpy=None):
+        """
+        Args:
+            columns: {sütun: değerler}; en az tarih_gun ve AMOUNT_FIELDS, isteğe bağlı firma
+            use_numpy: None → NumPy kuruluysa kullan; False → saf Python
+        """
+        self.use_numpy = NUMPY_AVAILABLE if use_numpy is None else use_numpy and NUMPY_AVAILABLE
+        firms = list(columns.get("firma") or [])
+        # Firma adları kod numarasına çevrilir; firma toplamları kod üzerinden yapılır
+        codes = {}
+        firm_codes = [codes.setdefault(firm or "", len(codes)) for firm in firms]
+        self.firms = list(codes)
+
+        if self.use_numpy:
+            self.days = np.asarray(columns["tarih_gun"], dtype=np.int64)
+            self.amounts = [self._np_minor(columns[field]) for field in AMOUNT_FIELDS]
+            self.firm_codes = np.asarray(firm_codes, dtype=np.int64)
+        else:
+            self.days = [int(day or 0) for day in _as_list(columns["tarih_gun"])]
+            self.amounts = [
+                [_round_half_away((value or 0) * 100) for value in _as_list(columns[field])]
+                for field in AMOUNT_FIELDS
+            ]
+            self.firm_codes = firm_codes
+
+    def __len__(self):
+        return len(self.days)
+
+    @staticmethod
+    def _np_minor(values):
+        """Tutar dizisini kuruşa çevirir; _round_half_away ile aynı float işlemleri."""
+        scaled = np.asarray(values, dtype=np.float64) * 100
+        return np.where(
+            scaled >= 0, np.floor(scaled + 0.5), -np.floor(-scaled + 0.5)
+        ).astype(np.int64)
+
+    # ------------------------------------------------------------------
+    # TARİH BAZLI TOPLAMLAR
+    # ------------------------------------------------------------------
+
+    def monthly(self, start_day=None, end_day=None):
+        """
+        (yıl, ay) → [tl, kdv, usd, eur, adet]; yalnızca kaydı olan aylar.
+        start_day/end_day: yyyymmdd sınırları (dahil).
+        """
+        if self.use_numpy:
+            return self._np_monthly(start_day, end_day)
+        buckets = {}
+        tl, kdv, usd, eur = self.amounts
+        for i, day in enumerate(self.days):
+            if not day or (start_day and day < start_day) or (end_day and day > end_day):
+                continue
+            key = (day // 10000, day // 100 % 100)
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = [0, 0, 0, 0, 0]
+            bucket[0] += tl[i]
+            bucket[1] += kdv[i]
+            bucket[2] += usd[i]
+            bucket[3] += eur[i]
+            bucket[4] += 1
+        return dict(sorted(buckets.items()))
+
+    def _np_monthly(self, start_day, end_day):
+        mask = self.days > 0
+        if start_day:
+            mask &= self.days >= start_day
+        if end_day:
+            mask &= self.days <= end_day
+        months = self.days[mask] // 100  # yyyymm
+        if not months.size:
+            return {}
+        base = int(months.min())
+        index = months - base
+        counts = np.bincount(index)
+        # Ağırlıklı bincount float64 toplar; kuruş toplamları 2**53'e kadar kesin
+        sums = [np.bincount(index, weights=values[mask]) for values in self.amounts]
+        return {
+            ((base + offset) // 100, (base + offset) % 100): [
+                int(total[offset]) for total in sums
+            ]
+            + [int(counts[offset])]
+            for offset in np.flatnonzero(counts).tolist()
+        }
+
+    def monthly_rows(self, start_day=None, end_day=None):
+        """monthly() sonucunu get_monthly_totals_for_years satır biçiminde döndürür."""
+        return [
+            {
+                "yil": year,
+                "ay": month,
+                "toplam_tutar_tl": tl / 100,
+                "kdv_tutari": kdv / 100,
+                "toplam_tutar_usd": usd / 100,
+                "toplam_tutar_eur": eur / 100,
+                "adet": count,
+                "toplam_tutar_tl_kurus": tl,
+                "kdv_tutari_kurus": kdv,
+            }
+            for (year, month), (tl, kdv, usd, eur, count) in self.monthly(
+                start_day, end_day
+            ).items()
+        ]
+
+    def quarterly(self, year):
+        """Yılın 4 çeyreği için [tl, kdv, usd, eur, adet] listeleri."""
+        year = int(year)
+        result = [[0] * 5 for _ in range(4)]
+        for (_, month), bucket in self.monthly(year * 10000 + 101, year * 10000 + 1231).items():
+            if 1 <= month <= 12:
+                quarter = result[(month - 1) // 3]
+                for i, value in enumerate(bucket):
+                    quarter[i] += value
+        return result
+
+    def yearly(self):
+        """yıl → [tl, kdv, usd, eur, adet]"""
+        result = {}
+        for (year, _), bucket in self.monthly().items():
+            totals = result.setdefault(year, [0] * 5)
+            for i, value in enumerate(bucket):
+                totals[i] += value
+        return result
+
+    # ------------------------------------------------------------------
+    # PARA BİRİMİ VE FİRMA BAZLI TOPLAMLAR
+    # ------------------------------------------------------------------
+
+    def currency_totals(self, year=None):
+        """{"TRY": kuruş, "USD": sent, "EUR": sent} (year verilirse yalnızca o yıl)."""
+        if year is None:
+            if self.use_numpy:
+                totals = [int(values.sum()) for values in self.amounts]
+            else:
+                totals = [sum(values) for values in self.amounts]
+        else:
+            totals = self.yearly().get(int(year), [0] * 5)
+        return {
+            currency: totals[AMOUNT_FIELDS.index(field)]
+            for currency, field in CURRENCY_FIELDS.items()
+        }
+
+    def by_firm(self, currency="TRY", year=None):
+        """firma → tutar (kuruş/sent), büyükten küçüğe; year verilirse yalnızca o yıl."""
+        values = self.amounts[AMOUNT_FIELDS.index(CURRENCY_FIELDS[currency])]
+        if year is not None:
+            start, end = int(year) * 10000 + 101, int(year) * 10000 + 1231
+        if self.use_numpy:
+            codes = self.firm_codes
+            if year is not None:
+                mask = (self.days >= start) & (self.days <= end)
+                codes, values = codes[mask], values[mask]
+            counts = np.bincount(codes, minlength=len(self.firms))
+            sums = np.bincount(codes, weights=values, minlength=len(self.firms))
+            totals = {
+                self.firms[code]: int(sums[code]) for code in np.flatnonzero(counts).tolist()
+            }
+        else:
+            totals = {}
+            for i, code in enumerate(self.firm_codes):
+                if year is not None and not start <= self.days[i] <= end:
+                    continue
+                firm = self.firms[code]
+                totals[firm] = totals.get(firm, 0) + values[i]
+        return dict(sorted(totals.items(), key=lambda item: (-item[1], item[0])))
+
+
+def _as_list(values):
+    return values.tolist() if hasattr(values, "tolist") else list(values)
+
+
+# ============================================================================
+# FATURA ANALİZİ (Backend için)
+# ============================================================================
+class InvoiceAnalytics:
+    """
+    Fatura tablolarının analiz sütunlarını bir kez okur ve ColumnTotals olarak
+    saklar. Veri değiştiğinde (aggregate_cache sürümü arttığında) bir sonraki
+    istekte yeniden okunur.
+    """
+
+    def __init__(self, backend, use_numpy=None):
+        self.backend = backend
+        self.use_numpy = use_numpy
+        self._tables = {}
+
+    def table(self, table):
+        """Tablonun güncel ColumnTotals nesnesi (gerekirse veritabanından okunur)."""
+        version = self.backend.aggregate_cache.version
+        cached = self._tables.get(table)
+        if cached is None or cached[0] != version:
+            columns = self.backend.db.fetch_columns(table, list(ANALYTICS_COLUMNS))
+            cached = self._tables[table] = (version, ColumnTotals(columns, self.use_numpy))
+        return cached[1]
+
+    def invalidate(self):
+        self._tables.clear()
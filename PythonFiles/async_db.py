@@ -0,0 +1,68 @@
+# async_db.py
+# -*- coding: utf-8 -*-
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+# ============================================================================
+# ASYNCIO VERİTABANI CEPHESİ
+# ============================================================================
+
+# Okuyucu havuzu kadar iş parçacığı: okumalar paralel, yazmalar yine tek
+# yazıcı kilidinde sıralanır.
+_DEFAULT_WORKERS = 4
+
+# İş parçacığına bağlı metotlar: ardışık çağrılar farklı iş parçacıklarına
+# düşebileceği için cepheden çağrılamaz; bloğun tamamı run() ile çalıştırılır.
+_THREAD_BOUND = frozenset({"transaction", "snapshot", "begin", "commit", "rollback"})
+
+
+class AsyncDatabase:
+    """
+    Database (Rust modülü ya da sqlite3 karşılığı) için asyncio cephesi.
+    Metotlar aynı adla awaitable olarak çağrılır ve ayrılmış bir iş parçacığı
+    havuzunda çalışır; Flet'in async olay işleyicileri arayüzü bloklamadan
+    veri bekler:
+
+        adb = AsyncDatabase(db)
+        page = await adb.get_invoices_page("income_invoices", None, 25)
+
+    transaction()/snapshot() gibi iş parçacığına bağlı bloklar tek çağrıda
+    çalıştırılır:
+
+        await adb.run(lambda: export_with_snapshot(db))
+    """
+
+    def __init__(self, db, max_workers=_DEFAULT_WORKERS):
+        self.db = db
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="async-db"
+        )
+
+    async def run(self, fn, *args, **kwargs):
+        """fn(*args, **kwargs) çağrısını havuzda çalıştırır ve sonucunu bekler."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(fn, *args, **kwargs)
+        )
+
+    def __getattr__(self, name):
+        if name in _THREAD_BOUND:
+            raise AttributeError(
+                f"{name}() iş parçacığına bağlıdır; bloğu AsyncDatabase.run() ile çalıştırın"
+            )
+        attr = getattr(self.db, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def call(*args, **kwargs):
+            # self.db yeniden başlatmada değişebilir; metot çağrı anında bulunur
+            return await self.run(getattr(self.db, name), *args, **kwargs)
+
+        return call
+
+    def close(self):
+        """Havuzu kapatır; kuyruktaki çağrıların bitmesini bekler."""
+        self._executor.shutdown(wait=True)
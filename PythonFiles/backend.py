@@ -29,7 +29,16 @@ os.chdir(PROJECT_ROOT)
 import rust_db  # type: ignore #noqa: E402
 
 # İş mantığı modülleri
-from invoices import InvoiceProcessor, InvoiceManager, PeriodicIncomeCalculator  # noqa: E402
+from invoices import (  # noqa: E402
+    AggregateCache,
+    Invoice,
+    InvoiceProcessor,
+    InvoiceManager,
+    MonthlyTotals,
+    PeriodicIncomeCalculator,
+)
+from async_db import AsyncDatabase  # noqa: E402
+from analytics import InvoiceAnalytics  # noqa: E402
 
 
 # ============================================================================
@@ -77,6 +86,13 @@ class Backend:
         self.db = rust_db.Database()  # type: ignore
         self.db.init_connections()
         self.db.create_tables()
+        # Fatura satırları dict yerine hafif Invoice kaydı olarak döner
+        self.db.row_factory = Invoice
+        # Değişiklik akışında son görülen data_version ve sıra numarası
+        self._change_lock = threading.Lock()
+        self._reset_change_feed()
+        # Flet async olay işleyicileri için awaitable veritabanı cephesi
+        self.async_db = AsyncDatabase(self.db)
 
         # Uygulama ayarlarını yükle
         self.settings = self.db.get_all_settings()
@@ -92,6 +108,13 @@ class Backend:
         else:
             self.settings["kurumlar_vergisi_yuzdesi"] = 22.0
 
+        # Dönemsel hesap sonuçları; veri değiştikçe sürümü artar
+        self.aggregate_cache = AggregateCache()
+        # Aylık fatura toplamlarının bellekteki kopyası; yazmalar delta uygular
+        self.monthly_totals = MonthlyTotals(self)
+        # Tarih/tutar/firma sütunları üzerinde (NumPy varsa vektörel) analizler
+        self.analytics = InvoiceAnalytics(self)
+
         # Alt modüllerin başlatılması
         self.invoice_processor = InvoiceProcessor(self)
         self.invoice_manager = InvoiceManager(self)
@@ -125,9 +148,17 @@ class Backend:
             bool: Başarı durumu
         """
         try:
+            # Kuyruktaki geçmiş kayıtları eski veritabanına yazılsın
+            self.flush_history()
             self.db = rust_db.Database()  # type: ignore
             self.db.init_connections()
             self.db.create_tables()
+            self.db.row_factory = Invoice
+            self._reset_change_feed()
+            self.async_db.db = self.db
+            self.aggregate_cache.invalidate()
+            self.monthly_totals.invalidate()
+            self.analytics.invalidate()
             self.settings = self.db.get_all_settings()
             # Kurumlar vergisi ayarını yeniden yükle
             if "kurumlar_vergisi_yuzdesi" in self.settings:
@@ -146,6 +177,41 @@ class Backend:
             logging.error(f"❌ Veritabanı yeniden başlatma hatası: {e}")
             return False
 
+    # ------------------------------------------------------------------------
+    # DEĞİŞİKLİK AKIŞI (artımlı arayüz yenileme)
+    # ------------------------------------------------------------------------
+    def _reset_change_feed(self):
+        with self._change_lock:
+            self._data_version = self.db.data_version()
+            self._change_seq = self.db.latest_change_seq()
+
+    def poll_changes(self):
+        """
+        Son çağrıdan bu yana invoices.db'ye yapılan yazmaları döndürür (bu
+        uygulamanın ve başka süreçlerin). PRAGMA data_version değişmediyse
+        tablo taranmaz. Değişiklik varsa data_updated olayı akışla tetiklenir.
+
+        Returns:
+            dict | None: {"seq", "reset", "changes": [{"seq", "table", "op", "id"}]};
+            değişiklik yoksa None. reset True ise dinleyiciler baştan yüklemelidir.
+        """
+        with self._change_lock:
+            version = self.db.data_version()
+            if version == self._data_version:
+                return None
+            self._data_version = version
+            feed = self.db.changes_since(self._change_seq)
+            self._change_seq = feed["seq"]
+        if not (feed["reset"] or feed["changes"]):
+            return None
+        # Başka süreçlerin ve doğrudan db yazmalarının (genel gider, kurumlar
+        # vergisi) ardından hesaplanmış toplamlar geçersizdir. Bellekteki aylık
+        # toplamlar yalnızca delta uygulanmamış bir fatura yazması varsa düşer.
+        self.monthly_totals.absorb_changes(feed)
+        self.aggregate_cache.invalidate()
+        self.data_updated.emit(feed)
+        return feed
+
     # ------------------------------------------------------------------------
     # QR MODÜLÜ (LAZY LOADING)
     # ------------------------------------------------------------------------
@@ -165,7 +231,8 @@ class Backend:
     def start_timers(self):
         """
         Uygulama döngüsü başladıktan sonra çağrılacak zamanlayıcıları başlatır.
-        Threading.Timer ile 5 dakikada bir kur güncellemesi yapar.
+        Threading.Timer ile 5 dakikada bir kur güncellemesi, 10 dakikada bir
+        bellekteki aylık toplamların doğrulamasını yapar.
         """
 
         def schedule_rate_update():
@@ -175,10 +242,20 @@ class Backend:
             self.rate_update_timer.daemon = True
             self.rate_update_timer.start()
 
-        # İlk timer'ı başlat
+        def schedule_totals_verification():
+            self.verify_monthly_totals()
+            # 10 dakika sonra tekrar çalıştır
+            self.totals_verify_timer = threading.Timer(600.0, schedule_totals_verification)
+            self.totals_verify_timer.daemon = True
+            self.totals_verify_timer.start()
+
+        # İlk timer'ları başlat
         self.rate_update_timer = threading.Timer(300.0, schedule_rate_update)
         self.rate_update_timer.daemon = True
         self.rate_update_timer.start()
+        self.totals_verify_timer = threading.Timer(600.0, schedule_totals_verification)
+        self.totals_verify_timer.daemon = True
+        self.totals_verify_timer.start()
 
     # ------------------------------------------------------------------------
     # DÖVİZ KURU İŞLEMLERİ
@@ -410,6 +487,98 @@ class Backend:
         """Çoklu fatura silme - InvoiceManager'a yönlendirir."""
         return self.invoice_manager.delete_multiple_invoices(invoice_type, invoice_ids)
 
+    def transaction(self):
+        """
+        Çok adımlı işlemler için: with backend.transaction(): bloğundaki fatura
+        ve geçmiş yazmaları tek commit'te kalıcı olur, hata olursa geri alınır.
+        """
+        return self.invoice_manager.transaction()
+
+    def snapshot(self):
+        """
+        Uzun raporlar ve dışa aktarmalar için: with backend.snapshot(): bloğundaki
+        fatura okumaları aynı ana ait tutarlı görüntüyü görür, yazmaları bekletmez.
+        """
+        return self.db.snapshot()
+
+    def get_invoices_between(
+        self, invoice_type, start_date=None, end_date=None, order_by="tarih ASC", limit=None
+    ):
+        """
+        Tarih aralığındaki faturalar (SQL tarafında, tarih indeksi ile filtrelenir).
+        start_date/end_date: 'DD.MM.YYYY' veya 'YYYY-MM-DD'; sınırlar dahildir.
+        """
+        table = "income_invoices" if invoice_type == "outgoing" else "expense_invoices"
+        return self.db.get_invoices_between(
+            table,
+            self._to_iso_date(start_date),
+            self._to_iso_date(end_date),
+            order_by,
+            limit,
+        )
+
+    def add_invoices_bulk(self, invoice_type, data_list):
+        """Toplu fatura ekleme (tek transaction) - InvoiceManager'a yönlendirir."""
+        return self.invoice_manager.add_invoices_bulk(invoice_type, data_list)
+
+    def get_invoices_page(
+        self,
+        invoice_type,
+        cursor=None,
+        limit=25,
+        direction="next",
+        order_by="tarih DESC",
+    ):
+        """İmleç tabanlı (keyset) fatura sayfası. invoice_type: 'outgoing' veya 'incoming'"""
+        table = "income_invoices" if invoice_type == "outgoing" else "expense_invoices"
+        return self.db.get_invoices_page(table, cursor, limit, direction, order_by)
+
+    def search_invoices(self, invoice_type, query, limit=25, offset=0):
+        """
+        Fatura no, firma, malzeme ve miktar içinde tam metin arama (FTS5).
+        Türkçe harfler katlanır (ı/İ → i, ş → s ...) ve kelime başları eşleşir.
+
+        Returns:
+            dict: {"items": [...], "total": int, "next_offset": int | None}
+        """
+        table = "income_invoices" if invoice_type == "outgoing" else "expense_invoices"
+        return self.db.search_invoices(query, table, limit, offset)
+
+    def verify_monthly_summary(self, repair=False):
+        """
+        Aylık özet tablosunu ham faturalarla karşılaştırır.
+
+        Args:
+            repair (bool): Tutarsızlık bulunursa özeti baştan oluştur
+
+        Returns:
+            list: Tutarsız (tablo, yıl, ay) kayıtları; boşsa özet tutarlı
+        """
+        problems = self.db.check_monthly_summary()
+        if problems:
+            logging.warning(f"Aylık özet tutarsız: {len(problems)} satır")
+            if repair:
+                self.db.rebuild_monthly_summary()
+        return problems
+
+    def verify_monthly_totals(self):
+        """
+        Bellekteki aylık toplamları (MonthlyTotals) veritabanıyla karşılaştırır.
+        Kayma varsa kopya ve hesaplanmış toplamlar düşürülür, sonraki okuma
+        veritabanından yükler.
+
+        Returns:
+            list: Farklı çıkan (tablo, yıl, ay) kayıtları; boşsa tutarlı
+        """
+        try:
+            drift = self.monthly_totals.verify()
+        except Exception as e:
+            logging.error(f"Aylık toplam doğrulama hatası: {e}")
+            return []
+        if drift:
+            self.aggregate_cache.invalidate()
+        return drift
+
     def delete_all_invoices(self, invoice_type):
         """Belirtilen türdeki tüm faturaları siler. invoice_type: 'outgoing' veya 'incoming'"""
         try:
@@ -432,21 +601,137 @@ class Backend:
     # DÖNEMSEL GELİR HESAPLAMALARI (Periodic Income Calculations)
     # ============================================================================
 
+    # Sonuçlar aggregate_cache'te (metot, yıl, para birimi, vergi oranı)
+    # anahtarıyla tutulur; sekmeler arasında düzenleme yapmadan gezinmek
+    # veritabanına gitmez. InvoiceManager yazmaları, kurumlar vergisi ayarı,
+    # poll_changes ve reinitialize_db önbelleği geçersiz kılar.
+
+    def _aggregate_key(self, method, year, currency="TRY"):
+        return (
+            method,
+            None if year is None else int(year),
+            currency,
+            self.settings.get("kurumlar_vergisi_yuzdesi"),
+        )
+
+    def _cached_aggregate(self, method, year, compute, currency="TRY"):
+        key = self._aggregate_key(method, year, currency)
+        return self.aggregate_cache.get_or_compute(key, compute)
+
     def get_summary_data(self):
         """Gelir, gider ve kar/zarar özetini hesaplar - PeriodicIncomeCalculator'a yönlendirir."""
-        return self.periodic_calculator.get_summary_data()
+        return self._cached_aggregate(
+            "summary", None, self.periodic_calculator.get_summary_data
+        )
 
     def get_year_range(self):
         """Fatura verilerinde bulunan tüm yılların listesini döndürür - PeriodicIncomeCalculator'a yönlendirir."""
-        return self.periodic_calculator.get_year_range()
+        return self._cached_aggregate(
+            "year_range", None, self.periodic_calculator.get_year_range
+        )
 
     def get_calculations_for_year(self, year):
         """Belirli bir yıl için aylık ve çeyrek dönem hesaplamaları - PeriodicIncomeCalculator'a yönlendirir."""
-        return self.periodic_calculator.get_calculations_for_year(year)
+        return self._cached_aggregate(
+            "calculations",
+            year,
+            lambda: self.periodic_calculator.get_calculations_for_year(year),
+        )
+
+    def get_calculations_for_years(self, years):
+        """
+        Birden fazla yılın hesaplamaları: önbellekte olmayan yıllar tek geçişte
+        hesaplanır ve get_calculations_for_year ile aynı anahtarlarla saklanır.
+
+        Returns:
+            dict: yıl → (monthly_results, quarterly_results)
+        """
+        years = sorted({int(y) for y in years})
+        keys = {self._aggregate_key("calculations", year): year for year in years}
+
+        def compute(missing):
+            results = self.periodic_calculator.get_calculations_for_years(
+                [keys[key] for key in missing]
+            )
+            return {key: results[keys[key]] for key in missing}
+
+        return dict(zip(years, self.aggregate_cache.get_or_compute_many(keys, compute)))
+
+    def get_year_over_year(self, years):
+        """Yılların özetleri ve önceki yıla göre değişimleri - PeriodicIncomeCalculator'a yönlendirir."""
+        years = sorted({int(y) for y in years})
+        return self._cached_aggregate(
+            f"year_over_year:{','.join(map(str, years))}",
+            None,
+            lambda: self.periodic_calculator.get_year_over_year(years),
+        )
+
+    def get_year_inputs(self, year):
+        """
+        Raporlar sayfasının yıl girdileri: {"general_expenses", "corporate_tax"}
+        (ay adı → TL). Yıl değiştirirken tekrar okunmasın diye önbellektedir.
+        """
+        return self._cached_aggregate(
+            "year_inputs",
+            year,
+            lambda: {
+                "general_expenses": self.db.get_yearly_expenses(int(year)) or {},
+                "corporate_tax": self.db.get_corporate_tax(int(year)) or {},
+            },
+        )
+
+    def prefetch_years(self, years):
+        """
+        Yılların hesaplamalarını ve rapor girdilerini arka planda önbelleğe alır
+        (ör. seçili yılın komşuları); yıl değiştirmek anında olur.
+
+        Returns:
+            threading.Thread: Önbelleği dolduran iş parçacığı
+        """
+        years = sorted({int(y) for y in years})
+
+        def warm():
+            try:
+                self.get_calculations_for_years(years)
+                for year in years:
+                    self.get_year_inputs(year)
+            except Exception as e:
+                logging.error(f"Yıl önbelleği doldurma hatası: {e}")
+
+        thread = threading.Thread(target=warm, name="prefetch-years", daemon=True)
+        thread.start()
+        return thread
 
     def get_yearly_summary(self, year):
         """Belirli bir yıl için yıllık özet - PeriodicIncomeCalculator'a yönlendirir."""
-        return self.periodic_calculator.get_yearly_summary(year)
+        return self._cached_aggregate(
+            "yearly_summary",
+            year,
+            lambda: self.periodic_calculator.get_yearly_summary(year),
+        )
+
+    def get_firm_totals(self, invoice_type, currency="TRY", year=None):
+        """
+        Firma bazında fatura toplamları, büyükten küçüğe (InvoiceAnalytics).
+        invoice_type: 'outgoing' veya 'incoming'; currency: TRY, USD veya EUR
+        """
+        table = "income_invoices" if invoice_type == "outgoing" else "expense_invoices"
+        currency = self._normalize_currency(currency)
+        return self._cached_aggregate(
+            f"firm_totals:{table}",
+            year,
+            lambda: {
+                firm: amount / 100
+                for firm, amount in self.analytics.table(table)
+                .by_firm(currency, year)
+                .items()
+            },
+            currency,
+        )
+
+    def get_aggregate_cache_stats(self):
+        """Toplam önbelleğinin isabet/ıskalama istatistikleri (AggregateCache.stats)."""
+        return self.aggregate_cache.stats()
 
     def get_invoice_count(self, invoice_type):
         """Fatura sayısını döndürür. invoice_type: 'outgoing' (gelir) veya 'incoming' (gider)"""
@@ -455,20 +740,90 @@ class Backend:
         else:
             return self.db.get_gider_invoice_count()
 
+    # ============================================================================
+    # ASYNC VARYANTLAR (Flet async olay işleyicileri için)
+    # ============================================================================
+    # Sık kullanılan çağrıların awaitable halleri. Çağrı async_db havuzunda
+    # çalışır; olay döngüsü (arayüz çizimi) sorgu sürerken beklemez.
+
+    async def get_invoices_page_async(
+        self, invoice_type, cursor=None, limit=25, direction="next", order_by="tarih DESC"
+    ):
+        return await self.async_db.run(
+            self.get_invoices_page, invoice_type, cursor, limit, direction, order_by
+        )
+
+    async def search_invoices_async(self, invoice_type, query, limit=25, offset=0):
+        return await self.async_db.run(
+            self.search_invoices, invoice_type, query, limit, offset
+        )
+
+    async def get_invoice_count_async(self, invoice_type):
+        return await self.async_db.run(self.get_invoice_count, invoice_type)
+
+    async def get_summary_data_async(self):
+        return await self.async_db.run(self.get_summary_data)
+
+    async def get_calculations_for_year_async(self, year):
+        return await self.async_db.run(self.get_calculations_for_year, year)
+
+    async def get_yearly_summary_async(self, year):
+        return await self.async_db.run(self.get_yearly_summary, year)
+
+    async def handle_invoice_operation_async(
+        self,
+        operation,
+        invoice_type,
+        data=None,
+        record_id=None,
+        limit=None,
+        offset=None,
+        order_by=None,
+    ):
+        """handle_invoice_operation'ın awaitable hali (ekleme/güncelleme/silme/okuma)."""
+        return await self.async_db.run(
+            self.handle_invoice_operation,
+            operation,
+            invoice_type,
+            data,
+            record_id,
+            limit,
+            offset,
+            order_by,
+        )
+
+    async def delete_multiple_invoices_async(self, invoice_type, invoice_ids):
+        return await self.async_db.run(
+            self.delete_multiple_invoices, invoice_type, invoice_ids
+        )
+
     # ============================================================================
     # İŞLEM GEÇMİŞİ YÖNETİMİ (History Management)
     # ============================================================================
+    def flush_history(self, timeout=10.0):
+        """
+        Arka planda bekleyen geçmiş kayıtlarını diske yazar.
+        Yedekleme, geri yükleme ve geçmiş okumalarından önce çağrılır.
+
+        Returns:
+            bool: Tüm kayıtlar yazıldıysa True
+        """
+        return self.invoice_manager.history_writer.flush(timeout)
+
     def get_recent_history(self, limit=20):
         """Son işlem geçmişini getirir."""
+        self.flush_history()
         return self.db.get_recent_history(limit)
 
     def get_history_by_date_range(self, start_date, end_date, limit=100):
         """Tarih aralığına göre işlem geçmişini getirir."""
+        self.flush_history()
         # Rust tarafı limit parametresini kabul etmiyor, sadece tarih aralığı gönderiyoruz
         return self.db.get_history_by_date_range(start_date, end_date)
 
     def clear_old_history(self, days_to_keep=90):
         """Eski geçmiş kayıtlarını temizler."""
+        self.flush_history()
         deleted_count = self.db.clear_old_history(days_to_keep)
         return deleted_count
 
@@ -483,6 +838,8 @@ class Backend:
         # Cache'i güncelle ve türüne göre dönüştür
         if key == "kurumlar_vergisi_yuzdesi":
             self.settings[key] = float(value)
+            # Vergi oranı tüm dönemsel hesapları değiştirir
+            self.aggregate_cache.invalidate()
         else:
             self.settings[key] = value
         # Veri güncellendiği callback'ini çağır
@@ -537,6 +894,17 @@ class Backend:
         except (ValueError, IndexError):
             return False
 
+    def _to_iso_date(self, date_str):
+        """'DD.MM.YYYY' veya 'YYYY-MM-DD' → 'YYYY-MM-DD'; geçersizse ValueError."""
+        if not date_str:
+            return None
+        for fmt in ("%d.%m.%Y", "%Y-%m-%d"):
+            try:
+                return datetime.strptime(str(date_str), fmt).strftime("%Y-%m-%d")
+            except ValueError:
+                pass
+        raise ValueError(f"Geçersiz tarih: {date_str}")
+
     def format_date(self, date_str):
         """Tarih string'ini DD.MM.YYYY formatına dönüştürür."""
         if not date_str:
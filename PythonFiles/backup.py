@@ -11,14 +11,18 @@ import tempfile
 
 
 class LocalBackupManager:
-    def __init__(self, database_folder="Database"):
+    def __init__(self, database_folder="Database", before_backup=None):
         """
         Yedekleme yöneticisi başlatılır.
 
         Args:
             database_folder (str): Yedeklenecek kaynak klasörün yolu. Varsayılan: 'Database'
+            before_backup (callable): Yedekten önce bekleyen yazmaları diske
+                işleyen fonksiyon (ör. Backend.flush_history); False dönerse
+                yedekleme yapılmaz
         """
         self.database_folder = os.path.abspath(database_folder)
+        self.before_backup = before_backup
 
     def get_default_filename(self):
         """
@@ -41,6 +45,10 @@ class LocalBackupManager:
         if not os.path.exists(self.database_folder):
             return False, f"Kaynak klasör bulunamadı: {self.database_folder}"
 
+        # Arka planda bekleyen kayıtlar yedeğe girmeden zip oluşturulmaz
+        if self.before_backup is not None and self.before_backup() is False:
+            return False, "Bekleyen kayıtlar diske yazılamadı, yedekleme iptal edildi"
+
         try:
             # Hedef klasörün var olduğundan emin ol (eğer bir klasör yolu verildiyse)
             dest_dir = os.path.dirname(destination_path)
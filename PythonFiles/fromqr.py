@@ -2068,8 +2068,6 @@ class QRInvoiceIntegrator:
                 'failed_files': list
             }
         """
-        from concurrent.futures import ThreadPoolExecutor, as_completed
-
         if not qr_results:
             logging.warning("QR sonuçları boş!")
             return {
@@ -2095,6 +2093,7 @@ class QRInvoiceIntegrator:
 
         # AŞAMA 1: Tüm faturaları parse et ve tarihleri topla
         logging.info("📋 Faturalar hazırlanıyor...")
+        candidates = []
         prepared_invoices = []
         date_list = []
 
@@ -2161,116 +2160,111 @@ class QRInvoiceIntegrator:
                         pass
                     continue
 
-                # DUPLICATE KONTROL
-                fatura_no = parsed_fields.get("fatura_no", "")
-                if self._is_duplicate_invoice(fatura_no):
-                    with lock:
-                        skipped_duplicates += 1
-                        processing_details.append(
-                            {
-                                "file": dosya_adi,
-                                "status": "ATLANDI (DUPLICATE)",
-                                "fatura_no": fatura_no,
-                                "error": None,
-                            }
-                        )
-                    continue
-
-                # Faturayı listeye ekle ve tarihini kaydet
-                prepared_invoices.append(
+                candidates.append(
                     {
                         "dosya_adi": dosya_adi,
                         "dosya_yolu": dosya_yolu,
                         "parsed_fields": parsed_fields,
                         "qr_json": qr_json,
+                        "fatura_no": parsed_fields.get("fatura_no", ""),
+                    }
+                )
+
+        # DUPLICATE KONTROL: tüm aday numaralar için tek toplu sorgu +
+        # aynı yükleme içindeki tekrarlar
+        existing_fatura_nos = self._find_existing_fatura_nos(
+            [inv["fatura_no"] for inv in candidates]
+        )
+        seen_fatura_nos = set()
+
+        for invoice in candidates:
+            fatura_no = invoice["fatura_no"]
+            if fatura_no and (
+                fatura_no in existing_fatura_nos or fatura_no in seen_fatura_nos
+            ):
+                skipped_duplicates += 1
+                processing_details.append(
+                    {
+                        "file": invoice["dosya_adi"],
+                        "status": "ATLANDI (DUPLICATE)",
                         "fatura_no": fatura_no,
+                        "error": None,
                     }
                 )
+                continue
+            if fatura_no:
+                seen_fatura_nos.add(fatura_no)
+
+            # Faturayı listeye ekle ve tarihini kaydet
+            prepared_invoices.append(invoice)
 
-                # Tarihi listeye ekle (kur çekme için)
-                if parsed_fields.get("tarih"):
-                    date_list.append(parsed_fields["tarih"])
+            # Tarihi listeye ekle (kur çekme için)
+            if invoice["parsed_fields"].get("tarih"):
+                date_list.append(invoice["parsed_fields"]["tarih"])
 
         # AŞAMA 2: Tüm tarihlerin kurlarını toplu çek
         logging.info(f"💱 {len(set(date_list))} farklı tarih için kurlar çekiliyor...")
         rates_cache = self.backend.fetch_bulk_historical_rates(date_list)
         logging.info(f"✅ {len(rates_cache)} tarih için kur bilgisi alındı")
 
-        # AŞAMA 3: Faturaları paralel olarak veritabanına ekle
+        # AŞAMA 3: Faturaları tek transaction ile toplu olarak veritabanına ekle
         logging.info(f"💾 {len(prepared_invoices)} fatura veritabanına ekleniyor...")
 
-        def process_invoice(invoice_data):
-            nonlocal successful_imports, failed_imports
-
-            dosya_adi = invoice_data["dosya_adi"]
-            dosya_yolu = invoice_data["dosya_yolu"]
-            parsed_fields = invoice_data["parsed_fields"]
-            qr_json = invoice_data["qr_json"]
-            fatura_no = invoice_data["fatura_no"]
-
+        for invoice_data in prepared_invoices:
             # Kur bilgisini cache'den al
+            parsed_fields = invoice_data["parsed_fields"]
             invoice_date = parsed_fields.get("tarih")
             if invoice_date and invoice_date in rates_cache:
                 parsed_fields["exchange_rates"] = rates_cache[invoice_date]
 
-            try:
-                result = self.backend.handle_invoice_operation(
-                    operation="add", invoice_type=invoice_type, data=parsed_fields
+        try:
+            new_ids = (
+                self.backend.add_invoices_bulk(
+                    invoice_type,
+                    [inv["parsed_fields"] for inv in prepared_invoices],
                 )
+                if prepared_invoices
+                else []
+            )
+            bulk_error = None
+        except Exception as e:
+            logging.error(f"   ❌ Toplu ekleme hatası: {e}")
+            new_ids = [None] * len(prepared_invoices)
+            bulk_error = str(e)
 
-                if result:
-                    with lock:
-                        successful_imports += 1
-                        processing_details.append(
-                            {
-                                "file": dosya_adi,
-                                "status": "BAŞARILI",
-                                "type": invoice_type,
-                                "fatura_no": fatura_no,
-                                "error": None,
-                            }
-                        )
-                else:
-                    with lock:
-                        failed_imports += 1
-                        failed_files.append(dosya_yolu)
-                        processing_details.append(
-                            {
-                                "file": dosya_adi,
-                                "status": "BAŞARISIZ",
-                                "error": "Backend False döndü",
-                            }
-                        )
-                    try:
-                        self._save_unadded_invoice(
-                            dosya_yolu,
-                            dosya_adi,
-                            "Backend False döndü",
-                            qr_json=qr_json,
-                            parsed_fields=parsed_fields,
-                        )
-                    except Exception:
-                        pass
+        for invoice_data, new_id in zip(prepared_invoices, new_ids):
+            dosya_adi = invoice_data["dosya_adi"]
+            dosya_yolu = invoice_data["dosya_yolu"]
 
-            except Exception as e:
-                with lock:
-                    failed_imports += 1
-                    failed_files.append(dosya_yolu)
-                    processing_details.append(
-                        {"file": dosya_adi, "status": "BAŞARISIZ", "error": str(e)}
-                    )
-                logging.error(f"   ❌ {dosya_adi} -> Hata: {e}")
+            if new_id:
+                successful_imports += 1
+                processing_details.append(
+                    {
+                        "file": dosya_adi,
+                        "status": "BAŞARILI",
+                        "type": invoice_type,
+                        "fatura_no": invoice_data["fatura_no"],
+                        "error": None,
+                    }
+                )
+                continue
 
-        # Paralel işleme (8 thread ile)
-        with ThreadPoolExecutor(max_workers=8) as executor:
-            futures = [
-                executor.submit(process_invoice, inv) for inv in prepared_invoices
-            ]
-            for future in as_completed(futures):
-                try:
-                    future.result()
-                except Exception as e:
-                    logging.error(f"Paralel işlem hatası: {e}")
+            reason = bulk_error or "Backend False döndü"
+            failed_imports += 1
+            failed_files.append(dosya_yolu)
+            processing_details.append(
+                {"file": dosya_adi, "status": "BAŞARISIZ", "error": reason}
+            )
+            try:
+                self._save_unadded_invoice(
+                    dosya_yolu,
+                    dosya_adi,
+                    reason,
+                    qr_json=invoice_data["qr_json"],
+                    parsed_fields=invoice_data["parsed_fields"],
+                )
+            except Exception:
+                pass
 
         # Backend sinyalini tetikle
         self.backend.data_updated.emit()
@@ -2286,28 +2280,21 @@ class QRInvoiceIntegrator:
             "failed_files": failed_files,
         }
 
-    def _is_duplicate_invoice(self, fatura_no):
-        """Veritabanında aynı fatura no var mı kontrol et"""
-        if not fatura_no:
-            return False
+    def _find_existing_fatura_nos(self, fatura_nos):
+        """Verilen fatura numaralarından gelir/gider tablolarında zaten bulunanlar (set)."""
+        fatura_nos = [no for no in set(fatura_nos) if no]
+        if not fatura_nos:
+            return set()
 
         try:
-            # Hem gelir hem gider veritabanında kontrol et
-            for db_type in ["outgoing", "incoming"]:
-                invoices = self.backend.handle_invoice_operation(
-                    operation="get", invoice_type=db_type, limit=None
-                )
-
-                if invoices:
-                    for invoice in invoices:
-                        existing_fatura_no = invoice.get("fatura_no", "")
-                        if existing_fatura_no and existing_fatura_no == fatura_no:
-                            return True
-
-            return False
+            return set(self.backend.db.find_existing_fatura_nos(fatura_nos))
         except Exception as e:
             logging.warning(f"⚠️ Duplicate kontrol hatası: {e}")
-            return False
+            return set()
+
+    def _is_duplicate_invoice(self, fatura_no):
+        """Veritabanında aynı fatura no var mı kontrol et"""
+        return fatura_no in self._find_existing_fatura_nos([fatura_no])
 
     def _save_unadded_invoice(
         self, dosya_yolu, dosya_adi, reason, qr_json=None, parsed_fields=None
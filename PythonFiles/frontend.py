@@ -42,8 +42,11 @@ try:
 except Exception:
     pass
 
+from collections.abc import Mapping
+
 # Backend modüllerini import et
 from backend import Backend
+from invoices import PeriodBuckets
 from locales import get_text
 
 # Tek instance kontrolü (Uygulamanın ikinci kez açılmasını engeller)
@@ -62,19 +65,55 @@ backend_instance = Backend()
 
 
 # Backend callback'lerini ayarla (Flet uyumlu)
+# Sayfaların okuduğu tablolar; değişiklik akışında yalnızca etkilenen sayfalar
+# yenilenir. None: sayfa ayrı veritabanından (geçmiş) okur, her yazmada yenilenir.
+_PAGE_TABLES = {
+    "home_page": {"income_invoices", "expense_invoices", "general_expenses", "corporate_tax"},
+    "donemsel_page": {"income_invoices", "expense_invoices", "general_expenses", "corporate_tax"},
+    "invoice_page": {"income_invoices", "expense_invoices", "general_expenses"},
+    "general_expenses": {"general_expenses"},
+    "transaction_history": None,
+}
+
+
+def _run_update_callbacks(tables=None):
+    """tables None ise tüm sayfaları, değilse bu tabloları gösteren sayfaları yeniler."""
+    for page_name, callback in state["update_callbacks"].items():
+        if callback is None:
+            continue
+        watched = _PAGE_TABLES.get(page_name)
+        if tables is not None and watched is not None and not (watched & tables):
+            continue
+        try:
+            callback()
+        except Exception:
+            pass
+
+
+def on_backend_changes(feed=None):
+    """
+    Backend.data_updated ile gelen değişiklik akışında yalnızca değişen
+    tabloları gösteren sayfaları yeniler. Akışsız çağrı ya da reset → tümü.
+    """
+    try:
+        if not feed or feed.get("reset"):
+            _run_update_callbacks()
+        else:
+            _run_update_callbacks({change["table"] for change in feed["changes"]})
+    except Exception:
+        pass
+
+
 def on_backend_data_updated():
     """
     Backend'den veri güncellendiğinde (örn: yeni fatura eklendiğinde)
-    tüm sayfalardaki ilgili bileşenleri (tablolar, grafikler) günceller.
+    ilgili sayfalardaki bileşenleri (tablolar, grafikler) günceller.
+    Fatura veritabanındaki yazmalar poll_changes ile akış olarak gelir;
+    akışta görünmeyen güncellemeler (ör. ayarlar) tüm sayfaları yeniler.
     """
     try:
-        # Tüm kayıtlı callback'leri çağır
-        for page_name, callback in state["update_callbacks"].items():
-            if callback is not None:
-                try:
-                    callback()
-                except Exception:
-                    pass
+        if backend_instance.poll_changes() is None:
+            _run_update_callbacks()
     except Exception:
         pass
 
@@ -96,6 +135,7 @@ def on_backend_status_updated(message, duration):
 
 
 backend_instance.on_data_updated = on_backend_data_updated
+backend_instance.data_updated.connect(on_backend_changes)
 backend_instance.on_status_updated = on_backend_status_updated
 
 # ============================================================================
@@ -521,6 +561,14 @@ def create_vertical_input(
 # ============================================================================
 # FATURA TABLOSU OLUŞTURMA
 # ============================================================================
+# Sıralama seçeneği -> veritabanı ORDER BY karşılığı
+INVOICE_SORT_ORDERS = {
+    "newest": "id DESC",
+    "date_desc": "tarih DESC",
+    "date_asc": "tarih ASC",
+}
+
+
 def create_invoice_table_content(
     sort_option="newest",
     invoice_type="income",
@@ -583,14 +631,7 @@ def create_invoice_table_content(
             db_type = "outgoing" if invoice_type == "income" else "incoming"
 
             # Sıralama seçeneğine göre order_by parametresi
-            if sort_option == "newest":
-                order_by = "id DESC"
-            elif sort_option == "date_desc":
-                order_by = "tarih DESC"
-            elif sort_option == "date_asc":
-                order_by = "tarih ASC"
-            else:
-                order_by = "id DESC"
+            order_by = INVOICE_SORT_ORDERS.get(sort_option, "id DESC")
 
             # Backend'den faturaları al
             invoices = backend_instance.handle_invoice_operation(
@@ -880,18 +921,11 @@ def create_donemsel_table(year=None, tax_fields=None, on_tax_change=None):
 
     # Backend'den verileri çek
     try:
-        income_invoices = (
-            backend_instance.handle_invoice_operation("get", "outgoing") or []
-        )
-        expense_invoices = (
-            backend_instance.handle_invoice_operation("get", "incoming") or []
-        )
-
-        # Genel giderleri çek
-        general_expenses = backend_instance.db.get_yearly_expenses(year) or {}
-
-        # Kurumlar vergisi tutarlarını çek (aylık)
-        corporate_tax_data = backend_instance.db.get_corporate_tax(year) or {}
+        # Genel giderler ve aylık kurumlar vergisi tutarları (önbellekten;
+        # komşu yıllar prefetch_years ile önceden yüklenir)
+        year_inputs = backend_instance.get_year_inputs(year)
+        general_expenses = year_inputs["general_expenses"]
+        corporate_tax_data = year_inputs["corporate_tax"]
 
         # Aylık toplamları hesapla
         monthly_income = [0.0] * 12
@@ -901,49 +935,15 @@ def create_donemsel_table(year=None, tax_fields=None, on_tax_change=None):
         monthly_income_kdv = [0.0] * 12  # Gelir faturalarındaki KDV
         monthly_expense_kdv = [0.0] * 12  # Gider faturalarındaki KDV
 
-        # Gelir faturalarını işle
-        for invoice in income_invoices:
-            tarih = invoice.get("tarih", "")
-            if not tarih:
-                continue
-
-            parts = tarih.split(".")
-            if len(parts) != 3:
-                continue
-
-            try:
-                month = int(parts[1])
-                invoice_year = int(parts[2])
-
-                if invoice_year == year:
-                    amount_tl = float(invoice.get("toplam_tutar_tl", 0))
-                    kdv_tl = float(invoice.get("kdv_tutari", 0))
-                    monthly_income[month - 1] += amount_tl
-                    monthly_income_kdv[month - 1] += kdv_tl
-            except (ValueError, IndexError):
-                continue
-
-        # Gider faturalarını işle
-        for invoice in expense_invoices:
-            tarih = invoice.get("tarih", "")
-            if not tarih:
-                continue
-
-            parts = tarih.split(".")
-            if len(parts) != 3:
-                continue
-
-            try:
-                month = int(parts[1])
-                invoice_year = int(parts[2])
-
-                if invoice_year == year:
-                    amount_tl = float(invoice.get("toplam_tutar_tl", 0))
-                    kdv_tl = float(invoice.get("kdv_tutari", 0))
-                    monthly_expense[month - 1] += amount_tl
-                    monthly_expense_kdv[month - 1] += kdv_tl
-            except (ValueError, IndexError):
-                continue
+        # Aylık fatura toplamları (bellekteki kopya; yazmalar delta ile işlenir)
+        for table, amounts, kdvs in (
+            ("income_invoices", monthly_income, monthly_income_kdv),
+            ("expense_invoices", monthly_expense, monthly_expense_kdv),
+        ):
+            for row in backend_instance.monthly_totals.rows(table, [year]):
+                if 1 <= row["ay"] <= 12:
+                    amounts[row["ay"] - 1] += row["toplam_tutar_tl"]
+                    kdvs[row["ay"] - 1] += row["kdv_tutari"]
 
         # Genel giderleri ay ay ekle
         month_keys = [
@@ -1293,26 +1293,7 @@ def create_grid_expenses(page):
                         years.add(int(exp["yil"]))
                     except (ValueError, TypeError):
                         pass
-            income = backend_instance.handle_invoice_operation("get", "outgoing") or []
-            for inv in income:
-                tarih = inv.get("tarih", "")
-                if tarih:
-                    parts = tarih.split(".")
-                    if len(parts) == 3:
-                        try:
-                            years.add(int(parts[2]))
-                        except ValueError:
-                            pass
-            expense = backend_instance.handle_invoice_operation("get", "incoming") or []
-            for inv in expense:
-                tarih = inv.get("tarih", "")
-                if tarih:
-                    parts = tarih.split(".")
-                    if len(parts) == 3:
-                        try:
-                            years.add(int(parts[2]))
-                        except ValueError:
-                            pass
+            years.update(backend_instance.db.get_available_years())
         except Exception:
             pass
         return sorted(years, reverse=True)
@@ -2299,6 +2280,26 @@ def currency_button(text, currency_code, current_selection, on_click_handler):
     )
 
 
+# ============================================================================
+# DEĞİŞİKLİK MONİTÖRÜ (Başka süreçlerin yazmaları)
+# ============================================================================
+def start_change_monitor():
+    """Her 2 saniyede fatura veritabanının data_version değerine bakar.
+    Başka bir süreç (ör. ikinci uygulama penceresi) veriyi değiştirdiyse
+    değişiklik akışı data_updated ile yalnızca ilgili sayfaları yeniler.
+    """
+
+    def _monitor():
+        while True:
+            time.sleep(2)
+            try:
+                backend_instance.poll_changes()
+            except Exception:
+                pass
+
+    threading.Thread(target=_monitor, daemon=True).start()
+
+
 # --- ANA UYGULAMA ---
 # ============================================================================
 # İNTERNET BAĞLANTI MONİTÖRÜ (Internet Connectivity Monitor)
@@ -2479,72 +2480,7 @@ def main(page: ft.Page):
         """Veritabanındaki tüm yılları döndürür (gelir, gider ve genel gider tablolarından) - sadece veri olan yıllar"""
         years = set()
         try:
-            # Gelir faturalarından yılları topla
-            income_invoices = (
-                backend_instance.handle_invoice_operation("get", "outgoing") or []
-            )
-            for invoice in income_invoices:
-                tarih = invoice.get("tarih", "")
-                if tarih:
-                    parts = tarih.split(".")
-                    if len(parts) == 3:
-                        try:
-                            years.add(int(parts[2]))
-                        except ValueError:
-                            pass
-
-            # Gider faturalarından yılları topla
-            expense_invoices = (
-                backend_instance.handle_invoice_operation("get", "incoming") or []
-            )
-            for invoice in expense_invoices:
-                tarih = invoice.get("tarih", "")
-                if tarih:
-                    parts = tarih.split(".")
-                    if len(parts) == 3:
-                        try:
-                            years.add(int(parts[2]))
-                        except ValueError:
-                            pass
-
-            # Genel giderlerden yılları topla (sadece en az bir aya veri girilmişse)
-            try:
-                all_general_expenses = backend_instance.db.get_all_yearly_expenses()
-                month_keys = [
-                    "ocak",
-                    "subat",
-                    "mart",
-                    "nisan",
-                    "mayis",
-                    "haziran",
-                    "temmuz",
-                    "agustos",
-                    "eylul",
-                    "ekim",
-                    "kasim",
-                    "aralik",
-                ]
-
-                for expense_data in all_general_expenses:
-                    if expense_data and "yil" in expense_data:
-                        # En az bir ayda veri var mı kontrol et
-                        has_data = False
-                        for month in month_keys:
-                            if (
-                                expense_data.get(month)
-                                and float(expense_data.get(month, 0) or 0) > 0
-                            ):
-                                has_data = True
-                                break
-
-                        if has_data:
-                            try:
-                                years.add(int(expense_data["yil"]))
-                            except (ValueError, TypeError):
-                                pass
-            except Exception:
-                pass
-
+            years.update(backend_instance.db.get_available_years())
         except Exception:
             pass
 
@@ -2564,64 +2500,22 @@ def main(page: ft.Page):
             elif current_currency == "EUR":
                 amount_field = "toplam_tutar_eur"
 
-            # Backend'den tüm faturaları al (operation='get')
-            income_invoices = (
-                backend_instance.handle_invoice_operation("get", "outgoing") or []
-            )
-            expense_invoices = (
-                backend_instance.handle_invoice_operation("get", "incoming") or []
-            )
-
-            # Yıllara göre grupla
+            # Bellekteki yıl/ay toplamları (ham faturalar ve özet tablosu taranmaz)
             yearly_data = {}
-
-            # Gelir faturalarını işle
-            for idx, invoice in enumerate(income_invoices):
-                tarih = invoice.get("tarih", "")
-                if not tarih:
-                    continue
-
-                parts = tarih.split(".")
-                if len(parts) != 3:
-                    continue
-
-                try:
-                    month = int(parts[1])
-                    year = int(parts[2])
-                    amount = (
-                        float(invoice.get(amount_field, 0)) / 1000
-                    )  # K (bin) cinsine çevir
-
-                    if year not in yearly_data:
-                        yearly_data[year] = {"gelir": [0] * 12, "gider": [0] * 12}
-
-                    yearly_data[year]["gelir"][month - 1] += amount
-                except (ValueError, IndexError):
-                    continue
-
-            # Gider faturalarını işle
-            for invoice in expense_invoices:
-                tarih = invoice.get("tarih", "")
-                if not tarih:
-                    continue
-
-                parts = tarih.split(".")
-                if len(parts) != 3:
-                    continue
-
-                try:
-                    month = int(parts[1])
-                    year = int(parts[2])
-                    amount = (
-                        float(invoice.get(amount_field, 0)) / 1000
-                    )  # K (bin) cinsine çevir
-
+            for table, key in (
+                ("income_invoices", "gelir"),
+                ("expense_invoices", "gider"),
+            ):
+                for row in backend_instance.monthly_totals.rows(table):
+                    year, month = row["yil"], row["ay"]
+                    if not 1 <= month <= 12:
+                        continue
                     if year not in yearly_data:
                         yearly_data[year] = {"gelir": [0] * 12, "gider": [0] * 12}
 
-                    yearly_data[year]["gider"][month - 1] += amount
-                except (ValueError, IndexError):
-                    continue
+                    # K (bin) cinsine çevir
+                    amount = (row[amount_field] or 0) / 1000
+                    yearly_data[year][key][month - 1] += amount
 
             # Genel giderleri ekle - her yıl için
             month_keys = [
@@ -3307,12 +3201,19 @@ def main(page: ft.Page):
         # İlk yüklemede verileri doldur
         load_corporate_tax_data()
 
+        def prefetch_adjacent_years(selected_year):
+            """Seçili yılın komşularını arka planda önbelleğe al (yıl değişimi anında olsun)"""
+            available = {int(option.key) for option in year_dropdown.options}
+            adjacent = [y for y in (selected_year - 1, selected_year + 1) if y in available]
+            if adjacent:
+                backend_instance.prefetch_years(adjacent)
+
         def on_year_change(e):
             """Yıl değiştiğinde tabloyu güncelle"""
             selected_year = int(e.control.value)
 
             # Kurumlar vergisi verilerini yükle
-            tax_data = backend_instance.db.get_corporate_tax(selected_year) or {}
+            tax_data = backend_instance.get_year_inputs(selected_year)["corporate_tax"]
             month_keys = [
                 "ocak",
                 "subat",
@@ -3336,8 +3237,10 @@ def main(page: ft.Page):
                 selected_year, tax_fields_list, on_tax_field_blur
             )
             page.update()
+            prefetch_adjacent_years(selected_year)
 
         year_dropdown.on_change = on_year_change
+        prefetch_adjacent_years(current_year)
 
         # File Picker Handlers
         def on_save_excel_result(e: ft.FilePickerResultEvent):
@@ -3638,116 +3541,56 @@ def main(page: ft.Page):
 
         def calculate_periodic_data(year, start_date=None, end_date=None):
             """Dönemsel veriler için hesaplama yap"""
-            # Backend'den verileri çek
-            income_invoices = (
-                backend_instance.handle_invoice_operation("get", "outgoing") or []
-            )
-            expense_invoices = (
-                backend_instance.handle_invoice_operation("get", "incoming") or []
-            )
-            general_expenses = backend_instance.db.get_yearly_expenses(year) or {}
-            corporate_tax_data = backend_instance.db.get_corporate_tax(year) or {}
-
-            # Tarih aralığı filtresi uygula (varsa)
+            # Backend'den yalnızca ilgili yılın (ve varsa seçilen aralığın) faturalarını çek
+            range_start = f"{year}-01-01"
+            range_end = f"{year}-12-31"
             if start_date and end_date:
                 try:
-                    start_dt = datetime.strptime(start_date, "%d.%m.%Y")
-                    end_dt = datetime.strptime(end_date, "%d.%m.%Y")
-
-                    def _in_range(tarih):
-                        try:
-                            return (
-                                start_dt
-                                <= datetime.strptime(tarih, "%d.%m.%Y")
-                                <= end_dt
-                            )
-                        except ValueError:
-                            return False
-
-                    income_invoices = [
-                        inv
-                        for inv in income_invoices
-                        if _in_range(inv.get("tarih", ""))
-                    ]
-                    expense_invoices = [
-                        inv
-                        for inv in expense_invoices
-                        if _in_range(inv.get("tarih", ""))
-                    ]
+                    range_start = max(
+                        range_start,
+                        datetime.strptime(start_date, "%d.%m.%Y").strftime("%Y-%m-%d"),
+                    )
+                    range_end = min(
+                        range_end,
+                        datetime.strptime(end_date, "%d.%m.%Y").strftime("%Y-%m-%d"),
+                    )
                 except ValueError:
                     pass
 
-            # Aylık hesaplamalar
-            monthly_income = [0.0] * 12
-            monthly_expense = [0.0] * 12
-            monthly_general = [0.0] * 12
-            monthly_income_kdv = [0.0] * 12
-            monthly_expense_kdv = [0.0] * 12
-            monthly_corporate_tax = [0.0] * 12
-
-            # Gelir faturalarını işle
-            for invoice in income_invoices:
-                tarih = invoice.get("tarih", "")
-                if not tarih:
-                    continue
-                parts = tarih.split(".")
-                if len(parts) != 3:
-                    continue
-                try:
-                    month = int(parts[1])
-                    invoice_year = int(parts[2])
-                    if invoice_year == year:
-                        monthly_income[month - 1] += float(
-                            invoice.get("toplam_tutar_tl", 0)
-                        )
-                        monthly_income_kdv[month - 1] += float(
-                            invoice.get("kdv_tutari", 0)
-                        )
-                except (ValueError, IndexError):
-                    continue
-
-            # Gider faturalarını işle
-            for invoice in expense_invoices:
-                tarih = invoice.get("tarih", "")
-                if not tarih:
-                    continue
-                parts = tarih.split(".")
-                if len(parts) != 3:
-                    continue
-                try:
-                    month = int(parts[1])
-                    invoice_year = int(parts[2])
-                    if invoice_year == year:
-                        monthly_expense[month - 1] += float(
-                            invoice.get("toplam_tutar_tl", 0)
-                        )
-                        monthly_expense_kdv[month - 1] += float(
-                            invoice.get("kdv_tutari", 0)
-                        )
-                except (ValueError, IndexError):
-                    continue
+            # Aralıktaki faturaların aylık toplamları analiz sütunlarından
+            # (bir kez okunur, NumPy varsa vektörel) PeriodBuckets'a aktarılır.
+            # Tüm okumalar aynı anlık görüntüden: rapor sürerken gelen yazmalar
+            # ne bekler ne de raporun yarısına karışır.
+            day_range = (
+                int(range_start.replace("-", "")),
+                int(range_end.replace("-", "")),
+            )
+            engine = PeriodBuckets()
+            with backend_instance.snapshot():
+                engine.add_general_expenses(
+                    year, backend_instance.db.get_yearly_expenses(year)
+                )
+                corporate_tax_data = backend_instance.db.get_corporate_tax(year) or {}
+                for kind, table in (
+                    ("income", "income_invoices"),
+                    ("expense", "expense_invoices"),
+                ):
+                    engine.add_monthly_totals(
+                        kind,
+                        backend_instance.analytics.table(table).monthly_rows(*day_range),
+                    )
 
-            # Genel gider ve kurumlar vergisi
-            month_keys = [
-                "ocak",
-                "subat",
-                "mart",
-                "nisan",
-                "mayis",
-                "haziran",
-                "temmuz",
-                "agustos",
-                "eylul",
-                "ekim",
-                "kasim",
-                "aralik",
+            # Aylık kovalar (kuruş) ve kurumlar vergisi yüzdeleri
+            months = engine.months(year)
+            monthly_income = [m[0] / 100 for m in months]
+            monthly_income_kdv = [m[1] / 100 for m in months]
+            monthly_expense = [m[2] / 100 for m in months]
+            monthly_expense_kdv = [m[3] / 100 for m in months]
+            monthly_general = [m[4] / 100 for m in months]
+            monthly_corporate_tax = [
+                float(corporate_tax_data.get(month_key) or 0)
+                for month_key in PeriodBuckets.MONTH_KEYS
             ]
-            for i in range(12):
-                month_key = month_keys[i]
-                if month_key in general_expenses:
-                    monthly_general[i] = float(general_expenses[month_key] or 0)
-                if month_key in corporate_tax_data:
-                    monthly_corporate_tax[i] = float(corporate_tax_data[month_key] or 0)
 
             # Aylık sonuçları hazırla
             monthly_results = []
@@ -3865,26 +3708,24 @@ def main(page: ft.Page):
             )
 
         # File Picker Handlers for Invoices
-        def filter_invoices(invoices):
+        def fetch_export_invoices(db_type):
+            """
+            Dışa aktarılacak faturalar; tarih filtresi varsa SQL tarafında uygulanır.
+            Okuma ayrı bir anlık görüntüden yapılır, fatura girişini bekletmez.
+            """
             start_str = export_filter_state.get("start")
             end_str = export_filter_state.get("end")
-            if not start_str or not end_str:
-                return invoices
-            try:
-                start_dt = datetime.strptime(start_str, "%d.%m.%Y")
-                end_dt = datetime.strptime(end_str, "%d.%m.%Y")
-
-                filtered = []
-                for inv in invoices:
+            with backend_instance.snapshot():
+                if start_str and end_str:
                     try:
-                        inv_dt = datetime.strptime(inv.get("tarih", ""), "%d.%m.%Y")
-                        if start_dt <= inv_dt <= end_dt:
-                            filtered.append(inv)
+                        return backend_instance.get_invoices_between(
+                            db_type, start_str, end_str, order_by="tarih DESC"
+                        )
                     except ValueError:
                         pass
-                return filtered
-            except ValueError:
-                return invoices
+                return backend_instance.handle_invoice_operation(
+                    operation="get", invoice_type=db_type
+                )
 
         def on_save_invoices_excel_result(e: ft.FilePickerResultEvent):
             if e.path:
@@ -3897,11 +3738,7 @@ def main(page: ft.Page):
                     else tr("filename_incoming_invoices")
                 )
 
-                invoices = backend_instance.handle_invoice_operation(
-                    operation="get", invoice_type=db_type
-                )
-
-                invoices = filter_invoices(invoices)
+                invoices = fetch_export_invoices(db_type)
 
                 if invoices:
                     from toexcel import InvoiceExcelExporter
@@ -3930,11 +3767,7 @@ def main(page: ft.Page):
                 current_invoice_type = state.get("invoice_type", "income")
                 db_type = "outgoing" if current_invoice_type == "income" else "incoming"
 
-                invoices = backend_instance.handle_invoice_operation(
-                    operation="get", invoice_type=db_type
-                )
-
-                invoices = filter_invoices(invoices)
+                invoices = fetch_export_invoices(db_type)
 
                 if invoices:
                     from topdf import InvoicePDFExporter
@@ -4620,7 +4453,15 @@ def main(page: ft.Page):
                 pass
 
         INVOICE_PAGE_SIZE = 25
-        invoice_pagination = {"page": 0, "total": 0}
+        # cursors: ziyaret edilen sayfaların başlangıç imleçleri (keyset sayfalama);
+        # arama yapılırken (query dolu) sonuç listesindeki offset'ler tutulur
+        invoice_pagination = {
+            "page": 0,
+            "total": 0,
+            "cursors": [None],
+            "next": None,
+            "query": "",
+        }
 
         initial_table_content = create_invoice_table_content(
             "newest",
@@ -4696,26 +4537,58 @@ def main(page: ft.Page):
             # Sayfalama hesapla
             if reset_page:
                 invoice_pagination["page"] = 0
+                invoice_pagination["cursors"] = [None]
             db_type = "outgoing" if current_invoice_type == "income" else "incoming"
+            cur_page = invoice_pagination["page"]
+            search_query = invoice_pagination["query"]
+
+            def fetch_page(cursor):
+                if search_query:
+                    # Tam metin arama: bm25 sırasında, imleç yerine offset ile
+                    result = backend_instance.search_invoices(
+                        db_type, search_query, INVOICE_PAGE_SIZE, cursor or 0
+                    )
+                    result["next_cursor"] = result["next_offset"]
+                    return result
+                # İmleç tabanlı sayfa: OFFSET taraması yerine son görülen kayıttan devam
+                return backend_instance.get_invoices_page(
+                    db_type,
+                    cursor=cursor,
+                    limit=INVOICE_PAGE_SIZE,
+                    order_by=INVOICE_SORT_ORDERS.get(sort_option, "id DESC"),
+                )
+
             try:
-                total = backend_instance.get_invoice_count(db_type)
+                page_data = fetch_page(invoice_pagination["cursors"][cur_page])
             except Exception:
-                total = 0
+                page_data = {"items": [], "next_cursor": None, "prev_cursor": None}
+            if not page_data["items"] and cur_page > 0:
+                # Silme sonrası boş kalan sayfadan ilk sayfaya dön
+                cur_page = 0
+                invoice_pagination["cursors"] = [None]
+                page_data = fetch_page(None)
+            invoice_pagination["page"] = cur_page
+
+            if search_query:
+                total = page_data.get("total", 0)
+            else:
+                try:
+                    total = backend_instance.get_invoice_count(db_type)
+                except Exception:
+                    total = 0
             invoice_pagination["total"] = total
             total_pages = max(1, (total + INVOICE_PAGE_SIZE - 1) // INVOICE_PAGE_SIZE)
-            cur_page = min(invoice_pagination["page"], total_pages - 1)
-            invoice_pagination["page"] = cur_page
-            offset = cur_page * INVOICE_PAGE_SIZE
+            invoice_pagination["next"] = page_data["next_cursor"]
 
             # Tabloyu yenile
             table_container.content = create_invoice_table_content(
                 sort_option,
                 current_invoice_type,
                 on_select_changed=update_selected_count,
+                invoice_list=page_data["items"],
                 theme_mode=page.theme_mode,
                 container_width=page.width - 40,
                 limit=INVOICE_PAGE_SIZE,
-                offset=offset,
             )
             _is_empty = (
                 getattr(table_container.content, "data", {}).get("row_count", 0) == 0
@@ -4723,9 +4596,9 @@ def main(page: ft.Page):
             table_container.height = 310 if _is_empty else None
 
             # Sayfalama barını güncelle
-            _page_label.value = f"{tr('pagination_page_of').format(cur_page + 1, total_pages)}  •  {tr('pagination_records').format(total)}"
+            _page_label.value = f"{tr('pagination_page_of').format(min(cur_page + 1, total_pages), total_pages)}  •  {tr('pagination_records').format(total)}"
             _prev_page_btn.disabled = cur_page == 0
-            _next_page_btn.disabled = cur_page >= total_pages - 1
+            _next_page_btn.disabled = page_data["next_cursor"] is None
 
             if income_btn.page:
                 income_btn.update()
@@ -4744,15 +4617,12 @@ def main(page: ft.Page):
         def _go_prev_invoice_page(e):
             if invoice_pagination["page"] > 0:
                 invoice_pagination["page"] -= 1
+                del invoice_pagination["cursors"][invoice_pagination["page"] + 1 :]
                 update_invoice_table()
 
         def _go_next_invoice_page(e):
-            total_pages = max(
-                1,
-                (invoice_pagination["total"] + INVOICE_PAGE_SIZE - 1)
-                // INVOICE_PAGE_SIZE,
-            )
-            if invoice_pagination["page"] < total_pages - 1:
+            if invoice_pagination["next"] is not None:
+                invoice_pagination["cursors"].append(invoice_pagination["next"])
                 invoice_pagination["page"] += 1
                 update_invoice_table()
 
@@ -4762,6 +4632,10 @@ def main(page: ft.Page):
         def on_sort_change(e):
             update_invoice_table(e.control.value, reset_page=True)
 
+        def on_invoice_search(e):
+            invoice_pagination["query"] = (e.control.value or "").strip()
+            update_invoice_table(reset_page=True)
+
         def set_invoice_type(inv_type):
             state["invoice_type"] = inv_type
             update_invoice_table(
@@ -4950,13 +4824,13 @@ def main(page: ft.Page):
 
                 row_data = selected_rows[0].data
                 invoice_id = (
-                    row_data.get("id") if isinstance(row_data, dict) else row_data
+                    row_data.get("id") if isinstance(row_data, Mapping) else row_data
                 )
                 editing_id = state.get("editing_invoice_id")
 
                 if editing_id != invoice_id:
                     # 1. tıklama: formu doldur, düzenleme moduna gir
-                    if isinstance(selected_rows[0].data, dict):
+                    if isinstance(selected_rows[0].data, Mapping):
                         fill_form_from_invoice(selected_rows[0].data)
                         state["editing_invoice_id"] = invoice_id
                     return
@@ -5004,7 +4878,7 @@ def main(page: ft.Page):
                         # Kaydedilen satırı tekrar seç ve formu güncel veriyle doldur
                         for row in get_invoice_table_rows():
                             if (
-                                isinstance(row.data, dict)
+                                isinstance(row.data, Mapping)
                                 and row.data.get("id") == invoice_id
                             ):
                                 try:
@@ -5013,7 +4887,7 @@ def main(page: ft.Page):
                                         cb.value = True
                                 except (AttributeError, TypeError):
                                     pass
-                                if isinstance(row.data, dict):
+                                if isinstance(row.data, Mapping):
                                     fill_form_from_invoice(row.data)
                                 break
                         update_selected_count()
@@ -5126,12 +5000,14 @@ def main(page: ft.Page):
                     original_callback = backend_instance.on_data_updated
                     backend_instance.on_data_updated = None
                     deleted_count = 0
-                    for row in selected_rows:
-                        if isinstance(row.data, dict) and "id" in row.data:
-                            if backend_instance.handle_invoice_operation(
-                                "delete", db_type, record_id=row.data["id"]
-                            ):
-                                deleted_count += 1
+                    # Tüm silmeler ve geçmiş kayıtları tek commit'te yazılır
+                    with backend_instance.transaction():
+                        for row in selected_rows:
+                            if isinstance(row.data, Mapping) and "id" in row.data:
+                                if backend_instance.handle_invoice_operation(
+                                    "delete", db_type, record_id=row.data["id"]
+                                ):
+                                    deleted_count += 1
                     backend_instance.on_data_updated = original_callback
                     update_invoice_table()
                     clear_inputs(force=True, show_message=False)
@@ -5355,7 +5231,8 @@ def main(page: ft.Page):
                 from backup import LocalBackupManager
 
                 manager = LocalBackupManager(
-                    database_folder=os.path.join(PROJECT_ROOT, "Database")
+                    database_folder=os.path.join(PROJECT_ROOT, "Database"),
+                    before_backup=backend_instance.flush_history,
                 )
 
                 def on_save_result(e: ft.FilePickerResultEvent):
@@ -5396,6 +5273,8 @@ def main(page: ft.Page):
                 )
 
                 def do_restore(zip_path):
+                    # Bekleyen geçmiş kayıtları değiştirilecek dosyalara yazılmasın
+                    backend_instance.flush_history()
                     success, msg = manager.restore_backup(zip_path)
                     if success:
                         reinit_ok = backend_instance.reinitialize_db()
@@ -5743,9 +5622,22 @@ def main(page: ft.Page):
             ),
         )
 
+        invoice_search_field = ft.TextField(
+            hint_text=tr("search_invoices_hint"),
+            prefix_icon="search",
+            on_change=on_invoice_search,
+            width=260,
+            height=48,
+            text_size=13,
+            border_radius=10,
+            bgcolor="surface",
+            border_color="outline",
+        )
+
         controls_row = ft.Row(
             [
                 sort_dropdown,
+                invoice_search_field,
                 ft.Row([btn_backup_menu], spacing=4),
                 ft.Container(expand=True),
                 ft.Container(
@@ -6155,50 +6047,22 @@ def main(page: ft.Page):
         try:
             # Seçili para birimini belirle
             current_currency = state.get("current_currency", "TRY")
-            amount_field = "toplam_tutar_tl"
+            sum_field = "toplam_tutar_tl"
             if current_currency == "USD":
-                amount_field = "toplam_tutar_usd"
+                sum_field = "toplam_tutar_usd"
             elif current_currency == "EUR":
-                amount_field = "toplam_tutar_eur"
-
-            # Giden faturalar (Gelir)
-            income_invoices = (
-                backend_instance.handle_invoice_operation(
-                    operation="get", invoice_type="outgoing"
+                sum_field = "toplam_tutar_eur"
+
+            # Bellekteki aylık toplamlar (veritabanına gidilmez)
+            totals = {}
+            for table in ("income_invoices", "expense_invoices"):
+                rows = backend_instance.monthly_totals.rows(table, [year] if year else None)
+                totals[table] = (
+                    sum(row[sum_field] for row in rows),
+                    sum(row["adet"] for row in rows),
                 )
-                or []
-            )
-
-            # Gelen faturalar (Gider)
-            expense_invoices = (
-                backend_instance.handle_invoice_operation(
-                    operation="get", invoice_type="incoming"
-                )
-                or []
-            )
-
-            # Eğer yıl filtresi varsa, sadece o yıla ait faturaları al
-            if year:
-                income_invoices = [
-                    inv
-                    for inv in income_invoices
-                    if inv.get("tarih", "").endswith(str(year))
-                ]
-                expense_invoices = [
-                    inv
-                    for inv in expense_invoices
-                    if inv.get("tarih", "").endswith(str(year))
-                ]
-
-            # Toplam gelir
-            total_income = sum(
-                float(inv.get(amount_field, 0)) for inv in income_invoices
-            )
-
-            # Toplam gider
-            total_expense = sum(
-                float(inv.get(amount_field, 0)) for inv in expense_invoices
-            )
+            total_income, income_count = totals["income_invoices"]
+            total_expense, expense_count = totals["expense_invoices"]
 
             # Genel giderleri ekle
             if year:
@@ -6249,8 +6113,8 @@ def main(page: ft.Page):
                 "total_income": total_income,
                 "total_expense": total_expense,
                 "monthly_avg": monthly_avg,
-                "income_count": len(income_invoices),
-                "expense_count": len(expense_invoices),
+                "income_count": income_count,
+                "expense_count": expense_count,
             }
         except Exception:
             return {
@@ -7036,6 +6900,8 @@ def main(page: ft.Page):
 
     # İnternet bağlantı monitörünü başlat
     start_internet_monitor()
+    # Başka süreçlerin fatura yazmalarını izle
+    start_change_monitor()
 
     def start_animations():
         time.sleep(0.5)
@@ -8,12 +8,87 @@ vergi/kur hesaplamalarının yapılmasından sorumludur.
 """
 
 import re
+import atexit
+import copy
 import logging
 import math
+import queue
+import threading
+import time
+from collections import Counter
+from collections.abc import Mapping
+from contextlib import contextmanager
 from datetime import datetime
 from decimal import Decimal
 
 
+# ============================================================================
+# FATURA KAYIT TİPİ
+# ============================================================================
+class Invoice(Mapping):
+    """
+    Veritabanı satırı için hafif, salt-okunur fatura kaydı (dict yerine __slots__).
+
+    Database.row_factory = Invoice ile kullanılır; satır SELECT * sırasında gelir.
+    Sözlük gibi davranır (inv["firma"], inv.get(...), "tarih" in inv, dict(inv)).
+    tarih ISO olarak saklanır, okunurken DD.MM.YYYY'ye çevrilir (tarih_iso ham değer).
+    """
+
+    FIELDS = (
+        "id", "fatura_no", "irsaliye_no", "tarih", "firma", "malzeme",
+        "miktar", "matrah", "toplam_tutar_tl", "toplam_tutar_usd",
+        "toplam_tutar_eur", "birim", "kdv_yuzdesi", "kdv_tutari",
+        "kdv_dahil", "usd_rate", "eur_rate", "updated_at", "created_at",
+    )
+
+    __slots__ = tuple("tarih_iso" if f == "tarih" else f for f in FIELDS)
+
+    def __init__(self, row):
+        (
+            self.id, self.fatura_no, self.irsaliye_no, self.tarih_iso,
+            self.firma, self.malzeme, self.miktar, self.matrah,
+            self.toplam_tutar_tl, self.toplam_tutar_usd, self.toplam_tutar_eur,
+            self.birim, self.kdv_yuzdesi, self.kdv_tutari, self.kdv_dahil,
+            self.usd_rate, self.eur_rate, self.updated_at, self.created_at,
+        ) = row[: len(Invoice.FIELDS)]
+
+    @property
+    def tarih(self):
+        # Yalnızca gösterilirken çevrilir; strptime yerine dilimleme
+        date_str = self.tarih_iso
+        if (
+            not isinstance(date_str, str)
+            or len(date_str) != 10
+            or date_str[4] != "-"
+            or date_str[7] != "-"
+        ):
+            return date_str
+        return f"{date_str[8:]}.{date_str[5:7]}.{date_str[:4]}"
+
+    def __getitem__(self, key):
+        if key not in Invoice._FIELD_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(Invoice.FIELDS)
+
+    def __len__(self):
+        return len(Invoice.FIELDS)
+
+    def __contains__(self, key):
+        return key in Invoice._FIELD_SET
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def __repr__(self):
+        return f"Invoice(id={self.id!r}, fatura_no={self.fatura_no!r}, tarih={self.tarih!r})"
+
+
+Invoice._FIELD_SET = frozenset(Invoice.FIELDS)
+
+
 # ============================================================================
 # FATURA İŞLEME SINIFI
 # ============================================================================
@@ -436,12 +511,123 @@ class InvoiceProcessor:
         return processed
 
 
+# ============================================================================
+# GEÇMİŞ YAZICI (write-behind)
+# ============================================================================
+class HistoryWriter:
+    """
+    Geçmiş kayıtlarını arka planda toplu yazan sınırlı kuyruk.
+
+    Fatura işlemi yalnızca kendi commit'ini yapar; kayıtlar tek bir iş parçacığı
+    tarafından batch_size kayıtta veya flush_interval saniyede bir, tek
+    transaction ile history.db'ye yazılır. Kuyruk doluysa add() bekler.
+    """
+
+    _FLUSH = object()
+    _STOP = object()
+
+    def __init__(self, backend, batch_size=100, flush_interval=0.2, max_pending=1000):
+        """
+        Args:
+            backend: db erişimi için Backend (geri yüklemede db değişebilir)
+            batch_size (int): Tek transaction'daki en fazla kayıt
+            flush_interval (float): İlk kayıttan sonra en fazla bekleme (saniye)
+            max_pending (int): Kuyruk kapasitesi
+        """
+        self.backend = backend
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="history-writer", daemon=True
+                )
+                self._thread.start()
+                atexit.register(self.close)
+
+    def add(self, action, details):
+        """Kaydı kuyruğa ekler; yazma arka planda yapılır."""
+        self._ensure_started()
+        self._queue.put((action, details))
+
+    def add_many(self, records):
+        """(action, details) çiftlerini sırayla kuyruğa ekler."""
+        self._ensure_started()
+        for record in records:
+            self._queue.put(record)
+
+    def flush(self, timeout=None):
+        """
+        Kuyruktaki tüm kayıtlar yazılana kadar bekler (yedekleme/kapanış öncesi).
+
+        Returns:
+            bool: Süre dolmadan tüm kayıtlar yazıldıysa True
+        """
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return self._queue.unfinished_tasks == 0
+        self._queue.put(self._FLUSH)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self):
+        """Bekleyen kayıtları yazar ve iş parçacığını durdurur."""
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        self._queue.put(self._STOP)
+        thread.join()
+        atexit.unregister(self.close)
+
+    def _run(self):
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            deadline = time.monotonic() + self.flush_interval
+            batch, markers = [], 0
+            while True:
+                if item is self._STOP or item is self._FLUSH:
+                    stop = item is self._STOP
+                    markers += 1
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self.backend.db.add_history_records(batch)
+                except Exception as e:
+                    logging.error(f"Geçmiş kayıtları yazılamadı ({len(batch)} kayıt): {e}")
+            for _ in range(len(batch) + markers):
+                self._queue.task_done()
+
+
 # ============================================================================
 # FATURA YÖNETİM SINIFI
 # ============================================================================
 class InvoiceManager:
     """Fatura operasyonlarını yöneten sınıf."""
 
+    # Tek DELETE ... IN (...) ifadesindeki en fazla id sayısı
+    DELETE_CHUNK_SIZE = 500
+
     def __init__(self, backend):
         """
         InvoiceManager başlatıcısı.
@@ -451,6 +637,79 @@ class InvoiceManager:
         """
         self.backend = backend
         self.processor = InvoiceProcessor(backend)
+        # Geçmiş kayıtları fatura işlemini bekletmeden arka planda yazılır
+        self.history_writer = HistoryWriter(backend)
+        # transaction() içindeyken geçmiş kayıtları iş parçacığı başına burada birikir
+        self._tx_local = threading.local()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Blok içindeki fatura yazmalarını ve geçmiş kayıtlarını tek transaction'da toplar.
+
+        Geçmiş kayıtları arka plan yazıcısına gitmez; commit'ten hemen önce aynı
+        transaction içinde tek batch olarak yazılır. Blok hata verirse fatura
+        yazmaları da, geçmiş kayıtları da geri alınır. İç içe kullanılabilir.
+        """
+        pending = getattr(self._tx_local, "pending", None)
+        outer = pending is None
+        if outer:
+            pending = self._tx_local.pending = []
+            generation = self.backend.monthly_totals.generation
+        mark = len(pending)
+        committed = False
+        try:
+            with self.backend.db.transaction():
+                try:
+                    yield self
+                except BaseException:
+                    del pending[mark:]
+                    raise
+                if outer and pending:
+                    self.backend.db.add_history_records(pending)
+            committed = True
+        finally:
+            # Geri alınan deltalar ya da blok sürerken commit öncesi veriden
+            # yeniden yüklenen kopya: bellekteki toplamlar baştan yüklenir
+            if not committed or (
+                outer and generation != self.backend.monthly_totals.generation
+            ):
+                self.backend.monthly_totals.invalidate()
+            if outer:
+                self._tx_local.pending = None
+                # Blok içinde hesaplanan toplamlar commit öncesi veriyi görmüş olabilir
+                self.backend.aggregate_cache.invalidate()
+
+    @staticmethod
+    def _table(invoice_type):
+        return "income_invoices" if invoice_type == "outgoing" else "expense_invoices"
+
+    def _delta_rows(self, table, ids):
+        """id'leri verilen satırların delta için tarih_gun ve tutar sütunları."""
+        if not ids:
+            return []
+        columns = self.backend.db.fetch_columns(
+            table,
+            ["id", "tarih_gun"] + list(_DELTA_FIELDS),
+            f"id IN ({','.join('?' * len(ids))})",
+            list(ids),
+        )
+        names = list(columns)
+        return [dict(zip(names, values)) for values in zip(*(_as_list(columns[n]) for n in names))]
+
+    def _notify_data_updated(self):
+        """Toplam önbelleğini geçersiz kılar ve arayüze veri değişikliğini bildirir."""
+        self.backend.aggregate_cache.invalidate()
+        if self.backend.on_data_updated:
+            self.backend.on_data_updated()
+
+    def _queue_history(self, records):
+        """Açık transaction varsa kayıtları ona ekler, yoksa arka plan yazıcısına verir."""
+        pending = getattr(self._tx_local, "pending", None)
+        if pending is not None:
+            pending.extend(records)
+        else:
+            self.history_writer.add_many(records)
 
     def handle_invoice_operation(
         self,
@@ -474,6 +733,7 @@ class InvoiceManager:
                 f"🔹 Fatura ekleniyor -> Tip: {invoice_type}, Firma: {processed_data.get('firma', 'N/A')[:30]}"
             )
 
+            generation = self.backend.monthly_totals.generation
             if invoice_type == "outgoing":
                 result = self.backend.db.add_gelir_invoice(processed_data)
                 if result:
@@ -493,8 +753,10 @@ class InvoiceManager:
                 return False
 
             if result:
-                if self.backend.on_data_updated:
-                    self.backend.on_data_updated()
+                self.backend.monthly_totals.apply(
+                    self._table(invoice_type), generation, added=[processed_data], ids=[result]
+                )
+                self._notify_data_updated()
                 return True
             return False
 
@@ -503,11 +765,15 @@ class InvoiceManager:
             if not processed_data:
                 return False
 
+            # Delta için güncellemeden önceki satır
+            generation = self.backend.monthly_totals.generation
             if invoice_type == "outgoing":
+                old_data = self.backend.db.get_gelir_invoice_by_id(record_id)
                 result = self.backend.db.update_gelir_invoice(record_id, processed_data)
                 if result:
                     self._add_history_record("GÜNCELLEME", "gelir", processed_data)
             elif invoice_type == "incoming":
+                old_data = self.backend.db.get_gider_invoice_by_id(record_id)
                 result = self.backend.db.update_gider_invoice(record_id, processed_data)
                 if result:
                     self._add_history_record("GÜNCELLEME", "gider", processed_data)
@@ -515,13 +781,20 @@ class InvoiceManager:
                 return False
 
             if result:
-                if self.backend.on_data_updated:
-                    self.backend.on_data_updated()
+                self.backend.monthly_totals.apply(
+                    self._table(invoice_type),
+                    generation,
+                    removed=[old_data] if old_data else [],
+                    added=[processed_data],
+                    ids=[record_id],
+                )
+                self._notify_data_updated()
                 return True
             return False
 
         elif operation == "delete":
-            # Silmeden önce fatura bilgilerini al
+            # Silmeden önce fatura bilgilerini al (geçmiş kaydı ve delta için)
+            generation = self.backend.monthly_totals.generation
             if invoice_type == "outgoing":
                 invoice_data = self.backend.db.get_gelir_invoice_by_id(record_id)
                 result = self.backend.db.delete_gelir_invoice(record_id)
@@ -536,8 +809,13 @@ class InvoiceManager:
                 return False
 
             if result:
-                if self.backend.on_data_updated:
-                    self.backend.on_data_updated()
+                self.backend.monthly_totals.apply(
+                    self._table(invoice_type),
+                    generation,
+                    removed=[invoice_data] if invoice_data else [],
+                    ids=[record_id],
+                )
+                self._notify_data_updated()
                 return True
             return False
 
@@ -569,6 +847,45 @@ class InvoiceManager:
         logging.warning(f"Geçersiz fatura operasyonu: {operation}")
         return False
 
+    def add_invoices_bulk(self, invoice_type, data_list):
+        """
+        Faturaları toplu ekler: tek transaction ile fatura, tek batch ile geçmiş kaydı.
+
+        Returns:
+            list: Girdi sırasıyla yeni id'ler; işlenemeyen kayıtlar için None.
+        """
+        if invoice_type == "outgoing":
+            add_bulk, history_type = self.backend.db.add_gelir_invoices_bulk, "gelir"
+        elif invoice_type == "incoming":
+            add_bulk, history_type = self.backend.db.add_gider_invoices_bulk, "gider"
+        else:
+            logging.error(f"❌ Geçersiz invoice_type: {invoice_type}")
+            return [None] * len(data_list)
+
+        processed = [self.processor.process_invoice_data(data) for data in data_list]
+        valid = [p for p in processed if p]
+        if not valid:
+            return [None] * len(data_list)
+
+        generation = self.backend.monthly_totals.generation
+        added_ids = add_bulk(valid)
+        self.backend.monthly_totals.apply(
+            self._table(invoice_type), generation, added=valid, ids=added_ids
+        )
+        new_ids = iter(added_ids)
+        ids = [next(new_ids) if p else None for p in processed]
+        logging.info(f"✅ {len(valid)} {history_type.upper()} faturası toplu eklendi")
+
+        try:
+            self._queue_history(
+                [self._history_entry("EKLEME", history_type, p) for p in valid]
+            )
+        except Exception as e:
+            logging.error(f"Toplu geçmiş kaydı ekleme hatası: {e}")
+
+        self._notify_data_updated()
+        return ids
+
     def handle_genel_gider_operation(
         self, operation, data=None, record_id=None, limit=None, offset=None
     ):
@@ -586,70 +903,92 @@ class InvoiceManager:
         return None
 
     def delete_multiple_invoices(self, invoice_type, invoice_ids):
-        """Çoklu fatura silme işlemi - 3 ayrı veritabanı ile."""
+        """
+        Çoklu fatura silme işlemi - 3 ayrı veritabanı ile.
+
+        id'ler SQLite parametre sınırına takılmamak için parçalar halinde,
+        tek transaction (tek commit) içinde silinir.
+        """
         try:
             if invoice_type == "outgoing":
-                deleted_count = self.backend.db.delete_multiple_gelir_invoices(
-                    invoice_ids
-                )
+                delete_many = self.backend.db.delete_multiple_gelir_invoices
             elif invoice_type == "incoming":
-                deleted_count = self.backend.db.delete_multiple_gider_invoices(
-                    invoice_ids
-                )
+                delete_many = self.backend.db.delete_multiple_gider_invoices
             else:
                 return 0
 
+            table = self._table(invoice_type)
+            invoice_ids = list(invoice_ids)
+            deleted_count = 0
+            generation = self.backend.monthly_totals.generation
+            with self.transaction():
+                for start in range(0, len(invoice_ids), self.DELETE_CHUNK_SIZE):
+                    chunk = invoice_ids[start : start + self.DELETE_CHUNK_SIZE]
+                    # Delta için silinecek satırların tarih ve tutarları (aynı transaction'da)
+                    removed = self._delta_rows(table, chunk)
+                    deleted_count += delete_many(chunk)
+                    self.backend.monthly_totals.apply(
+                        table, generation, removed=removed, ids=[r["id"] for r in removed]
+                    )
+
             if deleted_count > 0:
-                if self.backend.on_data_updated:
-                    self.backend.on_data_updated()
+                self._notify_data_updated()
             return deleted_count
         except Exception as e:
             logging.error(f"Çoklu {invoice_type} faturası silme hatası: {e}")
             return 0
 
+    def _history_entry(
+        self, operation_type, invoice_type, invoice_data=None, details=None
+    ):
+        """Geçmiş kaydı için (action, details) çiftini oluşturur."""
+        # İşlem tipine göre detay mesajı oluştur
+        if not details:
+            firma = None
+            amount = None
+            birim = "TL"
+            invoice_date = None
+
+            if invoice_data:
+                invoice_date = invoice_data.get("tarih")
+                firma = invoice_data.get("firma") or invoice_data.get("tur")
+                # MATRAH (KDV hariç) kullan
+                amount = (
+                    invoice_data.get("matrah")
+                    or invoice_data.get("toplam_tutar_tl")
+                    or invoice_data.get("miktar")
+                )
+                birim = invoice_data.get("birim", "TL")
+
+            if operation_type == "EKLEME":
+                details = f"{invoice_type.title()} fatura eklendi"
+            elif operation_type == "GÜNCELLEME":
+                details = f"{invoice_type.title()} fatura güncellendi"
+            elif operation_type == "SİLME":
+                details = f"{invoice_type.title()} fatura silindi"
+            else:
+                details = f"{operation_type} işlemi"
+
+            # Detaylı bilgi ekle
+            if firma:
+                details += f" - Firma: {firma}"
+            if amount:
+                details += f" - Tutar: {amount}|{birim}"  # Birim bilgisi eklendi
+            if invoice_date:
+                details += f" - Tarih: {invoice_date}"
+
+        # Rust modülü sadece action ve details alıyor
+        action = f"{operation_type}_{invoice_type.upper()}"
+        return action, details
+
     def _add_history_record(
         self, operation_type, invoice_type, invoice_data=None, details=None
     ):
         """Fatura işlemlerinde geçmiş kaydı ekler."""
         try:
-            # İşlem tipine göre detay mesajı oluştur
-            if not details:
-                firma = None
-                amount = None
-                birim = "TL"
-                invoice_date = None
-
-                if invoice_data:
-                    invoice_date = invoice_data.get("tarih")
-                    firma = invoice_data.get("firma") or invoice_data.get("tur")
-                    # MATRAH (KDV hariç) kullan
-                    amount = (
-                        invoice_data.get("matrah")
-                        or invoice_data.get("toplam_tutar_tl")
-                        or invoice_data.get("miktar")
-                    )
-                    birim = invoice_data.get("birim", "TL")
-
-                if operation_type == "EKLEME":
-                    details = f"{invoice_type.title()} fatura eklendi"
-                elif operation_type == "GÜNCELLEME":
-                    details = f"{invoice_type.title()} fatura güncellendi"
-                elif operation_type == "SİLME":
-                    details = f"{invoice_type.title()} fatura silindi"
-                else:
-                    details = f"{operation_type} işlemi"
-
-                # Detaylı bilgi ekle
-                if firma:
-                    details += f" - Firma: {firma}"
-                if amount:
-                    details += f" - Tutar: {amount}|{birim}"  # Birim bilgisi eklendi
-                if invoice_date:
-                    details += f" - Tarih: {invoice_date}"
-
-            # Rust modülü sadece action ve details alıyor
-            action = f"{operation_type}_{invoice_type.upper()}"
-            self.backend.db.add_history_record(action, details)
+            self._queue_history(
+                [self._history_entry(operation_type, invoice_type, invoice_data, details)]
+            )
 
         except Exception as e:
             logging.error(f"Geçmiş kaydı ekleme hatası: {e}")
@@ -660,9 +999,200 @@ class InvoiceManager:
 # ============================================================================
 
 
+class PeriodBuckets:
+    """
+    Fatura tutarlarını tek geçişte (yıl, ay) kovalarına toplayan hesap motoru.
+
+    Her kova gelir/gider faturalarının KDV dahil TL ve KDV toplamlarını ve o
+    ayın genel giderini tam sayı kuruş olarak tutar. Satırlar özet
+    tablosundan (add_monthly_totals) ya da ham sütunlardan (add_rows,
+    tarih_gun ile) gelebilir; aylık, çeyreklik ve kümülatif vergi sonuçları
+    aynı kovalardan türetilir.
+    """
+
+    MONTH_KEYS = (
+        "ocak",
+        "subat",
+        "mart",
+        "nisan",
+        "mayis",
+        "haziran",
+        "temmuz",
+        "agustos",
+        "eylul",
+        "ekim",
+        "kasim",
+        "aralik",
+    )
+
+    # Kova alanları: gelir_tl, gelir_kdv, gider_tl, gider_kdv, genel_gider
+    _OFFSETS = {"income": 0, "expense": 2}
+    _EMPTY = (0, 0, 0, 0, 0)
+
+    def __init__(self):
+        # yyyymm → [gelir_tl, gelir_kdv, gider_tl, gider_kdv, genel_gider] (kuruş)
+        self._buckets = {}
+
+    @staticmethod
+    def to_kurus(value):
+        """TL tutarını tam sayı kuruşa çevirir (yarımlar sıfırdan uzağa, SQLite round gibi)."""
+        return PeriodBuckets.round_half_away(float(value or 0) * 100)
+
+    @staticmethod
+    def round_half_away(value):
+        """Kuruş cinsinden ondalıklı değeri en yakın tam sayıya yuvarlar."""
+        return int(value + 0.5) if value >= 0 else -int(-value + 0.5)
+
+    def _bucket(self, year, month):
+        key = year * 100 + month
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [0, 0, 0, 0, 0]
+        return bucket
+
+    # ------------------------------------------------------------------
+    # KOVALARI DOLDURMA
+    # ------------------------------------------------------------------
+
+    def add_rows(self, kind, days, amounts_tl, kdvs):
+        """
+        Ham fatura satırlarını tek geçişte kovalara ekler.
+
+        Args:
+            kind: "income" veya "expense"
+            days: tarih_gun (yyyymmdd) değerleri; 0/None (tarihsiz) satır atlanır
+            amounts_tl: KDV dahil TL tutarları
+            kdvs: KDV tutarları
+        Sütunlar fetch_columns çıktısı (list, array veya ndarray) olabilir.
+        """
+        offset = self._OFFSETS[kind]
+        buckets = self._buckets
+        for day, tl, kdv in zip(_as_list(days), _as_list(amounts_tl), _as_list(kdvs)):
+            if not day:
+                continue
+            key = day // 100
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = [0, 0, 0, 0, 0]
+            # round_half_away satır içinde: çağrı maliyeti milyon satırda belirgin
+            tl = (tl or 0) * 100
+            kdv = (kdv or 0) * 100
+            bucket[offset] += int(tl + 0.5) if tl >= 0 else -int(-tl + 0.5)
+            bucket[offset + 1] += int(kdv + 0.5) if kdv >= 0 else -int(-kdv + 0.5)
+        return self
+
+    def add_monthly_totals(self, kind, rows):
+        """get_monthly_totals(_for_years) satırlarını (ay bazında toplanmış) ekler."""
+        offset = self._OFFSETS[kind]
+        for row in rows or []:
+            if 1 <= row["ay"] <= 12:
+                bucket = self._bucket(row["yil"], row["ay"])
+                bucket[offset] += row["toplam_tutar_tl_kurus"] or 0
+                bucket[offset + 1] += row["kdv_tutari_kurus"] or 0
+        return self
+
+    def add_general_expenses(self, year, monthly):
+        """get_yearly_expenses sözlüğünü (ay adı → TL) yılın kovalarına ekler."""
+        for month, key in enumerate(self.MONTH_KEYS, start=1):
+            amount = self.to_kurus((monthly or {}).get(key, 0))
+            if amount:
+                self._bucket(year, month)[4] += amount
+        return self
+
+    # ------------------------------------------------------------------
+    # TÜRETİLEN SONUÇLAR
+    # ------------------------------------------------------------------
+
+    def years(self):
+        return sorted({key // 100 for key in self._buckets})
+
+    def months(self, year):
+        """Yılın 12 ayı: (gelir_tl, gelir_kdv, gider_tl, gider_kdv, genel_gider) kuruş."""
+        return [
+            tuple(self._buckets.get(year * 100 + month, self._EMPTY))
+            for month in range(1, 13)
+        ]
+
+    def totals(self, year=None):
+        """Bir yılın (None → tüm yılların) kova toplamları, months() ile aynı sırada."""
+        result = [0] * 5
+        for key, bucket in self._buckets.items():
+            if year is None or key // 100 == year:
+                for i, value in enumerate(bucket):
+                    result[i] += value
+        return tuple(result)
+
+    def monthly_results(self, year):
+        """Aylık matrah bazında gelir, gider (genel gider dahil) ve KDV farkı (TL)."""
+        return [
+            {
+                "kesilen": (gelir_tl - gelir_kdv) / 100,  # Kar hesabı için matrah
+                "gelen": (gider_tl - gider_kdv + genel) / 100,  # Genel giderde KDV yok
+                "kdv": (gelir_kdv - gider_kdv) / 100,
+            }
+            for gelir_tl, gelir_kdv, gider_tl, gider_kdv, genel in self.months(year)
+        ]
+
+    def quarterly_results(self, year, tax_rate):
+        """
+        Kümülatif kar üzerinden çeyreklik kurumlar vergisi (tax_rate: 0.22 gibi).
+        Her çeyrekte ödenecek tutar, o ana kadarki vergiden önceki çeyreklerde
+        hesaplanan vergi düşülerek bulunur.
+        """
+        months = self.months(year)
+        results = []
+        cumulative_profit = 0
+        previous_tax = 0
+        for quarter in range(4):
+            for gelir_tl, gelir_kdv, gider_tl, gider_kdv, genel in months[
+                quarter * 3 : quarter * 3 + 3
+            ]:
+                cumulative_profit += (gelir_tl - gelir_kdv) - (gider_tl - gider_kdv + genel)
+
+            tax_for_period = (
+                self.round_half_away(cumulative_profit * tax_rate)
+                if cumulative_profit > 0
+                else 0
+            )
+            payable_tax = tax_for_period - previous_tax
+            previous_tax = tax_for_period
+
+            results.append(
+                {
+                    "kar": cumulative_profit / 100,
+                    "vergi": tax_for_period / 100,
+                    "odenecek_kv": payable_tax / 100 if payable_tax > 0 else 0,
+                }
+            )
+        return results
+
+    def yearly_summary(self, year, tax_rate):
+        """Yıllık matrah bazında gelir, gider, vergi ve net kar (tax_rate: 0.22 gibi)."""
+        gelir_tl, gelir_kdv, gider_tl, gider_kdv, genel = self.totals(year)
+        gelir_matrah = gelir_tl - gelir_kdv
+        toplam_gider_matrah = gider_tl - gider_kdv + genel
+        brut_kar = gelir_matrah - toplam_gider_matrah
+        vergi = self.round_half_away(brut_kar * tax_rate) if brut_kar > 0 else 0
+
+        return {
+            "toplam_gelir": gelir_matrah / 100,
+            "toplam_gider": toplam_gider_matrah / 100,
+            "yillik_kar": (brut_kar - vergi) / 100,  # Net kar
+            "vergi_tutari": vergi / 100,
+            "vergi_yuzdesi": tax_rate * 100,
+        }
+
+
+def _as_list(values):
+    """fetch_columns sütununu (array/ndarray) Python listesine çevirir; hızlı yineleme için."""
+    return values.tolist() if hasattr(values, "tolist") else values
+
+
 class PeriodicIncomeCalculator:
     """Dönemsel gelir, gider ve kar/zarar hesaplamaları yapan sınıf."""
 
+    MONTH_KEYS = list(PeriodBuckets.MONTH_KEYS)
+
     def __init__(self, backend):
         """
         PeriodicIncomeCalculator başlatıcısı.
@@ -672,111 +1202,54 @@ class PeriodicIncomeCalculator:
         """
         self.backend = backend
 
+    def _tax_rate(self):
+        """Kurumlar vergisi oranı (ayar yüzde olarak tutulur; 22 → 0.22)."""
+        tax_rate_raw = self.backend.settings.get("kurumlar_vergisi_yuzdesi", 22.0)
+        return float(tax_rate_raw) / 100.0
+
+    def _invoice_buckets(self, years=None):
+        """Yılların (None → tüm yıllar) aylık fatura toplamları (bellekteki MonthlyTotals)."""
+        engine = PeriodBuckets()
+        for kind, table in (("income", "income_invoices"), ("expense", "expense_invoices")):
+            engine.add_monthly_totals(kind, self.backend.monthly_totals.rows(table, years))
+        return engine
+
+    def buckets(self, years):
+        """Yılların aylık fatura toplamları ve genel giderleriyle doldurulmuş PeriodBuckets."""
+        years = sorted({int(y) for y in years})
+        engine = self._invoice_buckets(years)
+        if len(years) == 1:
+            engine.add_general_expenses(years[0], self.backend.db.get_yearly_expenses(years[0]))
+        else:
+            # Birden fazla yılın genel giderleri tek sorguda
+            for row in self.backend.db.get_all_yearly_expenses() or []:
+                if row["yil"] in years:
+                    engine.add_general_expenses(row["yil"], row)
+        return engine
+
     def get_summary_data(self):
-        """Gelir, gider ve kar/zarar özetini hesaplar - Rust async DB ile."""
+        """Gelir, gider ve kar/zarar özetini hesaplar - tüm yılların aylık kovalarından."""
         try:
-            # Tüm gelirleri al
-            gelir_invoices = self.backend.db.get_all_gelir_invoices(None, None) or []
-            total_revenue_kdv_dahil = sum(
-                inv.get("toplam_tutar_tl", 0) or 0 for inv in gelir_invoices
-            )
-            total_revenue_kdv = sum(
-                inv.get("kdv_tutari", 0) or 0 for inv in gelir_invoices
-            )
-            total_revenue = (
-                total_revenue_kdv_dahil - total_revenue_kdv
-            )  # Matrah (KDV hariç)
-
-            # Tüm giderleri al
-            gider_invoices = self.backend.db.get_all_gider_invoices(None, None) or []
-            invoice_expenses_kdv_dahil = sum(
-                inv.get("toplam_tutar_tl", 0) or 0 for inv in gider_invoices
-            )
-            invoice_expenses_kdv = sum(
-                inv.get("kdv_tutari", 0) or 0 for inv in gider_invoices
-            )
-            invoice_expenses = (
-                invoice_expenses_kdv_dahil - invoice_expenses_kdv
-            )  # Matrah (KDV hariç)
-
-            # Genel giderleri al (yıllık)
             current_year = datetime.now().year
-            yearly_expenses = self.backend.db.get_yearly_expenses(current_year)
-            general_expenses = 0
-            if yearly_expenses:
-                months = [
-                    "ocak",
-                    "subat",
-                    "mart",
-                    "nisan",
-                    "mayis",
-                    "haziran",
-                    "temmuz",
-                    "agustos",
-                    "eylul",
-                    "ekim",
-                    "kasim",
-                    "aralik",
-                ]
-                general_expenses = sum(
-                    yearly_expenses.get(month, 0) or 0 for month in months
-                )
-
-            # Toplam gider
-            total_expense = invoice_expenses + general_expenses
 
-            # Aylık veriler
-            monthly_income = [0] * 12
-            monthly_expenses = [0] * 12
+            # Tüm yılların fatura toplamları; genel giderler yalnızca bu yıl için
+            engine = self._invoice_buckets(None)
+            engine.add_general_expenses(
+                current_year, self.backend.db.get_yearly_expenses(current_year)
+            )
+            gelir_tl, gelir_kdv, gider_tl, gider_kdv, general_expenses = engine.totals()
 
-            # Gelir aylık dağılım
-            for inv in gelir_invoices:
-                try:
-                    tarih = inv.get("tarih", "")
-                    if tarih:
-                        parts = tarih.split(".")
-                        if len(parts) == 3 and parts[2] == str(current_year):
-                            month = int(parts[1]) - 1
-                            if 0 <= month < 12:
-                                monthly_income[month] += (
-                                    inv.get("toplam_tutar_tl", 0) or 0
-                                )
-                except Exception:
-                    continue
+            # Matrah (KDV hariç), kuruştan TL'ye
+            total_revenue = (gelir_tl - gelir_kdv) / 100
+            invoice_expenses = (gider_tl - gider_kdv) / 100
 
-            # Gider aylık dağılım (faturalar)
-            for inv in gider_invoices:
-                try:
-                    tarih = inv.get("tarih", "")
-                    if tarih:
-                        parts = tarih.split(".")
-                        if len(parts) == 3 and parts[2] == str(current_year):
-                            month = int(parts[1]) - 1
-                            if 0 <= month < 12:
-                                monthly_expenses[month] += (
-                                    inv.get("toplam_tutar_tl", 0) or 0
-                                )
-                except Exception:
-                    continue
+            # Toplam gider
+            total_expense = invoice_expenses + general_expenses / 100
 
-            # Genel giderler aylık dağılım
-            if yearly_expenses:
-                months = [
-                    "ocak",
-                    "subat",
-                    "mart",
-                    "nisan",
-                    "mayis",
-                    "haziran",
-                    "temmuz",
-                    "agustos",
-                    "eylul",
-                    "ekim",
-                    "kasim",
-                    "aralik",
-                ]
-                for i, month in enumerate(months):
-                    monthly_expenses[i] += yearly_expenses.get(month, 0) or 0
+            # Aylık veriler (bu yıl, KDV dahil; giderlere genel giderler eklenir)
+            months = engine.months(current_year)
+            monthly_income = [m[0] / 100 for m in months]
+            monthly_expenses = [(m[2] + m[4]) / 100 for m in months]
 
             active_income_months = sum(1 for income in monthly_income if income > 0)
             total_income_this_year = sum(monthly_income)
@@ -807,240 +1280,380 @@ class PeriodicIncomeCalculator:
         }, {"income": monthly_income, "expenses": monthly_expenses}
 
     def get_year_range(self):
-        """Fatura verilerinde bulunan tüm yılların listesini döndürür - Rust async DB ile."""
-        years_set = set()
-        current_year = datetime.now().year
-
-        years_set.add(str(current_year))
+        """Fatura verilerinde bulunan tüm yılların listesini döndürür (indeks üzerinden)."""
+        years_set = {str(datetime.now().year)}
 
         try:
-            # Gelir veritabanından yılları al
-            gelir_invoices = self.backend.db.get_all_gelir_invoices(None, None) or []
-            for inv in gelir_invoices:
-                try:
-                    if "tarih" in inv and inv["tarih"]:
-                        date_obj = datetime.strptime(inv["tarih"], "%d.%m.%Y")
-                        years_set.add(str(date_obj.year))
-                except (ValueError, KeyError):
-                    continue
-
-            # Gider veritabanından yılları al
-            gider_invoices = self.backend.db.get_all_gider_invoices(None, None) or []
-            for inv in gider_invoices:
-                try:
-                    if "tarih" in inv and inv["tarih"]:
-                        date_obj = datetime.strptime(inv["tarih"], "%d.%m.%Y")
-                        years_set.add(str(date_obj.year))
-                except (ValueError, KeyError):
-                    continue
-
-            # Genel gider veritabanından yılları al
-            yearly_expenses_list = self.backend.db.get_all_yearly_expenses() or []
-            for expense_record in yearly_expenses_list:
-                try:
-                    if "yil" in expense_record:
-                        years_set.add(str(expense_record["yil"]))
-                except (ValueError, KeyError):
-                    continue
+            years_set.update(str(y) for y in self.backend.db.get_available_years())
         except Exception as e:
             logging.error(f"Yıl aralığı alma hatası: {e}")
 
         return sorted(list(years_set), reverse=True)
 
     def get_calculations_for_year(self, year):
-        """Belirli bir yıl için aylık ve çeyrek dönem hesaplamaları - Rust async DB ile."""
-        # Vergi oranını güvenli şekilde float'a dönüştür
-        tax_rate_raw = self.backend.settings.get("kurumlar_vergisi_yuzdesi", 22.0)
-        tax_rate = float(tax_rate_raw) / 100.0
-
-        # Tüm faturaları al
-        gelir_invoices = self.backend.db.get_all_gelir_invoices(None, None) or []
-        gider_invoices = self.backend.db.get_all_gider_invoices(None, None) or []
-        yearly_expenses = self.backend.db.get_yearly_expenses(year)
-
-        monthly_results = []
-        months_tr = [
-            "ocak",
-            "subat",
-            "mart",
-            "nisan",
-            "mayis",
-            "haziran",
-            "temmuz",
-            "agustos",
-            "eylul",
-            "ekim",
-            "kasim",
-            "aralik",
-        ]
+        """
+        Belirli bir yıl için aylık ve çeyrek dönem hesaplamaları - PeriodBuckets ile.
 
-        for month in range(1, 13):
-            month_str = f"{month:02d}"
+        Tüm ara toplamlar tam sayı kuruş üzerinden yürür; float'a yalnızca
+        sonuç sözlükleri oluşturulurken çevrilir.
+        """
+        engine = self.buckets([year])
+        return (
+            engine.monthly_results(int(year)),
+            engine.quarterly_results(int(year), self._tax_rate()),
+        )
 
-            # Gelir hesapla - toplam_tutar_tl KDV dahil, kar için matrah hesaplayalım
-            kesilen_kdv_dahil = 0
-            kesilen_kdv = 0
-            for inv in gelir_invoices:
-                try:
-                    tarih = inv.get("tarih", "")
-                    if tarih:
-                        parts = tarih.split(".")
-                        if (
-                            len(parts) == 3
-                            and parts[1] == month_str
-                            and parts[2] == str(year)
-                        ):
-                            kesilen_kdv_dahil += inv.get("toplam_tutar_tl", 0) or 0
-                            kesilen_kdv += inv.get("kdv_tutari", 0) or 0
-                except Exception:
-                    continue
+    def get_calculations_for_years(self, years):
+        """
+        Birden fazla yıl için aylık ve çeyrek dönem hesaplamaları tek geçişte.
 
-            kesilen_matrah = (
-                kesilen_kdv_dahil - kesilen_kdv
-            )  # KDV dahil tutardan matrahı çıkar
+        Returns:
+            dict: yıl → (monthly_results, quarterly_results); get_calculations_for_year
+            ile aynı biçim
+        """
+        engine = self.buckets(years)
+        tax_rate = self._tax_rate()
+        return {
+            year: (engine.monthly_results(year), engine.quarterly_results(year, tax_rate))
+            for year in sorted({int(y) for y in years})
+        }
 
-            # Fatura giderleri hesapla
-            fatura_giderleri_kdv_dahil = 0
-            fatura_gider_kdv = 0
-            for inv in gider_invoices:
-                try:
-                    tarih = inv.get("tarih", "")
-                    if tarih:
-                        parts = tarih.split(".")
-                        if (
-                            len(parts) == 3
-                            and parts[1] == month_str
-                            and parts[2] == str(year)
-                        ):
-                            fatura_giderleri_kdv_dahil += (
-                                inv.get("toplam_tutar_tl", 0) or 0
-                            )
-                            fatura_gider_kdv += inv.get("kdv_tutari", 0) or 0
-                except Exception:
-                    continue
+    def get_yearly_summary(self, year):
+        """Belirli bir yıl için yıllık özet - PeriodBuckets ile (kuruş hassasiyetinde)."""
+        return self.buckets([year]).yearly_summary(int(year), self._tax_rate())
 
-            fatura_giderleri_matrah = fatura_giderleri_kdv_dahil - fatura_gider_kdv
+    def get_year_over_year(self, years):
+        """
+        Yılların yıllık özetleri ve bir önceki yıla göre değişimleri (tek geçişte).
 
-            # Genel giderleri hesapla
-            genel_giderler = 0
-            if yearly_expenses:
-                month_key = months_tr[month - 1]
-                genel_giderler = yearly_expenses.get(month_key, 0) or 0
+        Returns:
+            list: Yıl sırasıyla {"yil", toplam_gelir, toplam_gider, yillik_kar,
+            vergi_tutari, vergi_yuzdesi, "aylik": monthly_results, "degisim"}.
+            degisim ilk yılda None; sonrakilerde her özet alanı ve aylık
+            kesilen/gelen için {"fark", "yuzde"} (önceki değer 0 ise yuzde None).
+        """
+        years = sorted({int(y) for y in years})
+        engine = self.buckets(years)
+        tax_rate = self._tax_rate()
+
+        result = []
+        previous = None
+        for year in years:
+            entry = {"yil": year, **engine.yearly_summary(year, tax_rate)}
+            entry["aylik"] = engine.monthly_results(year)
+            entry["degisim"] = None
+            if previous is not None:
+                entry["degisim"] = {
+                    key: self._change(entry[key], previous[key])
+                    for key in ("toplam_gelir", "toplam_gider", "yillik_kar", "vergi_tutari")
+                }
+                entry["degisim"]["aylik"] = [
+                    {
+                        key: self._change(month[key], prev_month[key])
+                        for key in ("kesilen", "gelen")
+                    }
+                    for month, prev_month in zip(entry["aylik"], previous["aylik"])
+                ]
+            result.append(entry)
+            previous = entry
+        return result
+
+    @staticmethod
+    def _change(current, previous):
+        """İki TL tutarı arasındaki fark ve yüzde değişim."""
+        difference = round(current - previous, 2)
+        return {
+            "fark": difference,
+            "yuzde": round(difference / abs(previous) * 100, 2) if previous else None,
+        }
 
-            # Toplam gider (matrah bazında)
-            toplam_gider_matrah = fatura_giderleri_matrah + genel_giderler
 
-            monthly_results.append(
-                {
-                    "kesilen": kesilen_matrah,  # Kar hesabı için matrah kullanılıyor
-                    "gelen": toplam_gider_matrah,
-                    "kdv": kesilen_kdv - fatura_gider_kdv,  # Genel giderlerde KDV yok
-                }
-            )
+# ============================================================================
+# TOPLAM ÖNBELLEĞİ (Aggregate Cache)
+# ============================================================================
+class AggregateCache:
+    """
+    Dönemsel hesap sonuçları için sürüm damgalı önbellek.
 
-        quarterly_results = []
-        cumulative_profit = 0
-        for quarter in range(4):
-            start_month_idx = quarter * 3
-            end_month_idx = start_month_idx + 3
+    Anahtar (metot, yıl, para birimi, vergi oranı) gibi bir demettir. Her veri
+    değişikliğinde invalidate() sürümü artırır ve kayıtları boşaltır; sürüm
+    değişmeden yapılan tekrar çağrılar veritabanına hiç gitmez. Hesap sürerken
+    sürüm değişirse sonuç saklanmaz (eski veri önbelleğe girmez).
+    """
 
-            period_income = sum(
-                m["kesilen"] for m in monthly_results[start_month_idx:end_month_idx]
-            )
-            period_expense = sum(
-                m["gelen"] for m in monthly_results[start_month_idx:end_month_idx]
-            )
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get_or_compute(self, key, compute):
+        """key için saklı sonucu döndürür; yoksa compute() ile hesaplayıp saklar."""
+        with self._lock:
+            version = self.version
+            if key in self._entries:
+                self.hits += 1
+                # Çağıran sonucu değiştirse de saklı kopya bozulmasın
+                return copy.deepcopy(self._entries[key])
+            self.misses += 1
+
+        value = compute()
+        with self._lock:
+            if self.version == version:
+                self._entries[key] = copy.deepcopy(value)
+        return value
+
+    def get_or_compute_many(self, keys, compute):
+        """
+        Birden fazla anahtarın sonuçları; eksik olanlar tek compute(eksikler)
+        çağrısıyla ({anahtar: sonuç}) hesaplanır. Sonuçlar keys sırasıyla döner.
+        """
+        keys = list(keys)
+        with self._lock:
+            version = self.version
+            found = {k: copy.deepcopy(self._entries[k]) for k in keys if k in self._entries}
+            missing = [k for k in dict.fromkeys(keys) if k not in found]
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            computed = compute(missing)
+            with self._lock:
+                if self.version == version:
+                    for key in missing:
+                        self._entries[key] = copy.deepcopy(computed[key])
+            found.update(computed)
+        return [found[k] for k in keys]
+
+    def invalidate(self):
+        """Veri değişti: sürümü artırır ve tüm kayıtları düşürür."""
+        with self._lock:
+            self.version += 1
+            self.invalidations += 1
+            self._entries.clear()
+
+    def stats(self):
+        """İsabet/ıskalama sayıları, geçersiz kılma sayısı, sürüm ve kayıt adedi."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "version": self.version,
+                "entries": len(self._entries),
+            }
 
-            cumulative_profit += period_income - period_expense
 
-            tax_for_period = (
-                cumulative_profit * tax_rate if cumulative_profit > 0 else 0
-            )
+# ============================================================================
+# BELLEKTEKİ AYLIK TOPLAMLAR (artımlı delta)
+# ============================================================================
+_INVOICE_TABLES = ("income_invoices", "expense_invoices")
 
-            paid_tax_in_previous_quarters = sum(
-                q.get("vergi", 0) for q in quarterly_results
-            )
-            payable_tax = tax_for_period - paid_tax_in_previous_quarters
+# Kovadaki tutar alanları (fatura sütunu); kuruş/sent olarak tutulur
+_DELTA_FIELDS = ("toplam_tutar_tl", "kdv_tutari", "toplam_tutar_usd", "toplam_tutar_eur")
 
-            quarterly_results.append(
-                {
-                    "kar": cumulative_profit,
-                    "vergi": tax_for_period,
-                    "odenecek_kv": payable_tax if payable_tax > 0 else 0,
-                }
-            )
+# Akışta karşılığı beklenen kendi yazmalarımızın üst sınırı (aşılırsa unutulur)
+_MAX_PENDING_CHANGES = 10000
 
-        return monthly_results, quarterly_results
 
-    def get_yearly_summary(self, year):
-        """Belirli bir yıl için yıllık özet - Rust async DB ile."""
+def _minor(value):
+    """Tutarı kuruş/sent tam sayısına çevirir (veritabanındaki _to_minor ile aynı)."""
+    try:
+        return PeriodBuckets.round_half_away(float(value) * 100)
+    except (TypeError, ValueError):
+        return 0
 
-        # Tüm faturaları al
-        gelir_invoices = self.backend.db.get_all_gelir_invoices(None, None) or []
-        gider_invoices = self.backend.db.get_all_gider_invoices(None, None) or []
-        yearly_expenses = self.backend.db.get_yearly_expenses(year)
 
-        # Gelir hesapla (KDV dahil tutardan matrahı çıkar)
-        gelir_kdv_dahil = 0
-        gelir_kdv = 0
-        for inv in gelir_invoices:
-            try:
-                tarih = inv.get("tarih", "")
-                if tarih and tarih.endswith(str(year)):
-                    gelir_kdv_dahil += inv.get("toplam_tutar_tl", 0) or 0
-                    gelir_kdv += inv.get("kdv_tutari", 0) or 0
-            except Exception:
-                continue
+def _year_month(row):
+    """Satırın (yıl, ay) anahtarı (tarih_gun ya da tarih metninden); geçersizse None."""
+    day = row.get("tarih_gun")
+    if day:
+        return day // 10000, day // 100 % 100
+    tarih = row.get("tarih")
+    for fmt in ("%d.%m.%Y", "%Y-%m-%d"):
+        try:
+            parsed = datetime.strptime(str(tarih), fmt)
+            return parsed.year, parsed.month
+        except ValueError:
+            pass
+    return None
 
-        gelir_matrah = gelir_kdv_dahil - gelir_kdv
 
-        # Fatura giderleri hesapla (KDV dahil tutardan matrahı çıkar)
-        fatura_giderleri_kdv_dahil = 0
-        fatura_giderleri_kdv = 0
-        for inv in gider_invoices:
-            try:
-                tarih = inv.get("tarih", "")
-                if tarih and tarih.endswith(str(year)):
-                    fatura_giderleri_kdv_dahil += inv.get("toplam_tutar_tl", 0) or 0
-                    fatura_giderleri_kdv += inv.get("kdv_tutari", 0) or 0
-            except Exception:
-                continue
+class MonthlyTotals:
+    """
+    Fatura tablolarının (yıl, ay) bazlı TL/KDV/USD/EUR toplamlarının bellekteki
+    kopyası. İlk okumada monthly_summary'den bir kez yüklenir; sonrasında
+    InvoiceManager her yazmada eski ve yeni satırın farkını (delta) uygular,
+    özetler, grafikler ve çeyreklik vergi yeniden tarama yapmadan güncel kalır.
+
+    Yükleme ile yazma yarışırsa (yazma sürerken kopya yeniden yüklendiyse)
+    delta uygulanmaz, kopya düşürülür ve bir sonraki okumada yeniden yüklenir.
+    verify() kopyayı veritabanıyla karşılaştırır; kayma varsa kopyayı düşürür.
+    """
 
-        fatura_giderleri_matrah = fatura_giderleri_kdv_dahil - fatura_giderleri_kdv
-
-        # Genel giderleri hesapla
-        genel_giderler = 0
-        if yearly_expenses:
-            months = [
-                "ocak",
-                "subat",
-                "mart",
-                "nisan",
-                "mayis",
-                "haziran",
-                "temmuz",
-                "agustos",
-                "eylul",
-                "ekim",
-                "kasim",
-                "aralik",
-            ]
-            genel_giderler = sum(yearly_expenses.get(month, 0) or 0 for month in months)
-
-        # Toplam gider (matrah bazında)
-        toplam_gider_matrah = fatura_giderleri_matrah + genel_giderler
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        # {tablo: {(yıl, ay): [tl, kdv, usd, eur, adet]}}; None → yüklenmedi
+        self._totals = None
+        # Her yükleme/düşürmede artar; yazma öncesi alınan değerle karşılaştırılır
+        self.generation = 0
+        # (tablo, id) → değişiklik akışında görülmesi beklenen kendi yazmalarımız
+        self._pending = Counter()
+        self.loads = 0
+        self.deltas = 0
+        self.drifts = 0
+
+    # ------------------------------------------------------------------
+    # YÜKLEME VE OKUMA
+    # ------------------------------------------------------------------
+
+    def _read_db(self):
+        totals = {}
+        for table in _INVOICE_TABLES:
+            buckets = totals[table] = {}
+            for row in self.backend.db.get_monthly_totals_for_years(table) or []:
+                buckets[(row["yil"], row["ay"])] = [
+                    row["toplam_tutar_tl_kurus"] or 0,
+                    row["kdv_tutari_kurus"] or 0,
+                    _minor(row["toplam_tutar_usd"]),
+                    _minor(row["toplam_tutar_eur"]),
+                    row["adet"],
+                ]
+        return totals
+
+    def _loaded_locked(self):
+        if self._totals is None:
+            self._totals = self._read_db()
+            self.generation += 1
+            self.loads += 1
+        return self._totals
+
+    def rows(self, table, years=None):
+        """get_monthly_totals_for_years ile aynı biçimde satırlar (yıl, ay sıralı)."""
+        with self._lock:
+            buckets = self._loaded_locked()[table]
+            if years is not None:
+                years = {int(y) for y in years}
+            items = sorted(
+                (key, list(values))
+                for key, values in buckets.items()
+                if years is None or key[0] in years
+            )
+        return [
+            {
+                "yil": year,
+                "ay": month,
+                "toplam_tutar_tl": tl / 100,
+                "kdv_tutari": kdv / 100,
+                "toplam_tutar_usd": usd / 100,
+                "toplam_tutar_eur": eur / 100,
+                "adet": count,
+                "toplam_tutar_tl_kurus": tl,
+                "kdv_tutari_kurus": kdv,
+            }
+            for (year, month), (tl, kdv, usd, eur, count) in items
+        ]
 
-        brut_kar = gelir_matrah - toplam_gider_matrah
+    # ------------------------------------------------------------------
+    # DELTA UYGULAMA
+    # ------------------------------------------------------------------
 
-        # Vergi oranını güvenli şekilde float'a dönüştür
-        tax_rate_raw = self.backend.settings.get("kurumlar_vergisi_yuzdesi", 22.0)
-        tax_rate = float(tax_rate_raw) / 100
-        vergi = brut_kar * tax_rate if brut_kar > 0 else 0
+    def apply(self, table, generation, removed=(), added=(), ids=()):
+        """
+        Bir yazmanın farkını uygular: removed satırları çıkarılır, added eklenir.
 
-        return {
-            "toplam_gelir": gelir_matrah,
-            "toplam_gider": toplam_gider_matrah,
-            "yillik_kar": brut_kar - vergi,  # Net kar
-            "vergi_tutari": vergi,
-            "vergi_yuzdesi": tax_rate * 100,
-        }
+        Args:
+            table: "income_invoices" veya "expense_invoices"
+            generation: Yazmadan önce okunan self.generation
+            removed/added: Fatura satırları (tarih veya tarih_gun ve tutarlar)
+            ids: Yazılan satır id'leri (değişiklik akışında kendi yazmamız sayılır)
+        """
+        with self._lock:
+            for record_id in ids:
+                self._pending[(table, record_id)] += 1
+            if len(self._pending) > _MAX_PENDING_CHANGES:
+                self._pending.clear()
+            if self._totals is None:
+                return
+            if generation != self.generation:
+                # Yazma sürerken kopya yeniden yüklendi: yazmanın dahil olup
+                # olmadığı bilinmez, bir sonraki okumada baştan yüklenir
+                self._drop_locked()
+                return
+            buckets = self._totals[table]
+            for sign, rows in ((-1, removed), (1, added)):
+                for row in rows:
+                    key = _year_month(row)
+                    if key is None:
+                        continue
+                    bucket = buckets.setdefault(key, [0, 0, 0, 0, 0])
+                    for i, field in enumerate(_DELTA_FIELDS):
+                        bucket[i] += sign * _minor(row.get(field))
+                    bucket[4] += sign
+                    if bucket[4] <= 0:
+                        del buckets[key]
+            self.deltas += 1
+
+    def absorb_changes(self, feed):
+        """
+        Değişiklik akışını kendi yazmalarımızla eşleştirir; tanınmayan bir fatura
+        yazması (başka süreç, doğrudan db çağrısı) ya da reset kopyayı düşürür.
+        """
+        with self._lock:
+            if feed.get("reset"):
+                self._drop_locked()
+                return
+            for change in feed.get("changes", ()):
+                if change["table"] not in _INVOICE_TABLES:
+                    continue
+                key = (change["table"], change["id"])
+                if self._pending[key] > 0:
+                    self._pending[key] -= 1
+                    if not self._pending[key]:
+                        del self._pending[key]
+                else:
+                    self._drop_locked()
+                    return
+
+    def invalidate(self):
+        """Kopyayı düşürür; bir sonraki okuma veritabanından yükler."""
+        with self._lock:
+            self._drop_locked()
+
+    def _drop_locked(self):
+        self._totals = None
+        self._pending.clear()
+        self.generation += 1
+
+    # ------------------------------------------------------------------
+    # DOĞRULAMA
+    # ------------------------------------------------------------------
+
+    def verify(self):
+        """
+        Bellekteki toplamları veritabanındaki özetle karşılaştırır. Kayma varsa
+        kopya düşürülür (bir sonraki okuma yeniden yükler).
+
+        Returns:
+            list: Farklı çıkan (tablo, yıl, ay) anahtarları; boşsa tutarlı
+        """
+        with self._lock:
+            if self._totals is None:
+                return []
+            fresh = self._read_db()
+            drift = sorted(
+                (table, year, month)
+                for table in _INVOICE_TABLES
+                for year, month in set(fresh[table]) | set(self._totals[table])
+                if fresh[table].get((year, month)) != self._totals[table].get((year, month))
+            )
+            if drift:
+                self.drifts += 1
+                logging.warning(f"Bellekteki aylık toplamlar kaymış: {len(drift)} ay")
+                self._drop_locked()
+            return drift
@@ -235,6 +235,7 @@ TRANSLATIONS = {
         "restore_error_prefix": "❌ Geri yükleme hatası: {}",
         "pagination_page_of": "Sayfa {} / {}",
         "pagination_records": "{} kayıt",
+        "search_invoices_hint": "Fatura no, firma, malzeme ara",
         "delete_all_confirm_title": "⚠️ Tüm Faturaları Sil",
         "delete_all_confirm_msg": "Bu işlem mevcut türdeki TÜM {} faturayı kalıcı olarak silecek. Emin misiniz?",
         "delete_all_success": "{} fatura başarıyla silindi.",
@@ -553,6 +554,7 @@ TRANSLATIONS = {
         "restore_error_prefix": "❌ Restore error: {}",
         "pagination_page_of": "Page {} / {}",
         "pagination_records": "{} records",
+        "search_invoices_hint": "Search invoice no, company, item",
         "delete_all_confirm_title": "⚠️ Delete All Invoices",
         "delete_all_confirm_msg": "This will permanently delete ALL {} invoices of the current type. Are you sure?",
         "delete_all_success": "{} invoices deleted successfully.",
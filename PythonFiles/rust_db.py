@@ -6,9 +6,22 @@ Aynı API'yi sqlite3 modülü ile gerçekler; veriler diske kalıcı olarak kayd
 """
 
 import os
+import queue
+import re
 import sqlite3
 import threading
+from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
+from array import array
+from pathlib import Path
+
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
 
 
 def _to_iso_date(date_str):
@@ -23,14 +36,21 @@ def _to_iso_date(date_str):
     return date_str
 
 
+def _to_day_number(date_str):
+    """yyyy-mm-dd  →  yyyymmdd tamsayısı; ISO biçiminde değilse None."""
+    if not isinstance(date_str, str) or len(date_str) != 10:
+        return None
+    if date_str[4] != "-" or date_str[7] != "-":
+        return None
+    digits = date_str[:4] + date_str[5:7] + date_str[8:]
+    return int(digits) if digits.isascii() and digits.isdigit() else None
+
+
 def _to_display_date(date_str):
-    """yyyy-mm-dd  →  dd.mm.yyyy"""
-    if not date_str:
-        return date_str
-    try:
-        return datetime.strptime(date_str, "%Y-%m-%d").strftime("%d.%m.%Y")
-    except ValueError:
+    """yyyy-mm-dd  →  dd.mm.yyyy (satır başına strptime yerine dilimleme)"""
+    if _to_day_number(date_str) is None:
         return date_str
+    return f"{date_str[8:]}.{date_str[5:7]}.{date_str[:4]}"
 
 
 def _now_iso():
@@ -44,12 +64,466 @@ _INVOICE_COLS = (
     "kdv_dahil", "usd_rate", "eur_rate", "updated_at", "created_at",
 )
 
+# Sütunsal okumada sayısal dönen sütunlar (array typecode); NULL değerler 0 olur
+_NUMERIC_COLS = {
+    "id": "q",
+    "kdv_dahil": "q",
+    "matrah": "d",
+    "toplam_tutar_tl": "d",
+    "toplam_tutar_usd": "d",
+    "toplam_tutar_eur": "d",
+    "kdv_yuzdesi": "d",
+    "kdv_tutari": "d",
+    "usd_rate": "d",
+    "eur_rate": "d",
+    "tarih_gun": "q",
+    "yil": "q",
+    "ay": "q",
+}
+
+# Sütunsal okumada tarih_gun (yyyymmdd) üzerinden SQL'de hesaplanan tarih sütunları
+_DAY_NUMBER_COLS = {
+    "tarih_gun": "tarih_gun",
+    "yil": "tarih_gun / 10000",
+    "ay": "tarih_gun / 100 % 100",
+}
+
+# Para sütunlarının tamsayı kuruş/sent karşılıkları (REAL sütunların yanında tutulur)
+_MINOR_COLS = (
+    ("matrah", "matrah_kurus"),
+    ("toplam_tutar_tl", "toplam_tutar_tl_kurus"),
+    ("toplam_tutar_usd", "toplam_tutar_usd_cent"),
+    ("toplam_tutar_eur", "toplam_tutar_eur_cent"),
+    ("kdv_tutari", "kdv_tutari_kurus"),
+)
+
+# Yazarken tutarlardan ve tarihten türetilen sütunlar (kuruşlar + tarih_gun)
+_DERIVED_COLS = tuple(minor for _, minor in _MINOR_COLS) + ("tarih_gun",)
+_DERIVED_COLUMNS = ", ".join(_DERIVED_COLS)
+_DERIVED_ASSIGNMENTS = ", ".join(f"{col}=?" for col in _DERIVED_COLS)
+
+
+def _to_minor(value):
+    """
+    Tutarı kuruş/sent cinsinden tamsayıya çevirir. Yuvarlama SQLite'ın
+    round(x * 100) ifadesiyle aynıdır (yarım sıfırdan uzağa), böylece göçle
+    doldurulan ve yazılırken hesaplanan değerler birebir tutar.
+    """
+    if value is None:
+        return None
+    try:
+        scaled = float(value) * 100
+    except (TypeError, ValueError):
+        return None
+    return int(scaled + 0.5) if scaled >= 0 else -int(-scaled + 0.5)
+
+
+def _from_minor(value):
+    return (value or 0) / 100
+
+
 _MONTH_COLS = (
     "ocak", "subat", "mart", "nisan", "mayis", "haziran",
     "temmuz", "agustos", "eylul", "ekim", "kasim", "aralik",
 )
 
 
+_INVOICE_TABLES = ("income_invoices", "expense_invoices")
+
+# IN (...) listesi başına en fazla bu kadar parametre (SQLite değişken sınırının altında)
+_FATURA_NO_CHUNK = 400
+
+# Bir tablodaki yıllar için "skip-scan": her adımda tarih indeksinde bir sonraki
+# yılın başına atlanır (yıl sayısı × log N); tüm satırlar taranmaz.
+_YEAR_SKIP_SCAN = (
+    "{name}(y) AS ("
+    "SELECT (SELECT CAST(substr(MIN(tarih),1,4) AS INTEGER) FROM {table} "
+    "WHERE tarih >= '0000-01-01' AND tarih GLOB '[0-9][0-9][0-9][0-9]-*') "
+    "UNION ALL "
+    "SELECT (SELECT CAST(substr(MIN(tarih),1,4) AS INTEGER) FROM {table} "
+    "WHERE tarih >= printf('%04d-01-01', y + 1) AND tarih GLOB '[0-9][0-9][0-9][0-9]-*') "
+    "FROM {name} WHERE y IS NOT NULL)"
+)
+
+_AVAILABLE_YEARS_QUERY = (
+    "WITH RECURSIVE "
+    + _YEAR_SKIP_SCAN.format(name="income_years", table="income_invoices")
+    + ", "
+    + _YEAR_SKIP_SCAN.format(name="expense_years", table="expense_invoices")
+    + " SELECT y FROM income_years WHERE y IS NOT NULL"
+    " UNION SELECT y FROM expense_years WHERE y IS NOT NULL"
+    " UNION SELECT yil FROM general_expenses WHERE yil IS NOT NULL AND ("
+    + " OR ".join(f"{m} > 0" for m in _MONTH_COLS)
+    + ") ORDER BY 1"
+)
+
+_MONTHLY_TOTALS_SELECT = (
+    "SELECT year, month, sum_tl_kurus, sum_kdv_kurus, sum_usd_cent, sum_eur_cent, count "
+)
+
+
+# ----------------------------------------------------------------------
+# AYLIK ÖZET TABLOSU (monthly_summary)
+# Fatura tablolarındaki tetikleyiciler her INSERT/UPDATE/DELETE'te ilgili
+# (tablo, yıl, ay) satırını günceller; dashboard toplamları ham faturalar
+# taranmadan en fazla 24 satırdan okunur. Yalnızca ISO tarihli satırlar sayılır.
+# Toplamlar tamsayı kuruş/sent sütunlarından tutulur; yuvarlama kayması olmaz.
+# ----------------------------------------------------------------------
+
+_ISO_DATE_GLOB = "'[0-9][0-9][0-9][0-9]-[0-9][0-9]-*'"
+
+# (özet sütunu, fatura tablosundaki tamsayı kaynak sütun)
+_SUMMARY_SUMS = (
+    ("sum_tl_kurus", "toplam_tutar_tl_kurus"),
+    ("sum_usd_cent", "toplam_tutar_usd_cent"),
+    ("sum_eur_cent", "toplam_tutar_eur_cent"),
+    ("sum_kdv_kurus", "kdv_tutari_kurus"),
+)
+
+_SUMMARY_COLUMNS = ", ".join(col for col, _ in _SUMMARY_SUMS)
+
+_CREATE_MONTHLY_SUMMARY = (
+    "CREATE TABLE IF NOT EXISTS monthly_summary ("
+    "table_name TEXT NOT NULL, year INTEGER NOT NULL, month INTEGER NOT NULL, "
+    + "".join(f"{col} INTEGER NOT NULL DEFAULT 0, " for col, _ in _SUMMARY_SUMS)
+    + "count INTEGER NOT NULL DEFAULT 0, "
+    "PRIMARY KEY (table_name, year, month)) WITHOUT ROWID"
+)
+
+
+def _summary_key(table, row):
+    return (
+        f"{row}.tarih GLOB {_ISO_DATE_GLOB} AND table_name = '{table}' "
+        f"AND year = CAST(substr({row}.tarih,1,4) AS INTEGER) "
+        f"AND month = CAST(substr({row}.tarih,6,2) AS INTEGER)"
+    )
+
+
+def _summary_add(table, row):
+    """Satırın tutarlarını ayının özetine ekleyen ifade (row: NEW)."""
+    return (
+        "INSERT INTO monthly_summary"
+        f"(table_name, year, month, {_SUMMARY_COLUMNS}, count) "
+        f"SELECT '{table}', CAST(substr({row}.tarih,1,4) AS INTEGER), "
+        f"CAST(substr({row}.tarih,6,2) AS INTEGER), "
+        + ", ".join(f"COALESCE({row}.{src},0)" for _, src in _SUMMARY_SUMS)
+        + f", 1 WHERE {row}.tarih GLOB {_ISO_DATE_GLOB} "
+        "ON CONFLICT(table_name, year, month) DO UPDATE SET "
+        + ", ".join(f"{col} = {col} + excluded.{col}" for col, _ in _SUMMARY_SUMS)
+        + ", count = count + 1;"
+    )
+
+
+def _summary_subtract(table, row):
+    """Satırın tutarlarını ayının özetinden düşen ifadeler (row: OLD)."""
+    return (
+        "UPDATE monthly_summary SET "
+        + "".join(f"{col} = {col} - COALESCE({row}.{src},0), " for col, src in _SUMMARY_SUMS)
+        + f"count = count - 1 WHERE {_summary_key(table, row)}; "
+        f"DELETE FROM monthly_summary WHERE {_summary_key(table, row)} AND count <= 0;"
+    )
+
+
+def _summary_triggers(table):
+    return (
+        f"CREATE TRIGGER IF NOT EXISTS trg_{table}_summary_insert "
+        f"AFTER INSERT ON {table} BEGIN {_summary_add(table, 'NEW')} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{table}_summary_delete "
+        f"AFTER DELETE ON {table} BEGIN {_summary_subtract(table, 'OLD')} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{table}_summary_update "
+        "AFTER UPDATE OF tarih, "
+        + ", ".join(src for _, src in _SUMMARY_SUMS)
+        + f" ON {table} BEGIN "
+        f"{_summary_subtract(table, 'OLD')} {_summary_add(table, 'NEW')} END",
+    )
+
+
+def _summary_source(table):
+    """Ham faturalardan (tablo, yıl, ay) toplamları; özetle aynı sütun sırası."""
+    return (
+        f"SELECT '{table}' AS table_name, "
+        "CAST(substr(tarih,1,4) AS INTEGER) AS year, "
+        "CAST(substr(tarih,6,2) AS INTEGER) AS month, "
+        + "".join(f"COALESCE(SUM({src}),0) AS {col}, " for col, src in _SUMMARY_SUMS)
+        + f"COUNT(*) AS count FROM {table} WHERE tarih GLOB {_ISO_DATE_GLOB} "
+        "GROUP BY 2, 3"
+    )
+
+
+_REBUILD_MONTHLY_SUMMARY = ("DELETE FROM monthly_summary",) + tuple(
+    f"INSERT INTO monthly_summary(table_name, year, month, {_SUMMARY_COLUMNS}, count) "
+    + _summary_source(t)
+    for t in _INVOICE_TABLES
+)
+
+_SUMMARY_FIELDS = ("count",) + tuple(col for col, _ in _SUMMARY_SUMS)
+
+# Özetle ham toplamları karşılaştırır; yalnızca tutarsız (tablo, yıl, ay) döner.
+# Toplamlar tamsayı olduğu için karşılaştırma birebirdir.
+_CHECK_MONTHLY_SUMMARY = (
+    "WITH raw AS ("
+    + " UNION ALL ".join(_summary_source(t) for t in _INVOICE_TABLES)
+    + "), keys AS (SELECT table_name, year, month FROM raw "
+    "UNION SELECT table_name, year, month FROM monthly_summary) "
+    "SELECT k.table_name, k.year, k.month, "
+    + ", ".join(f"COALESCE(r.{f},0), COALESCE(s.{f},0)" for f in _SUMMARY_FIELDS)
+    + " FROM keys k "
+    "LEFT JOIN raw r ON r.table_name = k.table_name AND r.year = k.year AND r.month = k.month "
+    "LEFT JOIN monthly_summary s ON s.table_name = k.table_name AND s.year = k.year "
+    "AND s.month = k.month WHERE "
+    + " OR ".join(f"COALESCE(r.{f},0) != COALESCE(s.{f},0)" for f in _SUMMARY_FIELDS)
+    + " ORDER BY 1, 2, 3"
+)
+
+
+def _minor_unit_statements(table):
+    """REAL tutarlardan kuruş/sent sütunlarını doldurur (göç v4)."""
+    return (
+        f"UPDATE {table} SET "
+        + ", ".join(
+            f"{minor} = CAST(round({col} * 100) AS INTEGER)" for col, minor in _MINOR_COLS
+        ),
+    )
+
+
+def _day_number_statements(table):
+    """ISO tarihlerden tarih_gun (yyyymmdd) sütununu doldurur ve indeksler (göç v5)."""
+    return (
+        f"UPDATE {table} SET tarih_gun = CAST(substr(tarih,1,4) || substr(tarih,6,2) "
+        f"|| substr(tarih,9,2) AS INTEGER) "
+        f"WHERE tarih GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'",
+        f"CREATE INDEX IF NOT EXISTS idx_{table}_tarih_gun ON {table}(tarih_gun)",
+    )
+
+
+# Özet tablosu REAL toplamlardan tamsayı toplamlara geçer: eski tablo ve
+# tetikleyiciler kaldırılıp yeniden kurulur.
+_MONTHLY_SUMMARY_TO_MINOR = tuple(
+    f"DROP TRIGGER IF EXISTS trg_{t}_summary_{op}"
+    for t in _INVOICE_TABLES
+    for op in ("insert", "delete", "update")
+) + ("DROP TABLE IF EXISTS monthly_summary", _CREATE_MONTHLY_SUMMARY)
+
+# ----------------------------------------------------------------------
+# TAM METİN ARAMA (FTS5)
+# Her fatura tablosunun aranan sütunları, rowid = fatura id olacak şekilde
+# {tablo}_fts tablosunda tutulur ve tetikleyicilerle eşitlenir. unicode61
+# büyük/küçük harfi ve aksanları katlar (İ→i, Ş→s, Ğ→g ...); ayrıştırması
+# olmayan 'ı' hem indekslenirken hem sorguda 'i'ye çevrilir.
+# ----------------------------------------------------------------------
+
+_FTS_COLS = ("firma", "malzeme", "fatura_no", "miktar")
+
+# bm25 sütun ağırlıkları (_FTS_COLS sırasıyla); fatura no eşleşmesi en güçlüsü
+_FTS_WEIGHTS = "2.0, 1.0, 4.0, 0.5"
+
+_FTS_TOKEN = re.compile(r"\w+")
+
+
+def _fts_folded(row):
+    return ", ".join(f"replace({row}{c}, 'ı', 'i')" for c in _FTS_COLS)
+
+
+def _fts_statements(table):
+    fts = f"{table}_fts"
+    cols = ", ".join(_FTS_COLS)
+    assignments = ", ".join(f"{c} = replace(NEW.{c}, 'ı', 'i')" for c in _FTS_COLS)
+    return (
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{cols}, tokenize = 'unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_insert AFTER INSERT ON {table} "
+        f"BEGIN INSERT INTO {fts}(rowid, {cols}) VALUES (NEW.id, {_fts_folded('NEW.')}); END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_delete AFTER DELETE ON {table} "
+        f"BEGIN DELETE FROM {fts} WHERE rowid = OLD.id; END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_update AFTER UPDATE OF {cols} "
+        f"ON {table} BEGIN UPDATE {fts} SET {assignments} WHERE rowid = NEW.id; END",
+        # Mevcut faturaları indeksle
+        f"DELETE FROM {fts}",
+        f"INSERT INTO {fts}(rowid, {cols}) SELECT id, {_fts_folded('')} FROM {table}",
+    )
+
+
+def _fts_match_query(text):
+    """Kullanıcı metnini önek eşleşmeli, sözdizimi hatası vermeyen FTS5 ifadesine çevirir."""
+    tokens = _FTS_TOKEN.findall((text or "").replace("ı", "i"))
+    return " ".join(f'"{t}"*' for t in tokens)
+
+# ----------------------------------------------------------------------
+# DEĞİŞİKLİK AKIŞI
+# invoices.db tablolarındaki her yazma tetikleyicilerle changes tablosuna
+# artan sıra numarasıyla (seq) kaydedilir. Arayüz changes_since(seq) ile
+# yalnızca değişen satırları alır; başka süreçlerin yazmaları da görünür.
+# ----------------------------------------------------------------------
+
+_CHANGE_TABLES = _INVOICE_TABLES + ("general_expenses", "corporate_tax")
+
+# Tabloda tutulan kayıt sayısı; daha eski bir seq soran istemci baştan yükler
+_CHANGES_KEEP = 10000
+
+_CREATE_CHANGES = (
+    "CREATE TABLE IF NOT EXISTS changes ("
+    "seq INTEGER PRIMARY KEY, tbl TEXT NOT NULL, op TEXT NOT NULL, row_id INTEGER NOT NULL)",
+    # Her 1000 kayıtta bir eskiler budanır
+    "CREATE TRIGGER IF NOT EXISTS trg_changes_prune AFTER INSERT ON changes "
+    f"WHEN NEW.seq % 1000 = 0 BEGIN DELETE FROM changes WHERE seq <= NEW.seq - {_CHANGES_KEEP}; END",
+)
+
+
+def _change_triggers(table):
+    return tuple(
+        f"CREATE TRIGGER IF NOT EXISTS trg_{table}_changes_{op} AFTER {op.upper()} ON {table} "
+        f"BEGIN INSERT INTO changes(tbl, op, row_id) VALUES ('{table}', '{op}', {row}.id); END"
+        for op, row in (("insert", "NEW"), ("update", "NEW"), ("delete", "OLD"))
+    )
+
+
+# ----------------------------------------------------------------------
+# ŞEMA GÖÇLERİ (PRAGMA user_version ile sürümlenir)
+# Her kayıt: (hedef sürüm, SQL ifadeleri). Yeni göç her zaman listenin sonuna
+# eklenir; uygulanmış sürümler tekrar çalıştırılmaz.
+# ----------------------------------------------------------------------
+
+_INVOICES_MIGRATIONS = (
+    (
+        1,
+        (
+            "CREATE INDEX IF NOT EXISTS idx_income_invoices_tarih ON income_invoices(tarih)",
+            "CREATE INDEX IF NOT EXISTS idx_expense_invoices_tarih ON expense_invoices(tarih)",
+            "CREATE INDEX IF NOT EXISTS idx_income_invoices_fatura_no ON income_invoices(fatura_no)",
+            "CREATE INDEX IF NOT EXISTS idx_expense_invoices_fatura_no ON expense_invoices(fatura_no)",
+            "CREATE INDEX IF NOT EXISTS idx_income_invoices_firma ON income_invoices(firma)",
+            "CREATE INDEX IF NOT EXISTS idx_expense_invoices_firma ON expense_invoices(firma)",
+            "CREATE INDEX IF NOT EXISTS idx_general_expenses_yil ON general_expenses(yil)",
+        ),
+    ),
+    (
+        2,
+        (_CREATE_MONTHLY_SUMMARY,)
+        + _summary_triggers("income_invoices")
+        + _summary_triggers("expense_invoices")
+        + _REBUILD_MONTHLY_SUMMARY,
+    ),
+    (3, _fts_statements("income_invoices") + _fts_statements("expense_invoices")),
+    (
+        4,
+        _minor_unit_statements("income_invoices")
+        + _minor_unit_statements("expense_invoices")
+        + _MONTHLY_SUMMARY_TO_MINOR
+        + _summary_triggers("income_invoices")
+        + _summary_triggers("expense_invoices")
+        + _REBUILD_MONTHLY_SUMMARY,
+    ),
+    (5, _day_number_statements("income_invoices") + _day_number_statements("expense_invoices")),
+    (6, _CREATE_CHANGES + tuple(s for t in _CHANGE_TABLES for s in _change_triggers(t))),
+)
+
+# settings/exchange_rates birincil anahtar üzerinden sorgulanır; ek indeks yok.
+_SETTINGS_MIGRATIONS = ()
+
+_HISTORY_MIGRATIONS = (
+    (
+        1,
+        ("CREATE INDEX IF NOT EXISTS idx_history_timestamp ON history(timestamp)",),
+    ),
+)
+
+
+def _apply_migrations(con, migrations):
+    """Bekleyen göçleri sırayla, her biri tek transaction içinde uygular."""
+    version = con.execute("PRAGMA user_version").fetchone()[0]
+    for target, statements in migrations:
+        if target <= version:
+            continue
+        con.execute("BEGIN")
+        try:
+            for stmt in statements:
+                con.execute(stmt)
+            con.execute(f"PRAGMA user_version = {int(target)}")
+            con.commit()
+        except Exception:
+            con.rollback()
+            raise
+        version = target
+    return version
+
+
+def _check_invoice_table(table):
+    if table not in _INVOICE_TABLES:
+        raise ValueError(f"Geçersiz fatura tablosu: {table}")
+    return table
+
+
+def _row_to_monthly_total(row):
+    return {
+        "yil": row[0],
+        "ay": row[1],
+        "toplam_tutar_tl": _from_minor(row[2]),
+        "kdv_tutari": _from_minor(row[3]),
+        "toplam_tutar_usd": _from_minor(row[4]),
+        "toplam_tutar_eur": _from_minor(row[5]),
+        "adet": row[6],
+        # Kesin hesaplar (ör. kurumlar vergisi) için tamsayı kuruş toplamları
+        "toplam_tutar_tl_kurus": row[2],
+        "kdv_tutari_kurus": row[3],
+    }
+
+
+# ----------------------------------------------------------------------
+# KEYSET (SEEK) SAYFALAMA
+# Sıralama anahtarı (tarih, id) ya da yalnızca id'dir. NULL tarihler en küçük
+# kabul edilir. Her sayfa, indeks üzerinde aralık araması yapan sıralı
+# "segment" sorgularıyla okunur; OFFSET kullanılmaz.
+# ----------------------------------------------------------------------
+
+_PAGE_ORDERS = {
+    "id DESC": ("id", False),
+    "id ASC": ("id", True),
+    "tarih DESC": ("tarih", False),
+    "tarih ASC": ("tarih", True),
+}
+
+
+def _encode_cursor(invoice_id, tarih):
+    """Sayfa imleci: 'id' (tarih NULL) veya 'id|yyyy-mm-dd'."""
+    return str(invoice_id) if tarih is None else f"{invoice_id}|{tarih}"
+
+
+def _decode_cursor(cursor):
+    if cursor is None:
+        return None
+    invoice_id, sep, tarih = str(cursor).partition("|")
+    try:
+        return int(invoice_id), (tarih if sep else None)
+    except ValueError:
+        raise ValueError(f"Geçersiz sayfa imleci: {cursor}") from None
+
+
+def _page_segments(key, ascending, cursor):
+    """İmlecin ardından gelen satırlar için (koşul, parametreler, sıralama) listesi."""
+    direction = "ASC" if ascending else "DESC"
+    op = ">" if ascending else "<"
+    by_id = f"id {direction}"
+    if key == "id":
+        if cursor is None:
+            return [("1", (), by_id)]
+        return [(f"id {op} ?", (cursor[0],), by_id)]
+
+    by_date = f"tarih {direction}, id {direction}"
+    nulls = ("tarih IS NULL", (), by_id)
+    non_nulls = ("tarih IS NOT NULL", (), by_date)
+    if cursor is None:
+        return [nulls, non_nulls] if ascending else [non_nulls, nulls]
+
+    cursor_id, cursor_tarih = cursor
+    if cursor_tarih is None:
+        same = (f"tarih IS NULL AND id {op} ?", (cursor_id,), by_id)
+        return [same, non_nulls] if ascending else [same]
+
+    same = (f"tarih = ? AND id {op} ?", (cursor_tarih, cursor_id), by_id)
+    rest = (f"tarih {op} ?", (cursor_tarih,), by_date)
+    return [same, rest] if ascending else [same, rest, nulls]
+
+
 def _row_to_invoice(row):
     if row is None:
         return None
@@ -65,36 +539,331 @@ def _row_to_expense(row):
     return dict(zip(cols, row))
 
 
+_DB_FILES = {
+    "invoices": "invoices.db",
+    "settings": "settings.db",
+    "history": "history.db",
+}
+
+# Kilitli veritabanında hata vermeden önce beklenecek süre
+_BUSY_TIMEOUT_MS = 5000
+
+# Veritabanı başına en fazla bu kadar salt-okunur bağlantı
+_READER_POOL_SIZE = 4
+
+
+def _connect(path, **kwargs):
+    con = sqlite3.connect(
+        path, timeout=_BUSY_TIMEOUT_MS / 1000, check_same_thread=False, **kwargs
+    )
+    con.execute(f"PRAGMA busy_timeout={_BUSY_TIMEOUT_MS}")
+    return con
+
+
 class Database:
     def __init__(self):
-        self._lock = threading.Lock()
+        # Yazma işlemleri tek yazıcı bağlantısı üzerinden bu kilitle sıralanır;
+        # okumalar WAL sayesinde havuzdaki salt-okunur bağlantılardan kilitsiz yapılır.
+        # Açık bir transaction() kilidi blok boyunca tuttuğu için kilit yeniden girilebilir.
+        self._lock = threading.RLock()
+        # İç içe transaction derinliği; yalnızca kilidi tutan iş parçacığı değiştirir
+        self._tx_depth = 0
         self._invoices_con = None
         self._settings_con = None
         self._history_con = None
+        self._db_paths = {}
+        self._pool_lock = threading.Lock()
+        self._read_pools = {}
+        self._reader_counts = {}
+        # Fatura sayıları yazma işlemlerinde güncellenen önbellekten okunur
+        self._counts = {}
+        # Fatura satırları için kayıt tipi (ör. invoices.Invoice); None → dict
+        self.row_factory = None
+        # snapshot() bloğundaki iş parçacığının sabitlenmiş okuma bağlantısı
+        self._snapshot_local = threading.local()
+        # data_version() için ayrılmış bağlantı; sayaç bağlantıya özeldir
+        self._watch_con = None
+        self._watch_lock = threading.Lock()
 
     # ------------------------------------------------------------------
     # BAĞLANTI & TABLO
     # ------------------------------------------------------------------
 
     def init_connections(self):
+        self._counts = {}
         db_dir = os.path.join(os.getcwd(), "Database")
         os.makedirs(db_dir, exist_ok=True)
 
-        self._invoices_con = sqlite3.connect(
-            os.path.join(db_dir, "invoices.db"), check_same_thread=False
-        )
+        self._db_paths = {
+            name: os.path.join(db_dir, file) for name, file in _DB_FILES.items()
+        }
+
+        self._invoices_con = _connect(self._db_paths["invoices"])
         self._invoices_con.execute("PRAGMA journal_mode=WAL")
 
-        self._settings_con = sqlite3.connect(
-            os.path.join(db_dir, "settings.db"), check_same_thread=False
-        )
+        self._settings_con = _connect(self._db_paths["settings"])
         self._settings_con.execute("PRAGMA journal_mode=WAL")
 
-        self._history_con = sqlite3.connect(
-            os.path.join(db_dir, "history.db"), check_same_thread=False
-        )
+        self._history_con = _connect(self._db_paths["history"])
         self._history_con.execute("PRAGMA journal_mode=WAL")
 
+        # Eski okuyucu havuzlarını bırak; yeni bağlantılar yeni dosyaları görür
+        with self._pool_lock:
+            old_pools = self._read_pools
+            self._read_pools = {name: queue.LifoQueue() for name in _DB_FILES}
+            self._reader_counts = {name: 0 for name in _DB_FILES}
+        for pool in old_pools.values():
+            while not pool.empty():
+                pool.get_nowait().close()
+
+        with self._watch_lock:
+            if self._watch_con is not None:
+                self._watch_con.close()
+            self._watch_con = self._open_reader("invoices")
+
+    def _make_invoice(self, row):
+        if row is None:
+            return None
+        if self.row_factory is not None:
+            return self.row_factory(row)
+        return _row_to_invoice(row)
+
+    # ------------------------------------------------------------------
+    # OKUYUCU BAĞLANTI HAVUZU
+    # ------------------------------------------------------------------
+
+    def _open_reader(self, name):
+        uri = Path(self._db_paths[name]).as_uri() + "?mode=ro"
+        return _connect(uri, uri=True, isolation_level=None)
+
+    def _acquire_reader(self, name):
+        while True:
+            pool = self._read_pools[name]
+            try:
+                return pool, pool.get_nowait()
+            except queue.Empty:
+                pass
+            with self._pool_lock:
+                if pool is self._read_pools[name] and (
+                    self._reader_counts[name] < _READER_POOL_SIZE
+                ):
+                    self._reader_counts[name] += 1
+                    return pool, self._open_reader(name)
+            # Havuz dolu: bir bağlantının geri gelmesini bekle (havuz yenilenmiş
+            # olabileceği için kısa aralıklarla yeniden dene)
+            try:
+                return pool, pool.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+    @contextmanager
+    def _reading(self, name):
+        """
+        Havuzdan salt-okunur bağlantı verir. Blok tek bir okuma transaction'ı
+        içinde çalışır (tutarlı anlık görüntü) ve yazıcı kilidini beklemez.
+        """
+        pinned = self._snapshot_con(name)
+        if pinned is not None:
+            # snapshot() bloğu içinde: okumalar bloğun görüntüsünü paylaşır
+            yield pinned
+            return
+        pool, con = self._acquire_reader(name)
+        try:
+            con.execute("BEGIN")
+            try:
+                yield con
+            finally:
+                con.execute("COMMIT")
+        finally:
+            self._release_reader(name, pool, con)
+
+    def _release_reader(self, name, pool, con):
+        if pool is self._read_pools.get(name):
+            pool.put(con)
+        else:
+            con.close()
+
+    # ------------------------------------------------------------------
+    # ANLIK GÖRÜNTÜ (uzun raporlar ve dışa aktarmalar)
+    # ------------------------------------------------------------------
+
+    def _snapshot_con(self, name):
+        cons = getattr(self._snapshot_local, "cons", None)
+        return cons.get(name) if cons else None
+
+    @contextmanager
+    def snapshot(self):
+        """
+        with db.snapshot(): bloğu boyunca bu iş parçacığının fatura okumaları
+        (faturalar, genel giderler, özetler) tek bir okuma transaction'ından
+        yapılır ve aynı ana ait tutarlı görüntüyü görür. Ayrı salt-okunur
+        bağlantı kullanıldığı için WAL altında yazıcıyı bekletmez; blok
+        sürerken yapılan yazmalar blok bitince görünür. İç içe bloklar
+        dıştakinin görüntüsünü paylaşır.
+        """
+        if self._snapshot_con("invoices") is not None:
+            yield self
+            return
+        pool, con = self._acquire_reader("invoices")
+        try:
+            con.execute("BEGIN")
+            # İlk okuma WAL görüntüsünü sabitler
+            con.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()
+            self._snapshot_local.cons = {"invoices": con}
+            try:
+                yield self
+            finally:
+                self._snapshot_local.cons = None
+                con.execute("COMMIT")
+        finally:
+            self._release_reader("invoices", pool, con)
+
+    # ------------------------------------------------------------------
+    # DEĞİŞİKLİK AKIŞI
+    # ------------------------------------------------------------------
+
+    def data_version(self):
+        """
+        invoices.db'nin PRAGMA data_version değeri. Başka bir bağlantı (bu
+        nesnenin yazıcısı ya da başka bir süreç) commit ettiğinde değişir;
+        değişmediyse changes_since çağırmaya gerek yoktur.
+        """
+        with self._watch_lock:
+            return self._watch_con.execute("PRAGMA data_version").fetchone()[0]
+
+    def latest_change_seq(self):
+        with self._reading("invoices") as con:
+            return con.execute("SELECT MAX(seq) FROM changes").fetchone()[0] or 0
+
+    def changes_since(self, seq):
+        """
+        seq'ten sonraki yazmalar: {"seq": son sıra no, "reset": bool,
+        "changes": [{"seq", "table", "op", "id"}, ...]}. reset True ise
+        istenen kayıtlar budanmış ya da veritabanı değişmiştir (geri yükleme);
+        istemci baştan yüklemelidir.
+        """
+        with self._reading("invoices") as con:
+            oldest, latest = con.execute("SELECT MIN(seq), MAX(seq) FROM changes").fetchone()
+            latest = latest or 0
+            if seq > latest or (oldest is not None and seq < oldest - 1):
+                return {"seq": latest, "reset": True, "changes": []}
+            rows = con.execute(
+                "SELECT seq, tbl, op, row_id FROM changes WHERE seq > ? ORDER BY seq", (seq,)
+            ).fetchall()
+        return {
+            "seq": latest,
+            "reset": False,
+            "changes": [
+                {"seq": s, "table": tbl, "op": op, "id": row_id} for s, tbl, op, row_id in rows
+            ],
+        }
+
+    # ------------------------------------------------------------------
+    # TRANSACTION
+    # ------------------------------------------------------------------
+
+    def _writer_cons(self):
+        return (self._invoices_con, self._settings_con, self._history_con)
+
+    def begin(self):
+        """
+        Yazma transaction'ı başlatır. commit() çağrılana kadar yazma metotları
+        commit etmez; tüm yazmalar tek commit'te (tek fsync) kalıcı olur.
+        İç içe çağrıda SAVEPOINT açılır. Transaction açıkken diğer iş
+        parçacıklarının yazmaları bekler, okumalar beklemez.
+        """
+        self._lock.acquire()
+        depth = self._tx_depth
+        try:
+            for con in self._writer_cons():
+                if depth:
+                    con.execute(f"SAVEPOINT tx_{depth}")
+                elif not con.in_transaction:
+                    con.execute("BEGIN")
+        except Exception:
+            self._lock.release()
+            raise
+        self._tx_depth = depth + 1
+
+    def commit(self):
+        """En içteki transaction'ı kapatır; en dıştaysa diske yazar."""
+        depth = self._end_transaction()
+        try:
+            if depth:
+                for con in self._writer_cons():
+                    con.execute(f"RELEASE tx_{depth}")
+            else:
+                try:
+                    for con in self._writer_cons():
+                        con.commit()
+                except Exception:
+                    for con in self._writer_cons():
+                        con.rollback()
+                    self._counts = {}
+                    raise
+        finally:
+            self._lock.release()
+
+    def rollback(self):
+        """En içteki transaction'ı (ya da SAVEPOINT'i) geri alır."""
+        depth = self._end_transaction()
+        try:
+            for con in self._writer_cons():
+                if depth:
+                    con.execute(f"ROLLBACK TO tx_{depth}")
+                    con.execute(f"RELEASE tx_{depth}")
+                else:
+                    con.rollback()
+            # Önbellekteki sayılar geri alınan yazmaları içeriyor olabilir
+            self._counts = {}
+        finally:
+            self._lock.release()
+
+    def _end_transaction(self):
+        if not self._tx_depth or not self._lock._is_owned():
+            raise RuntimeError("Açık bir transaction yok")
+        self._tx_depth -= 1
+        return self._tx_depth
+
+    @contextmanager
+    def transaction(self):
+        """
+        with db.transaction(): bloğu hatasız biterse commit, hata olursa
+        rollback. İç içe bloklar SAVEPOINT olarak çalışır.
+        """
+        self.begin()
+        try:
+            yield self
+        except BaseException:
+            self.rollback()
+            raise
+        self.commit()
+
+    def _commit_locked(self, con):
+        """Açık bir transaction yoksa commit eder; varsa commit blok sonuna kalır."""
+        if not self._tx_depth:
+            con.commit()
+
+    @contextmanager
+    def _atomic_locked(self, con):
+        """Çok ifadeli yazmalar: ya kendi transaction'ı ya da açık transaction içinde SAVEPOINT."""
+        if not self._tx_depth:
+            try:
+                yield
+                con.commit()
+            except BaseException:
+                con.rollback()
+                raise
+            return
+        con.execute("SAVEPOINT atomic")
+        try:
+            yield
+        except BaseException:
+            con.execute("ROLLBACK TO atomic")
+            con.execute("RELEASE atomic")
+            raise
+        con.execute("RELEASE atomic")
+
     def create_tables(self):
         with self._lock:
             c = self._invoices_con
@@ -119,7 +888,13 @@ class Database:
                     usd_rate REAL,
                     eur_rate REAL,
                     updated_at TEXT,
-                    created_at TEXT
+                    created_at TEXT,
+                    matrah_kurus INTEGER,
+                    toplam_tutar_tl_kurus INTEGER,
+                    toplam_tutar_usd_cent INTEGER,
+                    toplam_tutar_eur_cent INTEGER,
+                    kdv_tutari_kurus INTEGER,
+                    tarih_gun INTEGER
                 );
                 CREATE TABLE IF NOT EXISTS expense_invoices (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -140,7 +915,13 @@ class Database:
                     usd_rate REAL,
                     eur_rate REAL,
                     updated_at TEXT,
-                    created_at TEXT
+                    created_at TEXT,
+                    matrah_kurus INTEGER,
+                    toplam_tutar_tl_kurus INTEGER,
+                    toplam_tutar_usd_cent INTEGER,
+                    toplam_tutar_eur_cent INTEGER,
+                    kdv_tutari_kurus INTEGER,
+                    tarih_gun INTEGER
                 );
                 CREATE TABLE IF NOT EXISTS general_expenses (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -166,13 +947,18 @@ class Database:
             )
             c.commit()
 
-            # Migration: matrah sütunu yoksa ekle
+            # Migration: matrah, kuruş ve tarih_gun sütunları yoksa ekle
+            # (kuruşlar göç v4'te, tarih_gun göç v5'te doldurulur)
+            new_columns = ("matrah REAL DEFAULT 0.0",) + tuple(
+                f"{col} INTEGER" for col in _DERIVED_COLS
+            )
             for tbl in ("income_invoices", "expense_invoices"):
-                try:
-                    c.execute(f"ALTER TABLE {tbl} ADD COLUMN matrah REAL DEFAULT 0.0")
-                    c.commit()
-                except sqlite3.OperationalError:
-                    pass
+                for column in new_columns:
+                    try:
+                        c.execute(f"ALTER TABLE {tbl} ADD COLUMN {column}")
+                        c.commit()
+                    except sqlite3.OperationalError:
+                        pass
 
             s = self._settings_con
             s.executescript(
@@ -198,20 +984,34 @@ class Database:
             )
             h.commit()
 
+            self._run_migrations_locked()
+
+    def _run_migrations_locked(self):
+        return {
+            "invoices": _apply_migrations(self._invoices_con, _INVOICES_MIGRATIONS),
+            "settings": _apply_migrations(self._settings_con, _SETTINGS_MIGRATIONS),
+            "history": _apply_migrations(self._history_con, _HISTORY_MIGRATIONS),
+        }
+
+    def run_migrations(self):
+        """Bekleyen şema göçlerini uygular; her veritabanının sürümünü döndürür."""
+        with self._lock:
+            return self._run_migrations_locked()
+
     # ------------------------------------------------------------------
     # AYARLAR
     # ------------------------------------------------------------------
 
     def get_all_settings(self):
-        with self._lock:
-            rows = self._settings_con.execute(
+        with self._reading("settings") as con:
+            rows = con.execute(
                 "SELECT key, value FROM settings"
             ).fetchall()
         return dict(rows)
 
     def get_setting(self, key):
-        with self._lock:
-            row = self._settings_con.execute(
+        with self._reading("settings") as con:
+            row = con.execute(
                 "SELECT value FROM settings WHERE key=?", (key,)
             ).fetchone()
         return row[0] if row else None
@@ -223,7 +1023,7 @@ class Database:
                 "ON CONFLICT(key) DO UPDATE SET value=excluded.value",
                 (key, value),
             )
-            self._settings_con.commit()
+            self._commit_locked(self._settings_con)
 
     # ------------------------------------------------------------------
     # DÖVİZ KURLARI
@@ -237,12 +1037,12 @@ class Database:
                 "ON CONFLICT(date) DO UPDATE SET usd_rate=excluded.usd_rate, eur_rate=excluded.eur_rate",
                 (date, usd_rate, eur_rate),
             )
-            self._settings_con.commit()
+            self._commit_locked(self._settings_con)
 
     def load_exchange_rates(self):
-        with self._lock:
+        with self._reading("settings") as con:
             date = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-            row = self._settings_con.execute(
+            row = con.execute(
                 "SELECT usd_rate, eur_rate FROM exchange_rates WHERE date=?", (date,)
             ).fetchone()
         return (row[0], row[1]) if row else (0.0, 0.0)
@@ -252,9 +1052,10 @@ class Database:
     # ------------------------------------------------------------------
 
     def _invoice_params(self, data):
+        tarih = _to_iso_date(data.get("tarih"))
         return (
             data.get("fatura_no"),
-            _to_iso_date(data.get("tarih")),
+            tarih,
             data.get("firma"),
             data.get("malzeme"),
             data.get("miktar"),
@@ -268,34 +1069,63 @@ class Database:
             data.get("kdv_dahil", 0),
             data.get("usd_rate"),
             data.get("eur_rate"),
+        ) + tuple(_to_minor(data.get(col)) for col, _ in _MINOR_COLS) + (
+            _to_day_number(tarih),
         )
 
+    def _insert_invoices_bulk_locked(self, table, data_list):
+        """Tek transaction + executemany; yeni id'leri ekleme sırasıyla döndürür."""
+        if not data_list:
+            return []
+        created_at = _now_iso()
+        params = [self._invoice_params(d) + (created_at,) for d in data_list]
+        con = self._invoices_con
+        with self._atomic_locked(con):
+            con.executemany(
+                f"""INSERT INTO {table}
+                   (fatura_no, tarih, firma, malzeme, miktar, matrah,
+                    toplam_tutar_tl, toplam_tutar_usd, toplam_tutar_eur,
+                    birim, kdv_yuzdesi, kdv_tutari, kdv_dahil,
+                    usd_rate, eur_rate, {_DERIVED_COLUMNS}, created_at)
+                   VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)""",
+                params,
+            )
+            # Tek yazma transaction'ı içinde rowid'ler ardışık atanır
+            last_id = con.execute("SELECT last_insert_rowid()").fetchone()[0]
+        self._adjust_count_locked(table, len(params))
+        return list(range(last_id - len(params) + 1, last_id + 1))
+
     def add_gelir_invoice(self, data):
         with self._lock:
             cur = self._invoices_con.execute(
-                """INSERT INTO income_invoices
+                f"""INSERT INTO income_invoices
                    (fatura_no, tarih, firma, malzeme, miktar, matrah,
                     toplam_tutar_tl, toplam_tutar_usd, toplam_tutar_eur,
                     birim, kdv_yuzdesi, kdv_tutari, kdv_dahil,
-                    usd_rate, eur_rate, created_at)
-                   VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)""",
+                    usd_rate, eur_rate, {_DERIVED_COLUMNS}, created_at)
+                   VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)""",
                 self._invoice_params(data) + (_now_iso(),),
             )
-            self._invoices_con.commit()
+            self._commit_locked(self._invoices_con)
+            self._adjust_count_locked("income_invoices", 1)
             return cur.lastrowid
 
+    def add_gelir_invoices_bulk(self, data_list):
+        with self._lock:
+            return self._insert_invoices_bulk_locked("income_invoices", list(data_list))
+
     def update_gelir_invoice(self, invoice_id, data):
         with self._lock:
             cur = self._invoices_con.execute(
-                """UPDATE income_invoices SET
+                f"""UPDATE income_invoices SET
                    fatura_no=?, tarih=?, firma=?, malzeme=?, miktar=?, matrah=?,
                    toplam_tutar_tl=?, toplam_tutar_usd=?, toplam_tutar_eur=?,
                    birim=?, kdv_yuzdesi=?, kdv_tutari=?, kdv_dahil=?,
-                   usd_rate=?, eur_rate=?, updated_at=?
+                   usd_rate=?, eur_rate=?, {_DERIVED_ASSIGNMENTS}, updated_at=?
                    WHERE id=?""",
                 self._invoice_params(data) + (_now_iso(), invoice_id),
             )
-            self._invoices_con.commit()
+            self._commit_locked(self._invoices_con)
             return cur.rowcount > 0
 
     def delete_gelir_invoice(self, invoice_id):
@@ -303,7 +1133,8 @@ class Database:
             cur = self._invoices_con.execute(
                 "DELETE FROM income_invoices WHERE id=?", (invoice_id,)
             )
-            self._invoices_con.commit()
+            self._commit_locked(self._invoices_con)
+            self._adjust_count_locked("income_invoices", -cur.rowcount)
             return cur.rowcount
 
     def delete_multiple_gelir_invoices(self, invoice_ids):
@@ -315,7 +1146,8 @@ class Database:
                 f"DELETE FROM income_invoices WHERE id IN ({placeholders})",
                 list(invoice_ids),
             )
-            self._invoices_con.commit()
+            self._commit_locked(self._invoices_con)
+            self._adjust_count_locked("income_invoices", -cur.rowcount)
             return cur.rowcount
 
     def get_all_gelir_invoices(self, limit=None, offset=None, order_by=None):
@@ -327,22 +1159,27 @@ class Database:
             params.append(limit)
             query += " OFFSET ?"
             params.append(offset or 0)
-        with self._lock:
-            rows = self._invoices_con.execute(query, params).fetchall()
-        return [_row_to_invoice(r) for r in rows]
+        with self._reading("invoices") as con:
+            rows = con.execute(query, params).fetchall()
+        return [self._make_invoice(r) for r in rows]
 
     def get_gelir_invoice_count(self):
-        with self._lock:
-            return self._invoices_con.execute(
-                "SELECT COUNT(*) FROM income_invoices"
-            ).fetchone()[0]
+        if self._snapshot_con("invoices") is not None:
+            # Önbellek en güncel sayıyı tutar; anlık görüntüde görüntünün sayısı döner
+            with self._reading("invoices") as con:
+                return con.execute("SELECT COUNT(*) FROM income_invoices").fetchone()[0]
+        count = self._counts.get("income_invoices")
+        if count is None:
+            with self._lock:
+                count = self._count_locked("income_invoices")
+        return count
 
     def get_gelir_invoice_by_id(self, invoice_id):
-        with self._lock:
-            row = self._invoices_con.execute(
+        with self._reading("invoices") as con:
+            row = con.execute(
                 "SELECT * FROM income_invoices WHERE id=?", (invoice_id,)
             ).fetchone()
-        return _row_to_invoice(row)
+        return self._make_invoice(row)
 
     # ------------------------------------------------------------------
     # GİDER FATURALARI
@@ -351,29 +1188,34 @@ class Database:
     def add_gider_invoice(self, data):
         with self._lock:
             cur = self._invoices_con.execute(
-                """INSERT INTO expense_invoices
+                f"""INSERT INTO expense_invoices
                    (fatura_no, tarih, firma, malzeme, miktar, matrah,
                     toplam_tutar_tl, toplam_tutar_usd, toplam_tutar_eur,
                     birim, kdv_yuzdesi, kdv_tutari, kdv_dahil,
-                    usd_rate, eur_rate, created_at)
-                   VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)""",
+                    usd_rate, eur_rate, {_DERIVED_COLUMNS}, created_at)
+                   VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)""",
                 self._invoice_params(data) + (_now_iso(),),
             )
-            self._invoices_con.commit()
+            self._commit_locked(self._invoices_con)
+            self._adjust_count_locked("expense_invoices", 1)
             return cur.lastrowid
 
+    def add_gider_invoices_bulk(self, data_list):
+        with self._lock:
+            return self._insert_invoices_bulk_locked("expense_invoices", list(data_list))
+
     def update_gider_invoice(self, invoice_id, data):
         with self._lock:
             cur = self._invoices_con.execute(
-                """UPDATE expense_invoices SET
+                f"""UPDATE expense_invoices SET
                    fatura_no=?, tarih=?, firma=?, malzeme=?, miktar=?, matrah=?,
                    toplam_tutar_tl=?, toplam_tutar_usd=?, toplam_tutar_eur=?,
                    birim=?, kdv_yuzdesi=?, kdv_tutari=?, kdv_dahil=?,
-                   usd_rate=?, eur_rate=?, updated_at=?
+                   usd_rate=?, eur_rate=?, {_DERIVED_ASSIGNMENTS}, updated_at=?
                    WHERE id=?""",
                 self._invoice_params(data) + (_now_iso(), invoice_id),
             )
-            self._invoices_con.commit()
+            self._commit_locked(self._invoices_con)
             return cur.rowcount > 0
 
     def delete_gider_invoice(self, invoice_id):
@@ -381,7 +1223,8 @@ class Database:
             cur = self._invoices_con.execute(
                 "DELETE FROM expense_invoices WHERE id=?", (invoice_id,)
             )
-            self._invoices_con.commit()
+            self._commit_locked(self._invoices_con)
+            self._adjust_count_locked("expense_invoices", -cur.rowcount)
             return cur.rowcount
 
     def delete_multiple_gider_invoices(self, invoice_ids):
@@ -393,7 +1236,8 @@ class Database:
                 f"DELETE FROM expense_invoices WHERE id IN ({placeholders})",
                 list(invoice_ids),
             )
-            self._invoices_con.commit()
+            self._commit_locked(self._invoices_con)
+            self._adjust_count_locked("expense_invoices", -cur.rowcount)
             return cur.rowcount
 
     def get_all_gider_invoices(self, limit=None, offset=None, order_by=None):
@@ -405,22 +1249,341 @@ class Database:
             params.append(limit)
             query += " OFFSET ?"
             params.append(offset or 0)
-        with self._lock:
-            rows = self._invoices_con.execute(query, params).fetchall()
-        return [_row_to_invoice(r) for r in rows]
+        with self._reading("invoices") as con:
+            rows = con.execute(query, params).fetchall()
+        return [self._make_invoice(r) for r in rows]
 
     def get_gider_invoice_count(self):
-        with self._lock:
-            return self._invoices_con.execute(
-                "SELECT COUNT(*) FROM expense_invoices"
-            ).fetchone()[0]
+        if self._snapshot_con("invoices") is not None:
+            # Önbellek en güncel sayıyı tutar; anlık görüntüde görüntünün sayısı döner
+            with self._reading("invoices") as con:
+                return con.execute("SELECT COUNT(*) FROM expense_invoices").fetchone()[0]
+        count = self._counts.get("expense_invoices")
+        if count is None:
+            with self._lock:
+                count = self._count_locked("expense_invoices")
+        return count
 
     def get_gider_invoice_by_id(self, invoice_id):
-        with self._lock:
-            row = self._invoices_con.execute(
+        with self._reading("invoices") as con:
+            row = con.execute(
                 "SELECT * FROM expense_invoices WHERE id=?", (invoice_id,)
             ).fetchone()
-        return _row_to_invoice(row)
+        return self._make_invoice(row)
+
+    # ------------------------------------------------------------------
+    # SAYFALAMA VE SAYAÇ ÖNBELLEĞİ
+    # ------------------------------------------------------------------
+
+    def _count_locked(self, table):
+        if table not in self._counts:
+            self._counts[table] = self._invoices_con.execute(
+                f"SELECT COUNT(*) FROM {table}"
+            ).fetchone()[0]
+        return self._counts[table]
+
+    def _adjust_count_locked(self, table, delta):
+        if table in self._counts:
+            self._counts[table] += delta
+
+    def _fetch_segments(self, con, table, segments, limit):
+        rows = []
+        for condition, params, order in segments:
+            remaining = limit - len(rows)
+            if remaining <= 0:
+                break
+            rows.extend(
+                con.execute(
+                    f"SELECT * FROM {table} WHERE {condition} "
+                    f"ORDER BY {order} LIMIT ?",
+                    params + (remaining,),
+                ).fetchall()
+            )
+        return rows
+
+    def get_invoices_page(
+        self, table, cursor=None, limit=25, direction="next", order_by="tarih DESC"
+    ):
+        """
+        Keyset (seek) sayfalama. cursor=None: direction="next" ise ilk sayfa,
+        "prev" ise son sayfa.
+
+        Returns:
+            dict: {"items": [...], "next_cursor": str|None, "prev_cursor": str|None}
+        """
+        _check_invoice_table(table)
+        if order_by not in _PAGE_ORDERS:
+            raise ValueError(f"Desteklenmeyen sıralama: {order_by}")
+        if direction not in ("next", "prev"):
+            raise ValueError(f"Geçersiz sayfa yönü: {direction}")
+        limit = max(1, int(limit))
+        key, ascending = _PAGE_ORDERS[order_by]
+        forward = direction == "next"
+        segments = _page_segments(key, ascending == forward, _decode_cursor(cursor))
+
+        with self._reading("invoices") as con:
+            rows = self._fetch_segments(con, table, segments, limit + 1)
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if not forward:
+            if not has_more and cursor is not None:
+                # Listenin başına ulaşıldı: kısa sayfa yerine ilk sayfayı döndür
+                return self.get_invoices_page(table, None, limit, "next", order_by)
+            rows.reverse()
+
+        cursors = [_encode_cursor(r[0], r[3]) for r in rows]
+        next_cursor = prev_cursor = None
+        if forward:
+            if has_more:
+                next_cursor = cursors[-1]
+            if cursor is not None:
+                prev_cursor = cursors[0] if cursors else cursor
+        else:
+            if has_more:
+                prev_cursor = cursors[0]
+            if cursor is not None:
+                next_cursor = cursors[-1] if cursors else cursor
+
+        return {
+            "items": [self._make_invoice(r) for r in rows],
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor,
+        }
+
+    # ------------------------------------------------------------------
+    # TARİH ARALIĞI SORGULARI
+    # ------------------------------------------------------------------
+
+    def get_invoices_between(
+        self, table, start_iso=None, end_iso=None, order_by="tarih ASC", limit=None
+    ):
+        """
+        tarih (ISO) sütunu üzerinde SQL tarafında filtreleme; sınırlar dahildir.
+        start_iso/end_iso verilmezse o yönde sınır uygulanmaz. Tarihsiz kayıtlar dönmez.
+        """
+        _check_invoice_table(table)
+        if order_by not in _PAGE_ORDERS:
+            raise ValueError(f"Desteklenmeyen sıralama: {order_by}")
+        key, ascending = _PAGE_ORDERS[order_by]
+        direction = "ASC" if ascending else "DESC"
+        order = f"tarih {direction}, id {direction}" if key == "tarih" else f"id {direction}"
+
+        conditions, params = ["tarih IS NOT NULL"], []
+        if start_iso:
+            conditions.append("tarih >= ?")
+            params.append(start_iso)
+        if end_iso:
+            conditions.append("tarih <= ?")
+            params.append(end_iso)
+        query = f"SELECT * FROM {table} WHERE {' AND '.join(conditions)} ORDER BY {order}"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(int(limit))
+
+        with self._reading("invoices") as con:
+            rows = con.execute(query, params).fetchall()
+        return [self._make_invoice(r) for r in rows]
+
+    def get_available_years(self):
+        """
+        Veri bulunan yıllar (artan): gelir/gider fatura tarihleri ve en az bir
+        ayı dolu genel gider yılları.
+        """
+        with self._reading("invoices") as con:
+            rows = con.execute(_AVAILABLE_YEARS_QUERY).fetchall()
+        return [r[0] for r in rows]
+
+    # ------------------------------------------------------------------
+    # SÜTUNSAL OKUMA (analitik)
+    # ------------------------------------------------------------------
+
+    def fetch_columns(self, table, columns, where=None, params=()):
+        """
+        Satır sözlükleri yerine sütun bazlı sonuç döndürür.
+
+        Args:
+            table: 'income_invoices' veya 'expense_invoices'
+            columns: Fatura sütun adları listesi
+            where: İsteğe bağlı SQL koşulu ('?' parametreli), ör. "tarih >= ?"
+            params: where parametreleri
+
+        Returns:
+            dict: {sütun: değerler}. Sayısal sütunlar NumPy kuruluysa ndarray,
+            değilse array('d') / array('q') (NULL → 0); diğerleri list.
+            tarih ISO (yyyy-mm-dd) formatında döner; tarih_gun (yyyymmdd),
+            yil ve ay tamsayı olarak istenebilir (tarihsiz satırlarda 0).
+        """
+        _check_invoice_table(table)
+        columns = list(columns)
+        unknown = [
+            c for c in columns if c not in _INVOICE_COLS and c not in _DAY_NUMBER_COLS
+        ]
+        if unknown or not columns:
+            raise ValueError(f"Geçersiz sütun(lar): {unknown or columns}")
+
+        selected = ", ".join(
+            f"{_DAY_NUMBER_COLS[c]} AS {c}" if c in _DAY_NUMBER_COLS else c
+            for c in columns
+        )
+        query = f"SELECT {selected} FROM {table}"
+        if where:
+            query += f" WHERE {where}"
+        with self._reading("invoices") as con:
+            rows = con.execute(query, tuple(params)).fetchall()
+
+        result = {}
+        for index, column in enumerate(columns):
+            typecode = _NUMERIC_COLS.get(column)
+            if typecode is None:
+                result[column] = [r[index] for r in rows]
+                continue
+            values = array(typecode, (r[index] or 0 for r in rows))
+            if NUMPY_AVAILABLE:
+                values = np.frombuffer(values, dtype=values.typecode)
+            result[column] = values
+        return result
+
+    # ------------------------------------------------------------------
+    # FATURA NO SORGULARI (toplu duplicate kontrolü)
+    # ------------------------------------------------------------------
+
+    def find_existing_fatura_nos(self, fatura_nos):
+        """Listede olup gelir veya gider tablosunda zaten kayıtlı fatura numaraları."""
+        unique = list({no for no in fatura_nos if no})
+        found = set()
+        with self._reading("invoices") as con:
+            for start in range(0, len(unique), _FATURA_NO_CHUNK):
+                chunk = unique[start : start + _FATURA_NO_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = con.execute(
+                    f"SELECT fatura_no FROM income_invoices WHERE fatura_no IN ({placeholders}) "
+                    f"UNION SELECT fatura_no FROM expense_invoices WHERE fatura_no IN ({placeholders})",
+                    chunk + chunk,
+                ).fetchall()
+                found.update(r[0] for r in rows)
+        return sorted(found)
+
+    # ------------------------------------------------------------------
+    # TAM METİN ARAMA
+    # ------------------------------------------------------------------
+
+    def search_invoices(self, query, table, limit=25, offset=0):
+        """
+        firma, malzeme, fatura_no ve miktar içinde önek eşleşmeli arama.
+        Sonuçlar bm25 puanına göre sıralanır: {"items", "total", "next_offset"}.
+        """
+        _check_invoice_table(table)
+        match = _fts_match_query(query)
+        if not match:
+            return {"items": [], "total": 0, "next_offset": None}
+        fts = f"{table}_fts"
+        limit = max(int(limit), 0)
+        offset = max(int(offset), 0)
+        with self._reading("invoices") as con:
+            total = con.execute(
+                f"SELECT COUNT(*) FROM {fts} WHERE {fts} MATCH ?", (match,)
+            ).fetchone()[0]
+            rows = con.execute(
+                f"SELECT t.* FROM {fts} JOIN {table} t ON t.id = {fts}.rowid "
+                f"WHERE {fts} MATCH ? ORDER BY bm25({fts}, {_FTS_WEIGHTS}), t.id DESC "
+                "LIMIT ? OFFSET ?",
+                (match, limit, offset),
+            ).fetchall()
+        end = offset + len(rows)
+        return {
+            "items": [self._make_invoice(r) for r in rows],
+            "total": total,
+            "next_offset": end if end < total else None,
+        }
+
+    # ------------------------------------------------------------------
+    # AYLIK TOPLAMLAR (tetikleyicilerle güncel tutulan monthly_summary)
+    # ------------------------------------------------------------------
+
+    def get_monthly_totals(self, table, year):
+        """Bir yılın ay bazlı tutar toplamları (yalnızca kaydı olan aylar)."""
+        _check_invoice_table(table)
+        with self._reading("invoices") as con:
+            rows = con.execute(
+                _MONTHLY_TOTALS_SELECT
+                + "FROM monthly_summary WHERE table_name = ? AND year = ? "
+                "ORDER BY month",
+                (table, int(year)),
+            ).fetchall()
+        return [_row_to_monthly_total(r) for r in rows]
+
+    def get_monthly_totals_for_years(self, table, years=None):
+        """Birden fazla yılın aylık toplamları; years=None ise tüm yıllar."""
+        _check_invoice_table(table)
+        query = _MONTHLY_TOTALS_SELECT + "FROM monthly_summary WHERE table_name = ?"
+        params = [table]
+        if years is not None:
+            years = sorted({int(y) for y in years})
+            if not years:
+                return []
+            query += f" AND year IN ({','.join('?' * len(years))})"
+            params += years
+        query += " ORDER BY year, month"
+        with self._reading("invoices") as con:
+            rows = con.execute(query, params).fetchall()
+        return [_row_to_monthly_total(r) for r in rows]
+
+    def get_monthly_summary(self, year=None):
+        """
+        Dashboard için tablo × ay toplamları (en fazla 24 satır).
+        year=None ise aynı ayın tüm yıllardaki toplamları birleştirilir.
+        """
+        query = (
+            "SELECT table_name, month, SUM(sum_tl_kurus), SUM(sum_usd_cent), "
+            "SUM(sum_eur_cent), SUM(sum_kdv_kurus), SUM(count) FROM monthly_summary"
+        )
+        params = ()
+        if year is not None:
+            query += " WHERE year = ?"
+            params = (int(year),)
+        query += " GROUP BY table_name, month ORDER BY table_name, month"
+        with self._reading("invoices") as con:
+            rows = con.execute(query, params).fetchall()
+        return [
+            {
+                "table": r[0],
+                "month": r[1],
+                "sum_tl": _from_minor(r[2]),
+                "sum_usd": _from_minor(r[3]),
+                "sum_eur": _from_minor(r[4]),
+                "sum_kdv": _from_minor(r[5]),
+                "count": r[6],
+                "sum_tl_kurus": r[2],
+                "sum_kdv_kurus": r[5],
+            }
+            for r in rows
+        ]
+
+    def rebuild_monthly_summary(self):
+        """Özeti ham faturalardan baştan oluşturur; özet satır sayısını döndürür."""
+        with self._lock:
+            con = self._invoices_con
+            with self._atomic_locked(con):
+                for stmt in _REBUILD_MONTHLY_SUMMARY:
+                    con.execute(stmt)
+                count = con.execute("SELECT COUNT(*) FROM monthly_summary").fetchone()[0]
+        return count
+
+    def check_monthly_summary(self):
+        """Ham toplamlarla uyuşmayan özet satırları; boş liste = tutarlı."""
+        with self._reading("invoices") as con:
+            rows = con.execute(_CHECK_MONTHLY_SUMMARY).fetchall()
+        return [
+            {
+                "table": r[0],
+                "year": r[1],
+                "month": r[2],
+                "expected": dict(zip(_SUMMARY_FIELDS, r[3::2])),
+                "actual": dict(zip(_SUMMARY_FIELDS, r[4::2])),
+            }
+            for r in rows
+        ]
 
     # ------------------------------------------------------------------
     # GEÇMİŞ
@@ -432,11 +1595,23 @@ class Database:
                 "INSERT INTO history(action,details,timestamp) VALUES(?,?,?)",
                 (action, details, _now_iso()),
             )
-            self._history_con.commit()
+            self._commit_locked(self._history_con)
 
-    def get_recent_history(self, limit):
+    def add_history_records(self, records):
+        """records: [(action, details), ...] — tek commit ile toplu ekleme."""
+        if not records:
+            return
         with self._lock:
-            rows = self._history_con.execute(
+            timestamp = _now_iso()
+            self._history_con.executemany(
+                "INSERT INTO history(action,details,timestamp) VALUES(?,?,?)",
+                [(action, details, timestamp) for action, details in records],
+            )
+            self._commit_locked(self._history_con)
+
+    def get_recent_history(self, limit):
+        with self._reading("history") as con:
+            rows = con.execute(
                 "SELECT id,action,details,timestamp FROM history "
                 "ORDER BY timestamp DESC LIMIT ?",
                 (limit,),
@@ -447,8 +1622,8 @@ class Database:
         ]
 
     def get_history_by_date_range(self, start_date, end_date):
-        with self._lock:
-            rows = self._history_con.execute(
+        with self._reading("history") as con:
+            rows = con.execute(
                 "SELECT id,action,details,timestamp FROM history "
                 "WHERE timestamp >= ? AND timestamp <= ? "
                 "ORDER BY timestamp DESC",
@@ -465,7 +1640,7 @@ class Database:
             cur = self._history_con.execute(
                 "DELETE FROM history WHERE timestamp < ?", (cutoff,)
             )
-            self._history_con.commit()
+            self._commit_locked(self._history_con)
             return cur.rowcount
 
     # ------------------------------------------------------------------
@@ -493,14 +1668,14 @@ class Database:
                     f"VALUES(?,{','.join('?'*12)})",
                     (year,) + vals,
                 )
-                self._invoices_con.commit()
+                self._commit_locked(self._invoices_con)
                 return cur.lastrowid
-            self._invoices_con.commit()
+            self._commit_locked(self._invoices_con)
         return 1
 
     def get_yearly_expenses(self, year):
-        with self._lock:
-            row = self._invoices_con.execute(
+        with self._reading("invoices") as con:
+            row = con.execute(
                 "SELECT id,yil," + ",".join(_MONTH_COLS) +
                 " FROM general_expenses WHERE yil=?",
                 (year,),
@@ -508,8 +1683,8 @@ class Database:
         return _row_to_expense(row)
 
     def get_yearly_expenses_by_id(self, id):
-        with self._lock:
-            row = self._invoices_con.execute(
+        with self._reading("invoices") as con:
+            row = con.execute(
                 "SELECT id,yil," + ",".join(_MONTH_COLS) +
                 " FROM general_expenses WHERE id=?",
                 (id,),
@@ -517,14 +1692,14 @@ class Database:
         return _row_to_expense(row)
 
     def get_yearly_expenses_count(self):
-        with self._lock:
-            return self._invoices_con.execute(
+        with self._reading("invoices") as con:
+            return con.execute(
                 "SELECT COUNT(*) FROM general_expenses"
             ).fetchone()[0]
 
     def get_all_yearly_expenses(self):
-        with self._lock:
-            rows = self._invoices_con.execute(
+        with self._reading("invoices") as con:
+            rows = con.execute(
                 "SELECT id,yil," + ",".join(_MONTH_COLS) +
                 " FROM general_expenses ORDER BY yil DESC"
             ).fetchall()
@@ -552,14 +1727,14 @@ class Database:
                     f"VALUES(?,{','.join('?'*12)})",
                     (year,) + vals,
                 )
-                self._invoices_con.commit()
+                self._commit_locked(self._invoices_con)
                 return cur.lastrowid
-            self._invoices_con.commit()
+            self._commit_locked(self._invoices_con)
         return 1
 
     def get_corporate_tax(self, year):
-        with self._lock:
-            row = self._invoices_con.execute(
+        with self._reading("invoices") as con:
+            row = con.execute(
                 "SELECT id,yil," + ",".join(_MONTH_COLS) +
                 " FROM corporate_tax WHERE yil=?",
                 (year,),
@@ -0,0 +1,55 @@
+import importlib.util
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+PYTHON_FILES = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "PythonFiles"
+)
+if PYTHON_FILES not in sys.path:
+    sys.path.append(PYTHON_FILES)
+
+
+def _load_fallback_db():
+    """PythonFiles/rust_db.py (sqlite3 karşılığı) modülünü yükler.
+
+    Proje kökündeki rust_db/ klasörü aynı isimde bir namespace paketi gibi
+    görüneceği için modül dosya yolundan yüklenir.
+    """
+    spec = importlib.util.spec_from_file_location(
+        "rust_db_fallback", os.path.join(PYTHON_FILES, "rust_db.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+rust_db_fallback = _load_fallback_db()
+
+from invoices import AggregateCache, MonthlyTotals  # noqa: E402
+
+
+@pytest.fixture
+def fallback_db(tmp_path, monkeypatch):
+    """Geçici bir Database/ klasöründe tabloları oluşturulmuş veritabanı."""
+    monkeypatch.chdir(tmp_path)
+    db = rust_db_fallback.Database()
+    db.init_connections()
+    db.create_tables()
+    yield db
+
+
+@pytest.fixture
+def fake_backend(fallback_db):
+    """Hesaplama sınıfları için db ve settings taşıyan minimal backend."""
+    backend = SimpleNamespace(
+        db=fallback_db,
+        settings={"kurumlar_vergisi_yuzdesi": 22.0, "kdv_yuzdesi": 20.0},
+        exchange_rates={"USD": 0.03, "EUR": 0.028},
+        on_data_updated=None,
+        aggregate_cache=AggregateCache(),
+    )
+    backend.monthly_totals = MonthlyTotals(backend)
+    return backend
@@ -1,2 +1,557 @@
-def test_placeholder():
-    pass
+import threading
+import time
+
+import pytest
+
+
+def _seed(db, n):
+    db.add_gelir_invoices_bulk(
+        [
+            {
+                "fatura_no": f"P-{i}",
+                "tarih": f"{2020 + i % 5}-{i % 12 + 1:02d}-{i % 28 + 1:02d}",
+                "toplam_tutar_tl": float(i % 1000),
+                "kdv_tutari": float(i % 100),
+            }
+            for i in range(n)
+        ]
+    )
+
+
+# =====================================================================
+# OKUYUCU / YAZICI ÇEKİŞMESİ
+# =====================================================================
+
+
+def test_readers_proceed_while_bulk_import_writes(fallback_db):
+    """Toplu içe aktarma yazarken dashboard okumaları beklememeli."""
+    _seed(fallback_db, 5000)
+    hold_seconds = 0.5
+    writer_started = threading.Event()
+    writer_done = threading.Event()
+
+    def writer():
+        # Uzun süren bir toplu içe aktarmayı taklit et: yazıcı kilidi ve
+        # açık yazma transaction'ı hold_seconds boyunca tutulur.
+        with fallback_db._lock:
+            con = fallback_db._invoices_con
+            con.execute(
+                "INSERT INTO income_invoices(fatura_no, tarih) VALUES('W-1', '2024-01-01')"
+            )
+            writer_started.set()
+            time.sleep(hold_seconds)
+            con.commit()
+        writer_done.set()
+
+    latencies = []
+    reads_during_write = []
+    lock = threading.Lock()
+
+    def reader():
+        writer_started.wait()
+        while not writer_done.is_set():
+            start = time.perf_counter()
+            fallback_db.get_monthly_totals_for_years("income_invoices")
+            fallback_db.get_invoices_page("income_invoices", limit=25)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                if not writer_done.is_set():
+                    reads_during_write.append(elapsed)
+
+    threads = [threading.Thread(target=writer)] + [
+        threading.Thread(target=reader) for _ in range(4)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    print(
+        f"\n4 okuyucu + 1 yazıcı: {len(reads_during_write)} okuma yazma sürerken, "
+        f"p50={p50 * 1000:.2f}ms max={latencies[-1] * 1000:.2f}ms"
+    )
+    assert len(reads_during_write) >= 8
+    assert latencies[-1] < hold_seconds
+    # Yazıcı commit ettikten sonra yeni kayıt okuyuculara görünür
+    assert fallback_db.find_existing_fatura_nos(["W-1"]) == ["W-1"]
+
+
+# =====================================================================
+# SÜTUNSAL OKUMA BELLEK KULLANIMI
+# =====================================================================
+
+
+def test_fetch_columns_uses_less_memory_than_row_dicts(fallback_db):
+    import tracemalloc
+
+    _seed(fallback_db, 5000)
+    fields = ["tarih", "toplam_tutar_tl", "kdv_tutari"]
+
+    def peak(fn):
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return result, peak_bytes, elapsed
+
+    rows, row_peak, row_time = peak(
+        lambda: fallback_db.get_all_gelir_invoices(None, None)
+    )
+    cols, col_peak, col_time = peak(
+        lambda: fallback_db.fetch_columns("income_invoices", fields)
+    )
+    print(
+        f"\n5k satır: dict listesi {row_peak / 1e6:.1f}MB {row_time * 1000:.0f}ms, "
+        f"sütunsal {col_peak / 1e6:.1f}MB {col_time * 1000:.0f}ms"
+    )
+
+    assert sum(cols["toplam_tutar_tl"]) == sum(r["toplam_tutar_tl"] for r in rows)
+    assert col_peak < row_peak / 3
+
+
+# =====================================================================
+# SATIR KAYIT TİPİ BELLEK KULLANIMI
+# =====================================================================
+
+
+def test_invoice_records_use_less_memory_than_row_dicts(fallback_db):
+    import tracemalloc
+
+    from invoices import Invoice
+
+    _seed(fallback_db, 5000)
+
+    def retained():
+        tracemalloc.start()
+        start = time.perf_counter()
+        rows = fallback_db.get_all_gelir_invoices(None, None)
+        elapsed = time.perf_counter() - start
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return rows, current, elapsed
+
+    dict_rows, dict_bytes, dict_time = retained()
+    fallback_db.row_factory = Invoice
+    records, record_bytes, record_time = retained()
+    print(
+        f"\n5k satır: dict {dict_bytes / 1e6:.1f}MB {dict_time * 1000:.0f}ms, "
+        f"Invoice {record_bytes / 1e6:.1f}MB {record_time * 1000:.0f}ms"
+    )
+
+    assert [r["tarih"] for r in records] == [r["tarih"] for r in dict_rows]
+    # Sütun değerleri (str/float) iki tarafta da ortak; kazanç dict başlığından gelir
+    assert record_bytes < dict_bytes * 0.75
+
+
+# =====================================================================
+# TAM METİN ARAMA
+# =====================================================================
+
+
+def test_search_is_faster_than_like_scan(fallback_db):
+    firms = ["Öztürk İnşaat", "Işık Tekstil", "Çelik Yapı", "Ağaoğlu Gıda"]
+    fallback_db.add_gelir_invoices_bulk(
+        [
+            {
+                "fatura_no": f"S-{i}",
+                "tarih": "2024-01-01",
+                "firma": f"{firms[i % 4]} {i}",
+                "malzeme": f"malzeme {i % 97}",
+            }
+            for i in range(50000)
+        ]
+    )
+
+    def best_of(fn, runs=5):
+        times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            result = fn()
+            times.append(time.perf_counter() - start)
+        return result, min(times)
+
+    with fallback_db._reading("invoices") as con:
+        like_rows, like_time = best_of(
+            lambda: con.execute(
+                "SELECT id FROM income_invoices WHERE firma LIKE ? OR malzeme LIKE ? "
+                "ORDER BY id DESC LIMIT 25",
+                ("% 4999", "% 4999"),
+            ).fetchall()
+        )
+    page, fts_time = best_of(
+        lambda: fallback_db.search_invoices("4999", "income_invoices", limit=25)
+    )
+    print(
+        f"\n50k fatura: LIKE taraması {like_time * 1000:.2f}ms, "
+        f"FTS5 {fts_time * 1000:.2f}ms ({page['total']} sonuç)"
+    )
+
+    # FTS kelime başı (önek) eşleşir: "4999" → 4999, 49990..49999
+    assert {r[0] for r in like_rows} <= {inv["id"] for inv in page["items"]}
+    assert page["total"] == 11
+    assert fts_time < 0.05
+    assert fts_time < like_time
+
+
+# =====================================================================
+# GEÇMİŞ KAYITLARI (write-behind)
+# =====================================================================
+
+
+def test_add_invoice_latency_with_history_writer(fake_backend):
+    from invoices import InvoiceManager
+
+    manager = InvoiceManager(fake_backend)
+    db = fake_backend.db
+
+    def data(i):
+        return {
+            "fatura_no": f"L-{i}",
+            "tarih": "01.03.2024",
+            "toplam_tutar": 10,
+            "birim": "TL",
+        }
+
+    def add_sync(i):
+        # Eski akış: fatura commit'inin ardından ayrı bir geçmiş commit'i
+        processed = manager.processor.process_invoice_data(data(i))
+        db.add_gelir_invoice(processed)
+        db.add_history_record(*manager._history_entry("EKLEME", "gelir", processed))
+
+    def timed(fn, n=200, offset=0):
+        start = time.perf_counter()
+        for i in range(n):
+            fn(offset + i)
+        return (time.perf_counter() - start) / n
+
+    sync_latency = timed(add_sync)
+    writer_latency = timed(
+        lambda i: manager.handle_invoice_operation("add", "outgoing", data(i)),
+        offset=1000,
+    )
+    assert manager.history_writer.flush(timeout=10)
+    print(
+        f"\nfatura ekleme: senkron geçmiş {sync_latency * 1e6:.0f}µs, "
+        f"arka plan yazıcı {writer_latency * 1e6:.0f}µs"
+    )
+
+    assert len(db.get_recent_history(1000)) == 400
+    manager.history_writer.close()
+
+
+# =====================================================================
+# ANLIK GÖRÜNTÜ İÇİNDE DIŞA AKTARMA
+# =====================================================================
+
+
+def test_export_snapshot_does_not_block_invoice_entry(fallback_db):
+    _seed(fallback_db, 50000)
+    exporting = threading.Event()
+    export_done = threading.Event()
+    exported = {}
+
+    def exporter():
+        # Dışa aktarma: sayfa sayfa bütün faturaları aynı görüntüden okur
+        with fallback_db.snapshot():
+            exporting.set()
+            start = time.perf_counter()
+            rows = []
+            for offset in range(0, 50000, 1000):
+                rows.extend(fallback_db.get_all_gelir_invoices(1000, offset))
+            exported["rows"] = len(rows)
+            exported["count"] = fallback_db.get_gelir_invoice_count()
+            exported["time"] = time.perf_counter() - start
+        export_done.set()
+
+    latencies = []
+
+    def writer():
+        exporting.wait()
+        i = 0
+        while not export_done.is_set():
+            start = time.perf_counter()
+            fallback_db.add_gelir_invoice(
+                {"fatura_no": f"N-{i}", "tarih": "2024-05-01", "toplam_tutar_tl": 1.0}
+            )
+            latencies.append(time.perf_counter() - start)
+            i += 1
+
+    threads = [threading.Thread(target=exporter), threading.Thread(target=writer)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    latencies.sort()
+    print(
+        f"\n50k dışa aktarma {exported['time'] * 1000:.0f}ms sürerken "
+        f"{len(latencies)} fatura eklendi, p50={latencies[len(latencies) // 2] * 1000:.2f}ms "
+        f"max={latencies[-1] * 1000:.2f}ms"
+    )
+
+    # Dışa aktarma başladığı anın görüntüsünü görür, yazıcı beklemez
+    assert exported["rows"] == exported["count"] == 50000
+    assert len(latencies) >= 5
+    assert latencies[-1] < exported["time"] / 2
+    assert fallback_db.get_gelir_invoice_count() == 50000 + len(latencies)
+
+
+# =====================================================================
+# ASYNC CEPHE: OLAY DÖNGÜSÜ BEKLEMEZ
+# =====================================================================
+
+
+def test_async_reads_do_not_block_event_loop(fallback_db):
+    import asyncio
+
+    from async_db import AsyncDatabase
+
+    _seed(fallback_db, 20000)
+    adb = AsyncDatabase(fallback_db)
+
+    async def ticker(stop, gaps):
+        # Arayüz çizimini taklit eden 5ms'lik döngü; en uzun aralık ölçülür
+        last = time.perf_counter()
+        while not stop.is_set():
+            await asyncio.sleep(0.005)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    async def scenario():
+        stop = asyncio.Event()
+        gaps = []
+        tick = asyncio.create_task(ticker(stop, gaps))
+        start = time.perf_counter()
+        rows = await asyncio.gather(
+            *(adb.get_all_gelir_invoices(None, None) for _ in range(4))
+        )
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await tick
+        return rows, elapsed, gaps
+
+    try:
+        rows, elapsed, gaps = asyncio.run(scenario())
+    finally:
+        adb.close()
+
+    print(
+        f"\n4 eşzamanlı 20k satır okuma {elapsed * 1000:.0f}ms, "
+        f"{len(gaps)} tık, en uzun döngü aralığı {max(gaps) * 1000:.1f}ms"
+    )
+    assert all(len(r) == 20000 for r in rows)
+    # Senkron çağrı döngüyü okuma boyunca durdururdu
+    assert max(gaps) < elapsed / 2
+    assert len(gaps) >= 5
+
+
+# =====================================================================
+# UZUN SORGULARDA GIL SERBEST
+# =====================================================================
+
+
+def test_python_threads_progress_during_long_queries(fallback_db):
+    _seed(fallback_db, 50000)
+    stop = threading.Event()
+    ticks = [0]
+
+    def spin():
+        # Arayüz/QR işçisi yerine saf Python iş yapan iş parçacığı
+        while not stop.is_set():
+            ticks[0] += 1
+
+    def rate(fn):
+        ticks[0] = 0
+        start = time.perf_counter()
+        fn()
+        return ticks[0] / (time.perf_counter() - start)
+
+    worker = threading.Thread(target=spin)
+    worker.start()
+    try:
+        idle_rate = rate(lambda: time.sleep(0.3))
+        # check_monthly_summary ham faturaları SQL içinde toplar (~0.1s/çağrı)
+        query_rate = rate(lambda: [fallback_db.check_monthly_summary() for _ in range(5)])
+    finally:
+        stop.set()
+        worker.join()
+
+    print(
+        f"\nPython iş parçacığı: boşta {idle_rate / 1e6:.2f}M tık/s, "
+        f"uzun sorgu sürerken {query_rate / 1e6:.2f}M tık/s"
+    )
+    # GIL sorgu boyunca tutulsaydı işçi neredeyse hiç ilerleyemezdi; tek
+    # çekirdekte CPU'yu sorguyla paylaştığı için boştaki hızın yarısı beklenir
+    assert query_rate > idle_rate * 0.25
+
+
+# =====================================================================
+# TEK GEÇİŞLİ KOVA MOTORU
+# =====================================================================
+
+
+def test_period_buckets_single_pass_scales_linearly():
+    from array import array
+
+    from invoices import PeriodBuckets
+
+    def columns(n):
+        days = array(
+            "q",
+            (20200000 + i % 5 * 10000 + (i % 12 + 1) * 100 + i % 28 + 1 for i in range(n)),
+        )
+        amounts = array("d", (float(i % 1000) + 0.25 for i in range(n)))
+        kdvs = array("d", (float(i % 100) + 0.05 for i in range(n)))
+        return days, amounts, kdvs
+
+    def split_loop(days, amounts, kdvs, years):
+        # Eski yol: her yıl ve ay için satırları yeniden süz (ay başına iki toplam)
+        rows = list(zip(days, amounts, kdvs))
+        result = {}
+        for year in years:
+            result[year] = []
+            for month in range(1, 13):
+                key = year * 100 + month
+                result[year].append(
+                    (
+                        sum(round(tl * 100) for d, tl, _ in rows if d // 100 == key),
+                        sum(round(kdv * 100) for d, _, kdv in rows if d // 100 == key),
+                    )
+                )
+        return result
+
+    timings = {}
+    for n in (10_000, 100_000, 1_000_000):
+        days, amounts, kdvs = columns(n)
+        start = time.perf_counter()
+        engine = PeriodBuckets().add_rows("income", days, amounts, kdvs)
+        for year in engine.years():
+            engine.monthly_results(year)
+            engine.quarterly_results(year, 0.22)
+        engine_time = time.perf_counter() - start
+
+        assert engine.totals()[0] == sum(round(a * 100) for a in amounts)
+        split_time = None
+        if n <= 100_000:
+            # Eski yol 1M satırda saniyeler sürer; yalnızca küçük boyutlarda ölçülür
+            start = time.perf_counter()
+            expected = split_loop(days, amounts, kdvs, engine.years())
+            split_time = time.perf_counter() - start
+            assert {y: [m[:2] for m in engine.months(y)] for y in expected} == expected
+        timings[n] = (engine_time, split_time)
+
+    for n, (engine_time, split_time) in timings.items():
+        print(
+            f"\n{n:>9} satır: tek geçiş {engine_time * 1000:.1f}ms"
+            + (f", ay başına süzme {split_time * 1000:.1f}ms" if split_time else "")
+        )
+
+    for n in (10_000, 100_000):
+        engine_time, split_time = timings[n]
+        assert engine_time * 3 < split_time
+    # Doğrusal ölçeklenir: 1M satır 100k satırın ~10 katı (tek çekirdek payı ile)
+    assert timings[1_000_000][0] < timings[100_000][0] * 20
+
+
+# =====================================================================
+# NUMPY ANALİZ HIZI
+# =====================================================================
+
+
+def test_numpy_analytics_speedup_at_1m_rows():
+    pytest.importorskip("numpy")
+    from analytics import ColumnTotals
+
+    n = 1_000_000
+    firms = [f"Firma {i}" for i in range(500)]
+    columns = {
+        "tarih_gun": [
+            20200000 + i % 5 * 10000 + (i % 12 + 1) * 100 + i % 28 + 1 for i in range(n)
+        ],
+        "toplam_tutar_tl": [float(i % 1000) + 0.125 for i in range(n)],
+        "kdv_tutari": [float(i % 100) + 0.025 for i in range(n)],
+        "toplam_tutar_usd": [float(i % 30) + 0.5 for i in range(n)],
+        "toplam_tutar_eur": [float(i % 25) + 0.75 for i in range(n)],
+        "firma": [firms[i % 500] for i in range(n)],
+    }
+
+    def run(totals):
+        start = time.perf_counter()
+        result = (
+            totals.monthly(),
+            [totals.quarterly(year) for year in range(2020, 2025)],
+            totals.by_firm("TRY"),
+            totals.by_firm("USD", 2022),
+        )
+        return result, time.perf_counter() - start
+
+    timings = {}
+    results = {}
+    for use_numpy in (True, False):
+        start = time.perf_counter()
+        totals = ColumnTotals(columns, use_numpy)
+        load_time = time.perf_counter() - start
+        results[use_numpy], query_time = run(totals)
+        timings[use_numpy] = (load_time, query_time)
+
+    print(
+        f"\n1M satır: NumPy yükleme {timings[True][0] * 1000:.0f}ms, "
+        f"toplamlar {timings[True][1] * 1000:.0f}ms; saf Python yükleme "
+        f"{timings[False][0] * 1000:.0f}ms, toplamlar {timings[False][1] * 1000:.0f}ms"
+    )
+    assert results[True] == results[False]
+    # Sütunlar bir kez yüklenir; her ekran yenilemesi yalnızca toplamları öder
+    assert timings[True][1] * 5 < timings[False][1]
+
+
+# =====================================================================
+# ÇOK YILLIK RAPOR VE YIL DEĞİŞTİRME
+# =====================================================================
+
+
+def test_year_switch_is_instant_after_prefetch(fake_backend):
+    from invoices import PeriodicIncomeCalculator
+
+    _seed(fake_backend.db, 50000)
+    calculator = PeriodicIncomeCalculator(fake_backend)
+    cache = fake_backend.aggregate_cache
+    years = list(range(2020, 2025))
+
+    def key(year):
+        return ("calculations", year, "TRY", 22.0)
+
+    def compute(missing):
+        results = calculator.get_calculations_for_years([k[1] for k in missing])
+        return {k: results[k[1]] for k in missing}
+
+    fake_backend.monthly_totals.rows("income_invoices")  # iki ölçüm de aynı kopyadan okusun
+    start = time.perf_counter()
+    one_by_one = {year: calculator.get_calculations_for_year(year) for year in years}
+    single_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cache.get_or_compute_many([key(y) for y in years], compute)  # prefetch
+    multi_time = time.perf_counter() - start
+
+    switch_times = []
+    for year in years * 20:
+        start = time.perf_counter()
+        (result,) = cache.get_or_compute_many([key(year)], compute)
+        switch_times.append(time.perf_counter() - start)
+        assert result == one_by_one[year]
+
+    print(
+        f"\n5 yıl: tek tek {single_time * 1000:.2f}ms, tek geçiş "
+        f"{multi_time * 1000:.2f}ms; önbellekten yıl değiştirme "
+        f"{max(switch_times) * 1e6:.0f}µs (en kötü)"
+    )
+    # Fatura toplamları zaten bellekte; tek geçiş yalnızca genel gider sorgularını
+    # tek sorguya indirir, asıl kazanç önbellekten yıl değiştirmektir
+    assert cache.stats()["misses"] == len(years)
+    assert max(switch_times) < 0.005
@@ -1,2 +1,1388 @@
-def test_placeholder():
-    pass
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from analytics import ColumnTotals, ANALYTICS_COLUMNS
+from conftest import rust_db_fallback
+from invoices import (
+    AggregateCache,
+    HistoryWriter,
+    Invoice,
+    InvoiceManager,
+    MonthlyTotals,
+    PeriodBuckets,
+    PeriodicIncomeCalculator,
+)
+
+
+def _invoice(fatura_no, tarih, tl, kdv, usd=0.0, eur=0.0):
+    return {
+        "fatura_no": fatura_no,
+        "tarih": tarih,
+        "toplam_tutar_tl": tl,
+        "kdv_tutari": kdv,
+        "toplam_tutar_usd": usd,
+        "toplam_tutar_eur": eur,
+    }
+
+
+# =====================================================================
+# AYLIK TOPLAMLAR (get_monthly_totals)
+# =====================================================================
+
+
+def test_monthly_totals_group_by_month(fallback_db):
+    fallback_db.add_gelir_invoice(_invoice("G-1", "05.01.2024", 120.0, 20.0, 4.0, 3.5))
+    fallback_db.add_gelir_invoice(_invoice("G-2", "31.01.2024", 60.0, 10.0, 2.0, 1.5))
+    fallback_db.add_gelir_invoice(_invoice("G-3", "01.03.2024", 240.0, 40.0))
+    fallback_db.add_gelir_invoice(_invoice("G-4", "01.03.2023", 999.0, 9.0))
+
+    totals = fallback_db.get_monthly_totals("income_invoices", 2024)
+
+    assert [(r["yil"], r["ay"], r["adet"]) for r in totals] == [
+        (2024, 1, 2),
+        (2024, 3, 1),
+    ]
+    assert totals[0]["toplam_tutar_tl"] == 180.0
+    assert totals[0]["kdv_tutari"] == 30.0
+    assert totals[0]["toplam_tutar_usd"] == 6.0
+    assert totals[0]["toplam_tutar_eur"] == 5.0
+
+
+def test_monthly_totals_for_years(fallback_db):
+    fallback_db.add_gider_invoice(_invoice("E-1", "10.12.2022", 50.0, 5.0))
+    fallback_db.add_gider_invoice(_invoice("E-2", "10.06.2023", 70.0, 7.0))
+    fallback_db.add_gider_invoice(_invoice("E-3", "10.06.2024", 90.0, 9.0))
+
+    selected = fallback_db.get_monthly_totals_for_years(
+        "expense_invoices", [2024, 2022]
+    )
+    everything = fallback_db.get_monthly_totals_for_years("expense_invoices")
+
+    assert [(r["yil"], r["ay"]) for r in selected] == [(2022, 12), (2024, 6)]
+    assert len(everything) == 3
+    assert fallback_db.get_monthly_totals_for_years("expense_invoices", []) == []
+
+
+def test_monthly_totals_rejects_unknown_table(fallback_db):
+    with pytest.raises(ValueError):
+        fallback_db.get_monthly_totals("settings; DROP TABLE history", 2024)
+
+
+def test_calculator_uses_sql_totals(fake_backend):
+    db = fake_backend.db
+    db.add_gelir_invoice(_invoice("G-1", "15.02.2024", 1200.0, 200.0))
+    db.add_gider_invoice(_invoice("E-1", "20.02.2024", 600.0, 100.0))
+    db.add_or_update_yearly_expenses(2024, {"subat": 100.0})
+
+    calc = PeriodicIncomeCalculator(fake_backend)
+    monthly, quarterly = calc.get_calculations_for_year(2024)
+    summary = calc.get_yearly_summary(2024)
+
+    assert monthly[1] == {"kesilen": 1000.0, "gelen": 600.0, "kdv": 100.0}
+    assert quarterly[0]["kar"] == 400.0
+    assert quarterly[0]["vergi"] == 400.0 * 0.22
+    assert summary["toplam_gelir"] == 1000.0
+    assert summary["toplam_gider"] == 600.0
+
+
+# =====================================================================
+# AYLIK ÖZET TABLOSU (monthly_summary tetikleyicileri)
+# =====================================================================
+
+
+def test_monthly_summary_follows_insert_update_delete(fallback_db):
+    first = fallback_db.add_gelir_invoice(_invoice("G-1", "05.01.2024", 100.0, 10.0))
+    second = fallback_db.add_gelir_invoice(_invoice("G-2", "20.01.2024", 50.0, 5.0))
+    fallback_db.add_gider_invoice(_invoice("E-1", "01.02.2024", 30.0, 3.0))
+
+    fallback_db.update_gelir_invoice(second, _invoice("G-2", "20.03.2024", 70.0, 7.0))
+    fallback_db.delete_gelir_invoice(first)
+
+    summary = fallback_db.get_monthly_summary(2024)
+    assert [(r["table"], r["month"], r["count"]) for r in summary] == [
+        ("expense_invoices", 2, 1),
+        ("income_invoices", 3, 1),
+    ]
+    assert summary[1]["sum_tl"] == 70.0
+    assert summary[1]["sum_kdv"] == 7.0
+    assert fallback_db.check_monthly_summary() == []
+
+
+def test_monthly_summary_merges_years_within_24_rows(fallback_db):
+    dates = [f"{2015 + i % 10}-{i % 12 + 1:02d}-01" for i in range(600)]
+    fallback_db.add_gelir_invoices_bulk(
+        [_invoice(f"G-{i}", d, 1.0, 0.0) for i, d in enumerate(dates)]
+    )
+    fallback_db.add_gider_invoices_bulk(
+        [_invoice(f"E-{i}", d, 2.0, 0.0) for i, d in enumerate(dates)]
+    )
+
+    summary = fallback_db.get_monthly_summary()
+    assert len(summary) == 24
+    assert sum(r["count"] for r in summary) == 1200
+    assert sum(r["sum_tl"] for r in summary) == 1800.0
+
+
+def test_monthly_summary_check_and_rebuild(fallback_db):
+    fallback_db.add_gelir_invoice(_invoice("G-1", "05.01.2024", 100.0, 10.0))
+    fallback_db.add_gelir_invoice(_invoice("G-2", None, 999.0, 0.0))
+    con = fallback_db._invoices_con
+    # Tetikleyiciler devre dışıyken yapılmış bir yazmayı taklit et
+    con.execute("DELETE FROM monthly_summary")
+    con.execute(
+        "INSERT INTO monthly_summary VALUES('expense_invoices', 2020, 1, 5, 0, 0, 0, 1)"
+    )
+    con.commit()
+
+    problems = fallback_db.check_monthly_summary()
+    assert [(p["table"], p["year"], p["month"]) for p in problems] == [
+        ("expense_invoices", 2020, 1),
+        ("income_invoices", 2024, 1),
+    ]
+    assert problems[1]["expected"]["sum_tl_kurus"] == 10000
+    assert problems[1]["actual"]["count"] == 0
+
+    assert fallback_db.rebuild_monthly_summary() == 1
+    assert fallback_db.check_monthly_summary() == []
+
+
+def test_migration_builds_summary_for_existing_rows(fallback_db):
+    con = fallback_db._invoices_con
+    fallback_db.add_gider_invoice(_invoice("E-1", "10.06.2023", 70.0, 7.0))
+    con.execute("DELETE FROM monthly_summary")
+    con.execute("PRAGMA user_version = 1")
+    con.commit()
+
+    assert fallback_db.run_migrations()["invoices"] >= 2
+    assert fallback_db.get_monthly_totals("expense_invoices", 2023)[0]["adet"] == 1
+
+# =====================================================================
+# TAM METİN ARAMA (search_invoices)
+# =====================================================================
+
+
+def _search_ids(db, query, table="income_invoices", **kwargs):
+    return [inv["id"] for inv in db.search_invoices(query, table, **kwargs)["items"]]
+
+
+def test_search_folds_turkish_letters_and_matches_prefixes(fallback_db):
+    ids = fallback_db.add_gelir_invoices_bulk(
+        [
+            dict(_invoice("A-1", "2024-01-01", 1.0, 0.0), firma="IŞIK Yapı A.Ş."),
+            dict(_invoice("A-2", "2024-01-02", 1.0, 0.0), firma="İstanbul Çelik"),
+            dict(_invoice("A-3", "2024-01-03", 1.0, 0.0), malzeme="Ağaç Palet"),
+        ]
+    )
+
+    assert _search_ids(fallback_db, "ışık") == [ids[0]]
+    assert _search_ids(fallback_db, "isik yapi") == [ids[0]]
+    assert _search_ids(fallback_db, "ISTANBUL") == [ids[1]]
+    assert _search_ids(fallback_db, "çel") == [ids[1]]
+    assert _search_ids(fallback_db, "agac") == [ids[2]]
+    assert _search_ids(fallback_db, "ist") == [ids[1]]
+    assert _search_ids(fallback_db, "ist", table="expense_invoices") == []
+
+
+def test_search_follows_updates_and_deletes(fallback_db):
+    invoice_id = fallback_db.add_gider_invoice(
+        dict(_invoice("E-1", "2024-01-01", 1.0, 0.0), firma="Eski Firma")
+    )
+    fallback_db.update_gider_invoice(
+        invoice_id, dict(_invoice("E-1", "2024-01-01", 1.0, 0.0), firma="Yeni Firma")
+    )
+    assert _search_ids(fallback_db, "eski", "expense_invoices") == []
+    assert _search_ids(fallback_db, "yeni", "expense_invoices") == [invoice_id]
+
+    fallback_db.delete_gider_invoice(invoice_id)
+    assert _search_ids(fallback_db, "yeni", "expense_invoices") == []
+
+
+def test_search_ranks_and_paginates(fallback_db):
+    ids = fallback_db.add_gelir_invoices_bulk(
+        [
+            dict(_invoice(f"X-{i}", "2024-01-01", 1.0, 0.0), malzeme="vida somun")
+            for i in range(5)
+        ]
+        + [dict(_invoice("VIDA-1", "2024-01-01", 1.0, 0.0), malzeme="civata")]
+    )
+
+    first = fallback_db.search_invoices("vida", "income_invoices", limit=4)
+    assert first["total"] == 6
+    # fatura_no eşleşmesi malzeme eşleşmesinden önce gelir
+    assert first["items"][0]["id"] == ids[-1]
+    second = fallback_db.search_invoices(
+        "vida", "income_invoices", limit=4, offset=first["next_offset"]
+    )
+    assert second["next_offset"] is None
+    seen = [i["id"] for i in first["items"] + second["items"]]
+    assert sorted(seen) == sorted(ids)
+
+
+def test_search_ignores_fts_syntax_in_user_input(fallback_db):
+    invoice_id = fallback_db.add_gelir_invoice(
+        dict(_invoice("A-1", "2024-01-01", 1.0, 0.0), firma="Acme")
+    )
+    assert _search_ids(fallback_db, 'acme" (') == [invoice_id]
+    assert _search_ids(fallback_db, '"ac*') == [invoice_id]
+    assert fallback_db.search_invoices("  -- ", "income_invoices")["items"] == []
+    with pytest.raises(ValueError):
+        fallback_db.search_invoices("acme", "settings")
+
+
+def test_search_migration_indexes_existing_rows(fallback_db):
+    con = fallback_db._invoices_con
+    invoice_id = fallback_db.add_gelir_invoice(
+        dict(_invoice("A-1", "2024-01-01", 1.0, 0.0), firma="Öztürk")
+    )
+    con.execute("DELETE FROM income_invoices_fts")
+    con.execute("PRAGMA user_version = 2")
+    con.commit()
+
+    fallback_db.run_migrations()
+    assert _search_ids(fallback_db, "ozturk") == [invoice_id]
+
+# =====================================================================
+# İNDEKSLER VE GÖÇLER (PRAGMA user_version / EXPLAIN QUERY PLAN)
+# =====================================================================
+
+
+def _query_plan(con, sql, params=()):
+    rows = con.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    return " | ".join(r[-1] for r in rows)
+
+
+def test_migrations_set_user_version(fallback_db):
+    for con in (fallback_db._invoices_con, fallback_db._history_con):
+        assert con.execute("PRAGMA user_version").fetchone()[0] >= 1
+
+
+def test_migrations_are_idempotent(fallback_db):
+    before = fallback_db.run_migrations()
+    fallback_db.create_tables()
+    assert fallback_db.run_migrations() == before
+
+
+@pytest.mark.parametrize(
+    "sql, params, index",
+    [
+        (
+            "SELECT * FROM income_invoices ORDER BY tarih DESC LIMIT 25",
+            (),
+            "idx_income_invoices_tarih",
+        ),
+        (
+            "SELECT * FROM expense_invoices ORDER BY tarih DESC LIMIT 25",
+            (),
+            "idx_expense_invoices_tarih",
+        ),
+        (
+            "SELECT id FROM income_invoices WHERE fatura_no = ?",
+            ("A-1",),
+            "idx_income_invoices_fatura_no",
+        ),
+        (
+            "SELECT id FROM expense_invoices WHERE firma = ?",
+            ("ACME",),
+            "idx_expense_invoices_firma",
+        ),
+        (
+            "SELECT * FROM general_expenses WHERE yil = ?",
+            (2024,),
+            "idx_general_expenses_yil",
+        ),
+    ],
+)
+def test_hot_invoice_queries_use_indexes(fallback_db, sql, params, index):
+    assert index in _query_plan(fallback_db._invoices_con, sql, params)
+
+
+def test_monthly_totals_query_uses_tarih_index(fallback_db):
+    plan = _query_plan(
+        fallback_db._invoices_con,
+        "SELECT substr(tarih,1,4) AS yil, substr(tarih,6,2) AS ay, "
+        "TOTAL(toplam_tutar_tl) FROM income_invoices "
+        "WHERE tarih >= ? AND tarih < ? GROUP BY yil, ay",
+        ("2024-01-01", "2025-01-01"),
+    )
+    assert "idx_income_invoices_tarih" in plan
+
+
+def test_history_range_query_uses_timestamp_index(fallback_db):
+    plan = _query_plan(
+        fallback_db._history_con,
+        "SELECT id,action,details,timestamp FROM history "
+        "WHERE timestamp >= ? AND timestamp <= ? ORDER BY timestamp DESC",
+        ("2024-01-01", "2024-12-31"),
+    )
+    assert "idx_history_timestamp" in plan
+
+
+# =====================================================================
+# KEYSET SAYFALAMA (get_invoices_page)
+# =====================================================================
+
+
+def _seed_for_paging(db):
+    dates = ["03.01.2024", "03.01.2024", None, "15.02.2023", "03.01.2024", None]
+    for i in range(23):
+        data = {"fatura_no": f"P-{i}"}
+        if dates[i % len(dates)]:
+            data["tarih"] = dates[i % len(dates)]
+        db.add_gelir_invoice(data)
+
+
+def _expected_order(db, order_by):
+    rows = db.get_all_gelir_invoices(None, None, "id ASC")
+    key, ascending = {
+        "id DESC": ("id", False),
+        "id ASC": ("id", True),
+        "tarih DESC": ("tarih", False),
+        "tarih ASC": ("tarih", True),
+    }[order_by]
+
+    def sort_key(r):
+        if key == "id":
+            return (r["id"],)
+        tarih = r["tarih"]
+        iso = "-".join(reversed(tarih.split("."))) if tarih else ""
+        return (tarih is not None, iso, r["id"])
+
+    return [r["id"] for r in sorted(rows, key=sort_key, reverse=not ascending)]
+
+
+@pytest.mark.parametrize("order_by", ["id DESC", "id ASC", "tarih DESC", "tarih ASC"])
+def test_keyset_pages_walk_full_order(fallback_db, order_by):
+    _seed_for_paging(fallback_db)
+    expected = _expected_order(fallback_db, order_by)
+
+    seen, cursor = [], None
+    while True:
+        page = fallback_db.get_invoices_page(
+            "income_invoices", cursor, 5, "next", order_by
+        )
+        seen.extend(inv["id"] for inv in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == expected
+
+    # Son sayfadan geriye doğru yürüme; başa varınca ilk sayfa döner
+    page = fallback_db.get_invoices_page("income_invoices", None, 5, "prev", order_by)
+    ids = [inv["id"] for inv in page["items"]]
+    assert page["next_cursor"] is None
+    assert ids == expected[-5:]
+    end = len(expected) - 5
+    while page["prev_cursor"] is not None:
+        page = fallback_db.get_invoices_page(
+            "income_invoices", page["prev_cursor"], 5, "prev", order_by
+        )
+        ids = [inv["id"] for inv in page["items"]]
+        if page["prev_cursor"] is None:
+            assert ids == expected[:5]
+        else:
+            assert ids == expected[end - 5 : end]
+            end -= 5
+
+
+def test_keyset_page_seeks_on_tarih_index(fallback_db):
+    plan = _query_plan(
+        fallback_db._invoices_con,
+        "SELECT * FROM income_invoices WHERE tarih = ? AND id < ? "
+        "ORDER BY id DESC LIMIT 26",
+        ("2024-01-03", 10),
+    )
+    assert "idx_income_invoices_tarih (tarih=? AND rowid<?)" in plan
+
+
+def test_invoice_count_cache_follows_writes(fallback_db):
+    assert fallback_db.get_gider_invoice_count() == 0
+    ids = [fallback_db.add_gider_invoice({"fatura_no": f"C-{i}"}) for i in range(4)]
+    assert fallback_db.get_gider_invoice_count() == 4
+    fallback_db.delete_gider_invoice(ids[0])
+    fallback_db.delete_multiple_gider_invoices(ids[1:3])
+    assert fallback_db.get_gider_invoice_count() == 1
+
+
+# =====================================================================
+# TOPLU EKLEME (add_*_invoices_bulk)
+# =====================================================================
+
+
+def test_bulk_insert_returns_ids_in_order(fallback_db):
+    rows = [_invoice(f"B-{i}", f"2024-02-{i + 1:02d}", 100.0 + i, 18.0) for i in range(5)]
+    fallback_db.add_gelir_invoice(_invoice("A-0", "2024-01-01", 1.0, 0.0))
+
+    ids = fallback_db.add_gelir_invoices_bulk(rows)
+
+    assert len(ids) == 5
+    for new_id, row in zip(ids, rows):
+        assert fallback_db.get_gelir_invoice_by_id(new_id)["fatura_no"] == row["fatura_no"]
+    assert fallback_db.get_gelir_invoice_count() == 6
+    assert fallback_db.add_gider_invoices_bulk([]) == []
+
+
+def test_bulk_insert_rolls_back_on_error(fallback_db):
+    rows = [_invoice("OK-1", "2024-03-01", 10.0, 1.0), _invoice(None, "2024-03-02", 5.0, 1.0)]
+    with pytest.raises(Exception):
+        fallback_db.add_gider_invoices_bulk(rows)
+    assert fallback_db.get_gider_invoice_count() == 0
+
+
+def test_manager_bulk_add_writes_history_in_one_batch(fake_backend):
+    manager = InvoiceManager(fake_backend)
+    data = [
+        {"fatura_no": "Q-1", "tarih": "05.04.2024", "firma": "Acme", "toplam_tutar": 120, "birim": "TL"},
+        {"fatura_no": "Q-2", "tarih": "06.04.2024", "firma": "Beta", "toplam_tutar": -5, "birim": "TL"},
+        {"fatura_no": "Q-3", "tarih": "07.04.2024", "firma": "Gama", "toplam_tutar": 240, "birim": "TL"},
+    ]
+
+    ids = manager.add_invoices_bulk("outgoing", data)
+
+    assert ids[1] is None and ids[0] and ids[2]
+    assert fake_backend.db.get_gelir_invoice_count() == 2
+    assert manager.history_writer.flush(timeout=5)
+    history = fake_backend.db.get_recent_history(10)
+    assert [h["action"] for h in history] == ["EKLEME_GELIR", "EKLEME_GELIR"]
+
+
+# =====================================================================
+# TOPLU DUPLICATE KONTROLÜ (find_existing_fatura_nos)
+# =====================================================================
+
+
+def test_find_existing_fatura_nos_checks_both_tables(fallback_db):
+    fallback_db.add_gelir_invoice(_invoice("G-1", "2024-01-01", 1.0, 0.0))
+    fallback_db.add_gider_invoice(_invoice("E-1", "2024-01-02", 1.0, 0.0))
+
+    found = fallback_db.find_existing_fatura_nos(["G-1", "E-1", "X-1", "G-1", "", None])
+
+    assert sorted(found) == ["E-1", "G-1"]
+    assert fallback_db.find_existing_fatura_nos([]) == []
+
+
+def test_find_existing_fatura_nos_spans_chunks(fallback_db):
+    fallback_db.add_gelir_invoices_bulk(
+        [_invoice(f"N-{i}", "2024-01-01", 1.0, 0.0) for i in range(0, 1000, 2)]
+    )
+    found = fallback_db.find_existing_fatura_nos([f"N-{i}" for i in range(1000)])
+    assert sorted(found) == sorted(f"N-{i}" for i in range(0, 1000, 2))
+
+
+def test_fatura_no_lookup_uses_index(fallback_db):
+    plan = _query_plan(
+        fallback_db._invoices_con,
+        "SELECT fatura_no FROM expense_invoices WHERE fatura_no IN (?,?)",
+        ("A", "B"),
+    )
+    assert "idx_expense_invoices_fatura_no" in plan
+
+
+# =====================================================================
+# TARİH ARALIĞI (get_invoices_between)
+# =====================================================================
+
+
+def test_invoices_between_is_inclusive_and_ordered(fallback_db):
+    dates = ["2023-12-31", "2024-01-01", "2024-02-15", "2024-03-31", "2024-04-01", None]
+    for i, tarih in enumerate(dates, 1):
+        fallback_db.add_gelir_invoice(_invoice(f"R-{i}", tarih, 1.0, 0.0))
+
+    rows = fallback_db.get_invoices_between("income_invoices", "2024-01-01", "2024-03-31")
+    assert [r["fatura_no"] for r in rows] == ["R-2", "R-3", "R-4"]
+    assert rows[0]["tarih"] == "01.01.2024"
+
+    rows = fallback_db.get_invoices_between(
+        "income_invoices", "2024-02-01", None, order_by="tarih DESC", limit=2
+    )
+    assert [r["fatura_no"] for r in rows] == ["R-5", "R-4"]
+
+
+def test_invoices_between_rejects_unknown_order(fallback_db):
+    with pytest.raises(ValueError):
+        fallback_db.get_invoices_between("income_invoices", order_by="firma; DROP")
+
+
+def test_invoices_between_uses_tarih_index(fallback_db):
+    plan = _query_plan(
+        fallback_db._invoices_con,
+        "SELECT * FROM income_invoices WHERE tarih IS NOT NULL AND tarih >= ? "
+        "AND tarih <= ? ORDER BY tarih ASC, id ASC",
+        ("2024-01-01", "2024-03-31"),
+    )
+    assert "idx_income_invoices_tarih (tarih>? AND tarih<?)" in plan
+
+
+# =====================================================================
+# MEVCUT YILLAR (get_available_years)
+# =====================================================================
+
+
+def test_available_years_merges_sources(fake_backend):
+    db = fake_backend.db
+    rows = [_invoice(f"Y-{i}", f"{y}-06-01", 1.0, 0.0) for i, y in enumerate([2021, 2021, 2023])]
+    db.add_gelir_invoices_bulk(rows)
+    db.add_gider_invoice(_invoice("Y-G", "2019-12-31", 1.0, 0.0))
+    db.add_gider_invoice(_invoice("Y-N", None, 1.0, 0.0))
+    db.add_or_update_yearly_expenses(2016, {"mart": 250.0})
+    db.add_or_update_yearly_expenses(2015, {})
+
+    assert db.get_available_years() == [2016, 2019, 2021, 2023]
+
+    years = PeriodicIncomeCalculator(fake_backend).get_year_range()
+    expected = {"2016", "2019", "2021", "2023", str(datetime.now().year)}
+    assert years == sorted(expected, reverse=True)
+
+
+def test_available_years_skip_scans_tarih_index(fallback_db):
+    plan = _query_plan(fallback_db._invoices_con, rust_db_fallback._AVAILABLE_YEARS_QUERY)
+    assert plan.count("USING COVERING INDEX idx_income_invoices_tarih (tarih>?)") == 2
+    assert plan.count("USING COVERING INDEX idx_expense_invoices_tarih (tarih>?)") == 2
+
+
+# =====================================================================
+# SÜTUNSAL OKUMA (fetch_columns)
+# =====================================================================
+
+
+def test_fetch_columns_returns_column_arrays(fallback_db):
+    fallback_db.add_gelir_invoices_bulk(
+        [
+            _invoice("F-1", "2023-05-01", 100.0, 18.0),
+            _invoice("F-2", "2024-01-10", 200.5, 36.0),
+            _invoice("F-3", "2024-07-20", None, None),
+        ]
+    )
+
+    cols = fallback_db.fetch_columns(
+        "income_invoices", ["fatura_no", "tarih", "toplam_tutar_tl", "kdv_tutari"]
+    )
+    assert cols["fatura_no"] == ["F-1", "F-2", "F-3"]
+    assert cols["tarih"] == ["2023-05-01", "2024-01-10", "2024-07-20"]
+    assert list(cols["toplam_tutar_tl"]) == [100.0, 200.5, 0.0]
+    assert sum(cols["kdv_tutari"]) == 54.0
+    if not rust_db_fallback.NUMPY_AVAILABLE:
+        assert cols["toplam_tutar_tl"].typecode == "d"
+
+    cols = fallback_db.fetch_columns(
+        "income_invoices", ["toplam_tutar_tl"], "tarih >= ? AND tarih < ?",
+        ("2024-01-01", "2025-01-01"),
+    )
+    assert list(cols["toplam_tutar_tl"]) == [200.5, 0.0]
+
+
+def test_fetch_columns_rejects_unknown_columns(fallback_db):
+    with pytest.raises(ValueError):
+        fallback_db.fetch_columns("income_invoices", ["toplam_tutar_tl", "1; DROP"])
+    with pytest.raises(ValueError):
+        fallback_db.fetch_columns("settings", ["id"])
+
+
+# =====================================================================
+# FATURA KAYIT TİPİ (Invoice / row_factory)
+# =====================================================================
+
+
+def test_invoice_record_behaves_like_row_dict(fallback_db):
+    fallback_db.add_gelir_invoice(_invoice("F-1", "2024-03-05", 120.0, 20.0))
+    as_dict = fallback_db.get_all_gelir_invoices(None, None)[0]
+
+    fallback_db.row_factory = Invoice
+    inv = fallback_db.get_all_gelir_invoices(None, None)[0]
+
+    assert isinstance(inv, Invoice)
+    assert dict(inv) == as_dict
+    assert inv["tarih"] == "05.03.2024"
+    assert inv.tarih_iso == "2024-03-05"
+    assert inv.get("toplam_tutar_tl") == 120.0
+    assert inv.get("tur") is None
+    assert "firma" in inv and "tur" not in inv
+    with pytest.raises(KeyError):
+        inv["tarih_iso"]
+    with pytest.raises(AttributeError):
+        inv.extra = 1
+
+
+def test_row_factory_applies_to_all_invoice_reads(fallback_db):
+    invoice_id = fallback_db.add_gider_invoice(_invoice("G-1", "2024-01-01", 50.0, 0.0))
+    fallback_db.row_factory = Invoice
+
+    assert isinstance(fallback_db.get_gider_invoice_by_id(invoice_id), Invoice)
+    assert fallback_db.get_gider_invoice_by_id(invoice_id + 1) is None
+    page = fallback_db.get_invoices_page("expense_invoices", limit=10)
+    assert [i["fatura_no"] for i in page["items"]] == ["G-1"]
+    between = fallback_db.get_invoices_between("expense_invoices", "2024-01-01")
+    assert isinstance(between[0], Invoice)
+
+
+# =====================================================================
+# GEÇMİŞ YAZICI (HistoryWriter)
+# =====================================================================
+
+
+def test_history_writer_batches_records(fake_backend):
+    batches = []
+    db = fake_backend.db
+
+    def add_history_records(rows):
+        batches.append(len(rows))
+        db.add_history_records(rows)
+
+    fake_backend.db = SimpleNamespace(add_history_records=add_history_records)
+    writer = HistoryWriter(fake_backend, batch_size=3, flush_interval=5.0)
+
+    writer.add_many((f"A{i}", "d") for i in range(7))
+    assert writer.flush(timeout=5)
+
+    # flush beklemeden yazdırır; kayıtlar en fazla batch_size'lık transaction'larla gelir
+    assert sum(batches) == 7 and max(batches) <= 3
+    actions = [h["action"] for h in db.get_recent_history(10)]
+    assert sorted(actions) == [f"A{i}" for i in range(7)]
+    writer.close()
+    assert not writer._thread.is_alive()
+
+
+def test_history_writer_close_drains_queue(fake_backend):
+    writer = HistoryWriter(fake_backend, flush_interval=5.0)
+    writer.add("EKLEME_GELIR", "x")
+    writer.close()
+    assert [h["action"] for h in fake_backend.db.get_recent_history(5)] == ["EKLEME_GELIR"]
+    # Kapandıktan sonra eklenen kayıt yeni iş parçacığıyla yazılır
+    writer.add("SİLME_GELIR", "y")
+    assert writer.flush(timeout=5)
+    assert len(fake_backend.db.get_recent_history(5)) == 2
+    writer.close()
+
+
+def test_backup_flushes_pending_history_first(fake_backend, tmp_path):
+    from backup import LocalBackupManager
+
+    manager = InvoiceManager(fake_backend)
+    data = {"fatura_no": "B-1", "tarih": "01.02.2024", "toplam_tutar": 10, "birim": "TL"}
+    manager.handle_invoice_operation("add", "outgoing", data)
+    flushed = []
+
+    def before_backup():
+        flushed.append(manager.history_writer.flush(timeout=5))
+        return flushed[-1]
+
+    backup = LocalBackupManager("Database", before_backup=before_backup)
+    ok, _ = backup.create_backup(str(tmp_path / "yedek.zip"))
+    assert ok and flushed == [True]
+    assert fake_backend.db.get_recent_history(5)[0]["action"] == "EKLEME_GELIR"
+
+    failing = LocalBackupManager("Database", before_backup=lambda: False)
+    ok, _ = failing.create_backup(str(tmp_path / "yedek2.zip"))
+    assert not ok and not (tmp_path / "yedek2.zip").exists()
+    manager.history_writer.close()
+
+
+# =====================================================================
+# TRANSACTION
+# =====================================================================
+
+
+def test_transaction_commits_once_at_block_exit(fallback_db):
+    with fallback_db.transaction():
+        fallback_db.add_gelir_invoice(_invoice("T-1", "01.01.2024", 10.0, 2.0))
+        fallback_db.add_or_update_yearly_expenses(2024, {"ocak": 5})
+        fallback_db.add_history_record("EKLEME_GELIR", "T-1")
+        # Okuyucular commit edilmemiş yazmaları görmez
+        assert fallback_db.find_existing_fatura_nos(["T-1"]) == []
+        assert fallback_db.get_recent_history(5) == []
+
+    assert fallback_db.find_existing_fatura_nos(["T-1"]) == ["T-1"]
+    assert fallback_db.get_yearly_expenses(2024)["ocak"] == 5
+    assert len(fallback_db.get_recent_history(5)) == 1
+
+
+def test_transaction_rolls_back_all_databases_on_error(fallback_db):
+    fallback_db.add_gelir_invoice(_invoice("T-0", "01.01.2024", 10.0, 2.0))
+    assert fallback_db.get_gelir_invoice_count() == 1
+
+    with pytest.raises(ZeroDivisionError):
+        with fallback_db.transaction():
+            fallback_db.add_gelir_invoices_bulk(
+                [_invoice(f"T-{i}", "01.02.2024", 1.0, 0.0) for i in range(1, 4)]
+            )
+            fallback_db.add_history_record("EKLEME_GELIR", "T")
+            1 / 0
+
+    assert fallback_db.get_gelir_invoice_count() == 1
+    assert fallback_db.get_recent_history(5) == []
+    assert fallback_db.check_monthly_summary() == []
+    # Kilit bırakıldı: sonraki yazmalar normal commit eder
+    fallback_db.add_gelir_invoice(_invoice("T-9", "01.01.2024", 1.0, 0.0))
+    assert fallback_db.get_gelir_invoice_count() == 2
+
+
+def test_nested_transaction_is_a_savepoint(fallback_db):
+    with fallback_db.transaction():
+        fallback_db.add_gelir_invoice(_invoice("N-1", "01.01.2024", 10.0, 2.0))
+        with pytest.raises(ValueError):
+            with fallback_db.transaction():
+                fallback_db.add_gelir_invoice(_invoice("N-2", "01.01.2024", 5.0, 1.0))
+                fallback_db.add_history_record("EKLEME_GELIR", "N-2")
+                raise ValueError
+        with fallback_db.transaction():
+            fallback_db.add_gelir_invoice(_invoice("N-3", "01.01.2024", 7.0, 1.0))
+
+    assert sorted(fallback_db.find_existing_fatura_nos(["N-1", "N-2", "N-3"])) == [
+        "N-1",
+        "N-3",
+    ]
+    assert fallback_db.get_recent_history(5) == []
+    assert fallback_db.check_monthly_summary() == []
+
+
+def test_commit_without_begin_raises(fallback_db):
+    with pytest.raises(RuntimeError):
+        fallback_db.commit()
+    fallback_db.begin()
+    fallback_db.add_gider_invoice(_invoice("E-1", "01.01.2024", 10.0, 2.0))
+    fallback_db.rollback()
+    assert fallback_db.get_gider_invoice_count() == 0
+    with pytest.raises(RuntimeError):
+        fallback_db.rollback()
+
+
+def test_manager_transaction_groups_invoice_and_history(fake_backend):
+    manager = InvoiceManager(fake_backend)
+    db = fake_backend.db
+
+    def data(no):
+        return {"fatura_no": no, "tarih": "01.03.2024", "toplam_tutar": 10, "birim": "TL"}
+
+    with manager.transaction():
+        manager.handle_invoice_operation("add", "outgoing", data("M-1"))
+        manager.handle_invoice_operation("add", "incoming", data("M-2"))
+    # Geçmiş arka plan yazıcısını beklemeden aynı commit'le yazıldı
+    assert manager.history_writer._thread is None
+    assert sorted(h["action"] for h in db.get_recent_history(5)) == [
+        "EKLEME_GELIR",
+        "EKLEME_GIDER",
+    ]
+
+    with pytest.raises(RuntimeError):
+        with manager.transaction():
+            manager.handle_invoice_operation("add", "outgoing", data("M-3"))
+            raise RuntimeError("iptal")
+    assert db.find_existing_fatura_nos(["M-3"]) == []
+    assert len(db.get_recent_history(5)) == 2
+
+
+def test_delete_multiple_invoices_chunks_in_one_transaction(fake_backend):
+    manager = InvoiceManager(fake_backend)
+    manager.DELETE_CHUNK_SIZE = 3
+    db = fake_backend.db
+    ids = db.add_gelir_invoices_bulk(
+        [_invoice(f"D-{i}", "01.01.2024", 1.0, 0.0) for i in range(10)]
+    )
+    commits = []
+    real_commit = db.commit
+    db.commit = lambda: (commits.append(1), real_commit())[1]
+
+    assert manager.delete_multiple_invoices("outgoing", ids[:8]) == 8
+    assert commits == [1]
+    assert db.get_gelir_invoice_count() == 2
+
+
+# =====================================================================
+# TAM SAYI KURUŞ TUTARLARI
+# =====================================================================
+
+
+def test_to_minor_rounds_half_away_from_zero():
+    assert rust_db_fallback._to_minor(12.345) == 1235
+    assert rust_db_fallback._to_minor(0.125) == 13
+    assert rust_db_fallback._to_minor(-0.125) == -13
+    assert rust_db_fallback._to_minor("3.10") == 310
+    assert rust_db_fallback._to_minor(None) is None
+    assert rust_db_fallback._to_minor("abc") is None
+
+
+def test_kurus_totals_are_exact(fake_backend):
+    db = fake_backend.db
+    db.add_gelir_invoices_bulk(
+        [_invoice(f"K-{i}", "01.01.2024", 0.1, 0.02) for i in range(1000)]
+    )
+    # Float toplamı birikim hatası verir; kuruş toplamı vermez
+    assert sum([0.1] * 1000) != 100.0
+
+    totals = db.get_monthly_totals("income_invoices", 2024)[0]
+    assert totals["toplam_tutar_tl_kurus"] == 10000
+    assert totals["toplam_tutar_tl"] == 100.0
+    summary = db.get_monthly_summary(2024)[0]
+    assert (summary["sum_tl_kurus"], summary["sum_kdv_kurus"]) == (10000, 2000)
+
+    monthly, quarterly = PeriodicIncomeCalculator(fake_backend).get_calculations_for_year(2024)
+    assert monthly[0]["kesilen"] == 80.0
+    assert quarterly[0]["vergi"] == 17.6
+
+
+def test_minor_unit_migration_backfills_existing_rows(fallback_db):
+    con = fallback_db._invoices_con
+    fallback_db.add_gider_invoice(_invoice("E-1", "10.06.2023", 70.05, 7.01, 2.5))
+    # v4 öncesi bir veritabanını taklit et: kuruş sütunları boş
+    con.execute("UPDATE expense_invoices SET toplam_tutar_tl_kurus = NULL, kdv_tutari_kurus = NULL")
+    con.execute("PRAGMA user_version = 3")
+    con.commit()
+
+    assert fallback_db.run_migrations()["invoices"] >= 4
+    row = con.execute(
+        "SELECT toplam_tutar_tl_kurus, kdv_tutari_kurus, toplam_tutar_usd_cent "
+        "FROM expense_invoices"
+    ).fetchone()
+    assert tuple(row) == (7005, 701, 250)
+    assert fallback_db.get_monthly_totals("expense_invoices", 2023)[0]["toplam_tutar_tl"] == 70.05
+    assert fallback_db.check_monthly_summary() == []
+
+
+# =====================================================================
+# TAMSAYI GÜN NUMARASI (tarih_gun)
+# =====================================================================
+
+
+def test_day_number_follows_writes_and_feeds_columns(fallback_db):
+    first = fallback_db.add_gelir_invoice(_invoice("T-1", "05.03.2024", 10.0, 1.0))
+    fallback_db.add_gelir_invoices_bulk(
+        [_invoice("T-2", "2023-12-31", 20.0, 2.0), _invoice("T-3", None, 30.0, 3.0)]
+    )
+    fallback_db.update_gelir_invoice(first, _invoice("T-1", "06.04.2024", 10.0, 1.0))
+
+    cols = fallback_db.fetch_columns(
+        "income_invoices", ["fatura_no", "tarih_gun", "yil", "ay"]
+    )
+    assert cols["fatura_no"] == ["T-1", "T-2", "T-3"]
+    assert list(cols["tarih_gun"]) == [20240406, 20231231, 0]
+    assert list(cols["yil"]) == [2024, 2023, 0]
+    assert list(cols["ay"]) == [4, 12, 0]
+
+    cols = fallback_db.fetch_columns(
+        "income_invoices", ["toplam_tutar_tl"], "tarih_gun BETWEEN ? AND ?",
+        (20240101, 20241231),
+    )
+    assert list(cols["toplam_tutar_tl"]) == [10.0]
+
+
+def test_day_number_migration_backfills_and_indexes(fallback_db):
+    con = fallback_db._invoices_con
+    fallback_db.add_gider_invoice(_invoice("T-1", "10.06.2023", 70.0, 7.0))
+    con.execute("UPDATE expense_invoices SET tarih_gun = NULL")
+    con.execute("DROP INDEX idx_expense_invoices_tarih_gun")
+    con.execute("PRAGMA user_version = 4")
+    con.commit()
+
+    assert fallback_db.run_migrations()["invoices"] >= 5
+    assert con.execute("SELECT tarih_gun FROM expense_invoices").fetchone()[0] == 20230610
+    plan = _query_plan(
+        con, "SELECT id FROM expense_invoices WHERE tarih_gun BETWEEN ? AND ?", (1, 2)
+    )
+    assert "idx_expense_invoices_tarih_gun" in plan
+
+
+def test_reads_format_dates_without_strptime(fallback_db, monkeypatch):
+    fallback_db.add_gelir_invoices_bulk(
+        [_invoice(f"T-{i}", "2024-02-29", 1.0, 0.0) for i in range(100)]
+        + [_invoice("T-x", None, 1.0, 0.0)]
+    )
+
+    class NoParse(datetime):
+        @classmethod
+        def strptime(cls, *args):
+            raise AssertionError("satır okurken strptime çağrıldı")
+
+    monkeypatch.setattr(rust_db_fallback, "datetime", NoParse)
+    rows = fallback_db.get_all_gelir_invoices(None, None)
+    assert {r["tarih"] for r in rows} == {"29.02.2024", None}
+
+    fallback_db.row_factory = Invoice
+    records = fallback_db.get_all_gelir_invoices(None, None)
+    assert records[0].tarih == "29.02.2024"
+    assert records[0].tarih_iso == "2024-02-29"
+
+
+# =====================================================================
+# ANLIK GÖRÜNTÜ (snapshot)
+# =====================================================================
+
+
+def test_snapshot_reads_a_consistent_view(fallback_db):
+    fallback_db.add_gelir_invoice(_invoice("T-1", "01.01.2024", 10.0, 2.0))
+
+    with fallback_db.snapshot():
+        # Blok sürerken yapılan yazma yazıcıyı beklemeden commit edilir
+        fallback_db.add_gelir_invoice(_invoice("T-2", "02.01.2024", 20.0, 4.0))
+        assert fallback_db.get_gelir_invoice_count() == 1
+        assert fallback_db.find_existing_fatura_nos(["T-1", "T-2"]) == ["T-1"]
+        assert list(fallback_db.fetch_columns("income_invoices", ["toplam_tutar_tl"])[
+            "toplam_tutar_tl"
+        ]) == [10.0]
+        assert fallback_db.get_monthly_totals("income_invoices", 2024)[0]["kdv_tutari"] == 2.0
+        with fallback_db.snapshot():
+            assert fallback_db.get_gelir_invoice_count() == 1
+
+    assert fallback_db.get_gelir_invoice_count() == 2
+    assert sorted(fallback_db.find_existing_fatura_nos(["T-1", "T-2"])) == ["T-1", "T-2"]
+
+
+def test_snapshot_is_per_thread(fallback_db):
+    import threading
+
+    fallback_db.add_gelir_invoice(_invoice("T-1", "01.01.2024", 10.0, 2.0))
+    seen = []
+
+    with fallback_db.snapshot():
+        fallback_db.add_gelir_invoice(_invoice("T-2", "02.01.2024", 20.0, 4.0))
+        # Başka bir iş parçacığı bu bloğun görüntüsünü değil güncel veriyi okur
+        t = threading.Thread(target=lambda: seen.append(fallback_db.get_gelir_invoice_count()))
+        t.start()
+        t.join()
+        assert fallback_db.get_gelir_invoice_count() == 1
+
+    assert seen == [2]
+
+
+# =====================================================================
+# DEĞİŞİKLİK AKIŞI (changes_since / data_version)
+# =====================================================================
+
+
+def test_changes_since_lists_writes_in_order(fallback_db):
+    start = fallback_db.latest_change_seq()
+    gelir_id = fallback_db.add_gelir_invoice(_invoice("T-1", "01.01.2024", 10.0, 2.0))
+    fallback_db.update_gelir_invoice(gelir_id, _invoice("T-1", "02.01.2024", 12.0, 2.4))
+    gider_id = fallback_db.add_gider_invoice(_invoice("G-1", "01.01.2024", 5.0, 1.0))
+    fallback_db.delete_gider_invoice(gider_id)
+    fallback_db.add_or_update_yearly_expenses(2024, {"ocak": 5})
+    with pytest.raises(ZeroDivisionError):
+        with fallback_db.transaction():
+            fallback_db.add_gelir_invoice(_invoice("T-2", "03.01.2024", 1.0, 0.0))
+            1 / 0
+
+    feed = fallback_db.changes_since(start)
+    assert not feed["reset"]
+    assert [(c["table"], c["op"], c["id"]) for c in feed["changes"]] == [
+        ("income_invoices", "insert", gelir_id),
+        ("income_invoices", "update", gelir_id),
+        ("expense_invoices", "insert", gider_id),
+        ("expense_invoices", "delete", gider_id),
+        ("general_expenses", "insert", 1),
+    ]
+    assert feed["seq"] == feed["changes"][-1]["seq"] == fallback_db.latest_change_seq()
+    assert fallback_db.changes_since(feed["seq"])["changes"] == []
+
+
+def test_data_version_detects_other_processes(fallback_db):
+    import sqlite3
+
+    version = fallback_db.data_version()
+    assert fallback_db.data_version() == version
+    seq = fallback_db.latest_change_seq()
+
+    # Başka bir süreç gibi ayrı bağlantıdan yazma
+    other = sqlite3.connect(fallback_db._db_paths["invoices"])
+    other.execute("INSERT INTO corporate_tax(yil, ocak) VALUES (2024, 1)")
+    other.commit()
+    other.close()
+
+    assert fallback_db.data_version() != version
+    changes = fallback_db.changes_since(seq)["changes"]
+    assert [(c["table"], c["op"]) for c in changes] == [("corporate_tax", "insert")]
+
+
+def test_changes_since_resets_when_history_is_gone(fallback_db):
+    fallback_db.add_gelir_invoices_bulk(
+        [_invoice(f"T-{i}", "01.01.2024", 1.0, 0.0) for i in range(rust_db_fallback._CHANGES_KEEP + 1000)]
+    )
+    # Budanmış kayıtlar ve geri yüklemede geriye giden sıra numarası
+    assert fallback_db.changes_since(0)["reset"]
+    assert fallback_db.changes_since(fallback_db.latest_change_seq() + 5)["reset"]
+    count = fallback_db._invoices_con.execute("SELECT COUNT(*) FROM changes").fetchone()[0]
+    assert count <= rust_db_fallback._CHANGES_KEEP + 1000
+
+
+# =====================================================================
+# ASYNC CEPHE (AsyncDatabase)
+# =====================================================================
+
+
+def test_async_database_runs_concurrent_awaits(fallback_db):
+    import asyncio
+
+    from async_db import AsyncDatabase
+
+    adb = AsyncDatabase(fallback_db)
+
+    async def scenario():
+        ids = await asyncio.gather(
+            *(
+                adb.add_gelir_invoice(_invoice(f"A-{i}", "01.03.2024", 10.0, 2.0))
+                for i in range(20)
+            )
+        )
+        count, page, totals = await asyncio.gather(
+            adb.get_gelir_invoice_count(),
+            adb.get_invoices_page("income_invoices", None, 5),
+            adb.get_monthly_totals("income_invoices", 2024),
+        )
+        await adb.delete_gelir_invoice(ids[0])
+        return ids, count, page, totals, await adb.get_gelir_invoice_count()
+
+    try:
+        ids, count, page, totals, after_delete = asyncio.run(scenario())
+    finally:
+        adb.close()
+
+    assert len(set(ids)) == 20
+    assert count == 20
+    assert len(page["items"]) == 5
+    assert [(t["ay"], t["toplam_tutar_tl"]) for t in totals] == [(3, 200.0)]
+    assert after_delete == 19
+
+
+def test_async_database_rejects_thread_bound_blocks(fallback_db):
+    import asyncio
+
+    from async_db import AsyncDatabase
+
+    adb = AsyncDatabase(fallback_db)
+
+    def export():
+        # Snapshot bloğu tek çağrıda, aynı iş parçacığında çalışır
+        with fallback_db.snapshot():
+            return fallback_db.get_gelir_invoice_count()
+
+    try:
+        with pytest.raises(AttributeError):
+            adb.transaction()
+        assert asyncio.run(adb.run(export)) == 0
+    finally:
+        adb.close()
+
+
+# =====================================================================
+# TEK GEÇİŞLİ KOVA MOTORU (PeriodBuckets)
+# =====================================================================
+
+
+def test_period_buckets_rows_match_monthly_totals(fallback_db):
+    fallback_db.add_gelir_invoices_bulk(
+        [
+            _invoice("B-1", "05.01.2024", 120.0, 20.0),
+            _invoice("B-2", "31.01.2024", 0.125, 0.02),
+            _invoice("B-3", "01.05.2024", 240.0, 40.0),
+            _invoice("B-4", "01.05.2023", 999.0, 9.0),
+        ]
+    )
+    columns = fallback_db.fetch_columns(
+        "income_invoices", ["tarih_gun", "toplam_tutar_tl", "kdv_tutari"]
+    )
+    from_rows = PeriodBuckets().add_rows(
+        "income", columns["tarih_gun"], columns["toplam_tutar_tl"], columns["kdv_tutari"]
+    )
+    from_totals = PeriodBuckets().add_monthly_totals(
+        "income", fallback_db.get_monthly_totals_for_years("income_invoices")
+    )
+
+    assert from_rows.years() == from_totals.years() == [2023, 2024]
+    for year in (2023, 2024):
+        assert from_rows.months(year) == from_totals.months(year)
+    # 0.125 TL → 13 kuruş (yarımlar sıfırdan uzağa, SQL tarafıyla aynı)
+    assert from_rows.months(2024)[0] == (12013, 2002, 0, 0, 0)
+    assert from_rows.totals() == (135913, 6902, 0, 0, 0)
+
+
+def test_period_buckets_quarterly_tax_is_cumulative():
+    engine = PeriodBuckets()
+    # Ç1 kâr 1000, Ç2 zarar 500 (400 fatura + 100 genel gider), Ç3 kâr 600
+    engine.add_rows("income", [20240115, 20240710, 0], [1200.0, 720.0, 99.0], [200.0, 120.0, 9.0])
+    engine.add_rows("expense", [20240420], [480.0], [80.0])
+    engine.add_general_expenses(2024, {"mayis": 100.0})
+
+    quarterly = engine.quarterly_results(2024, 0.25)
+    assert [q["kar"] for q in quarterly] == [1000.0, 500.0, 1100.0, 1100.0]
+    assert [q["vergi"] for q in quarterly] == [250.0, 125.0, 275.0, 275.0]
+    # Zarar çeyreğinde iade yok; sonraki çeyrek yalnızca farkı öder
+    assert [q["odenecek_kv"] for q in quarterly] == [250.0, 0, 150.0, 0]
+
+    monthly = engine.monthly_results(2024)
+    assert (monthly[3]["gelen"], monthly[4]["gelen"]) == (400.0, 100.0)
+    assert monthly[3]["kdv"] == -80.0
+    assert engine.yearly_summary(2024, 0.25) == {
+        "toplam_gelir": 1600.0,
+        "toplam_gider": 500.0,
+        "yillik_kar": 825.0,
+        "vergi_tutari": 275.0,
+        "vergi_yuzdesi": 25.0,
+    }
+
+
+# =====================================================================
+# TOPLAM ÖNBELLEĞİ (AggregateCache)
+# =====================================================================
+
+
+def test_aggregate_cache_serves_repeats_until_data_changes(fake_backend, monkeypatch):
+    db = fake_backend.db
+    reads = []
+    totals_for_years = db.get_monthly_totals_for_years
+    monkeypatch.setattr(
+        db,
+        "get_monthly_totals_for_years",
+        lambda *args: reads.append(args) or totals_for_years(*args),
+    )
+    cache = fake_backend.aggregate_cache
+    calculator = PeriodicIncomeCalculator(fake_backend)
+    manager = InvoiceManager(fake_backend)
+
+    def yearly_summary():
+        key = ("yearly_summary", 2024, "TRY", 22.0)
+        return cache.get_or_compute(key, lambda: calculator.get_yearly_summary(2024))
+
+    def add(no, tarih, tutar):
+        data = {"fatura_no": no, "tarih": tarih, "toplam_tutar": tutar, "birim": "TL"}
+        manager.handle_invoice_operation("add", "outgoing", data)
+
+    add("C-1", "01.02.2024", 120)
+    first = yearly_summary()
+    first["toplam_gelir"] = -1  # çağıranın değiştirmesi saklı sonucu bozmaz
+    for _ in range(5):
+        assert yearly_summary()["toplam_gelir"] == 120.0
+    assert len(reads) == 2  # gelir + gider, yalnızca ilk çağrıda
+
+    add("C-2", "01.03.2024", 60)
+    assert yearly_summary()["toplam_gelir"] == 180.0
+    assert len(reads) == 2  # yeni fatura bellekteki toplamlara delta olarak eklendi
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (5, 2, 1)
+    assert stats["version"] == stats["invalidations"] == 2
+
+
+def test_aggregate_cache_drops_results_computed_across_a_change():
+    cache = AggregateCache()
+
+    def compute():
+        cache.invalidate()  # hesap sürerken başka bir iş parçacığı yazdı
+        return "eski"
+
+    assert cache.get_or_compute("k", compute) == "eski"
+    assert cache.get_or_compute("k", lambda: "yeni") == "yeni"
+    assert cache.stats()["misses"] == 2
+
+
+# =====================================================================
+# BELLEKTEKİ AYLIK TOPLAMLAR (MonthlyTotals delta)
+# =====================================================================
+
+
+def test_monthly_totals_follow_writes_without_rescan(fake_backend):
+    db = fake_backend.db
+    totals = fake_backend.monthly_totals
+    manager = InvoiceManager(fake_backend)
+
+    def data(no, tarih, tutar, birim="TL"):
+        return {"fatura_no": no, "tarih": tarih, "toplam_tutar": tutar, "birim": birim}
+
+    manager.add_invoices_bulk(
+        "outgoing", [data("D-1", "05.01.2024", 100), data("D-2", "06.01.2024", 50)]
+    )
+    assert totals.rows("income_invoices") == db.get_monthly_totals_for_years("income_invoices")
+    assert totals.loads == 1
+
+    ids = [inv["id"] for inv in db.get_all_gelir_invoices(None, None, None)]
+    manager.handle_invoice_operation("add", "outgoing", data("D-3", "07.02.2024", 30, "USD"))
+    manager.handle_invoice_operation(
+        "update", "outgoing", data("D-1", "05.03.2023", 70), ids[0]
+    )
+    manager.handle_invoice_operation("delete", "outgoing", record_id=ids[1])
+    manager.add_invoices_bulk(
+        "incoming", [data(f"E-{i}", "10.04.2024", 12.345) for i in range(3)]
+    )
+    gider_ids = [inv["id"] for inv in db.get_all_gider_invoices(None, None, None)]
+    manager.delete_multiple_invoices("incoming", gider_ids[:2])
+
+    # Ocak boşaldı ve düştü; güncelleme satırı 2023/3'e taşıdı
+    assert [(r["yil"], r["ay"]) for r in totals.rows("income_invoices")] == [
+        (2023, 3),
+        (2024, 2),
+    ]
+    for table in ("income_invoices", "expense_invoices"):
+        assert totals.rows(table) == db.get_monthly_totals_for_years(table)
+    assert (totals.loads, totals.deltas) == (1, 5)
+    assert totals.verify() == []
+
+    # Kendi yazmalarımız akışta eşleşir; tanınmayan yazma kopyayı düşürür
+    totals.absorb_changes(db.changes_since(0))
+    assert totals.rows("income_invoices") and totals.loads == 1
+    db.add_gelir_invoice(_invoice("X-1", "01.05.2024", 10.0, 1.0))
+    totals.absorb_changes(db.changes_since(0))
+    assert totals.rows("income_invoices") == db.get_monthly_totals_for_years("income_invoices")
+    assert totals.loads == 2
+
+
+def test_monthly_totals_recover_from_rollback_and_drift(fake_backend):
+    db = fake_backend.db
+    totals = fake_backend.monthly_totals
+    manager = InvoiceManager(fake_backend)
+    data = {"fatura_no": "R-1", "tarih": "01.06.2024", "toplam_tutar": 10, "birim": "TL"}
+    assert totals.rows("income_invoices") == []
+
+    with pytest.raises(RuntimeError):
+        with manager.transaction():
+            manager.handle_invoice_operation("add", "outgoing", data)
+            raise RuntimeError("iptal")
+    assert totals.rows("income_invoices") == []
+
+    # Yönetici dışından yazma: doğrulama kaymayı bulur ve kopyayı düşürür
+    db.add_gelir_invoice(_invoice("R-2", "01.06.2024", 20.0, 2.0))
+    assert totals.verify() == [("income_invoices", 2024, 6)]
+    assert totals.drifts == 1
+    assert totals.rows("income_invoices")[0]["toplam_tutar_tl"] == 20.0
+
+
+def test_monthly_totals_skip_deltas_when_reloaded_mid_write(fake_backend):
+    totals = fake_backend.monthly_totals
+    totals.rows("income_invoices")
+    generation = totals.generation
+    fake_backend.db.add_gelir_invoice(_invoice("W-1", "01.07.2024", 5.0, 1.0))
+    totals.invalidate()
+    totals.rows("income_invoices")  # yeniden yükleme yazmayı zaten içeriyor
+
+    totals.apply(
+        "income_invoices", generation, added=[_invoice("W-1", "01.07.2024", 5.0, 1.0)]
+    )
+    assert totals.rows("income_invoices")[0]["adet"] == 1
+    assert isinstance(totals, MonthlyTotals) and totals.loads == 3
+
+
+# =====================================================================
+# FATURA ANALİZİ (NumPy / saf Python)
+# =====================================================================
+
+
+def _golden_invoices():
+    """Yarım kuruşlar, negatif tutarlar, tarihsiz satırlar ve boş firmalar."""
+    firms = ["Öztürk İnşaat", "Işık Tekstil", "", "Çelik Yapı"]
+    amounts = [0.125, 12.345, 2.675, 1.005, -3.335, 1000000.015, 0.1, 99.995]
+    rows = []
+    for i in range(400):
+        tl = amounts[i % 8] * (1 + i % 5)
+        rows.append(
+            {
+                "fatura_no": f"A-{i}",
+                "tarih": (
+                    None if i % 37 == 0 else f"{2021 + i % 4}-{i % 12 + 1:02d}-{i % 28 + 1:02d}"
+                ),
+                "firma": firms[i % 4],
+                "toplam_tutar_tl": tl,
+                "kdv_tutari": tl * 0.2,
+                "toplam_tutar_usd": tl * 0.03,
+                "toplam_tutar_eur": tl * 0.028,
+            }
+        )
+    return rows
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_analytics_match_sql_totals_exactly(fallback_db, use_numpy):
+    fallback_db.add_gelir_invoices_bulk(_golden_invoices())
+    columns = fallback_db.fetch_columns("income_invoices", list(ANALYTICS_COLUMNS))
+    totals = ColumnTotals(columns, use_numpy)
+
+    expected = fallback_db.get_monthly_totals_for_years("income_invoices")
+    assert totals.monthly_rows() == expected
+    assert totals.monthly_rows(20220301, 20220630) == [
+        r for r in expected if r["yil"] == 2022 and 3 <= r["ay"] <= 6
+    ]
+
+    # Ham satırlardan tek geçiş (PeriodBuckets.add_rows) ile birebir aynı kovalar
+    from_rows = PeriodBuckets().add_rows(
+        "income", columns["tarih_gun"], columns["toplam_tutar_tl"], columns["kdv_tutari"]
+    )
+    from_analytics = PeriodBuckets().add_monthly_totals("income", totals.monthly_rows())
+    for year in range(2021, 2025):
+        months = from_rows.months(year)
+        assert from_analytics.months(year) == months
+        assert [q[:2] for q in totals.quarterly(year)] == [
+            [sum(m[i] for m in months[q * 3 : q * 3 + 3]) for i in range(2)] for q in range(4)
+        ]
+    assert totals.yearly()[2022][4] == sum(r["adet"] for r in expected if r["yil"] == 2022)
+
+    with fallback_db._reading("invoices") as con:
+        sql = dict(
+            con.execute(
+                "SELECT COALESCE(firma, ''), SUM(toplam_tutar_usd_cent) FROM income_invoices "
+                "GROUP BY 1"
+            ).fetchall()
+        )
+        sums = con.execute(
+            "SELECT SUM(toplam_tutar_tl_kurus), SUM(toplam_tutar_usd_cent), "
+            "SUM(toplam_tutar_eur_cent) FROM income_invoices"
+        ).fetchone()
+    assert totals.by_firm("USD") == dict(sorted(sql.items(), key=lambda i: (-i[1], i[0])))
+    assert totals.currency_totals() == dict(zip(("TRY", "USD", "EUR"), sums))
+
+
+# =====================================================================
+# ÇOK YILLIK RAPOR (get_calculations_for_years / get_year_over_year)
+# =====================================================================
+
+
+def test_calculations_for_years_match_single_year_calls(fake_backend, monkeypatch):
+    db = fake_backend.db
+    db.add_gelir_invoices_bulk(
+        [
+            _invoice(f"Y-{i}", f"1{i % 9}.0{i % 9 + 1}.202{i % 3}", 100.0 + i, 18.0)
+            for i in range(30)
+        ]
+    )
+    db.add_gider_invoices_bulk([_invoice("Z-1", "15.05.2021", 50.0, 9.0)])
+    db.add_or_update_yearly_expenses(2021, {"mart": 40.0})
+    db.add_or_update_yearly_expenses(2022, {"ocak": 10.0})
+    calculator = PeriodicIncomeCalculator(fake_backend)
+
+    expected = {year: calculator.get_calculations_for_year(year) for year in (2020, 2021, 2022)}
+    reads = []
+    yearly_expenses = db.get_yearly_expenses
+    monkeypatch.setattr(
+        db, "get_yearly_expenses", lambda y: reads.append(y) or yearly_expenses(y)
+    )
+
+    assert calculator.get_calculations_for_years([2022, 2020, 2021]) == expected
+    assert reads == []  # genel giderler tek get_all_yearly_expenses sorgusuyla
+
+    cache = AggregateCache()
+    computed = []
+
+    def compute(missing):
+        computed.append(missing)
+        return {key: key * 10 for key in missing}
+
+    assert cache.get_or_compute_many([1, 2], compute) == [10, 20]
+    assert cache.get_or_compute_many([2, 3, 1], compute) == [20, 30, 10]
+    assert computed == [[1, 2], [3]]
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (2, 3)
+
+
+def test_year_over_year_compares_each_year_with_the_previous(fake_backend):
+    db = fake_backend.db
+    db.add_gelir_invoices_bulk(
+        [
+            _invoice("Y-1", "10.01.2022", 120.0, 20.0),
+            _invoice("Y-2", "10.01.2023", 170.0, 20.0),
+            _invoice("Y-3", "10.02.2023", 60.0, 10.0),
+        ]
+    )
+    report = PeriodicIncomeCalculator(fake_backend).get_year_over_year([2023, 2022])
+
+    assert [entry["yil"] for entry in report] == [2022, 2023]
+    assert report[0]["degisim"] is None
+    assert (report[0]["toplam_gelir"], report[1]["toplam_gelir"]) == (100.0, 200.0)
+    change = report[1]["degisim"]
+    assert change["toplam_gelir"] == {"fark": 100.0, "yuzde": 100.0}
+    assert change["toplam_gider"] == {"fark": 0.0, "yuzde": None}
+    assert change["aylik"][0]["kesilen"] == {"fark": 50.0, "yuzde": 50.0}
+    assert change["aylik"][1]["kesilen"] == {"fark": 50.0, "yuzde": None}
@@ -1,16 +1,22 @@
 use pyo3::prelude::*;
-use pyo3::types::{PyDict, PyList};
+use pyo3::types::{PyBytes, PyDict, PyList};
 use pyo3::exceptions::{PyRuntimeError, PyValueError};
-use sqlx::sqlite::{SqlitePool, SqlitePoolOptions, SqliteConnectOptions};
-use sqlx::Row;
-use std::sync::Arc;
-use tokio::sync::RwLock;
+use sqlx::sqlite::{Sqlite, SqliteConnection, SqlitePool, SqlitePoolOptions, SqliteConnectOptions, SqliteRow};
+use sqlx::pool::PoolConnection;
+use sqlx::{Connection, Row, Transaction};
+use std::collections::HashMap;
+use std::sync::{Arc, Mutex as StdMutex};
+use std::sync::atomic::{AtomicI64, Ordering};
+use tokio::sync::{Mutex, RwLock};
 use tokio::runtime::Runtime;
 use chrono::{Utc, NaiveDate};
 use std::str::FromStr;
 use std::fs;
 use std::path::PathBuf;
+use std::time::Duration;
 use std::env;
+use std::future::Future;
+use std::thread::{self, ThreadId};
 
 // ============================================================================
 // YARDIMCI FONKSİYONLAR
@@ -25,9 +31,26 @@ fn to_iso_date(date: &str) -> String {
     }
 }
 
+/// yyyy-mm-dd → yyyymmdd tamsayısı; ISO biçiminde değilse None.
+fn to_day_number(date: &str) -> Option<i64> {
+    let b = date.as_bytes();
+    if b.len() != 10 || b[4] != b'-' || b[7] != b'-' {
+        return None;
+    }
+    let mut value = 0i64;
+    for &c in b[..4].iter().chain(&b[5..7]).chain(&b[8..]) {
+        if !c.is_ascii_digit() {
+            return None;
+        }
+        value = value * 10 + (c - b'0') as i64;
+    }
+    Some(value)
+}
+
+/// yyyy-mm-dd → dd.mm.yyyy (satır başına tarih ayrıştırma yerine dilimleme)
 fn to_display_date(date: &str) -> String {
-    if let Ok(d) = NaiveDate::parse_from_str(date, "%Y-%m-%d") {
-        d.format("%d.%m.%Y").to_string()
+    if to_day_number(date).is_some() {
+        format!("{}.{}.{}", &date[8..], &date[5..7], &date[..4])
     } else {
         date.to_string()
     }
@@ -153,6 +176,1077 @@ fn validate_invoice_data(data: &Bound<'_, PyDict>) -> PyResult<()> {
     Ok(())
 }
 
+// ============================================================================
+// AYLIK TOPLAM YARDIMCILARI
+// ============================================================================
+
+/// Veri bulunan yıllar: her fatura tablosunda tarih indeksi üzerinde bir sonraki
+/// yılın başına atlayan "skip-scan" (yıl sayısı × log N) + dolu genel gider yılları.
+const AVAILABLE_YEARS_QUERY: &str = r#"
+WITH RECURSIVE
+    income_years(y) AS (
+        SELECT (SELECT CAST(substr(MIN(tarih), 1, 4) AS INTEGER) FROM income_invoices
+                WHERE tarih >= '0000-01-01' AND tarih GLOB '[0-9][0-9][0-9][0-9]-*')
+        UNION ALL
+        SELECT (SELECT CAST(substr(MIN(tarih), 1, 4) AS INTEGER) FROM income_invoices
+                WHERE tarih >= printf('%04d-01-01', y + 1) AND tarih GLOB '[0-9][0-9][0-9][0-9]-*')
+        FROM income_years WHERE y IS NOT NULL
+    ),
+    expense_years(y) AS (
+        SELECT (SELECT CAST(substr(MIN(tarih), 1, 4) AS INTEGER) FROM expense_invoices
+                WHERE tarih >= '0000-01-01' AND tarih GLOB '[0-9][0-9][0-9][0-9]-*')
+        UNION ALL
+        SELECT (SELECT CAST(substr(MIN(tarih), 1, 4) AS INTEGER) FROM expense_invoices
+                WHERE tarih >= printf('%04d-01-01', y + 1) AND tarih GLOB '[0-9][0-9][0-9][0-9]-*')
+        FROM expense_years WHERE y IS NOT NULL
+    )
+SELECT y FROM income_years WHERE y IS NOT NULL
+UNION SELECT y FROM expense_years WHERE y IS NOT NULL
+UNION SELECT yil FROM general_expenses WHERE yil IS NOT NULL
+    AND (ocak > 0 OR subat > 0 OR mart > 0 OR nisan > 0 OR mayis > 0 OR haziran > 0 OR temmuz > 0 OR agustos > 0 OR eylul > 0 OR ekim > 0 OR kasim > 0 OR aralik > 0)
+ORDER BY 1
+"#;
+
+/// Kilitli veritabanında hata vermeden önce beklenecek süre
+const BUSY_TIMEOUT_MS: u64 = 5000;
+
+/// IN (...) listesi başına en fazla bu kadar parametre (SQLite değişken sınırının altında)
+const FATURA_NO_CHUNK: usize = 400;
+
+/// Dinamik tablo adı kullanan sorgularda yalnızca fatura tablolarına izin verir.
+fn check_invoice_table(table: &str) -> PyResult<&'static str> {
+    match table {
+        "income_invoices" => Ok("income_invoices"),
+        "expense_invoices" => Ok("expense_invoices"),
+        _ => Err(PyValueError::new_err(format!("Geçersiz fatura tablosu: {}", table))),
+    }
+}
+
+/// Tutarı tam sayı kuruş/sente çevirir; yarımlar sıfırdan uzağa yuvarlanır (SQLite round gibi).
+fn to_minor(value: Option<f64>) -> Option<i64> {
+    value.map(|v| (v * 100.0).round() as i64)
+}
+
+/// monthly_summary satırlarını get_monthly_totals sözlük anahtarlarıyla seçer.
+/// Tutarlar tam sayı kuruş/sent olarak okunur, float karşılıkları /100 ile üretilir.
+const MONTHLY_TOTALS_SELECT: &str = "SELECT year AS yil, month AS ay, \
+     sum_tl_kurus AS toplam_tutar_tl_kurus, sum_kdv_kurus AS kdv_tutari_kurus, \
+     sum_usd_cent AS toplam_tutar_usd_cent, sum_eur_cent AS toplam_tutar_eur_cent, \
+     count AS adet ";
+
+fn monthly_totals_to_pylist(py: Python<'_>, rows: Vec<sqlx::sqlite::SqliteRow>) -> PyResult<Py<PyAny>> {
+    let result = PyList::empty(py);
+    for row in rows {
+        let dict = PyDict::new(py);
+        dict.set_item("yil", row.get::<i64, _>("yil"))?;
+        dict.set_item("ay", row.get::<i64, _>("ay"))?;
+        let tl_kurus = row.get::<i64, _>("toplam_tutar_tl_kurus");
+        let kdv_kurus = row.get::<i64, _>("kdv_tutari_kurus");
+        dict.set_item("toplam_tutar_tl", tl_kurus as f64 / 100.0)?;
+        dict.set_item("kdv_tutari", kdv_kurus as f64 / 100.0)?;
+        dict.set_item("toplam_tutar_usd", row.get::<i64, _>("toplam_tutar_usd_cent") as f64 / 100.0)?;
+        dict.set_item("toplam_tutar_eur", row.get::<i64, _>("toplam_tutar_eur_cent") as f64 / 100.0)?;
+        dict.set_item("toplam_tutar_tl_kurus", tl_kurus)?;
+        dict.set_item("kdv_tutari_kurus", kdv_kurus)?;
+        dict.set_item("adet", row.get::<i64, _>("adet"))?;
+        result.append(dict)?;
+    }
+    Ok(result.into())
+}
+
+// ============================================================================
+// AYLIK ÖZET TABLOSU (monthly_summary)
+// ============================================================================
+// Fatura tablolarındaki tetikleyiciler her INSERT/UPDATE/DELETE'te ilgili
+// (tablo, yıl, ay) satırını günceller; dashboard toplamları ham faturalar
+// taranmadan en fazla 24 satırdan okunur. Yalnızca ISO tarihli satırlar sayılır.
+
+const CREATE_MONTHLY_SUMMARY: &str = r#"
+CREATE TABLE IF NOT EXISTS monthly_summary (
+    table_name TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    sum_tl_kurus INTEGER NOT NULL DEFAULT 0,
+    sum_usd_cent INTEGER NOT NULL DEFAULT 0,
+    sum_eur_cent INTEGER NOT NULL DEFAULT 0,
+    sum_kdv_kurus INTEGER NOT NULL DEFAULT 0,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (table_name, year, month)
+) WITHOUT ROWID
+"#;
+
+const INCOME_SUMMARY_INSERT_TRIGGER: &str = r#"
+CREATE TRIGGER IF NOT EXISTS trg_income_invoices_summary_insert AFTER INSERT ON income_invoices
+BEGIN
+    INSERT INTO monthly_summary(table_name, year, month, sum_tl_kurus, sum_usd_cent, sum_eur_cent, sum_kdv_kurus, count)
+    SELECT 'income_invoices', CAST(substr(NEW.tarih, 1, 4) AS INTEGER), CAST(substr(NEW.tarih, 6, 2) AS INTEGER),
+           COALESCE(NEW.toplam_tutar_tl_kurus, 0), COALESCE(NEW.toplam_tutar_usd_cent, 0),
+           COALESCE(NEW.toplam_tutar_eur_cent, 0), COALESCE(NEW.kdv_tutari_kurus, 0), 1
+    WHERE NEW.tarih GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-*'
+    ON CONFLICT(table_name, year, month) DO UPDATE SET
+        sum_tl_kurus = sum_tl_kurus + excluded.sum_tl_kurus, sum_usd_cent = sum_usd_cent + excluded.sum_usd_cent,
+        sum_eur_cent = sum_eur_cent + excluded.sum_eur_cent, sum_kdv_kurus = sum_kdv_kurus + excluded.sum_kdv_kurus,
+        count = count + 1;
+END
+"#;
+
+const INCOME_SUMMARY_DELETE_TRIGGER: &str = r#"
+CREATE TRIGGER IF NOT EXISTS trg_income_invoices_summary_delete AFTER DELETE ON income_invoices
+BEGIN
+    UPDATE monthly_summary SET
+        sum_tl_kurus = sum_tl_kurus - COALESCE(OLD.toplam_tutar_tl_kurus, 0), sum_usd_cent = sum_usd_cent - COALESCE(OLD.toplam_tutar_usd_cent, 0),
+        sum_eur_cent = sum_eur_cent - COALESCE(OLD.toplam_tutar_eur_cent, 0), sum_kdv_kurus = sum_kdv_kurus - COALESCE(OLD.kdv_tutari_kurus, 0),
+        count = count - 1
+    WHERE OLD.tarih GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-*' AND table_name = 'income_invoices'
+        AND year = CAST(substr(OLD.tarih, 1, 4) AS INTEGER)
+        AND month = CAST(substr(OLD.tarih, 6, 2) AS INTEGER);
+    DELETE FROM monthly_summary
+    WHERE OLD.tarih GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-*' AND table_name = 'income_invoices'
+        AND year = CAST(substr(OLD.tarih, 1, 4) AS INTEGER)
+        AND month = CAST(substr(OLD.tarih, 6, 2) AS INTEGER) AND count <= 0;
+END
+"#;
+
+const INCOME_SUMMARY_UPDATE_TRIGGER: &str = r#"
+CREATE TRIGGER IF NOT EXISTS trg_income_invoices_summary_update
+AFTER UPDATE OF tarih, toplam_tutar_tl_kurus, toplam_tutar_usd_cent, toplam_tutar_eur_cent, kdv_tutari_kurus ON income_invoices
+BEGIN
+    UPDATE monthly_summary SET
+        sum_tl_kurus = sum_tl_kurus - COALESCE(OLD.toplam_tutar_tl_kurus, 0), sum_usd_cent = sum_usd_cent - COALESCE(OLD.toplam_tutar_usd_cent, 0),
+        sum_eur_cent = sum_eur_cent - COALESCE(OLD.toplam_tutar_eur_cent, 0), sum_kdv_kurus = sum_kdv_kurus - COALESCE(OLD.kdv_tutari_kurus, 0),
+        count = count - 1
+    WHERE OLD.tarih GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-*' AND table_name = 'income_invoices'
+        AND year = CAST(substr(OLD.tarih, 1, 4) AS INTEGER)
+        AND month = CAST(substr(OLD.tarih, 6, 2) AS INTEGER);
+    DELETE FROM monthly_summary
+    WHERE OLD.tarih GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-*' AND table_name = 'income_invoices'
+        AND year = CAST(substr(OLD.tarih, 1, 4) AS INTEGER)
+        AND month = CAST(substr(OLD.tarih, 6, 2) AS INTEGER) AND count <= 0;
+    INSERT INTO monthly_summary(table_name, year, month, sum_tl_kurus, sum_usd_cent, sum_eur_cent, sum_kdv_kurus, count)
+    SELECT 'income_invoices', CAST(substr(NEW.tarih, 1, 4) AS INTEGER), CAST(substr(NEW.tarih, 6, 2) AS INTEGER),
+           COALESCE(NEW.toplam_tutar_tl_kurus, 0), COALESCE(NEW.toplam_tutar_usd_cent, 0),
+           COALESCE(NEW.toplam_tutar_eur_cent, 0), COALESCE(NEW.kdv_tutari_kurus, 0), 1
+    WHERE NEW.tarih GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-*'
+    ON CONFLICT(table_name, year, month) DO UPDATE SET
+        sum_tl_kurus = sum_tl_kurus + excluded.sum_tl_kurus, sum_usd_cent = sum_usd_cent + excluded.sum_usd_cent,
+        sum_eur_cent = sum_eur_cent + excluded.sum_eur_cent, sum_kdv_kurus = sum_kdv_kurus + excluded.sum_kdv_kurus,
+        count = count + 1;
+END
+"#;
+
+const EXPENSE_SUMMARY_INSERT_TRIGGER: &str = r#"
+CREATE TRIGGER IF NOT EXISTS trg_expense_invoices_summary_insert AFTER INSERT ON expense_invoices
+BEGIN
+    INSERT INTO monthly_summary(table_name, year, month, sum_tl_kurus, sum_usd_cent, sum_eur_cent, sum_kdv_kurus, count)
+    SELECT 'expense_invoices', CAST(substr(NEW.tarih, 1, 4) AS INTEGER), CAST(substr(NEW.tarih, 6, 2) AS INTEGER),
+           COALESCE(NEW.toplam_tutar_tl_kurus, 0), COALESCE(NEW.toplam_tutar_usd_cent, 0),
+           COALESCE(NEW.toplam_tutar_eur_cent, 0), COALESCE(NEW.kdv_tutari_kurus, 0), 1
+    WHERE NEW.tarih GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-*'
+    ON CONFLICT(table_name, year, month) DO UPDATE SET
+        sum_tl_kurus = sum_tl_kurus + excluded.sum_tl_kurus, sum_usd_cent = sum_usd_cent + excluded.sum_usd_cent,
+        sum_eur_cent = sum_eur_cent + excluded.sum_eur_cent, sum_kdv_kurus = sum_kdv_kurus + excluded.sum_kdv_kurus,
+        count = count + 1;
+END
+"#;
+
+const EXPENSE_SUMMARY_DELETE_TRIGGER: &str = r#"
+CREATE TRIGGER IF NOT EXISTS trg_expense_invoices_summary_delete AFTER DELETE ON expense_invoices
+BEGIN
+    UPDATE monthly_summary SET
+        sum_tl_kurus = sum_tl_kurus - COALESCE(OLD.toplam_tutar_tl_kurus, 0), sum_usd_cent = sum_usd_cent - COALESCE(OLD.toplam_tutar_usd_cent, 0),
+        sum_eur_cent = sum_eur_cent - COALESCE(OLD.toplam_tutar_eur_cent, 0), sum_kdv_kurus = sum_kdv_kurus - COALESCE(OLD.kdv_tutari_kurus, 0),
+        count = count - 1
+    WHERE OLD.tarih GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-*' AND table_name = 'expense_invoices'
+        AND year = CAST(substr(OLD.tarih, 1, 4) AS INTEGER)
+        AND month = CAST(substr(OLD.tarih, 6, 2) AS INTEGER);
+    DELETE FROM monthly_summary
+    WHERE OLD.tarih GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-*' AND table_name = 'expense_invoices'
+        AND year = CAST(substr(OLD.tarih, 1, 4) AS INTEGER)
+        AND month = CAST(substr(OLD.tarih, 6, 2) AS INTEGER) AND count <= 0;
+END
+"#;
+
+const EXPENSE_SUMMARY_UPDATE_TRIGGER: &str = r#"
+CREATE TRIGGER IF NOT EXISTS trg_expense_invoices_summary_update
+AFTER UPDATE OF tarih, toplam_tutar_tl_kurus, toplam_tutar_usd_cent, toplam_tutar_eur_cent, kdv_tutari_kurus ON expense_invoices
+BEGIN
+    UPDATE monthly_summary SET
+        sum_tl_kurus = sum_tl_kurus - COALESCE(OLD.toplam_tutar_tl_kurus, 0), sum_usd_cent = sum_usd_cent - COALESCE(OLD.toplam_tutar_usd_cent, 0),
+        sum_eur_cent = sum_eur_cent - COALESCE(OLD.toplam_tutar_eur_cent, 0), sum_kdv_kurus = sum_kdv_kurus - COALESCE(OLD.kdv_tutari_kurus, 0),
+        count = count - 1
+    WHERE OLD.tarih GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-*' AND table_name = 'expense_invoices'
+        AND year = CAST(substr(OLD.tarih, 1, 4) AS INTEGER)
+        AND month = CAST(substr(OLD.tarih, 6, 2) AS INTEGER);
+    DELETE FROM monthly_summary
+    WHERE OLD.tarih GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-*' AND table_name = 'expense_invoices'
+        AND year = CAST(substr(OLD.tarih, 1, 4) AS INTEGER)
+        AND month = CAST(substr(OLD.tarih, 6, 2) AS INTEGER) AND count <= 0;
+    INSERT INTO monthly_summary(table_name, year, month, sum_tl_kurus, sum_usd_cent, sum_eur_cent, sum_kdv_kurus, count)
+    SELECT 'expense_invoices', CAST(substr(NEW.tarih, 1, 4) AS INTEGER), CAST(substr(NEW.tarih, 6, 2) AS INTEGER),
+           COALESCE(NEW.toplam_tutar_tl_kurus, 0), COALESCE(NEW.toplam_tutar_usd_cent, 0),
+           COALESCE(NEW.toplam_tutar_eur_cent, 0), COALESCE(NEW.kdv_tutari_kurus, 0), 1
+    WHERE NEW.tarih GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-*'
+    ON CONFLICT(table_name, year, month) DO UPDATE SET
+        sum_tl_kurus = sum_tl_kurus + excluded.sum_tl_kurus, sum_usd_cent = sum_usd_cent + excluded.sum_usd_cent,
+        sum_eur_cent = sum_eur_cent + excluded.sum_eur_cent, sum_kdv_kurus = sum_kdv_kurus + excluded.sum_kdv_kurus,
+        count = count + 1;
+END
+"#;
+
+const REBUILD_INCOME_SUMMARY: &str = r#"
+INSERT INTO monthly_summary(table_name, year, month, sum_tl_kurus, sum_usd_cent, sum_eur_cent, sum_kdv_kurus, count)
+    SELECT 'income_invoices' AS table_name,
+           CAST(substr(tarih, 1, 4) AS INTEGER) AS year, CAST(substr(tarih, 6, 2) AS INTEGER) AS month,
+           COALESCE(SUM(toplam_tutar_tl_kurus), 0) AS sum_tl_kurus, COALESCE(SUM(toplam_tutar_usd_cent), 0) AS sum_usd_cent,
+           COALESCE(SUM(toplam_tutar_eur_cent), 0) AS sum_eur_cent, COALESCE(SUM(kdv_tutari_kurus), 0) AS sum_kdv_kurus, COUNT(*) AS count
+    FROM income_invoices WHERE tarih GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-*'
+    GROUP BY 2, 3
+"#;
+
+const REBUILD_EXPENSE_SUMMARY: &str = r#"
+INSERT INTO monthly_summary(table_name, year, month, sum_tl_kurus, sum_usd_cent, sum_eur_cent, sum_kdv_kurus, count)
+    SELECT 'expense_invoices' AS table_name,
+           CAST(substr(tarih, 1, 4) AS INTEGER) AS year, CAST(substr(tarih, 6, 2) AS INTEGER) AS month,
+           COALESCE(SUM(toplam_tutar_tl_kurus), 0) AS sum_tl_kurus, COALESCE(SUM(toplam_tutar_usd_cent), 0) AS sum_usd_cent,
+           COALESCE(SUM(toplam_tutar_eur_cent), 0) AS sum_eur_cent, COALESCE(SUM(kdv_tutari_kurus), 0) AS sum_kdv_kurus, COUNT(*) AS count
+    FROM expense_invoices WHERE tarih GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-*'
+    GROUP BY 2, 3
+"#;
+
+/// Özetle ham toplamları karşılaştırır; yalnızca tutarsız (tablo, yıl, ay) döner.
+/// Tutarlar tam sayı kuruş/sent olduğundan karşılaştırma birebirdir.
+const CHECK_MONTHLY_SUMMARY: &str = r#"
+WITH raw AS (
+    SELECT 'income_invoices' AS table_name,
+           CAST(substr(tarih, 1, 4) AS INTEGER) AS year, CAST(substr(tarih, 6, 2) AS INTEGER) AS month,
+           COALESCE(SUM(toplam_tutar_tl_kurus), 0) AS sum_tl_kurus, COALESCE(SUM(toplam_tutar_usd_cent), 0) AS sum_usd_cent,
+           COALESCE(SUM(toplam_tutar_eur_cent), 0) AS sum_eur_cent, COALESCE(SUM(kdv_tutari_kurus), 0) AS sum_kdv_kurus, COUNT(*) AS count
+    FROM income_invoices WHERE tarih GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-*'
+    GROUP BY 2, 3
+    UNION ALL
+    SELECT 'expense_invoices' AS table_name,
+           CAST(substr(tarih, 1, 4) AS INTEGER) AS year, CAST(substr(tarih, 6, 2) AS INTEGER) AS month,
+           COALESCE(SUM(toplam_tutar_tl_kurus), 0) AS sum_tl_kurus, COALESCE(SUM(toplam_tutar_usd_cent), 0) AS sum_usd_cent,
+           COALESCE(SUM(toplam_tutar_eur_cent), 0) AS sum_eur_cent, COALESCE(SUM(kdv_tutari_kurus), 0) AS sum_kdv_kurus, COUNT(*) AS count
+    FROM expense_invoices WHERE tarih GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-*'
+    GROUP BY 2, 3
+),
+keys AS (
+    SELECT table_name, year, month FROM raw
+    UNION SELECT table_name, year, month FROM monthly_summary
+)
+SELECT k.table_name, k.year, k.month,
+       COALESCE(r.count, 0) AS expected_count, COALESCE(s.count, 0) AS actual_count,
+       COALESCE(r.sum_tl_kurus, 0) AS expected_sum_tl, COALESCE(s.sum_tl_kurus, 0) AS actual_sum_tl,
+       COALESCE(r.sum_usd_cent, 0) AS expected_sum_usd, COALESCE(s.sum_usd_cent, 0) AS actual_sum_usd,
+       COALESCE(r.sum_eur_cent, 0) AS expected_sum_eur, COALESCE(s.sum_eur_cent, 0) AS actual_sum_eur,
+       COALESCE(r.sum_kdv_kurus, 0) AS expected_sum_kdv, COALESCE(s.sum_kdv_kurus, 0) AS actual_sum_kdv
+FROM keys k
+LEFT JOIN raw r ON r.table_name = k.table_name AND r.year = k.year AND r.month = k.month
+LEFT JOIN monthly_summary s ON s.table_name = k.table_name AND s.year = k.year AND s.month = k.month
+WHERE COALESCE(r.count, 0) != COALESCE(s.count, 0) OR
+      COALESCE(r.sum_tl_kurus, 0) != COALESCE(s.sum_tl_kurus, 0) OR
+      COALESCE(r.sum_usd_cent, 0) != COALESCE(s.sum_usd_cent, 0) OR
+      COALESCE(r.sum_eur_cent, 0) != COALESCE(s.sum_eur_cent, 0) OR
+      COALESCE(r.sum_kdv_kurus, 0) != COALESCE(s.sum_kdv_kurus, 0)
+ORDER BY 1, 2, 3
+"#;
+
+const CLEAR_MONTHLY_SUMMARY: &str = "DELETE FROM monthly_summary";
+
+// ----------------------------------------------------------------------------
+// Tam sayı kuruş/sent sütunları
+// ----------------------------------------------------------------------------
+// Her para sütununun yanında INTEGER karşılığı tutulur; özet ve toplamlar
+// bunları SQL'de birebir toplar (float birikim hatası olmaz).
+
+const MINOR_COLUMNS: [&str; 5] = [
+    "matrah_kurus",
+    "toplam_tutar_tl_kurus",
+    "toplam_tutar_usd_cent",
+    "toplam_tutar_eur_cent",
+    "kdv_tutari_kurus",
+];
+
+const BACKFILL_INCOME_MINOR: &str = r#"
+UPDATE income_invoices SET
+    matrah_kurus = CAST(round(matrah * 100) AS INTEGER),
+    toplam_tutar_tl_kurus = CAST(round(toplam_tutar_tl * 100) AS INTEGER),
+    toplam_tutar_usd_cent = CAST(round(toplam_tutar_usd * 100) AS INTEGER),
+    toplam_tutar_eur_cent = CAST(round(toplam_tutar_eur * 100) AS INTEGER),
+    kdv_tutari_kurus = CAST(round(kdv_tutari * 100) AS INTEGER)
+"#;
+
+const BACKFILL_EXPENSE_MINOR: &str = r#"
+UPDATE expense_invoices SET
+    matrah_kurus = CAST(round(matrah * 100) AS INTEGER),
+    toplam_tutar_tl_kurus = CAST(round(toplam_tutar_tl * 100) AS INTEGER),
+    toplam_tutar_usd_cent = CAST(round(toplam_tutar_usd * 100) AS INTEGER),
+    toplam_tutar_eur_cent = CAST(round(toplam_tutar_eur * 100) AS INTEGER),
+    kdv_tutari_kurus = CAST(round(kdv_tutari * 100) AS INTEGER)
+"#;
+
+// ----------------------------------------------------------------------------
+// Tamsayı gün numarası (tarih_gun = yyyymmdd)
+// ----------------------------------------------------------------------------
+// Yıl/ay okumaları ve tarih aralıkları metin tarih yerine indeksli tamsayı
+// sütun üzerinden yapılır; yazarken to_day_number ile hesaplanır.
+
+const BACKFILL_INCOME_DAY_NUMBER: &str = r#"
+UPDATE income_invoices SET
+    tarih_gun = CAST(substr(tarih, 1, 4) || substr(tarih, 6, 2) || substr(tarih, 9, 2) AS INTEGER)
+WHERE tarih GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'
+"#;
+
+const BACKFILL_EXPENSE_DAY_NUMBER: &str = r#"
+UPDATE expense_invoices SET
+    tarih_gun = CAST(substr(tarih, 1, 4) || substr(tarih, 6, 2) || substr(tarih, 9, 2) AS INTEGER)
+WHERE tarih GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'
+"#;
+
+// ============================================================================
+// TAM METİN ARAMA (FTS5)
+// ============================================================================
+// Her fatura tablosunun aranan sütunları, rowid = fatura id olacak şekilde
+// {tablo}_fts tablosunda tutulur ve tetikleyicilerle eşitlenir. unicode61
+// büyük/küçük harfi ve aksanları katlar (İ→i, Ş→s, Ğ→g ...); ayrıştırması
+// olmayan 'ı' hem indekslenirken hem sorguda 'i'ye çevrilir.
+
+/// bm25 sütun ağırlıkları (firma, malzeme, fatura_no, miktar); fatura no en güçlüsü
+const FTS_WEIGHTS: &str = "2.0, 1.0, 4.0, 0.5";
+
+const CREATE_INCOME_FTS: &str =
+    "CREATE VIRTUAL TABLE IF NOT EXISTS income_invoices_fts USING fts5(firma, malzeme, fatura_no, miktar, tokenize = 'unicode61 remove_diacritics 2')";
+
+const INCOME_FTS_INSERT_TRIGGER: &str = r#"
+CREATE TRIGGER IF NOT EXISTS trg_income_invoices_fts_insert AFTER INSERT ON income_invoices
+BEGIN
+    INSERT INTO income_invoices_fts(rowid, firma, malzeme, fatura_no, miktar) VALUES (
+        NEW.id,
+        replace(NEW.firma, 'ı', 'i'),
+        replace(NEW.malzeme, 'ı', 'i'),
+        replace(NEW.fatura_no, 'ı', 'i'),
+        replace(NEW.miktar, 'ı', 'i')
+    );
+END
+"#;
+
+const INCOME_FTS_DELETE_TRIGGER: &str = r#"
+CREATE TRIGGER IF NOT EXISTS trg_income_invoices_fts_delete AFTER DELETE ON income_invoices
+BEGIN
+    DELETE FROM income_invoices_fts WHERE rowid = OLD.id;
+END
+"#;
+
+const INCOME_FTS_UPDATE_TRIGGER: &str = r#"
+CREATE TRIGGER IF NOT EXISTS trg_income_invoices_fts_update AFTER UPDATE OF firma, malzeme, fatura_no, miktar ON income_invoices
+BEGIN
+    UPDATE income_invoices_fts SET
+        firma = replace(NEW.firma, 'ı', 'i'),
+        malzeme = replace(NEW.malzeme, 'ı', 'i'),
+        fatura_no = replace(NEW.fatura_no, 'ı', 'i'),
+        miktar = replace(NEW.miktar, 'ı', 'i')
+    WHERE rowid = NEW.id;
+END
+"#;
+
+const CLEAR_INCOME_FTS: &str = "DELETE FROM income_invoices_fts";
+
+const REBUILD_INCOME_FTS: &str = r#"
+INSERT INTO income_invoices_fts(rowid, firma, malzeme, fatura_no, miktar)
+SELECT id, replace(firma, 'ı', 'i'), replace(malzeme, 'ı', 'i'), replace(fatura_no, 'ı', 'i'), replace(miktar, 'ı', 'i') FROM income_invoices
+"#;
+
+const CREATE_EXPENSE_FTS: &str =
+    "CREATE VIRTUAL TABLE IF NOT EXISTS expense_invoices_fts USING fts5(firma, malzeme, fatura_no, miktar, tokenize = 'unicode61 remove_diacritics 2')";
+
+const EXPENSE_FTS_INSERT_TRIGGER: &str = r#"
+CREATE TRIGGER IF NOT EXISTS trg_expense_invoices_fts_insert AFTER INSERT ON expense_invoices
+BEGIN
+    INSERT INTO expense_invoices_fts(rowid, firma, malzeme, fatura_no, miktar) VALUES (
+        NEW.id,
+        replace(NEW.firma, 'ı', 'i'),
+        replace(NEW.malzeme, 'ı', 'i'),
+        replace(NEW.fatura_no, 'ı', 'i'),
+        replace(NEW.miktar, 'ı', 'i')
+    );
+END
+"#;
+
+const EXPENSE_FTS_DELETE_TRIGGER: &str = r#"
+CREATE TRIGGER IF NOT EXISTS trg_expense_invoices_fts_delete AFTER DELETE ON expense_invoices
+BEGIN
+    DELETE FROM expense_invoices_fts WHERE rowid = OLD.id;
+END
+"#;
+
+const EXPENSE_FTS_UPDATE_TRIGGER: &str = r#"
+CREATE TRIGGER IF NOT EXISTS trg_expense_invoices_fts_update AFTER UPDATE OF firma, malzeme, fatura_no, miktar ON expense_invoices
+BEGIN
+    UPDATE expense_invoices_fts SET
+        firma = replace(NEW.firma, 'ı', 'i'),
+        malzeme = replace(NEW.malzeme, 'ı', 'i'),
+        fatura_no = replace(NEW.fatura_no, 'ı', 'i'),
+        miktar = replace(NEW.miktar, 'ı', 'i')
+    WHERE rowid = NEW.id;
+END
+"#;
+
+const CLEAR_EXPENSE_FTS: &str = "DELETE FROM expense_invoices_fts";
+
+const REBUILD_EXPENSE_FTS: &str = r#"
+INSERT INTO expense_invoices_fts(rowid, firma, malzeme, fatura_no, miktar)
+SELECT id, replace(firma, 'ı', 'i'), replace(malzeme, 'ı', 'i'), replace(fatura_no, 'ı', 'i'), replace(miktar, 'ı', 'i') FROM expense_invoices
+"#;
+
+/// Kullanıcı metnini önek eşleşmeli, sözdizimi hatası vermeyen FTS5 ifadesine çevirir.
+fn fts_match_query(text: &str) -> String {
+    text.replace('ı', "i")
+        .split(|c: char| !(c.is_alphanumeric() || c == '_'))
+        .filter(|t| !t.is_empty())
+        .map(|t| format!("\"{}\"*", t))
+        .collect::<Vec<_>>()
+        .join(" ")
+}
+
+// ============================================================================
+// DEĞİŞİKLİK AKIŞI
+// ============================================================================
+// invoices.db tablolarındaki her yazma tetikleyicilerle changes tablosuna
+// artan sıra numarasıyla (seq) kaydedilir. Arayüz changes_since(seq) ile
+// yalnızca değişen satırları alır; başka süreçlerin yazmaları da görünür.
+
+const CREATE_CHANGES: &str =
+    "CREATE TABLE IF NOT EXISTS changes (seq INTEGER PRIMARY KEY, tbl TEXT NOT NULL, op TEXT NOT NULL, row_id INTEGER NOT NULL)";
+
+/// Her 1000 kayıtta bir eskiler budanır; tabloda son 10000 değişiklik kalır.
+/// Daha eski bir seq soran istemci baştan yükler.
+const CHANGES_PRUNE_TRIGGER: &str = r#"
+CREATE TRIGGER IF NOT EXISTS trg_changes_prune AFTER INSERT ON changes WHEN NEW.seq % 1000 = 0
+BEGIN
+    DELETE FROM changes WHERE seq <= NEW.seq - 10000;
+END
+"#;
+
+const INCOME_INVOICES_CHANGES_INSERT_TRIGGER: &str =
+    "CREATE TRIGGER IF NOT EXISTS trg_income_invoices_changes_insert AFTER INSERT ON income_invoices BEGIN INSERT INTO changes(tbl, op, row_id) VALUES ('income_invoices', 'insert', NEW.id); END";
+
+const INCOME_INVOICES_CHANGES_UPDATE_TRIGGER: &str =
+    "CREATE TRIGGER IF NOT EXISTS trg_income_invoices_changes_update AFTER UPDATE ON income_invoices BEGIN INSERT INTO changes(tbl, op, row_id) VALUES ('income_invoices', 'update', NEW.id); END";
+
+const INCOME_INVOICES_CHANGES_DELETE_TRIGGER: &str =
+    "CREATE TRIGGER IF NOT EXISTS trg_income_invoices_changes_delete AFTER DELETE ON income_invoices BEGIN INSERT INTO changes(tbl, op, row_id) VALUES ('income_invoices', 'delete', OLD.id); END";
+
+const EXPENSE_INVOICES_CHANGES_INSERT_TRIGGER: &str =
+    "CREATE TRIGGER IF NOT EXISTS trg_expense_invoices_changes_insert AFTER INSERT ON expense_invoices BEGIN INSERT INTO changes(tbl, op, row_id) VALUES ('expense_invoices', 'insert', NEW.id); END";
+
+const EXPENSE_INVOICES_CHANGES_UPDATE_TRIGGER: &str =
+    "CREATE TRIGGER IF NOT EXISTS trg_expense_invoices_changes_update AFTER UPDATE ON expense_invoices BEGIN INSERT INTO changes(tbl, op, row_id) VALUES ('expense_invoices', 'update', NEW.id); END";
+
+const EXPENSE_INVOICES_CHANGES_DELETE_TRIGGER: &str =
+    "CREATE TRIGGER IF NOT EXISTS trg_expense_invoices_changes_delete AFTER DELETE ON expense_invoices BEGIN INSERT INTO changes(tbl, op, row_id) VALUES ('expense_invoices', 'delete', OLD.id); END";
+
+const GENERAL_EXPENSES_CHANGES_INSERT_TRIGGER: &str =
+    "CREATE TRIGGER IF NOT EXISTS trg_general_expenses_changes_insert AFTER INSERT ON general_expenses BEGIN INSERT INTO changes(tbl, op, row_id) VALUES ('general_expenses', 'insert', NEW.id); END";
+
+const GENERAL_EXPENSES_CHANGES_UPDATE_TRIGGER: &str =
+    "CREATE TRIGGER IF NOT EXISTS trg_general_expenses_changes_update AFTER UPDATE ON general_expenses BEGIN INSERT INTO changes(tbl, op, row_id) VALUES ('general_expenses', 'update', NEW.id); END";
+
+const GENERAL_EXPENSES_CHANGES_DELETE_TRIGGER: &str =
+    "CREATE TRIGGER IF NOT EXISTS trg_general_expenses_changes_delete AFTER DELETE ON general_expenses BEGIN INSERT INTO changes(tbl, op, row_id) VALUES ('general_expenses', 'delete', OLD.id); END";
+
+const CORPORATE_TAX_CHANGES_INSERT_TRIGGER: &str =
+    "CREATE TRIGGER IF NOT EXISTS trg_corporate_tax_changes_insert AFTER INSERT ON corporate_tax BEGIN INSERT INTO changes(tbl, op, row_id) VALUES ('corporate_tax', 'insert', NEW.id); END";
+
+const CORPORATE_TAX_CHANGES_UPDATE_TRIGGER: &str =
+    "CREATE TRIGGER IF NOT EXISTS trg_corporate_tax_changes_update AFTER UPDATE ON corporate_tax BEGIN INSERT INTO changes(tbl, op, row_id) VALUES ('corporate_tax', 'update', NEW.id); END";
+
+const CORPORATE_TAX_CHANGES_DELETE_TRIGGER: &str =
+    "CREATE TRIGGER IF NOT EXISTS trg_corporate_tax_changes_delete AFTER DELETE ON corporate_tax BEGIN INSERT INTO changes(tbl, op, row_id) VALUES ('corporate_tax', 'delete', OLD.id); END";
+
+// ============================================================================
+// ŞEMA GÖÇLERİ (PRAGMA user_version ile sürümlenir)
+// ============================================================================
+// Her kayıt: (hedef sürüm, SQL ifadeleri). Yeni göç her zaman listenin sonuna
+// eklenir; uygulanmış sürümler tekrar çalıştırılmaz.
+
+const INVOICES_MIGRATIONS: &[(i64, &[&str])] = &[
+    (1, &[
+        "CREATE INDEX IF NOT EXISTS idx_income_invoices_tarih ON income_invoices(tarih)",
+        "CREATE INDEX IF NOT EXISTS idx_expense_invoices_tarih ON expense_invoices(tarih)",
+        "CREATE INDEX IF NOT EXISTS idx_income_invoices_fatura_no ON income_invoices(fatura_no)",
+        "CREATE INDEX IF NOT EXISTS idx_expense_invoices_fatura_no ON expense_invoices(fatura_no)",
+        "CREATE INDEX IF NOT EXISTS idx_income_invoices_firma ON income_invoices(firma)",
+        "CREATE INDEX IF NOT EXISTS idx_expense_invoices_firma ON expense_invoices(firma)",
+        "CREATE INDEX IF NOT EXISTS idx_general_expenses_yil ON general_expenses(yil)",
+    ]),
+    (2, &[
+        CREATE_MONTHLY_SUMMARY,
+        INCOME_SUMMARY_INSERT_TRIGGER,
+        INCOME_SUMMARY_DELETE_TRIGGER,
+        INCOME_SUMMARY_UPDATE_TRIGGER,
+        EXPENSE_SUMMARY_INSERT_TRIGGER,
+        EXPENSE_SUMMARY_DELETE_TRIGGER,
+        EXPENSE_SUMMARY_UPDATE_TRIGGER,
+        CLEAR_MONTHLY_SUMMARY,
+        REBUILD_INCOME_SUMMARY,
+        REBUILD_EXPENSE_SUMMARY,
+    ]),
+    (3, &[
+        CREATE_INCOME_FTS,
+        INCOME_FTS_INSERT_TRIGGER,
+        INCOME_FTS_DELETE_TRIGGER,
+        INCOME_FTS_UPDATE_TRIGGER,
+        CLEAR_INCOME_FTS,
+        REBUILD_INCOME_FTS,
+        CREATE_EXPENSE_FTS,
+        EXPENSE_FTS_INSERT_TRIGGER,
+        EXPENSE_FTS_DELETE_TRIGGER,
+        EXPENSE_FTS_UPDATE_TRIGGER,
+        CLEAR_EXPENSE_FTS,
+        REBUILD_EXPENSE_FTS,
+    ]),
+    (4, &[
+        BACKFILL_INCOME_MINOR,
+        BACKFILL_EXPENSE_MINOR,
+        // v2'nin REAL özet tablosu tam sayı sütunlarla yeniden kurulur
+        "DROP TRIGGER IF EXISTS trg_income_invoices_summary_insert",
+        "DROP TRIGGER IF EXISTS trg_income_invoices_summary_delete",
+        "DROP TRIGGER IF EXISTS trg_income_invoices_summary_update",
+        "DROP TRIGGER IF EXISTS trg_expense_invoices_summary_insert",
+        "DROP TRIGGER IF EXISTS trg_expense_invoices_summary_delete",
+        "DROP TRIGGER IF EXISTS trg_expense_invoices_summary_update",
+        "DROP TABLE IF EXISTS monthly_summary",
+        CREATE_MONTHLY_SUMMARY,
+        INCOME_SUMMARY_INSERT_TRIGGER,
+        INCOME_SUMMARY_DELETE_TRIGGER,
+        INCOME_SUMMARY_UPDATE_TRIGGER,
+        EXPENSE_SUMMARY_INSERT_TRIGGER,
+        EXPENSE_SUMMARY_DELETE_TRIGGER,
+        EXPENSE_SUMMARY_UPDATE_TRIGGER,
+        CLEAR_MONTHLY_SUMMARY,
+        REBUILD_INCOME_SUMMARY,
+        REBUILD_EXPENSE_SUMMARY,
+    ]),
+    (5, &[
+        BACKFILL_INCOME_DAY_NUMBER,
+        BACKFILL_EXPENSE_DAY_NUMBER,
+        "CREATE INDEX IF NOT EXISTS idx_income_invoices_tarih_gun ON income_invoices(tarih_gun)",
+        "CREATE INDEX IF NOT EXISTS idx_expense_invoices_tarih_gun ON expense_invoices(tarih_gun)",
+    ]),
+    (6, &[
+        CREATE_CHANGES,
+        CHANGES_PRUNE_TRIGGER,
+        INCOME_INVOICES_CHANGES_INSERT_TRIGGER,
+        INCOME_INVOICES_CHANGES_UPDATE_TRIGGER,
+        INCOME_INVOICES_CHANGES_DELETE_TRIGGER,
+        EXPENSE_INVOICES_CHANGES_INSERT_TRIGGER,
+        EXPENSE_INVOICES_CHANGES_UPDATE_TRIGGER,
+        EXPENSE_INVOICES_CHANGES_DELETE_TRIGGER,
+        GENERAL_EXPENSES_CHANGES_INSERT_TRIGGER,
+        GENERAL_EXPENSES_CHANGES_UPDATE_TRIGGER,
+        GENERAL_EXPENSES_CHANGES_DELETE_TRIGGER,
+        CORPORATE_TAX_CHANGES_INSERT_TRIGGER,
+        CORPORATE_TAX_CHANGES_UPDATE_TRIGGER,
+        CORPORATE_TAX_CHANGES_DELETE_TRIGGER,
+    ]),
+];
+
+// settings/exchange_rates birincil anahtar üzerinden sorgulanır; ek indeks yok.
+const SETTINGS_MIGRATIONS: &[(i64, &[&str])] = &[];
+
+const HISTORY_MIGRATIONS: &[(i64, &[&str])] = &[
+    (1, &[
+        "CREATE INDEX IF NOT EXISTS idx_history_timestamp ON history(timestamp)",
+    ]),
+];
+
+/// Bekleyen göçleri sırayla, her biri tek transaction içinde uygular ve
+/// veritabanının ulaştığı sürümü döndürür.
+async fn apply_migrations(pool: &SqlitePool, migrations: &[(i64, &[&str])], db_name: &str) -> PyResult<i64> {
+    let mut version: i64 = sqlx::query_scalar("PRAGMA user_version")
+        .fetch_one(pool)
+        .await
+        .map_err(|e| PyRuntimeError::new_err(format!("Failed to read user_version of {}: {}", db_name, e)))?;
+
+    for (target, statements) in migrations.iter() {
+        if *target <= version {
+            continue;
+        }
+        let mut tx = pool.begin()
+            .await
+            .map_err(|e| PyRuntimeError::new_err(format!("Failed to begin migration on {}: {}", db_name, e)))?;
+        for stmt in statements.iter() {
+            sqlx::query(*stmt)
+                .execute(&mut *tx)
+                .await
+                .map_err(|e| PyRuntimeError::new_err(format!("Migration {} failed on {}: {}", target, db_name, e)))?;
+        }
+        sqlx::query(&format!("PRAGMA user_version = {}", target))
+            .execute(&mut *tx)
+            .await
+            .map_err(|e| PyRuntimeError::new_err(format!("Failed to set user_version of {}: {}", db_name, e)))?;
+        tx.commit()
+            .await
+            .map_err(|e| PyRuntimeError::new_err(format!("Failed to commit migration on {}: {}", db_name, e)))?;
+        version = *target;
+    }
+
+    Ok(version)
+}
+
+/// Üç veritabanının göçlerini uygular; başlatılmamış havuzlar atlanır.
+async fn run_all_migrations(
+    invoices_pool: &RwLock<Option<SqlitePool>>,
+    settings_pool: &RwLock<Option<SqlitePool>>,
+    history_pool: &RwLock<Option<SqlitePool>>,
+) -> PyResult<(i64, i64, i64)> {
+    let mut versions = (0, 0, 0);
+    if let Some(pool) = invoices_pool.read().await.as_ref() {
+        versions.0 = apply_migrations(pool, INVOICES_MIGRATIONS, "invoices.db").await?;
+    }
+    if let Some(pool) = settings_pool.read().await.as_ref() {
+        versions.1 = apply_migrations(pool, SETTINGS_MIGRATIONS, "settings.db").await?;
+    }
+    if let Some(pool) = history_pool.read().await.as_ref() {
+        versions.2 = apply_migrations(pool, HISTORY_MIGRATIONS, "history.db").await?;
+    }
+    Ok(versions)
+}
+
+// ============================================================================
+// KEYSET (SEEK) SAYFALAMA YARDIMCILARI
+// ============================================================================
+// Sıralama anahtarı (tarih, id) ya da yalnızca id'dir. NULL tarihler en küçük
+// kabul edilir. Her sayfa, indeks üzerinde aralık araması yapan sıralı
+// "segment" sorgularıyla okunur; OFFSET kullanılmaz.
+
+struct PageSegment {
+    condition: String,
+    tarih: Option<String>,
+    id: Option<i64>,
+    order: String,
+}
+
+impl PageSegment {
+    fn new(condition: String, tarih: Option<String>, id: Option<i64>, order: &str) -> Self {
+        PageSegment { condition, tarih, id, order: order.to_string() }
+    }
+}
+
+/// Desteklenen sıralamalar: (tarih sütunuyla mı, artan mı)
+fn page_order(order_by: &str) -> PyResult<(bool, bool)> {
+    match order_by {
+        "id DESC" => Ok((false, false)),
+        "id ASC" => Ok((false, true)),
+        "tarih DESC" => Ok((true, false)),
+        "tarih ASC" => Ok((true, true)),
+        _ => Err(PyValueError::new_err(format!("Desteklenmeyen sıralama: {}", order_by))),
+    }
+}
+
+/// Sayfa imleci: "id" (tarih NULL) veya "id|yyyy-mm-dd".
+fn encode_cursor(id: i64, tarih: &Option<String>) -> String {
+    match tarih {
+        Some(t) => format!("{}|{}", id, t),
+        None => id.to_string(),
+    }
+}
+
+fn decode_cursor(cursor: &str) -> PyResult<(i64, Option<String>)> {
+    let (id_part, tarih) = match cursor.split_once('|') {
+        Some((id, t)) => (id, Some(t.to_string())),
+        None => (cursor, None),
+    };
+    let id = id_part
+        .parse::<i64>()
+        .map_err(|_| PyValueError::new_err(format!("Geçersiz sayfa imleci: {}", cursor)))?;
+    Ok((id, tarih))
+}
+
+/// İmlecin ardından gelen satırlar için sırayla okunacak segmentler.
+fn page_segments(by_tarih: bool, ascending: bool, cursor: &Option<(i64, Option<String>)>) -> Vec<PageSegment> {
+    let direction = if ascending { "ASC" } else { "DESC" };
+    let op = if ascending { ">" } else { "<" };
+    let by_id = format!("id {}", direction);
+
+    if !by_tarih {
+        return match cursor {
+            None => vec![PageSegment::new("1".to_string(), None, None, &by_id)],
+            Some((id, _)) => vec![PageSegment::new(format!("id {} ?", op), None, Some(*id), &by_id)],
+        };
+    }
+
+    let by_date = format!("tarih {}, id {}", direction, direction);
+    let nulls = PageSegment::new("tarih IS NULL".to_string(), None, None, &by_id);
+    let non_nulls = PageSegment::new("tarih IS NOT NULL".to_string(), None, None, &by_date);
+
+    match cursor {
+        None => {
+            if ascending { vec![nulls, non_nulls] } else { vec![non_nulls, nulls] }
+        }
+        Some((id, None)) => {
+            let same = PageSegment::new(format!("tarih IS NULL AND id {} ?", op), None, Some(*id), &by_id);
+            if ascending { vec![same, non_nulls] } else { vec![same] }
+        }
+        Some((id, Some(tarih))) => {
+            let same = PageSegment::new(format!("tarih = ? AND id {} ?", op), Some(tarih.clone()), Some(*id), &by_id);
+            let rest = PageSegment::new(format!("tarih {} ?", op), Some(tarih.clone()), None, &by_date);
+            if ascending { vec![same, rest] } else { vec![same, rest, nulls] }
+        }
+    }
+}
+
+/// Fatura satırını Python sözlüğüne çevirir (tarih görüntüleme formatında).
+fn invoice_row_to_dict<'py>(py: Python<'py>, row: &SqliteRow) -> PyResult<Bound<'py, PyDict>> {
+    let dict = PyDict::new(py);
+    dict.set_item("id", row.get::<i64, _>("id"))?;
+    dict.set_item("fatura_no", row.try_get::<String, _>("fatura_no").ok())?;
+    let tarih_iso = row.try_get::<String, _>("tarih").ok();
+    dict.set_item("tarih", tarih_iso.as_ref().map(|t| to_display_date(t)))?;
+    dict.set_item("firma", row.try_get::<String, _>("firma").ok())?;
+    dict.set_item("malzeme", row.try_get::<String, _>("malzeme").ok())?;
+    dict.set_item("miktar", row.try_get::<String, _>("miktar").ok())?;
+    dict.set_item("matrah", row.try_get::<f64, _>("matrah").ok())?;
+    dict.set_item("toplam_tutar_tl", row.try_get::<f64, _>("toplam_tutar_tl").ok())?;
+    dict.set_item("toplam_tutar_usd", row.try_get::<f64, _>("toplam_tutar_usd").ok())?;
+    dict.set_item("toplam_tutar_eur", row.try_get::<f64, _>("toplam_tutar_eur").ok())?;
+    dict.set_item("birim", row.try_get::<String, _>("birim").ok())?;
+    dict.set_item("kdv_yuzdesi", row.try_get::<f64, _>("kdv_yuzdesi").ok())?;
+    dict.set_item("kdv_tutari", row.try_get::<f64, _>("kdv_tutari").ok())?;
+    dict.set_item("kdv_dahil", row.try_get::<i64, _>("kdv_dahil").ok())?;
+    dict.set_item("usd_rate", row.try_get::<f64, _>("usd_rate").ok())?;
+    dict.set_item("eur_rate", row.try_get::<f64, _>("eur_rate").ok())?;
+    dict.set_item("updated_at", row.try_get::<String, _>("updated_at").ok())?;
+    dict.set_item("created_at", row.try_get::<String, _>("created_at").ok())?;
+    Ok(dict)
+}
+
+/// row_factory verilmişse satırı SELECT * sırasındaki tuple ile ona verir
+/// (tarih ISO kalır), yoksa görüntüleme formatında dict kurar.
+fn invoice_row_to_py<'py>(py: Python<'py>, row: &SqliteRow, factory: &Option<Py<PyAny>>) -> PyResult<Bound<'py, PyAny>> {
+    let factory = match factory {
+        Some(f) => f.bind(py),
+        None => return Ok(invoice_row_to_dict(py, row)?.into_any()),
+    };
+    let values = PyList::empty(py);
+    for column in INVOICE_COLUMNS {
+        match numeric_typecode(column) {
+            Some("q") => values.append(row.try_get::<Option<i64>, _>(*column).ok().flatten())?,
+            Some(_) => values.append(row.try_get::<Option<f64>, _>(*column).ok().flatten())?,
+            None => values.append(row.try_get::<Option<String>, _>(*column).ok().flatten())?,
+        }
+    }
+    factory.call1((values.to_tuple(),))
+}
+
+/// Sayaç önbelleğini yalnızca daha önce doldurulmuşsa günceller (-1 = bilinmiyor).
+fn adjust_count(counter: &AtomicI64, delta: i64) {
+    let _ = counter.fetch_update(Ordering::SeqCst, Ordering::SeqCst, |c| {
+        if c >= 0 { Some(c + delta) } else { None }
+    });
+}
+
+// ============================================================================
+// YAZMA TRANSACTION'I
+// ============================================================================
+
+/// begin() ile açılan yazma transaction'ı. Her veritabanı için bağlantı ilk
+/// yazmada havuzdan alınır ve commit/rollback'e kadar tutulur. Yalnızca açan
+/// iş parçacığının yazmaları bu bağlantılardan geçer.
+struct WriteTx {
+    owner: ThreadId,
+    // İç içe begin() sayısı; 1'den büyükse SAVEPOINT tx_1..tx_{depth-1} açık
+    depth: usize,
+    conns: Vec<(&'static str, Transaction<'static, Sqlite>)>,
+}
+
+impl WriteTx {
+    async fn connection(&mut self, pool: &SqlitePool, db_name: &'static str) -> PyResult<&mut Transaction<'static, Sqlite>> {
+        if let Some(i) = self.conns.iter().position(|(name, _)| *name == db_name) {
+            return Ok(&mut self.conns[i].1);
+        }
+        let mut tx = pool
+            .begin()
+            .await
+            .map_err(|e| PyRuntimeError::new_err(format!("Failed to begin transaction on {}: {}", db_name, e)))?;
+        // Sonradan katılan bağlantıda da açık SAVEPOINT'ler olmalı ki rollback() doğru seviyeye dönsün
+        for level in 1..self.depth {
+            sqlx::query(&format!("SAVEPOINT tx_{}", level))
+                .execute(&mut *tx)
+                .await
+                .map_err(|e| PyRuntimeError::new_err(format!("Failed to create savepoint: {}", e)))?;
+        }
+        self.conns.push((db_name, tx));
+        Ok(&mut self.conns.last_mut().unwrap().1)
+    }
+}
+
+/// Yazma hedefi: açık transaction'ın bağlantısı ya da havuzdan alınan
+/// (otomatik commit) bağlantı.
+enum Writer<'a> {
+    Pooled(PoolConnection<Sqlite>),
+    Tx(&'a mut Transaction<'static, Sqlite>),
+}
+
+impl Writer<'_> {
+    fn conn(&mut self) -> &mut SqliteConnection {
+        match self {
+            Writer::Pooled(conn) => &mut **conn,
+            Writer::Tx(tx) => &mut ***tx,
+        }
+    }
+}
+
+/// Bu iş parçacığının açık transaction'ı varsa onun bağlantısını, yoksa
+/// havuzdan bir bağlantı verir.
+async fn writer_for<'a>(pool: &SqlitePool, db_name: &'static str, state: &'a mut Option<WriteTx>) -> PyResult<Writer<'a>> {
+    match state {
+        Some(tx) if tx.owner == thread::current().id() => Ok(Writer::Tx(tx.connection(pool, db_name).await?)),
+        _ => pool
+            .acquire()
+            .await
+            .map(Writer::Pooled)
+            .map_err(|e| PyRuntimeError::new_err(format!("Failed to acquire {} connection: {}", db_name, e))),
+    }
+}
+
+// ============================================================================
+// ANLIK GÖRÜNTÜ (uzun raporlar ve dışa aktarmalar)
+// ============================================================================
+
+/// snapshot() ile açılan okuma transaction'ı. Havuzdan ayrılmış bir
+/// bağlantıda tutulur; WAL modunda yazıcıyı engellemez.
+struct ReadSnapshot {
+    // İç içe snapshot() sayısı; yalnızca en dıştaki kapanınca bırakılır
+    depth: usize,
+    tx: Transaction<'static, Sqlite>,
+}
+
+type Snapshots = Arc<StdMutex<HashMap<ThreadId, ReadSnapshot>>>;
+
+/// Okuma kaynağı: bu iş parçacığının anlık görüntüsü ya da havuzdan alınan
+/// bağlantı. Görüntü okuma süresince tablodan çıkarılır ve Drop'ta geri
+/// konur; kilit okuma boyunca tutulmaz.
+enum Reader {
+    Pooled(PoolConnection<Sqlite>),
+    Snapshot(Snapshots, Option<ReadSnapshot>),
+}
+
+impl Reader {
+    fn conn(&mut self) -> &mut SqliteConnection {
+        match self {
+            Reader::Pooled(conn) => &mut **conn,
+            Reader::Snapshot(_, snapshot) => &mut *snapshot.as_mut().unwrap().tx,
+        }
+    }
+}
+
+impl Drop for Reader {
+    fn drop(&mut self) {
+        if let Reader::Snapshot(snapshots, snapshot) = self {
+            if let Some(snapshot) = snapshot.take() {
+                snapshots.lock().unwrap().insert(thread::current().id(), snapshot);
+            }
+        }
+    }
+}
+
+/// Bu iş parçacığının açık anlık görüntüsü varsa onun bağlantısını, yoksa
+/// havuzdan bir bağlantı verir.
+async fn reader_for(pool: &SqlitePool, snapshots: &Snapshots) -> PyResult<Reader> {
+    let owned = snapshots.lock().unwrap().remove(&thread::current().id());
+    match owned {
+        Some(snapshot) => Ok(Reader::Snapshot(snapshots.clone(), Some(snapshot))),
+        None => pool
+            .acquire()
+            .await
+            .map(Reader::Pooled)
+            .map_err(|e| PyRuntimeError::new_err(format!("Failed to acquire invoices connection: {}", e))),
+    }
+}
+
+// ============================================================================
+// TOPLU EKLEME YARDIMCILARI
+// ============================================================================
+
+/// Fatura INSERT parametreleri (doğrulanmış ve tarih ISO formatına çevrilmiş)
+struct InvoiceParams {
+    fatura_no: Option<String>,
+    tarih: Option<String>,
+    firma: Option<String>,
+    malzeme: Option<String>,
+    miktar: Option<String>,
+    matrah: Option<f64>,
+    toplam_tutar_tl: Option<f64>,
+    toplam_tutar_usd: Option<f64>,
+    toplam_tutar_eur: Option<f64>,
+    birim: Option<String>,
+    kdv_yuzdesi: f64,
+    kdv_tutari: f64,
+    kdv_dahil: i64,
+    usd_rate: Option<f64>,
+    eur_rate: Option<f64>,
+}
+
+impl InvoiceParams {
+    fn from_dict(data: &Bound<'_, PyDict>) -> PyResult<Self> {
+        validate_invoice_data(data)?;
+        let tarih_raw: Option<String> = data.get_item("tarih")?.map(|v| v.extract()).transpose()?.flatten();
+        Ok(InvoiceParams {
+            fatura_no: data.get_item("fatura_no")?.map(|v| v.extract()).transpose()?.flatten(),
+            tarih: tarih_raw.map(|t| to_iso_date(&t)),
+            firma: data.get_item("firma")?.map(|v| v.extract()).transpose()?.flatten(),
+            malzeme: data.get_item("malzeme")?.map(|v| v.extract()).transpose()?.flatten(),
+            miktar: data.get_item("miktar")?.map(|v| v.extract()).transpose()?.flatten(),
+            matrah: match data.get_item("matrah")? { Some(v) => v.extract()?, None => None },
+            toplam_tutar_tl: data.get_item("toplam_tutar_tl")?.map(|v| v.extract()).transpose()?.flatten(),
+            toplam_tutar_usd: data.get_item("toplam_tutar_usd")?.map(|v| v.extract()).transpose()?.flatten(),
+            toplam_tutar_eur: data.get_item("toplam_tutar_eur")?.map(|v| v.extract()).transpose()?.flatten(),
+            birim: data.get_item("birim")?.map(|v| v.extract()).transpose()?.flatten(),
+            kdv_yuzdesi: data.get_item("kdv_yuzdesi")?.map(|v| v.extract()).transpose()?.flatten().unwrap_or(0.0),
+            kdv_tutari: data.get_item("kdv_tutari")?.map(|v| v.extract()).transpose()?.flatten().unwrap_or(0.0),
+            kdv_dahil: data.get_item("kdv_dahil")?.map(|v| v.extract()).transpose()?.flatten().unwrap_or(0),
+            usd_rate: data.get_item("usd_rate")?.map(|v| v.extract()).transpose()?.flatten(),
+            eur_rate: data.get_item("eur_rate")?.map(|v| v.extract()).transpose()?.flatten(),
+        })
+    }
+}
+
+/// Faturaları tek transaction içinde ekler (tek commit); yeni id'leri sırayla döndürür.
+/// Herhangi bir satır başarısız olursa tüm grup geri alınır. Açık bir transaction
+/// içinde çağrılırsa SAVEPOINT olarak çalışır.
+async fn insert_invoices_bulk(writer: &mut Writer<'_>, table: &str, rows: Vec<InvoiceParams>) -> PyResult<Vec<i64>> {
+    let query = format!(
+        "INSERT INTO {} (fatura_no, tarih, firma, malzeme, miktar, matrah, toplam_tutar_tl, \
+         toplam_tutar_usd, toplam_tutar_eur, birim, kdv_yuzdesi, kdv_tutari, \
+         kdv_dahil, usd_rate, eur_rate, matrah_kurus, toplam_tutar_tl_kurus, \
+         toplam_tutar_usd_cent, toplam_tutar_eur_cent, kdv_tutari_kurus, tarih_gun, created_at) \
+         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        table
+    );
+    let created_at = Utc::now().to_rfc3339();
+    let mut tx = writer
+        .conn()
+        .begin()
+        .await
+        .map_err(|e| PyRuntimeError::new_err(format!("Failed to begin bulk insert: {}", e)))?;
+
+    let mut ids = Vec::with_capacity(rows.len());
+    for row in rows {
+        let tarih_gun = row.tarih.as_deref().and_then(to_day_number);
+        let result = sqlx::query(&query)
+            .bind(row.fatura_no)
+            .bind(row.tarih)
+            .bind(row.firma)
+            .bind(row.malzeme)
+            .bind(row.miktar)
+            .bind(row.matrah)
+            .bind(row.toplam_tutar_tl)
+            .bind(row.toplam_tutar_usd)
+            .bind(row.toplam_tutar_eur)
+            .bind(row.birim)
+            .bind(row.kdv_yuzdesi)
+            .bind(row.kdv_tutari)
+            .bind(row.kdv_dahil)
+            .bind(row.usd_rate)
+            .bind(row.eur_rate)
+            .bind(to_minor(row.matrah))
+            .bind(to_minor(row.toplam_tutar_tl))
+            .bind(to_minor(row.toplam_tutar_usd))
+            .bind(to_minor(row.toplam_tutar_eur))
+            .bind(to_minor(Some(row.kdv_tutari)))
+            .bind(tarih_gun)
+            .bind(created_at.clone())
+            .execute(&mut *tx)
+            .await
+            .map_err(|e| PyRuntimeError::new_err(format!("Failed to bulk insert into {}: {}", table, e)))?;
+        ids.push(result.last_insert_rowid());
+    }
+
+    tx.commit()
+        .await
+        .map_err(|e| PyRuntimeError::new_err(format!("Failed to commit bulk insert: {}", e)))?;
+    Ok(ids)
+}
+
+// ============================================================================
+// SÜTUNSAL OKUMA YARDIMCILARI
+// ============================================================================
+
+const INVOICE_COLUMNS: &[&str] = &[
+    "id", "fatura_no", "irsaliye_no", "tarih", "firma", "malzeme",
+    "miktar", "matrah", "toplam_tutar_tl", "toplam_tutar_usd",
+    "toplam_tutar_eur", "birim", "kdv_yuzdesi", "kdv_tutari",
+    "kdv_dahil", "usd_rate", "eur_rate", "updated_at", "created_at",
+];
+
+/// Sütunsal okumada sayısal dönen sütunlar (array typecode); NULL değerler 0 olur
+fn numeric_typecode(column: &str) -> Option<&'static str> {
+    match column {
+        "id" | "kdv_dahil" | "tarih_gun" | "yil" | "ay" => Some("q"),
+        "matrah" | "toplam_tutar_tl" | "toplam_tutar_usd" | "toplam_tutar_eur"
+        | "kdv_yuzdesi" | "kdv_tutari" | "usd_rate" | "eur_rate" => Some("d"),
+        _ => None,
+    }
+}
+
+/// Sütunsal okumada tarih_gun (yyyymmdd) üzerinden SQL'de hesaplanan tarih sütunları
+fn day_number_expr(column: &str) -> Option<&'static str> {
+    match column {
+        "tarih_gun" => Some("tarih_gun"),
+        "yil" => Some("tarih_gun / 10000"),
+        "ay" => Some("tarih_gun / 100 % 100"),
+        _ => None,
+    }
+}
+
+/// Python'dan gelen sorgu parametresi
+enum SqlParam {
+    Null,
+    Int(i64),
+    Real(f64),
+    Text(String),
+}
+
+fn extract_sql_params(params: Option<Vec<Bound<'_, PyAny>>>) -> PyResult<Vec<SqlParam>> {
+    params
+        .unwrap_or_default()
+        .iter()
+        .map(|value| {
+            if value.is_none() {
+                Ok(SqlParam::Null)
+            } else if let Ok(v) = value.extract::<i64>() {
+                Ok(SqlParam::Int(v))
+            } else if let Ok(v) = value.extract::<f64>() {
+                Ok(SqlParam::Real(v))
+            } else {
+                Ok(SqlParam::Text(value.extract::<String>()?))
+            }
+        })
+        .collect()
+}
+
+/// Sayısal sütunu array('d'/'q') olarak kurar; NumPy kuruluysa kopyasız ndarray'e sarar.
+fn numeric_column<'py>(py: Python<'py>, typecode: &str, rows: &[SqliteRow], index: usize) -> PyResult<Bound<'py, PyAny>> {
+    let mut bytes: Vec<u8> = Vec::with_capacity(rows.len() * 8);
+    for row in rows {
+        if typecode == "q" {
+            let v = row.try_get::<Option<i64>, _>(index).ok().flatten().unwrap_or(0);
+            bytes.extend_from_slice(&v.to_ne_bytes());
+        } else {
+            let v = row.try_get::<Option<f64>, _>(index).ok().flatten().unwrap_or(0.0);
+            bytes.extend_from_slice(&v.to_ne_bytes());
+        }
+    }
+    let values = py.import("array")?.getattr("array")?.call1((typecode,))?;
+    values.call_method1("frombytes", (PyBytes::new(py, &bytes),))?;
+    match py.import("numpy") {
+        Ok(np) => np.call_method1("frombuffer", (values, typecode)),
+        Err(_) => Ok(values),
+    }
+}
+
 // ============================================================================
 // VERİTABANI SINIFI
 // ============================================================================
@@ -162,6 +1256,32 @@ struct Database {
     settings_pool: Arc<RwLock<Option<SqlitePool>>>,
     history_pool: Arc<RwLock<Option<SqlitePool>>>,
     runtime: Runtime,
+    // Fatura sayıları yazma işlemlerinde güncellenen önbellekten okunur
+    income_count: Arc<AtomicI64>,
+    expense_count: Arc<AtomicI64>,
+    // Fatura satırları için kayıt tipi (ör. invoices.Invoice); None → dict
+    #[pyo3(get, set)]
+    row_factory: Option<Py<PyAny>>,
+    // begin() ile açılan yazma transaction'ı
+    write_tx: Arc<Mutex<Option<WriteTx>>>,
+    // snapshot() ile açılan okuma transaction'ları (iş parçacığı başına)
+    snapshots: Snapshots,
+    // data_version() için ayrılmış bağlantı; sayaç bağlantıya özeldir
+    watch_conn: Arc<Mutex<Option<SqliteConnection>>>,
+}
+
+impl Database {
+    /// Async veritabanı işini GIL bırakılarak çalıştırır. Girdiler önceden
+    /// Python nesnelerinden çıkarılır, sonuç nesneleri GIL geri alınınca
+    /// kurulur; sorgu sürerken diğer Python iş parçacıkları (Flet arayüzü,
+    /// QR işçileri) çalışmaya devam eder.
+    fn run_detached<F>(&self, py: Python<'_>, future: F) -> F::Output
+    where
+        F: Future + Send,
+        F::Output: Send,
+    {
+        py.detach(|| self.runtime.block_on(future))
+    }
 }
 
 #[pymethods]
@@ -173,6 +1293,12 @@ impl Database {
             settings_pool: Arc::new(RwLock::new(None)),
             history_pool: Arc::new(RwLock::new(None)),
             runtime: Runtime::new().unwrap(),
+            income_count: Arc::new(AtomicI64::new(-1)),
+            expense_count: Arc::new(AtomicI64::new(-1)),
+            row_factory: None,
+            write_tx: Arc::new(Mutex::new(None)),
+            snapshots: Arc::new(StdMutex::new(HashMap::new())),
+            watch_conn: Arc::new(Mutex::new(None)),
         }
     }
 
@@ -180,7 +1306,7 @@ impl Database {
     // BAĞLANTI VE TABLO OLUŞTURMA
     // ------------------------------------------------------------------------
 
-    fn init_connections(&self) -> PyResult<()> {
+    fn init_connections(&self, py: Python<'_>) -> PyResult<()> {
         // Çalışma dizini Python tarafında PROJECT_ROOT'a ayarlandığı için
         // current_dir() her zaman doğru konumu (proje kökü veya exe dizini) döner.
         let cwd = env::current_dir().unwrap_or_else(|_| PathBuf::from("."));
@@ -190,33 +1316,46 @@ impl Database {
             fs::create_dir(&db_path).map_err(|e| PyRuntimeError::new_err(format!("Failed to create Database directory: {}", e)))?;
         }
 
+        // Yeni bağlantıda sayaç önbellekleri geçersiz
+        self.income_count.store(-1, Ordering::SeqCst);
+        self.expense_count.store(-1, Ordering::SeqCst);
+
         let invoices_pool = self.invoices_pool.clone();
         let settings_pool = self.settings_pool.clone();
         let history_pool = self.history_pool.clone();
+        let watch_conn = self.watch_conn.clone();
         
         // Veritabanı dosya yollarını oluştur
         let invoices_db_path = db_path.join("invoices.db");
         let settings_db_path = db_path.join("settings.db");
         let history_db_path = db_path.join("history.db");
 
-        self.runtime.block_on(async move {
+        self.run_detached(py, async move {
             // Faturalar Veritabanı (Faturalar ve Genel Giderler)
             let connection_string = format!("sqlite:{}?mode=rwc", invoices_db_path.display());
             let opts = SqliteConnectOptions::from_str(&connection_string)
                 .map_err(|e| PyRuntimeError::new_err(format!("Failed to parse connection string: {}", e)))?
-                .journal_mode(sqlx::sqlite::SqliteJournalMode::Wal);
+                .journal_mode(sqlx::sqlite::SqliteJournalMode::Wal)
+                .busy_timeout(Duration::from_millis(BUSY_TIMEOUT_MS));
             
             let pool = SqlitePoolOptions::new()
                 .max_connections(5)
-                .connect_with(opts).await
+                .connect_with(opts.clone()).await
                 .map_err(|e| PyRuntimeError::new_err(format!("Failed to connect to invoices.db: {}", e)))?;
             *invoices_pool.write().await = Some(pool);
 
+            let conn = SqliteConnection::connect_with(&opts).await
+                .map_err(|e| PyRuntimeError::new_err(format!("Failed to connect to invoices.db: {}", e)))?;
+            if let Some(old) = watch_conn.lock().await.replace(conn) {
+                let _ = old.close().await;
+            }
+
             // Ayarlar Veritabanı (Ayarlar ve Döviz Kurları)
             let connection_string = format!("sqlite:{}?mode=rwc", settings_db_path.display());
             let opts = SqliteConnectOptions::from_str(&connection_string)
                 .map_err(|e| PyRuntimeError::new_err(format!("Failed to parse connection string: {}", e)))?
-                .journal_mode(sqlx::sqlite::SqliteJournalMode::Wal);
+                .journal_mode(sqlx::sqlite::SqliteJournalMode::Wal)
+                .busy_timeout(Duration::from_millis(BUSY_TIMEOUT_MS));
 
             let pool = SqlitePoolOptions::new()
                 .max_connections(5)
@@ -228,7 +1367,8 @@ impl Database {
             let connection_string = format!("sqlite:{}?mode=rwc", history_db_path.display());
             let opts = SqliteConnectOptions::from_str(&connection_string)
                 .map_err(|e| PyRuntimeError::new_err(format!("Failed to parse connection string: {}", e)))?
-                .journal_mode(sqlx::sqlite::SqliteJournalMode::Wal);
+                .journal_mode(sqlx::sqlite::SqliteJournalMode::Wal)
+                .busy_timeout(Duration::from_millis(BUSY_TIMEOUT_MS));
 
             let pool = SqlitePoolOptions::new()
                 .max_connections(5)
@@ -240,12 +1380,12 @@ impl Database {
         })
     }
 
-    fn create_tables(&self) -> PyResult<()> {
+    fn create_tables(&self, py: Python<'_>) -> PyResult<()> {
         let invoices_pool = self.invoices_pool.clone();
         let settings_pool = self.settings_pool.clone();
         let history_pool = self.history_pool.clone();
 
-        self.runtime.block_on(async move {
+        self.run_detached(py, async move {
             // FATURA VERİTABANI TABLOLARI
             if let Some(pool) = invoices_pool.read().await.as_ref() {
                 // Gelir Faturaları
@@ -270,7 +1410,13 @@ impl Database {
                         usd_rate REAL CHECK(usd_rate IS NULL OR usd_rate > 0.0),
                         eur_rate REAL CHECK(eur_rate IS NULL OR eur_rate > 0.0),
                         updated_at TEXT,
-                        created_at TEXT
+                        created_at TEXT,
+                        matrah_kurus INTEGER,
+                        toplam_tutar_tl_kurus INTEGER,
+                        toplam_tutar_usd_cent INTEGER,
+                        toplam_tutar_eur_cent INTEGER,
+                        kdv_tutari_kurus INTEGER,
+                        tarih_gun INTEGER
                     )
                     "#
                 )
@@ -280,6 +1426,10 @@ impl Database {
 
                 // Migration for matrah column
                 let _ = sqlx::query("ALTER TABLE income_invoices ADD COLUMN matrah REAL DEFAULT 0.0").execute(pool).await;
+                // Tam sayı kuruş/sent ve tarih_gun sütunları (göç v4/v5 eski satırları doldurur)
+                for column in MINOR_COLUMNS.iter().chain(&["tarih_gun"]) {
+                    let _ = sqlx::query(&format!("ALTER TABLE income_invoices ADD COLUMN {} INTEGER", column)).execute(pool).await;
+                }
 
                 // Gider Faturaları
                 sqlx::query(
@@ -303,7 +1453,13 @@ impl Database {
                         usd_rate REAL CHECK(usd_rate IS NULL OR usd_rate > 0.0),
                         eur_rate REAL CHECK(eur_rate IS NULL OR eur_rate > 0.0),
                         updated_at TEXT,
-                        created_at TEXT
+                        created_at TEXT,
+                        matrah_kurus INTEGER,
+                        toplam_tutar_tl_kurus INTEGER,
+                        toplam_tutar_usd_cent INTEGER,
+                        toplam_tutar_eur_cent INTEGER,
+                        kdv_tutari_kurus INTEGER,
+                        tarih_gun INTEGER
                     )
                     "#
                 )
@@ -313,6 +1469,10 @@ impl Database {
 
                 // Migration for matrah column
                 let _ = sqlx::query("ALTER TABLE expense_invoices ADD COLUMN matrah REAL DEFAULT 0.0").execute(pool).await;
+                // Tam sayı kuruş/sent ve tarih_gun sütunları (göç v4/v5 eski satırları doldurur)
+                for column in MINOR_COLUMNS.iter().chain(&["tarih_gun"]) {
+                    let _ = sqlx::query(&format!("ALTER TABLE expense_invoices ADD COLUMN {} INTEGER", column)).execute(pool).await;
+                }
 
                 // Genel Giderler
                 sqlx::query(
@@ -410,22 +1570,169 @@ impl Database {
                 .map_err(|e| PyRuntimeError::new_err(format!("Failed to create history: {}", e)))?;
             }
 
+            // Tablolar hazır olduktan sonra bekleyen göçleri (indeksler vb.) uygula
+            run_all_migrations(&invoices_pool, &settings_pool, &history_pool).await?;
+
             Ok(())
         })
     }
 
+    /// Bekleyen şema göçlerini uygular; her veritabanının sürümünü döndürür.
+    fn run_migrations(&self, py: Python<'_>) -> PyResult<Py<PyAny>> {
+        let invoices_pool = self.invoices_pool.clone();
+        let settings_pool = self.settings_pool.clone();
+        let history_pool = self.history_pool.clone();
+
+        let (invoices, settings, history) = self.run_detached(py, async move {
+            run_all_migrations(&invoices_pool, &settings_pool, &history_pool).await
+        })?;
+
+        let dict = PyDict::new(py);
+        dict.set_item("invoices", invoices)?;
+        dict.set_item("settings", settings)?;
+        dict.set_item("history", history)?;
+        Ok(dict.into())
+    }
+
+    // ============================================================================
+    // TRANSACTION
+    // ============================================================================
+
+    /// Yazma transaction'ı başlatır: commit() çağrılana kadar bu iş parçacığının
+    /// yazmaları commit edilmez (tek fsync). İç içe çağrıda SAVEPOINT açılır.
+    fn begin(&self, py: Python<'_>) -> PyResult<()> {
+        let write_tx = self.write_tx.clone();
+
+        self.run_detached(py, async move {
+            let mut state = write_tx.lock().await;
+            match state.as_mut() {
+                None => {
+                    *state = Some(WriteTx { owner: thread::current().id(), depth: 1, conns: Vec::new() });
+                    Ok(())
+                }
+                Some(tx) if tx.owner == thread::current().id() => {
+                    let savepoint = format!("SAVEPOINT tx_{}", tx.depth);
+                    for (_, conn) in tx.conns.iter_mut() {
+                        sqlx::query(&savepoint)
+                            .execute(&mut **conn)
+                            .await
+                            .map_err(|e| PyRuntimeError::new_err(format!("Failed to create savepoint: {}", e)))?;
+                    }
+                    tx.depth += 1;
+                    Ok(())
+                }
+                Some(_) => Err(PyRuntimeError::new_err("Another thread has an open transaction")),
+            }
+        })
+    }
+
+    /// En içteki transaction'ı kapatır; en dıştaysa tüm veritabanlarını commit eder.
+    fn commit(&self, py: Python<'_>) -> PyResult<()> {
+        let write_tx = self.write_tx.clone();
+
+        let result = self.run_detached(py, async move {
+            let mut state = write_tx.lock().await;
+            let tx = match state.as_mut() {
+                Some(tx) if tx.owner == thread::current().id() => tx,
+                _ => return Err(PyRuntimeError::new_err("No open transaction")),
+            };
+            tx.depth -= 1;
+            if tx.depth > 0 {
+                let release = format!("RELEASE tx_{}", tx.depth);
+                for (_, conn) in tx.conns.iter_mut() {
+                    sqlx::query(&release)
+                        .execute(&mut **conn)
+                        .await
+                        .map_err(|e| PyRuntimeError::new_err(format!("Failed to release savepoint: {}", e)))?;
+                }
+                return Ok(true);
+            }
+
+            // İlk commit hatasından sonra kalan bağlantılar geri alınır
+            let mut failure = None;
+            for (db_name, conn) in state.take().unwrap().conns {
+                if failure.is_some() {
+                    let _ = conn.rollback().await;
+                } else if let Err(e) = conn.commit().await {
+                    failure = Some(PyRuntimeError::new_err(format!("Failed to commit {}: {}", db_name, e)));
+                }
+            }
+            match failure {
+                Some(err) => Err(err),
+                None => Ok(true),
+            }
+        });
+
+        if result.is_err() {
+            self.income_count.store(-1, Ordering::SeqCst);
+            self.expense_count.store(-1, Ordering::SeqCst);
+        }
+        result.map(|_| ())
+    }
+
+    /// En içteki transaction'ı (ya da SAVEPOINT'i) geri alır.
+    fn rollback(&self, py: Python<'_>) -> PyResult<()> {
+        let write_tx = self.write_tx.clone();
+
+        self.run_detached(py, async move {
+            let mut state = write_tx.lock().await;
+            let tx = match state.as_mut() {
+                Some(tx) if tx.owner == thread::current().id() => tx,
+                _ => return Err(PyRuntimeError::new_err("No open transaction")),
+            };
+            tx.depth -= 1;
+            if tx.depth > 0 {
+                let depth = tx.depth;
+                for (_, conn) in tx.conns.iter_mut() {
+                    for stmt in [format!("ROLLBACK TO tx_{}", depth), format!("RELEASE tx_{}", depth)] {
+                        sqlx::query(&stmt)
+                            .execute(&mut **conn)
+                            .await
+                            .map_err(|e| PyRuntimeError::new_err(format!("Failed to roll back savepoint: {}", e)))?;
+                    }
+                }
+                return Ok(());
+            }
+
+            for (db_name, conn) in state.take().unwrap().conns {
+                conn.rollback()
+                    .await
+                    .map_err(|e| PyRuntimeError::new_err(format!("Failed to roll back {}: {}", db_name, e)))?;
+            }
+            Ok(())
+        })?;
+
+        // Önbellekteki sayılar geri alınan yazmaları içeriyor olabilir
+        self.income_count.store(-1, Ordering::SeqCst);
+        self.expense_count.store(-1, Ordering::SeqCst);
+        Ok(())
+    }
+
+    /// with db.transaction(): bloğu hatasız biterse commit, hata olursa rollback.
+    fn transaction(slf: PyRef<'_, Self>) -> TransactionScope {
+        TransactionScope { db: slf.into() }
+    }
+
+    /// with db.snapshot(): bloğu içindeki fatura okumaları tek bir okuma
+    /// transaction'ından, aynı andaki görüntüden yapılır. Yazıcıyı engellemez.
+    fn snapshot(slf: PyRef<'_, Self>) -> SnapshotScope {
+        SnapshotScope { db: slf.into() }
+    }
+
     // ============================================================================
     // GELİR FATURASI METOTLARI
     // ============================================================================
     
-    fn add_gelir_invoice(&self, data: &Bound<'_, PyDict>) -> PyResult<i64> {
+    fn add_gelir_invoice(&self, py: Python<'_>, data: &Bound<'_, PyDict>) -> PyResult<i64> {
         validate_invoice_data(data)?;
         let invoices_pool = self.invoices_pool.clone();
+        let write_tx = self.write_tx.clone();
         
         // Python sözlüğünden değerleri al
         let fatura_no: Option<String> = data.get_item("fatura_no")?.map(|v| v.extract()).transpose()?.flatten();
         let tarih_raw: Option<String> = data.get_item("tarih")?.map(|v| v.extract()).transpose()?.flatten();
         let tarih = tarih_raw.map(|t| to_iso_date(&t)); // ISO formatına çevir
+        let tarih_gun = tarih.as_deref().and_then(to_day_number);
         
         let firma: Option<String> = data.get_item("firma")?.map(|v| v.extract()).transpose()?.flatten();
         let malzeme: Option<String> = data.get_item("malzeme")?.map(|v| v.extract()).transpose()?.flatten();
@@ -441,16 +1748,19 @@ impl Database {
         let usd_rate: Option<f64> = data.get_item("usd_rate")?.map(|v| v.extract()).transpose()?.flatten();
         let eur_rate: Option<f64> = data.get_item("eur_rate")?.map(|v| v.extract()).transpose()?.flatten();
 
-        self.runtime.block_on(async move {
+        let id = self.run_detached(py, async move {
             if let Some(pool) = invoices_pool.read().await.as_ref() {
+                let mut tx_state = write_tx.lock().await;
+                let mut writer = writer_for(pool, "invoices", &mut tx_state).await?;
                 let created_at = Utc::now().to_rfc3339();
                 
                 let result = sqlx::query(
                     r#"
                     INSERT INTO income_invoices (fatura_no, tarih, firma, malzeme, miktar, matrah, toplam_tutar_tl, 
                                         toplam_tutar_usd, toplam_tutar_eur, birim, kdv_yuzdesi, kdv_tutari, 
-                                        kdv_dahil, usd_rate, eur_rate, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                                        kdv_dahil, usd_rate, eur_rate, matrah_kurus, toplam_tutar_tl_kurus,
+                                        toplam_tutar_usd_cent, toplam_tutar_eur_cent, kdv_tutari_kurus, tarih_gun, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                     "#
                 )
                 .bind(fatura_no)
@@ -468,8 +1778,14 @@ impl Database {
                 .bind(kdv_dahil)
                 .bind(usd_rate)
                 .bind(eur_rate)
+                .bind(to_minor(matrah))
+                .bind(to_minor(toplam_tutar_tl))
+                .bind(to_minor(toplam_tutar_usd))
+                .bind(to_minor(toplam_tutar_eur))
+                .bind(to_minor(Some(kdv_tutari)))
+                .bind(tarih_gun)
                 .bind(created_at)
-                .execute(pool)
+                .execute(writer.conn())
                 .await
                 .map_err(|e| PyRuntimeError::new_err(format!("Failed to insert gelir invoice: {}", e)))?;
 
@@ -477,16 +1793,47 @@ impl Database {
             } else {
                 Err(PyRuntimeError::new_err("Database not initialized"))
             }
-        })
+        })?;
+
+        adjust_count(&self.income_count, 1);
+        Ok(id)
+    }
+
+    /// Toplu gelir faturası ekleme: tek transaction, tek commit. Yeni id listesi döner.
+    fn add_gelir_invoices_bulk(&self, py: Python<'_>, data_list: Vec<Bound<'_, PyDict>>) -> PyResult<Vec<i64>> {
+        let rows = data_list
+            .iter()
+            .map(|data| InvoiceParams::from_dict(data))
+            .collect::<PyResult<Vec<_>>>()?;
+        if rows.is_empty() {
+            return Ok(Vec::new());
+        }
+        let invoices_pool = self.invoices_pool.clone();
+        let write_tx = self.write_tx.clone();
+
+        let ids = self.run_detached(py, async move {
+            if let Some(pool) = invoices_pool.read().await.as_ref() {
+                let mut tx_state = write_tx.lock().await;
+                let mut writer = writer_for(pool, "invoices", &mut tx_state).await?;
+                insert_invoices_bulk(&mut writer, "income_invoices", rows).await
+            } else {
+                Err(PyRuntimeError::new_err("Database not initialized"))
+            }
+        })?;
+
+        adjust_count(&self.income_count, ids.len() as i64);
+        Ok(ids)
     }
 
-    fn update_gelir_invoice(&self, invoice_id: i64, data: &Bound<'_, PyDict>) -> PyResult<bool> {
+    fn update_gelir_invoice(&self, py: Python<'_>, invoice_id: i64, data: &Bound<'_, PyDict>) -> PyResult<bool> {
         validate_invoice_data(data)?;
         let invoices_pool = self.invoices_pool.clone();
+        let write_tx = self.write_tx.clone();
         
         let fatura_no: Option<String> = data.get_item("fatura_no")?.map(|v| v.extract()).transpose()?.flatten();
         let tarih_raw: Option<String> = data.get_item("tarih")?.map(|v| v.extract()).transpose()?.flatten();
         let tarih = tarih_raw.map(|t| to_iso_date(&t)); // ISO formatına çevir
+        let tarih_gun = tarih.as_deref().and_then(to_day_number);
 
         let firma: Option<String> = data.get_item("firma")?.map(|v| v.extract()).transpose()?.flatten();
         let malzeme: Option<String> = data.get_item("malzeme")?.map(|v| v.extract()).transpose()?.flatten();
@@ -502,8 +1849,10 @@ impl Database {
         let usd_rate: Option<f64> = data.get_item("usd_rate")?.map(|v| v.extract()).transpose()?.flatten();
         let eur_rate: Option<f64> = data.get_item("eur_rate")?.map(|v| v.extract()).transpose()?.flatten();
 
-        self.runtime.block_on(async move {
+        self.run_detached(py, async move {
             if let Some(pool) = invoices_pool.read().await.as_ref() {
+                let mut tx_state = write_tx.lock().await;
+                let mut writer = writer_for(pool, "invoices", &mut tx_state).await?;
                 let updated_at = Utc::now().to_rfc3339();
                 
                 let result = sqlx::query(
@@ -511,7 +1860,9 @@ impl Database {
                     UPDATE income_invoices SET
                     fatura_no = ?, tarih = ?, firma = ?, malzeme = ?, miktar = ?, matrah = ?,
                     toplam_tutar_tl = ?, toplam_tutar_usd = ?, toplam_tutar_eur = ?, birim = ?, 
-                    kdv_yuzdesi = ?, kdv_tutari = ?, kdv_dahil = ?, usd_rate = ?, eur_rate = ?, updated_at = ?
+                    kdv_yuzdesi = ?, kdv_tutari = ?, kdv_dahil = ?, usd_rate = ?, eur_rate = ?,
+                    matrah_kurus = ?, toplam_tutar_tl_kurus = ?, toplam_tutar_usd_cent = ?,
+                    toplam_tutar_eur_cent = ?, kdv_tutari_kurus = ?, tarih_gun = ?, updated_at = ?
                     WHERE id = ?
                     "#
                 )
@@ -530,9 +1881,15 @@ impl Database {
                 .bind(kdv_dahil)
                 .bind(usd_rate)
                 .bind(eur_rate)
+                .bind(to_minor(matrah))
+                .bind(to_minor(toplam_tutar_tl))
+                .bind(to_minor(toplam_tutar_usd))
+                .bind(to_minor(toplam_tutar_eur))
+                .bind(to_minor(Some(kdv_tutari)))
+                .bind(tarih_gun)
                 .bind(updated_at)
                 .bind(invoice_id)
-                .execute(pool)
+                .execute(writer.conn())
                 .await
                 .map_err(|e| PyRuntimeError::new_err(format!("Failed to update gelir invoice: {}", e)))?;
 
@@ -543,14 +1900,17 @@ impl Database {
         })
     }
 
-    fn delete_gelir_invoice(&self, invoice_id: i64) -> PyResult<i64> {
+    fn delete_gelir_invoice(&self, py: Python<'_>, invoice_id: i64) -> PyResult<i64> {
         let invoices_pool = self.invoices_pool.clone();
+        let write_tx = self.write_tx.clone();
         
-        self.runtime.block_on(async move {
+        let affected = self.run_detached(py, async move {
             if let Some(pool) = invoices_pool.read().await.as_ref() {
+                let mut tx_state = write_tx.lock().await;
+                let mut writer = writer_for(pool, "invoices", &mut tx_state).await?;
                 let result = sqlx::query("DELETE FROM income_invoices WHERE id = ?")
                     .bind(invoice_id)
-                    .execute(pool)
+                    .execute(writer.conn())
                     .await
                     .map_err(|e| PyRuntimeError::new_err(format!("Failed to delete gelir invoice: {}", e)))?;
 
@@ -558,18 +1918,24 @@ impl Database {
             } else {
                 Err(PyRuntimeError::new_err("Database not initialized"))
             }
-        })
+        })?;
+
+        adjust_count(&self.income_count, -affected);
+        Ok(affected)
     }
 
-    fn delete_multiple_gelir_invoices(&self, invoice_ids: Vec<i64>) -> PyResult<i64> {
+    fn delete_multiple_gelir_invoices(&self, py: Python<'_>, invoice_ids: Vec<i64>) -> PyResult<i64> {
         let invoices_pool = self.invoices_pool.clone();
+        let write_tx = self.write_tx.clone();
         
-        self.runtime.block_on(async move {
+        let affected = self.run_detached(py, async move {
             if invoice_ids.is_empty() {
                 return Ok(0);
             }
 
             if let Some(pool) = invoices_pool.read().await.as_ref() {
+                let mut tx_state = write_tx.lock().await;
+                let mut writer = writer_for(pool, "invoices", &mut tx_state).await?;
                 let placeholders = vec!["?"; invoice_ids.len()].join(",");
                 let query = format!("DELETE FROM income_invoices WHERE id IN ({})", placeholders);
                 
@@ -578,7 +1944,7 @@ impl Database {
                     q = q.bind(id);
                 }
                 
-                let result = q.execute(pool)
+                let result = q.execute(writer.conn())
                     .await
                     .map_err(|e| PyRuntimeError::new_err(format!("Failed to delete multiple gelir invoices: {}", e)))?;
 
@@ -586,15 +1952,20 @@ impl Database {
             } else {
                 Err(PyRuntimeError::new_err("Database not initialized"))
             }
-        })
+        })?;
+
+        adjust_count(&self.income_count, -affected);
+        Ok(affected)
     }
 
     #[pyo3(signature = (limit=None, offset=None, order_by=None))]
     fn get_all_gelir_invoices(&self, py: Python<'_>, limit: Option<i64>, offset: Option<i64>, order_by: Option<String>) -> PyResult<Py<PyAny>> {
         let invoices_pool = self.invoices_pool.clone();
+        let snapshots = self.snapshots.clone();
         
-        let rows = self.runtime.block_on(async move {
+        let rows = self.run_detached(py, async move {
             if let Some(pool) = invoices_pool.read().await.as_ref() {
+                let mut reader = reader_for(pool, &snapshots).await?;
                 let order_clause = order_by.unwrap_or_else(|| "tarih DESC".to_string());
                 let query = if let Some(lim) = limit {
                     format!(
@@ -606,7 +1977,7 @@ impl Database {
                 };
 
                 sqlx::query(&query)
-                    .fetch_all(pool)
+                    .fetch_all(reader.conn())
                     .await
                     .map_err(|e| PyRuntimeError::new_err(format!("Failed to fetch gelir invoices: {}", e)))
             } else {
@@ -615,43 +1986,28 @@ impl Database {
         })?;
 
         let result = PyList::empty(py);
-        for row in rows {
-            let dict = PyDict::new(py);
-            dict.set_item("id", row.get::<i64, _>("id"))?;
-            dict.set_item("fatura_no", row.try_get::<String, _>("fatura_no").ok())?;
-            
-            // ISO tarihini görüntüleme formatına geri çevir
-            let tarih_iso = row.try_get::<String, _>("tarih").ok();
-            let tarih_display = tarih_iso.as_ref().map(|t| to_display_date(t));
-            dict.set_item("tarih", tarih_display)?;
-
-            dict.set_item("firma", row.try_get::<String, _>("firma").ok())?;
-            dict.set_item("malzeme", row.try_get::<String, _>("malzeme").ok())?;
-            dict.set_item("miktar", row.try_get::<String, _>("miktar").ok())?;
-            dict.set_item("matrah", row.try_get::<f64, _>("matrah").ok())?;
-            dict.set_item("toplam_tutar_tl", row.try_get::<f64, _>("toplam_tutar_tl").ok())?;
-            dict.set_item("toplam_tutar_usd", row.try_get::<f64, _>("toplam_tutar_usd").ok())?;
-            dict.set_item("toplam_tutar_eur", row.try_get::<f64, _>("toplam_tutar_eur").ok())?;
-            dict.set_item("birim", row.try_get::<String, _>("birim").ok())?;
-            dict.set_item("kdv_yuzdesi", row.try_get::<f64, _>("kdv_yuzdesi").ok())?;
-            dict.set_item("kdv_tutari", row.try_get::<f64, _>("kdv_tutari").ok())?;
-            dict.set_item("kdv_dahil", row.try_get::<i64, _>("kdv_dahil").ok())?;
-            dict.set_item("usd_rate", row.try_get::<f64, _>("usd_rate").ok())?;
-            dict.set_item("eur_rate", row.try_get::<f64, _>("eur_rate").ok())?;
-            dict.set_item("updated_at", row.try_get::<String, _>("updated_at").ok())?;
-            dict.set_item("created_at", row.try_get::<String, _>("created_at").ok())?;
-            result.append(dict)?;
+        for row in rows.iter() {
+            result.append(invoice_row_to_py(py, row, &self.row_factory)?)?;
         }
         Ok(result.into())
     }
 
-    fn get_gelir_invoice_count(&self) -> PyResult<i64> {
+    fn get_gelir_invoice_count(&self, py: Python<'_>) -> PyResult<i64> {
+        // Anlık görüntü açıkken önbellek değil görüntüdeki sayı döner
+        let in_snapshot = self.snapshots.lock().unwrap().contains_key(&thread::current().id());
+        let cached = self.income_count.load(Ordering::SeqCst);
+        if cached >= 0 && !in_snapshot {
+            return Ok(cached);
+        }
+
         let invoices_pool = self.invoices_pool.clone();
+        let snapshots = self.snapshots.clone();
         
-        self.runtime.block_on(async move {
+        let count = self.run_detached(py, async move {
             if let Some(pool) = invoices_pool.read().await.as_ref() {
+                let mut reader = reader_for(pool, &snapshots).await?;
                 let row = sqlx::query("SELECT COUNT(*) as count FROM income_invoices")
-                    .fetch_one(pool)
+                    .fetch_one(reader.conn())
                     .await
                     .map_err(|e| PyRuntimeError::new_err(format!("Failed to count gelir invoices: {}", e)))?;
 
@@ -659,17 +2015,24 @@ impl Database {
             } else {
                 Err(PyRuntimeError::new_err("Database not initialized"))
             }
-        })
+        })?;
+
+        if !in_snapshot {
+            self.income_count.store(count, Ordering::SeqCst);
+        }
+        Ok(count)
     }
 
     fn get_gelir_invoice_by_id(&self, py: Python<'_>, invoice_id: i64) -> PyResult<Py<PyAny>> {
         let invoices_pool = self.invoices_pool.clone();
+        let snapshots = self.snapshots.clone();
         
-        let row = self.runtime.block_on(async move {
+        let row = self.run_detached(py, async move {
             if let Some(pool) = invoices_pool.read().await.as_ref() {
+                let mut reader = reader_for(pool, &snapshots).await?;
                 sqlx::query("SELECT * FROM income_invoices WHERE id = ?")
                     .bind(invoice_id)
-                    .fetch_optional(pool)
+                    .fetch_optional(reader.conn())
                     .await
                     .map_err(|e| PyRuntimeError::new_err(format!("Failed to fetch gelir invoice: {}", e)))
             } else {
@@ -678,30 +2041,7 @@ impl Database {
         })?;
 
         if let Some(r) = row {
-            let dict = PyDict::new(py);
-            dict.set_item("id", r.get::<i64, _>("id"))?;
-            dict.set_item("fatura_no", r.try_get::<String, _>("fatura_no").ok())?;
-            
-            let tarih_iso = r.try_get::<String, _>("tarih").ok();
-            let tarih_display = tarih_iso.as_ref().map(|t| to_display_date(t));
-            dict.set_item("tarih", tarih_display)?;
-
-            dict.set_item("firma", r.try_get::<String, _>("firma").ok())?;
-            dict.set_item("malzeme", r.try_get::<String, _>("malzeme").ok())?;
-            dict.set_item("miktar", r.try_get::<String, _>("miktar").ok())?;
-            dict.set_item("matrah", r.try_get::<f64, _>("matrah").ok())?;
-            dict.set_item("toplam_tutar_tl", r.try_get::<f64, _>("toplam_tutar_tl").ok())?;
-            dict.set_item("toplam_tutar_usd", r.try_get::<f64, _>("toplam_tutar_usd").ok())?;
-            dict.set_item("toplam_tutar_eur", r.try_get::<f64, _>("toplam_tutar_eur").ok())?;
-            dict.set_item("birim", r.try_get::<String, _>("birim").ok())?;
-            dict.set_item("kdv_yuzdesi", r.try_get::<f64, _>("kdv_yuzdesi").ok())?;
-            dict.set_item("kdv_tutari", r.try_get::<f64, _>("kdv_tutari").ok())?;
-            dict.set_item("kdv_dahil", r.try_get::<i64, _>("kdv_dahil").ok())?;
-            dict.set_item("usd_rate", r.try_get::<f64, _>("usd_rate").ok())?;
-            dict.set_item("eur_rate", r.try_get::<f64, _>("eur_rate").ok())?;
-            dict.set_item("updated_at", r.try_get::<String, _>("updated_at").ok())?;
-            dict.set_item("created_at", r.try_get::<String, _>("created_at").ok())?;
-            Ok(dict.into())
+            Ok(invoice_row_to_py(py, &r, &self.row_factory)?.unbind())
         } else {
             Ok(py.None())
         }
@@ -711,13 +2051,15 @@ impl Database {
     // GİDER FATURASI METOTLARI
     // ============================================================================
     
-    fn add_gider_invoice(&self, data: &Bound<'_, PyDict>) -> PyResult<i64> {
+    fn add_gider_invoice(&self, py: Python<'_>, data: &Bound<'_, PyDict>) -> PyResult<i64> {
         validate_invoice_data(data)?;
         let invoices_pool = self.invoices_pool.clone();
+        let write_tx = self.write_tx.clone();
         
         let fatura_no: Option<String> = data.get_item("fatura_no")?.map(|v| v.extract()).transpose()?.flatten();
         let tarih_raw: Option<String> = data.get_item("tarih")?.map(|v| v.extract()).transpose()?.flatten();
         let tarih = tarih_raw.map(|t| to_iso_date(&t));
+        let tarih_gun = tarih.as_deref().and_then(to_day_number);
 
         let firma: Option<String> = data.get_item("firma")?.map(|v| v.extract()).transpose()?.flatten();
         let malzeme: Option<String> = data.get_item("malzeme")?.map(|v| v.extract()).transpose()?.flatten();
@@ -733,16 +2075,19 @@ impl Database {
         let usd_rate: Option<f64> = data.get_item("usd_rate")?.map(|v| v.extract()).transpose()?.flatten();
         let eur_rate: Option<f64> = data.get_item("eur_rate")?.map(|v| v.extract()).transpose()?.flatten();
 
-        self.runtime.block_on(async move {
+        let id = self.run_detached(py, async move {
             if let Some(pool) = invoices_pool.read().await.as_ref() {
+                let mut tx_state = write_tx.lock().await;
+                let mut writer = writer_for(pool, "invoices", &mut tx_state).await?;
                 let created_at = Utc::now().to_rfc3339();
                 
                 let result = sqlx::query(
                     r#"
                     INSERT INTO expense_invoices (fatura_no, tarih, firma, malzeme, miktar, matrah, toplam_tutar_tl, 
                                         toplam_tutar_usd, toplam_tutar_eur, birim, kdv_yuzdesi, kdv_tutari, 
-                                        kdv_dahil, usd_rate, eur_rate, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                                        kdv_dahil, usd_rate, eur_rate, matrah_kurus, toplam_tutar_tl_kurus,
+                                        toplam_tutar_usd_cent, toplam_tutar_eur_cent, kdv_tutari_kurus, tarih_gun, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                     "#
                 )
                 .bind(fatura_no)
@@ -760,147 +2105,845 @@ impl Database {
                 .bind(kdv_dahil)
                 .bind(usd_rate)
                 .bind(eur_rate)
+                .bind(to_minor(matrah))
+                .bind(to_minor(toplam_tutar_tl))
+                .bind(to_minor(toplam_tutar_usd))
+                .bind(to_minor(toplam_tutar_eur))
+                .bind(to_minor(Some(kdv_tutari)))
+                .bind(tarih_gun)
                 .bind(created_at)
-                .execute(pool)
+                .execute(writer.conn())
                 .await
                 .map_err(|e| PyRuntimeError::new_err(format!("Failed to insert gider invoice: {}", e)))?;
 
-                Ok(result.last_insert_rowid())
+                Ok(result.last_insert_rowid())
+            } else {
+                Err(PyRuntimeError::new_err("Database not initialized"))
+            }
+        })?;
+
+        adjust_count(&self.expense_count, 1);
+        Ok(id)
+    }
+
+    /// Toplu gider faturası ekleme: tek transaction, tek commit. Yeni id listesi döner.
+    fn add_gider_invoices_bulk(&self, py: Python<'_>, data_list: Vec<Bound<'_, PyDict>>) -> PyResult<Vec<i64>> {
+        let rows = data_list
+            .iter()
+            .map(|data| InvoiceParams::from_dict(data))
+            .collect::<PyResult<Vec<_>>>()?;
+        if rows.is_empty() {
+            return Ok(Vec::new());
+        }
+        let invoices_pool = self.invoices_pool.clone();
+        let write_tx = self.write_tx.clone();
+
+        let ids = self.run_detached(py, async move {
+            if let Some(pool) = invoices_pool.read().await.as_ref() {
+                let mut tx_state = write_tx.lock().await;
+                let mut writer = writer_for(pool, "invoices", &mut tx_state).await?;
+                insert_invoices_bulk(&mut writer, "expense_invoices", rows).await
+            } else {
+                Err(PyRuntimeError::new_err("Database not initialized"))
+            }
+        })?;
+
+        adjust_count(&self.expense_count, ids.len() as i64);
+        Ok(ids)
+    }
+
+    fn update_gider_invoice(&self, py: Python<'_>, invoice_id: i64, data: &Bound<'_, PyDict>) -> PyResult<bool> {
+        validate_invoice_data(data)?;
+        let invoices_pool = self.invoices_pool.clone();
+        let write_tx = self.write_tx.clone();
+        
+        let fatura_no: Option<String> = data.get_item("fatura_no")?.map(|v| v.extract()).transpose()?.flatten();
+        let tarih_raw: Option<String> = data.get_item("tarih")?.map(|v| v.extract()).transpose()?.flatten();
+        let tarih = tarih_raw.map(|t| to_iso_date(&t));
+        let tarih_gun = tarih.as_deref().and_then(to_day_number);
+
+        let firma: Option<String> = data.get_item("firma")?.map(|v| v.extract()).transpose()?.flatten();
+        let malzeme: Option<String> = data.get_item("malzeme")?.map(|v| v.extract()).transpose()?.flatten();
+        let miktar: Option<String> = data.get_item("miktar")?.map(|v| v.extract()).transpose()?.flatten();
+        let matrah: Option<f64> = match data.get_item("matrah")? { Some(v) => v.extract()?, None => None };
+        let toplam_tutar_tl: Option<f64> = data.get_item("toplam_tutar_tl")?.map(|v| v.extract()).transpose()?.flatten();
+        let toplam_tutar_usd: Option<f64> = data.get_item("toplam_tutar_usd")?.map(|v| v.extract()).transpose()?.flatten();
+        let toplam_tutar_eur: Option<f64> = data.get_item("toplam_tutar_eur")?.map(|v| v.extract()).transpose()?.flatten();
+        let birim: Option<String> = data.get_item("birim")?.map(|v| v.extract()).transpose()?.flatten();
+        let kdv_yuzdesi: f64 = data.get_item("kdv_yuzdesi")?.map(|v| v.extract()).transpose()?.flatten().unwrap_or(0.0);
+        let kdv_tutari: f64 = data.get_item("kdv_tutari")?.map(|v| v.extract()).transpose()?.flatten().unwrap_or(0.0);
+        let kdv_dahil: i64 = data.get_item("kdv_dahil")?.map(|v| v.extract()).transpose()?.flatten().unwrap_or(0);
+        let usd_rate: Option<f64> = data.get_item("usd_rate")?.map(|v| v.extract()).transpose()?.flatten();
+        let eur_rate: Option<f64> = data.get_item("eur_rate")?.map(|v| v.extract()).transpose()?.flatten();
+
+        self.run_detached(py, async move {
+            if let Some(pool) = invoices_pool.read().await.as_ref() {
+                let mut tx_state = write_tx.lock().await;
+                let mut writer = writer_for(pool, "invoices", &mut tx_state).await?;
+                let updated_at = Utc::now().to_rfc3339();
+                
+                let result = sqlx::query(
+                    r#"
+                    UPDATE expense_invoices SET
+                    fatura_no = ?, tarih = ?, firma = ?, malzeme = ?, miktar = ?, matrah = ?,
+                    toplam_tutar_tl = ?, toplam_tutar_usd = ?, toplam_tutar_eur = ?, birim = ?, 
+                    kdv_yuzdesi = ?, kdv_tutari = ?, kdv_dahil = ?, usd_rate = ?, eur_rate = ?,
+                    matrah_kurus = ?, toplam_tutar_tl_kurus = ?, toplam_tutar_usd_cent = ?,
+                    toplam_tutar_eur_cent = ?, kdv_tutari_kurus = ?, tarih_gun = ?, updated_at = ?
+                    WHERE id = ?
+                    "#
+                )
+                .bind(fatura_no)
+                .bind(tarih)
+                .bind(firma)
+                .bind(malzeme)
+                .bind(miktar)
+                .bind(matrah)
+                .bind(toplam_tutar_tl)
+                .bind(toplam_tutar_usd)
+                .bind(toplam_tutar_eur)
+                .bind(birim)
+                .bind(kdv_yuzdesi)
+                .bind(kdv_tutari)
+                .bind(kdv_dahil)
+                .bind(usd_rate)
+                .bind(eur_rate)
+                .bind(to_minor(matrah))
+                .bind(to_minor(toplam_tutar_tl))
+                .bind(to_minor(toplam_tutar_usd))
+                .bind(to_minor(toplam_tutar_eur))
+                .bind(to_minor(Some(kdv_tutari)))
+                .bind(tarih_gun)
+                .bind(updated_at)
+                .bind(invoice_id)
+                .execute(writer.conn())
+                .await
+                .map_err(|e| PyRuntimeError::new_err(format!("Failed to update gider invoice: {}", e)))?;
+
+                Ok(result.rows_affected() > 0)
+            } else {
+                Err(PyRuntimeError::new_err("Database not initialized"))
+            }
+        })
+    }
+
+    fn delete_gider_invoice(&self, py: Python<'_>, invoice_id: i64) -> PyResult<i64> {
+        let invoices_pool = self.invoices_pool.clone();
+        let write_tx = self.write_tx.clone();
+        
+        let affected = self.run_detached(py, async move {
+            if let Some(pool) = invoices_pool.read().await.as_ref() {
+                let mut tx_state = write_tx.lock().await;
+                let mut writer = writer_for(pool, "invoices", &mut tx_state).await?;
+                let result = sqlx::query("DELETE FROM expense_invoices WHERE id = ?")
+                    .bind(invoice_id)
+                    .execute(writer.conn())
+                    .await
+                    .map_err(|e| PyRuntimeError::new_err(format!("Failed to delete gider invoice: {}", e)))?;
+
+                Ok(result.rows_affected() as i64)
+            } else {
+                Err(PyRuntimeError::new_err("Database not initialized"))
+            }
+        })?;
+
+        adjust_count(&self.expense_count, -affected);
+        Ok(affected)
+    }
+
+    fn delete_multiple_gider_invoices(&self, py: Python<'_>, invoice_ids: Vec<i64>) -> PyResult<i64> {
+        let invoices_pool = self.invoices_pool.clone();
+        let write_tx = self.write_tx.clone();
+        
+        let affected = self.run_detached(py, async move {
+            if invoice_ids.is_empty() {
+                return Ok(0);
+            }
+
+            if let Some(pool) = invoices_pool.read().await.as_ref() {
+                let mut tx_state = write_tx.lock().await;
+                let mut writer = writer_for(pool, "invoices", &mut tx_state).await?;
+                let placeholders = vec!["?"; invoice_ids.len()].join(",");
+                let query = format!("DELETE FROM expense_invoices WHERE id IN ({})", placeholders);
+                
+                let mut q = sqlx::query(&query);
+                for id in invoice_ids {
+                    q = q.bind(id);
+                }
+                
+                let result = q.execute(writer.conn())
+                    .await
+                    .map_err(|e| PyRuntimeError::new_err(format!("Failed to delete multiple gider invoices: {}", e)))?;
+
+                Ok(result.rows_affected() as i64)
+            } else {
+                Err(PyRuntimeError::new_err("Database not initialized"))
+            }
+        })?;
+
+        adjust_count(&self.expense_count, -affected);
+        Ok(affected)
+    }
+
+    #[pyo3(signature = (limit=None, offset=None, order_by=None))]
+    fn get_all_gider_invoices(&self, py: Python<'_>, limit: Option<i64>, offset: Option<i64>, order_by: Option<String>) -> PyResult<Py<PyAny>> {
+        let invoices_pool = self.invoices_pool.clone();
+        let snapshots = self.snapshots.clone();
+        
+        let rows = self.run_detached(py, async move {
+            if let Some(pool) = invoices_pool.read().await.as_ref() {
+                let mut reader = reader_for(pool, &snapshots).await?;
+                let order_clause = order_by.unwrap_or_else(|| "tarih DESC".to_string());
+                let query = if let Some(lim) = limit {
+                    format!(
+                        "SELECT * FROM expense_invoices ORDER BY {} LIMIT {} OFFSET {}",
+                        order_clause, lim, offset.unwrap_or(0)
+                    )
+                } else {
+                    format!("SELECT * FROM expense_invoices ORDER BY {}", order_clause)
+                };
+
+                sqlx::query(&query)
+                    .fetch_all(reader.conn())
+                    .await
+                    .map_err(|e| PyRuntimeError::new_err(format!("Failed to fetch gider invoices: {}", e)))
+            } else {
+                Err(PyRuntimeError::new_err("Database not initialized"))
+            }
+        })?;
+
+        let result = PyList::empty(py);
+        for row in rows.iter() {
+            result.append(invoice_row_to_py(py, row, &self.row_factory)?)?;
+        }
+        Ok(result.into())
+    }
+
+    fn get_gider_invoice_count(&self, py: Python<'_>) -> PyResult<i64> {
+        // Anlık görüntü açıkken önbellek değil görüntüdeki sayı döner
+        let in_snapshot = self.snapshots.lock().unwrap().contains_key(&thread::current().id());
+        let cached = self.expense_count.load(Ordering::SeqCst);
+        if cached >= 0 && !in_snapshot {
+            return Ok(cached);
+        }
+
+        let invoices_pool = self.invoices_pool.clone();
+        let snapshots = self.snapshots.clone();
+        
+        let count = self.run_detached(py, async move {
+            if let Some(pool) = invoices_pool.read().await.as_ref() {
+                let mut reader = reader_for(pool, &snapshots).await?;
+                let row = sqlx::query("SELECT COUNT(*) as count FROM expense_invoices")
+                    .fetch_one(reader.conn())
+                    .await
+                    .map_err(|e| PyRuntimeError::new_err(format!("Failed to count gider invoices: {}", e)))?;
+
+                Ok(row.get::<i64, _>("count"))
+            } else {
+                Err(PyRuntimeError::new_err("Database not initialized"))
+            }
+        })?;
+
+        if !in_snapshot {
+            self.expense_count.store(count, Ordering::SeqCst);
+        }
+        Ok(count)
+    }
+
+    // ============================================================================
+    // KEYSET SAYFALAMA
+    // ============================================================================
+
+    /// İmleç tabanlı sayfa okuma. OFFSET yerine son görülen (tarih, id)
+    /// değerinden indeks üzerinde arama yapılır; sayfa derinliğinden bağımsızdır.
+    /// Dönüş: {"items": [...], "next_cursor": str|None, "prev_cursor": str|None}
+    #[pyo3(signature = (table, cursor=None, limit=25, direction="next", order_by="tarih DESC"))]
+    fn get_invoices_page(
+        &self,
+        py: Python<'_>,
+        table: String,
+        cursor: Option<String>,
+        limit: i64,
+        direction: &str,
+        order_by: &str,
+    ) -> PyResult<Py<PyAny>> {
+        let table = check_invoice_table(&table)?;
+        let (by_tarih, ascending) = page_order(order_by)?;
+        let forward = match direction {
+            "next" => true,
+            "prev" => false,
+            _ => return Err(PyValueError::new_err(format!("Geçersiz sayfa yönü: {}", direction))),
+        };
+        let limit = limit.max(1);
+        let decoded = match &cursor {
+            Some(c) => Some(decode_cursor(c)?),
+            None => None,
+        };
+        // Geri yönde sıralama ters çevrilerek okunur, sonra düzeltilir
+        let segments = page_segments(by_tarih, ascending == forward, &decoded);
+        let invoices_pool = self.invoices_pool.clone();
+        let snapshots = self.snapshots.clone();
+
+        let mut rows = self.run_detached(py, async move {
+            if let Some(pool) = invoices_pool.read().await.as_ref() {
+                let mut reader = reader_for(pool, &snapshots).await?;
+                let mut rows: Vec<SqliteRow> = Vec::new();
+                for segment in segments.iter() {
+                    let remaining = limit + 1 - rows.len() as i64;
+                    if remaining <= 0 {
+                        break;
+                    }
+                    let query = format!(
+                        "SELECT * FROM {} WHERE {} ORDER BY {} LIMIT ?",
+                        table, segment.condition, segment.order
+                    );
+                    let mut q = sqlx::query(&query);
+                    if let Some(tarih) = &segment.tarih {
+                        q = q.bind(tarih.clone());
+                    }
+                    if let Some(id) = segment.id {
+                        q = q.bind(id);
+                    }
+                    let mut part = q
+                        .bind(remaining)
+                        .fetch_all(reader.conn())
+                        .await
+                        .map_err(|e| PyRuntimeError::new_err(format!("Failed to fetch invoice page: {}", e)))?;
+                    rows.append(&mut part);
+                }
+                Ok(rows)
+            } else {
+                Err(PyRuntimeError::new_err("Database not initialized"))
+            }
+        })?;
+
+        let has_more = rows.len() as i64 > limit;
+        rows.truncate(limit as usize);
+        if !forward {
+            // Başa ulaşıldıysa kısmi sayfa yerine ilk sayfa döndürülür
+            if !has_more && cursor.is_some() {
+                return self.get_invoices_page(py, table.to_string(), None, limit, "next", order_by);
+            }
+            rows.reverse();
+        }
+
+        let cursors: Vec<String> = rows
+            .iter()
+            .map(|row| encode_cursor(row.get::<i64, _>("id"), &row.try_get::<String, _>("tarih").ok()))
+            .collect();
+
+        let mut next_cursor: Option<String> = None;
+        let mut prev_cursor: Option<String> = None;
+        if forward {
+            if has_more {
+                next_cursor = cursors.last().cloned();
+            }
+            if cursor.is_some() {
+                prev_cursor = cursors.first().cloned().or_else(|| cursor.clone());
+            }
+        } else {
+            if has_more {
+                prev_cursor = cursors.first().cloned();
+            }
+            if cursor.is_some() {
+                next_cursor = cursors.last().cloned().or_else(|| cursor.clone());
+            }
+        }
+
+        let items = PyList::empty(py);
+        for row in rows.iter() {
+            items.append(invoice_row_to_py(py, row, &self.row_factory)?)?;
+        }
+
+        let result = PyDict::new(py);
+        result.set_item("items", items)?;
+        result.set_item("next_cursor", next_cursor)?;
+        result.set_item("prev_cursor", prev_cursor)?;
+        Ok(result.into())
+    }
+
+    fn get_gider_invoice_by_id(&self, py: Python<'_>, invoice_id: i64) -> PyResult<Py<PyAny>> {
+        let invoices_pool = self.invoices_pool.clone();
+        let snapshots = self.snapshots.clone();
+        
+        let row = self.run_detached(py, async move {
+            if let Some(pool) = invoices_pool.read().await.as_ref() {
+                let mut reader = reader_for(pool, &snapshots).await?;
+                sqlx::query("SELECT * FROM expense_invoices WHERE id = ?")
+                    .bind(invoice_id)
+                    .fetch_optional(reader.conn())
+                    .await
+                    .map_err(|e| PyRuntimeError::new_err(format!("Failed to fetch gider invoice: {}", e)))
+            } else {
+                Err(PyRuntimeError::new_err("Database not initialized"))
+            }
+        })?;
+
+        if let Some(r) = row {
+            Ok(invoice_row_to_py(py, &r, &self.row_factory)?.unbind())
+        } else {
+            Ok(py.None())
+        }
+    }
+
+    // ============================================================================
+    // TARİH ARALIĞI SORGULARI
+    // ============================================================================
+
+    /// tarih (ISO) sütunu üzerinde SQL tarafında filtreleme; sınırlar dahildir.
+    /// start_iso/end_iso verilmezse o yönde sınır uygulanmaz. Tarihsiz kayıtlar dönmez.
+    #[pyo3(signature = (table, start_iso=None, end_iso=None, order_by="tarih ASC", limit=None))]
+    fn get_invoices_between(
+        &self,
+        py: Python<'_>,
+        table: String,
+        start_iso: Option<String>,
+        end_iso: Option<String>,
+        order_by: &str,
+        limit: Option<i64>,
+    ) -> PyResult<Py<PyAny>> {
+        let table = check_invoice_table(&table)?;
+        let (by_tarih, ascending) = page_order(order_by)?;
+        let direction = if ascending { "ASC" } else { "DESC" };
+        let order = if by_tarih {
+            format!("tarih {0}, id {0}", direction)
+        } else {
+            format!("id {}", direction)
+        };
+
+        let mut conditions = vec!["tarih IS NOT NULL"];
+        if start_iso.is_some() {
+            conditions.push("tarih >= ?");
+        }
+        if end_iso.is_some() {
+            conditions.push("tarih <= ?");
+        }
+        let mut query = format!("SELECT * FROM {} WHERE {} ORDER BY {}", table, conditions.join(" AND "), order);
+        if limit.is_some() {
+            query.push_str(" LIMIT ?");
+        }
+        let invoices_pool = self.invoices_pool.clone();
+        let snapshots = self.snapshots.clone();
+
+        let rows = self.run_detached(py, async move {
+            if let Some(pool) = invoices_pool.read().await.as_ref() {
+                let mut reader = reader_for(pool, &snapshots).await?;
+                let mut q = sqlx::query(&query);
+                if let Some(start) = start_iso {
+                    q = q.bind(start);
+                }
+                if let Some(end) = end_iso {
+                    q = q.bind(end);
+                }
+                if let Some(n) = limit {
+                    q = q.bind(n);
+                }
+                q.fetch_all(reader.conn())
+                    .await
+                    .map_err(|e| PyRuntimeError::new_err(format!("Failed to fetch invoices by date range: {}", e)))
+            } else {
+                Err(PyRuntimeError::new_err("Database not initialized"))
+            }
+        })?;
+
+        let result = PyList::empty(py);
+        for row in rows.iter() {
+            result.append(invoice_row_to_py(py, row, &self.row_factory)?)?;
+        }
+        Ok(result.into())
+    }
+
+    /// Veri bulunan yıllar (artan): gelir/gider fatura tarihleri ve en az bir
+    /// ayı dolu genel gider yılları.
+    fn get_available_years(&self, py: Python<'_>) -> PyResult<Vec<i64>> {
+        let invoices_pool = self.invoices_pool.clone();
+        let snapshots = self.snapshots.clone();
+
+        self.run_detached(py, async move {
+            if let Some(pool) = invoices_pool.read().await.as_ref() {
+                let mut reader = reader_for(pool, &snapshots).await?;
+                sqlx::query_scalar::<_, i64>(AVAILABLE_YEARS_QUERY)
+                    .fetch_all(reader.conn())
+                    .await
+                    .map_err(|e| PyRuntimeError::new_err(format!("Failed to fetch available years: {}", e)))
+            } else {
+                Err(PyRuntimeError::new_err("Database not initialized"))
+            }
+        })
+    }
+
+    // ============================================================================
+    // SÜTUNSAL OKUMA (analitik)
+    // ============================================================================
+
+    /// Satır sözlükleri yerine sütun bazlı sonuç: {sütun: değerler}.
+    /// Sayısal sütunlar NumPy kuruluysa ndarray, değilse array('d') / array('q')
+    /// (NULL → 0); diğerleri list. tarih ISO (yyyy-mm-dd) formatında döner;
+    /// tarih_gun (yyyymmdd), yil ve ay tamsayı olarak istenebilir.
+    #[pyo3(signature = (table, columns, r#where=None, params=None))]
+    fn fetch_columns(
+        &self,
+        py: Python<'_>,
+        table: String,
+        columns: Vec<String>,
+        r#where: Option<String>,
+        params: Option<Vec<Bound<'_, PyAny>>>,
+    ) -> PyResult<Py<PyAny>> {
+        let table = check_invoice_table(&table)?;
+        if columns.is_empty()
+            || columns
+                .iter()
+                .any(|c| !INVOICE_COLUMNS.contains(&c.as_str()) && day_number_expr(c).is_none())
+        {
+            return Err(PyValueError::new_err(format!("Geçersiz sütun(lar): {:?}", columns)));
+        }
+        let params = extract_sql_params(params)?;
+
+        let selected: Vec<String> = columns
+            .iter()
+            .map(|c| match day_number_expr(c) {
+                Some(expr) => format!("{} AS {}", expr, c),
+                None => c.clone(),
+            })
+            .collect();
+        let mut query = format!("SELECT {} FROM {}", selected.join(", "), table);
+        if let Some(condition) = r#where {
+            query.push_str(" WHERE ");
+            query.push_str(&condition);
+        }
+        let invoices_pool = self.invoices_pool.clone();
+        let snapshots = self.snapshots.clone();
+
+        let rows = self.run_detached(py, async move {
+            if let Some(pool) = invoices_pool.read().await.as_ref() {
+                let mut reader = reader_for(pool, &snapshots).await?;
+                let mut q = sqlx::query(&query);
+                for param in params {
+                    q = match param {
+                        SqlParam::Null => q.bind(None::<String>),
+                        SqlParam::Int(v) => q.bind(v),
+                        SqlParam::Real(v) => q.bind(v),
+                        SqlParam::Text(v) => q.bind(v),
+                    };
+                }
+                q.fetch_all(reader.conn())
+                    .await
+                    .map_err(|e| PyRuntimeError::new_err(format!("Failed to fetch columns: {}", e)))
+            } else {
+                Err(PyRuntimeError::new_err("Database not initialized"))
+            }
+        })?;
+
+        let result = PyDict::new(py);
+        for (index, column) in columns.iter().enumerate() {
+            match numeric_typecode(column) {
+                Some(typecode) => {
+                    result.set_item(column, numeric_column(py, typecode, &rows, index)?)?;
+                }
+                None => {
+                    let values: Vec<Option<String>> = rows
+                        .iter()
+                        .map(|row| row.try_get::<Option<String>, _>(index).ok().flatten())
+                        .collect();
+                    result.set_item(column, values)?;
+                }
+            }
+        }
+        Ok(result.into())
+    }
+
+    // ============================================================================
+    // FATURA NO SORGULARI (toplu duplicate kontrolü)
+    // ============================================================================
+
+    /// Listede olup gelir veya gider tablosunda zaten kayıtlı fatura numaraları.
+    /// fatura_no indeksleri üzerinden parça parça IN (...) sorgusu yapılır.
+    fn find_existing_fatura_nos(&self, py: Python<'_>, fatura_nos: Vec<String>) -> PyResult<Vec<String>> {
+        let mut unique: Vec<String> = fatura_nos.into_iter().filter(|no| !no.is_empty()).collect();
+        unique.sort();
+        unique.dedup();
+        if unique.is_empty() {
+            return Ok(Vec::new());
+        }
+        let invoices_pool = self.invoices_pool.clone();
+        let snapshots = self.snapshots.clone();
+
+        self.run_detached(py, async move {
+            if let Some(pool) = invoices_pool.read().await.as_ref() {
+                let mut reader = reader_for(pool, &snapshots).await?;
+                let mut found: Vec<String> = Vec::new();
+                for chunk in unique.chunks(FATURA_NO_CHUNK) {
+                    let placeholders = vec!["?"; chunk.len()].join(",");
+                    let query = format!(
+                        "SELECT fatura_no FROM income_invoices WHERE fatura_no IN ({0}) \
+                         UNION SELECT fatura_no FROM expense_invoices WHERE fatura_no IN ({0})",
+                        placeholders
+                    );
+                    let mut q = sqlx::query_scalar::<_, String>(&query);
+                    for no in chunk.iter().chain(chunk.iter()) {
+                        q = q.bind(no.clone());
+                    }
+                    let mut rows = q
+                        .fetch_all(reader.conn())
+                        .await
+                        .map_err(|e| PyRuntimeError::new_err(format!("Failed to look up fatura_no: {}", e)))?;
+                    found.append(&mut rows);
+                }
+                found.sort();
+                found.dedup();
+                Ok(found)
             } else {
                 Err(PyRuntimeError::new_err("Database not initialized"))
             }
         })
     }
 
-    fn update_gider_invoice(&self, invoice_id: i64, data: &Bound<'_, PyDict>) -> PyResult<bool> {
-        validate_invoice_data(data)?;
-        let invoices_pool = self.invoices_pool.clone();
-        
-        let fatura_no: Option<String> = data.get_item("fatura_no")?.map(|v| v.extract()).transpose()?.flatten();
-        let tarih_raw: Option<String> = data.get_item("tarih")?.map(|v| v.extract()).transpose()?.flatten();
-        let tarih = tarih_raw.map(|t| to_iso_date(&t));
+    // ============================================================================
+    // TAM METİN ARAMA
+    // ============================================================================
 
-        let firma: Option<String> = data.get_item("firma")?.map(|v| v.extract()).transpose()?.flatten();
-        let malzeme: Option<String> = data.get_item("malzeme")?.map(|v| v.extract()).transpose()?.flatten();
-        let miktar: Option<String> = data.get_item("miktar")?.map(|v| v.extract()).transpose()?.flatten();
-        let matrah: Option<f64> = match data.get_item("matrah")? { Some(v) => v.extract()?, None => None };
-        let toplam_tutar_tl: Option<f64> = data.get_item("toplam_tutar_tl")?.map(|v| v.extract()).transpose()?.flatten();
-        let toplam_tutar_usd: Option<f64> = data.get_item("toplam_tutar_usd")?.map(|v| v.extract()).transpose()?.flatten();
-        let toplam_tutar_eur: Option<f64> = data.get_item("toplam_tutar_eur")?.map(|v| v.extract()).transpose()?.flatten();
-        let birim: Option<String> = data.get_item("birim")?.map(|v| v.extract()).transpose()?.flatten();
-        let kdv_yuzdesi: f64 = data.get_item("kdv_yuzdesi")?.map(|v| v.extract()).transpose()?.flatten().unwrap_or(0.0);
-        let kdv_tutari: f64 = data.get_item("kdv_tutari")?.map(|v| v.extract()).transpose()?.flatten().unwrap_or(0.0);
-        let kdv_dahil: i64 = data.get_item("kdv_dahil")?.map(|v| v.extract()).transpose()?.flatten().unwrap_or(0);
-        let usd_rate: Option<f64> = data.get_item("usd_rate")?.map(|v| v.extract()).transpose()?.flatten();
-        let eur_rate: Option<f64> = data.get_item("eur_rate")?.map(|v| v.extract()).transpose()?.flatten();
+    /// firma, malzeme, fatura_no ve miktar içinde önek eşleşmeli arama.
+    /// Sonuçlar bm25 puanına göre sıralanır: {"items", "total", "next_offset"}.
+    #[pyo3(signature = (query, table, limit=25, offset=0))]
+    fn search_invoices(&self, py: Python<'_>, query: String, table: String, limit: i64, offset: i64) -> PyResult<Py<PyAny>> {
+        let table = check_invoice_table(&table)?;
+        let result = PyDict::new(py);
+        let matched = fts_match_query(&query);
+        if matched.is_empty() {
+            result.set_item("items", PyList::empty(py))?;
+            result.set_item("total", 0)?;
+            result.set_item("next_offset", py.None())?;
+            return Ok(result.into());
+        }
+        let limit = limit.max(0);
+        let offset = offset.max(0);
+        let invoices_pool = self.invoices_pool.clone();
+        let snapshots = self.snapshots.clone();
 
-        self.runtime.block_on(async move {
+        let (total, rows) = self.run_detached(py, async move {
             if let Some(pool) = invoices_pool.read().await.as_ref() {
-                let updated_at = Utc::now().to_rfc3339();
-                
-                let result = sqlx::query(
-                    r#"
-                    UPDATE expense_invoices SET
-                    fatura_no = ?, tarih = ?, firma = ?, malzeme = ?, miktar = ?, matrah = ?,
-                    toplam_tutar_tl = ?, toplam_tutar_usd = ?, toplam_tutar_eur = ?, birim = ?, 
-                    kdv_yuzdesi = ?, kdv_tutari = ?, kdv_dahil = ?, usd_rate = ?, eur_rate = ?, updated_at = ?
-                    WHERE id = ?
-                    "#
-                )
-                .bind(fatura_no)
-                .bind(tarih)
-                .bind(firma)
-                .bind(malzeme)
-                .bind(miktar)
-                .bind(matrah)
-                .bind(toplam_tutar_tl)
-                .bind(toplam_tutar_usd)
-                .bind(toplam_tutar_eur)
-                .bind(birim)
-                .bind(kdv_yuzdesi)
-                .bind(kdv_tutari)
-                .bind(kdv_dahil)
-                .bind(usd_rate)
-                .bind(eur_rate)
-                .bind(updated_at)
-                .bind(invoice_id)
-                .execute(pool)
+                let mut reader = reader_for(pool, &snapshots).await?;
+                let fts = format!("{}_fts", table);
+                let total: i64 = sqlx::query_scalar(&format!(
+                    "SELECT COUNT(*) FROM {fts} WHERE {fts} MATCH ?",
+                    fts = fts
+                ))
+                .bind(matched.clone())
+                .fetch_one(reader.conn())
                 .await
-                .map_err(|e| PyRuntimeError::new_err(format!("Failed to update gider invoice: {}", e)))?;
-
-                Ok(result.rows_affected() > 0)
+                .map_err(|e| PyRuntimeError::new_err(format!("Failed to search invoices: {}", e)))?;
+
+                let rows = sqlx::query(&format!(
+                    "SELECT t.* FROM {fts} JOIN {table} t ON t.id = {fts}.rowid \
+                     WHERE {fts} MATCH ? ORDER BY bm25({fts}, {weights}), t.id DESC LIMIT ? OFFSET ?",
+                    fts = fts,
+                    table = table,
+                    weights = FTS_WEIGHTS
+                ))
+                .bind(matched.clone())
+                .bind(limit)
+                .bind(offset)
+                .fetch_all(reader.conn())
+                .await
+                .map_err(|e| PyRuntimeError::new_err(format!("Failed to search invoices: {}", e)))?;
+                Ok((total, rows))
             } else {
                 Err(PyRuntimeError::new_err("Database not initialized"))
             }
-        })
+        })?;
+
+        let items = PyList::empty(py);
+        for row in rows.iter() {
+            items.append(invoice_row_to_py(py, row, &self.row_factory)?)?;
+        }
+        let end = offset + rows.len() as i64;
+        result.set_item("items", items)?;
+        result.set_item("total", total)?;
+        if end < total {
+            result.set_item("next_offset", end)?;
+        } else {
+            result.set_item("next_offset", py.None())?;
+        }
+        Ok(result.into())
     }
 
-    fn delete_gider_invoice(&self, invoice_id: i64) -> PyResult<i64> {
+    // ============================================================================
+    // AYLIK TOPLAM METOTLARI (tetikleyicilerle güncel tutulan monthly_summary)
+    // ============================================================================
+
+    /// Bir yılın ay bazlı tutar toplamları (yalnızca kaydı olan aylar döner).
+    fn get_monthly_totals(&self, py: Python<'_>, table: String, year: i64) -> PyResult<Py<PyAny>> {
+        let table = check_invoice_table(&table)?;
         let invoices_pool = self.invoices_pool.clone();
-        
-        self.runtime.block_on(async move {
+        let snapshots = self.snapshots.clone();
+
+        let rows = self.run_detached(py, async move {
             if let Some(pool) = invoices_pool.read().await.as_ref() {
-                let result = sqlx::query("DELETE FROM expense_invoices WHERE id = ?")
-                    .bind(invoice_id)
-                    .execute(pool)
+                let mut reader = reader_for(pool, &snapshots).await?;
+                let query = format!(
+                    "{}FROM monthly_summary WHERE table_name = ? AND year = ? ORDER BY month",
+                    MONTHLY_TOTALS_SELECT
+                );
+                sqlx::query(&query)
+                    .bind(table)
+                    .bind(year)
+                    .fetch_all(reader.conn())
                     .await
-                    .map_err(|e| PyRuntimeError::new_err(format!("Failed to delete gider invoice: {}", e)))?;
-
-                Ok(result.rows_affected() as i64)
+                    .map_err(|e| PyRuntimeError::new_err(format!("Failed to fetch monthly totals: {}", e)))
             } else {
                 Err(PyRuntimeError::new_err("Database not initialized"))
             }
-        })
+        })?;
+
+        monthly_totals_to_pylist(py, rows)
     }
 
-    fn delete_multiple_gider_invoices(&self, invoice_ids: Vec<i64>) -> PyResult<i64> {
+    /// Birden fazla yılın aylık toplamları; `years` verilmezse tüm yıllar döner.
+    #[pyo3(signature = (table, years=None))]
+    fn get_monthly_totals_for_years(&self, py: Python<'_>, table: String, years: Option<Vec<i64>>) -> PyResult<Py<PyAny>> {
+        let table = check_invoice_table(&table)?;
         let invoices_pool = self.invoices_pool.clone();
-        
-        self.runtime.block_on(async move {
-            if invoice_ids.is_empty() {
-                return Ok(0);
+        let snapshots = self.snapshots.clone();
+
+        let years = years.map(|mut ys| {
+            ys.sort_unstable();
+            ys.dedup();
+            ys
+        });
+        if let Some(ys) = &years {
+            if ys.is_empty() {
+                return Ok(PyList::empty(py).into());
             }
+        }
 
+        let rows = self.run_detached(py, async move {
             if let Some(pool) = invoices_pool.read().await.as_ref() {
-                let placeholders = vec!["?"; invoice_ids.len()].join(",");
-                let query = format!("DELETE FROM expense_invoices WHERE id IN ({})", placeholders);
-                
+                let mut reader = reader_for(pool, &snapshots).await?;
+                let mut query = format!(
+                    "{}FROM monthly_summary WHERE table_name = ?",
+                    MONTHLY_TOTALS_SELECT
+                );
+                if let Some(ys) = &years {
+                    let placeholders = vec!["?"; ys.len()].join(",");
+                    query.push_str(&format!(" AND year IN ({})", placeholders));
+                }
+                query.push_str(" ORDER BY year, month");
+
+                let mut q = sqlx::query(&query).bind(table);
+                if let Some(ys) = &years {
+                    for y in ys {
+                        q = q.bind(*y);
+                    }
+                }
+
+                q.fetch_all(reader.conn())
+                    .await
+                    .map_err(|e| PyRuntimeError::new_err(format!("Failed to fetch monthly totals: {}", e)))
+            } else {
+                Err(PyRuntimeError::new_err("Database not initialized"))
+            }
+        })?;
+
+        monthly_totals_to_pylist(py, rows)
+    }
+
+    /// Dashboard için tablo × ay toplamları (en fazla 24 satır).
+    /// `year` verilmezse aynı ayın tüm yıllardaki toplamları birleştirilir.
+    #[pyo3(signature = (year=None))]
+    fn get_monthly_summary(&self, py: Python<'_>, year: Option<i64>) -> PyResult<Py<PyAny>> {
+        let invoices_pool = self.invoices_pool.clone();
+        let snapshots = self.snapshots.clone();
+
+        let rows = self.run_detached(py, async move {
+            if let Some(pool) = invoices_pool.read().await.as_ref() {
+                let mut reader = reader_for(pool, &snapshots).await?;
+                let mut query = String::from(
+                    "SELECT table_name, month, SUM(sum_tl_kurus) AS sum_tl_kurus, \
+                     SUM(sum_usd_cent) AS sum_usd_cent, SUM(sum_eur_cent) AS sum_eur_cent, \
+                     SUM(sum_kdv_kurus) AS sum_kdv_kurus, SUM(count) AS count \
+                     FROM monthly_summary",
+                );
+                if year.is_some() {
+                    query.push_str(" WHERE year = ?");
+                }
+                query.push_str(" GROUP BY table_name, month ORDER BY table_name, month");
+
                 let mut q = sqlx::query(&query);
-                for id in invoice_ids {
-                    q = q.bind(id);
+                if let Some(y) = year {
+                    q = q.bind(y);
                 }
-                
-                let result = q.execute(pool)
+                q.fetch_all(reader.conn())
                     .await
-                    .map_err(|e| PyRuntimeError::new_err(format!("Failed to delete multiple gider invoices: {}", e)))?;
+                    .map_err(|e| PyRuntimeError::new_err(format!("Failed to fetch monthly summary: {}", e)))
+            } else {
+                Err(PyRuntimeError::new_err("Database not initialized"))
+            }
+        })?;
 
-                Ok(result.rows_affected() as i64)
+        let result = PyList::empty(py);
+        for row in rows {
+            let dict = PyDict::new(py);
+            dict.set_item("table", row.get::<String, _>("table_name"))?;
+            dict.set_item("month", row.get::<i64, _>("month"))?;
+            let sum_tl_kurus = row.get::<i64, _>("sum_tl_kurus");
+            let sum_kdv_kurus = row.get::<i64, _>("sum_kdv_kurus");
+            dict.set_item("sum_tl", sum_tl_kurus as f64 / 100.0)?;
+            dict.set_item("sum_usd", row.get::<i64, _>("sum_usd_cent") as f64 / 100.0)?;
+            dict.set_item("sum_eur", row.get::<i64, _>("sum_eur_cent") as f64 / 100.0)?;
+            dict.set_item("sum_kdv", sum_kdv_kurus as f64 / 100.0)?;
+            dict.set_item("sum_tl_kurus", sum_tl_kurus)?;
+            dict.set_item("sum_kdv_kurus", sum_kdv_kurus)?;
+            dict.set_item("count", row.get::<i64, _>("count"))?;
+            result.append(dict)?;
+        }
+        Ok(result.into())
+    }
+
+    /// Özeti ham faturalardan tek transaction içinde baştan oluşturur;
+    /// özet satır sayısını döndürür.
+    fn rebuild_monthly_summary(&self, py: Python<'_>) -> PyResult<i64> {
+        let invoices_pool = self.invoices_pool.clone();
+        let write_tx = self.write_tx.clone();
+
+        self.run_detached(py, async move {
+            if let Some(pool) = invoices_pool.read().await.as_ref() {
+                let mut tx_state = write_tx.lock().await;
+                let mut writer = writer_for(pool, "invoices", &mut tx_state).await?;
+                let mut tx = writer.conn().begin()
+                    .await
+                    .map_err(|e| PyRuntimeError::new_err(format!("Failed to begin transaction: {}", e)))?;
+                for stmt in [CLEAR_MONTHLY_SUMMARY, REBUILD_INCOME_SUMMARY, REBUILD_EXPENSE_SUMMARY] {
+                    sqlx::query(stmt)
+                        .execute(&mut *tx)
+                        .await
+                        .map_err(|e| PyRuntimeError::new_err(format!("Failed to rebuild monthly summary: {}", e)))?;
+                }
+                let count: i64 = sqlx::query_scalar("SELECT COUNT(*) FROM monthly_summary")
+                    .fetch_one(&mut *tx)
+                    .await
+                    .map_err(|e| PyRuntimeError::new_err(format!("Failed to count monthly summary: {}", e)))?;
+                tx.commit()
+                    .await
+                    .map_err(|e| PyRuntimeError::new_err(format!("Failed to commit transaction: {}", e)))?;
+                Ok(count)
             } else {
                 Err(PyRuntimeError::new_err("Database not initialized"))
             }
         })
     }
 
-    #[pyo3(signature = (limit=None, offset=None, order_by=None))]
-    fn get_all_gider_invoices(&self, py: Python<'_>, limit: Option<i64>, offset: Option<i64>, order_by: Option<String>) -> PyResult<Py<PyAny>> {
+    /// Ham toplamlarla uyuşmayan özet satırları; boş liste = tutarlı.
+    fn check_monthly_summary(&self, py: Python<'_>) -> PyResult<Py<PyAny>> {
         let invoices_pool = self.invoices_pool.clone();
-        
-        let rows = self.runtime.block_on(async move {
-            if let Some(pool) = invoices_pool.read().await.as_ref() {
-                let order_clause = order_by.unwrap_or_else(|| "tarih DESC".to_string());
-                let query = if let Some(lim) = limit {
-                    format!(
-                        "SELECT * FROM expense_invoices ORDER BY {} LIMIT {} OFFSET {}",
-                        order_clause, lim, offset.unwrap_or(0)
-                    )
-                } else {
-                    format!("SELECT * FROM expense_invoices ORDER BY {}", order_clause)
-                };
+        let snapshots = self.snapshots.clone();
 
-                sqlx::query(&query)
-                    .fetch_all(pool)
+        let rows = self.run_detached(py, async move {
+            if let Some(pool) = invoices_pool.read().await.as_ref() {
+                let mut reader = reader_for(pool, &snapshots).await?;
+                sqlx::query(CHECK_MONTHLY_SUMMARY)
+                    .fetch_all(reader.conn())
                     .await
-                    .map_err(|e| PyRuntimeError::new_err(format!("Failed to fetch gider invoices: {}", e)))
+                    .map_err(|e| PyRuntimeError::new_err(format!("Failed to check monthly summary: {}", e)))
             } else {
                 Err(PyRuntimeError::new_err("Database not initialized"))
             }
@@ -908,104 +2951,119 @@ impl Database {
 
         let result = PyList::empty(py);
         for row in rows {
+            let expected = PyDict::new(py);
+            let actual = PyDict::new(py);
+            expected.set_item("count", row.get::<i64, _>("expected_count"))?;
+            actual.set_item("count", row.get::<i64, _>("actual_count"))?;
+            for field in ["sum_tl_kurus", "sum_usd_cent", "sum_eur_cent", "sum_kdv_kurus"] {
+                expected.set_item(field, row.get::<i64, _>(format!("expected_{}", field).as_str()))?;
+                actual.set_item(field, row.get::<i64, _>(format!("actual_{}", field).as_str()))?;
+            }
             let dict = PyDict::new(py);
-            dict.set_item("id", row.get::<i64, _>("id"))?;
-            dict.set_item("fatura_no", row.try_get::<String, _>("fatura_no").ok())?;
-            
-            let tarih_iso = row.try_get::<String, _>("tarih").ok();
-            let tarih_display = tarih_iso.as_ref().map(|t| to_display_date(t));
-            dict.set_item("tarih", tarih_display)?;
-
-            dict.set_item("firma", row.try_get::<String, _>("firma").ok())?;
-            dict.set_item("malzeme", row.try_get::<String, _>("malzeme").ok())?;
-            dict.set_item("miktar", row.try_get::<String, _>("miktar").ok())?;
-            dict.set_item("matrah", row.try_get::<f64, _>("matrah").ok())?;
-            dict.set_item("toplam_tutar_tl", row.try_get::<f64, _>("toplam_tutar_tl").ok())?;
-            dict.set_item("toplam_tutar_usd", row.try_get::<f64, _>("toplam_tutar_usd").ok())?;
-            dict.set_item("toplam_tutar_eur", row.try_get::<f64, _>("toplam_tutar_eur").ok())?;
-            dict.set_item("birim", row.try_get::<String, _>("birim").ok())?;
-            dict.set_item("kdv_yuzdesi", row.try_get::<f64, _>("kdv_yuzdesi").ok())?;
-            dict.set_item("kdv_tutari", row.try_get::<f64, _>("kdv_tutari").ok())?;
-            dict.set_item("kdv_dahil", row.try_get::<i64, _>("kdv_dahil").ok())?;
-            dict.set_item("usd_rate", row.try_get::<f64, _>("usd_rate").ok())?;
-            dict.set_item("eur_rate", row.try_get::<f64, _>("eur_rate").ok())?;
-            dict.set_item("updated_at", row.try_get::<String, _>("updated_at").ok())?;
-            dict.set_item("created_at", row.try_get::<String, _>("created_at").ok())?;
+            dict.set_item("table", row.get::<String, _>("table_name"))?;
+            dict.set_item("year", row.get::<i64, _>("year"))?;
+            dict.set_item("month", row.get::<i64, _>("month"))?;
+            dict.set_item("expected", expected)?;
+            dict.set_item("actual", actual)?;
             result.append(dict)?;
         }
         Ok(result.into())
     }
 
-    fn get_gider_invoice_count(&self) -> PyResult<i64> {
+    // ============================================================================
+    // DEĞİŞİKLİK AKIŞI
+    // ============================================================================
+
+    /// invoices.db'nin PRAGMA data_version değeri. Başka bir bağlantı (havuz
+    /// ya da başka bir süreç) commit ettiğinde değişir; değişmediyse
+    /// changes_since çağırmaya gerek yoktur.
+    fn data_version(&self, py: Python<'_>) -> PyResult<i64> {
+        let watch_conn = self.watch_conn.clone();
+
+        self.run_detached(py, async move {
+            if let Some(conn) = watch_conn.lock().await.as_mut() {
+                sqlx::query_scalar::<_, i64>("PRAGMA data_version")
+                    .fetch_one(conn)
+                    .await
+                    .map_err(|e| PyRuntimeError::new_err(format!("Failed to read data_version: {}", e)))
+            } else {
+                Err(PyRuntimeError::new_err("Database not initialized"))
+            }
+        })
+    }
+
+    fn latest_change_seq(&self, py: Python<'_>) -> PyResult<i64> {
         let invoices_pool = self.invoices_pool.clone();
-        
-        self.runtime.block_on(async move {
+        let snapshots = self.snapshots.clone();
+
+        self.run_detached(py, async move {
             if let Some(pool) = invoices_pool.read().await.as_ref() {
-                let row = sqlx::query("SELECT COUNT(*) as count FROM expense_invoices")
-                    .fetch_one(pool)
+                let mut reader = reader_for(pool, &snapshots).await?;
+                let latest: Option<i64> = sqlx::query_scalar("SELECT MAX(seq) FROM changes")
+                    .fetch_one(reader.conn())
                     .await
-                    .map_err(|e| PyRuntimeError::new_err(format!("Failed to count gider invoices: {}", e)))?;
-
-                Ok(row.get::<i64, _>("count"))
+                    .map_err(|e| PyRuntimeError::new_err(format!("Failed to read changes: {}", e)))?;
+                Ok(latest.unwrap_or(0))
             } else {
                 Err(PyRuntimeError::new_err("Database not initialized"))
             }
         })
     }
 
-    fn get_gider_invoice_by_id(&self, py: Python<'_>, invoice_id: i64) -> PyResult<Py<PyAny>> {
+    /// seq'ten sonraki yazmalar: {"seq", "reset", "changes": [{"seq", "table", "op", "id"}]}.
+    /// reset true ise istenen kayıtlar budanmış ya da veritabanı değişmiştir
+    /// (geri yükleme); istemci baştan yüklemelidir.
+    fn changes_since(&self, py: Python<'_>, seq: i64) -> PyResult<Py<PyAny>> {
         let invoices_pool = self.invoices_pool.clone();
-        
-        let row = self.runtime.block_on(async move {
+        let snapshots = self.snapshots.clone();
+
+        let (latest, reset, rows) = self.run_detached(py, async move {
             if let Some(pool) = invoices_pool.read().await.as_ref() {
-                sqlx::query("SELECT * FROM expense_invoices WHERE id = ?")
-                    .bind(invoice_id)
-                    .fetch_optional(pool)
+                let mut reader = reader_for(pool, &snapshots).await?;
+                let bounds = sqlx::query("SELECT MIN(seq) AS oldest, MAX(seq) AS latest FROM changes")
+                    .fetch_one(reader.conn())
                     .await
-                    .map_err(|e| PyRuntimeError::new_err(format!("Failed to fetch gider invoice: {}", e)))
+                    .map_err(|e| PyRuntimeError::new_err(format!("Failed to read changes: {}", e)))?;
+                let oldest: Option<i64> = bounds.get("oldest");
+                let latest = bounds.get::<Option<i64>, _>("latest").unwrap_or(0);
+                if seq > latest || oldest.map_or(false, |oldest| seq < oldest - 1) {
+                    return Ok((latest, true, Vec::new()));
+                }
+                let rows = sqlx::query("SELECT seq, tbl, op, row_id FROM changes WHERE seq > ? ORDER BY seq")
+                    .bind(seq)
+                    .fetch_all(reader.conn())
+                    .await
+                    .map_err(|e| PyRuntimeError::new_err(format!("Failed to read changes: {}", e)))?;
+                Ok((latest, false, rows))
             } else {
                 Err(PyRuntimeError::new_err("Database not initialized"))
             }
         })?;
 
-        if let Some(r) = row {
+        let changes = PyList::empty(py);
+        for row in rows {
             let dict = PyDict::new(py);
-            dict.set_item("id", r.get::<i64, _>("id"))?;
-            dict.set_item("fatura_no", r.try_get::<String, _>("fatura_no").ok())?;
-            
-            let tarih_iso = r.try_get::<String, _>("tarih").ok();
-            let tarih_display = tarih_iso.as_ref().map(|t| to_display_date(t));
-            dict.set_item("tarih", tarih_display)?;
-
-            dict.set_item("firma", r.try_get::<String, _>("firma").ok())?;
-            dict.set_item("malzeme", r.try_get::<String, _>("malzeme").ok())?;
-            dict.set_item("miktar", r.try_get::<String, _>("miktar").ok())?;
-            dict.set_item("matrah", r.try_get::<f64, _>("matrah").ok())?;
-            dict.set_item("toplam_tutar_tl", r.try_get::<f64, _>("toplam_tutar_tl").ok())?;
-            dict.set_item("toplam_tutar_usd", r.try_get::<f64, _>("toplam_tutar_usd").ok())?;
-            dict.set_item("toplam_tutar_eur", r.try_get::<f64, _>("toplam_tutar_eur").ok())?;
-            dict.set_item("birim", r.try_get::<String, _>("birim").ok())?;
-            dict.set_item("kdv_yuzdesi", r.try_get::<f64, _>("kdv_yuzdesi").ok())?;
-            dict.set_item("kdv_tutari", r.try_get::<f64, _>("kdv_tutari").ok())?;
-            dict.set_item("kdv_dahil", r.try_get::<i64, _>("kdv_dahil").ok())?;
-            dict.set_item("usd_rate", r.try_get::<f64, _>("usd_rate").ok())?;
-            dict.set_item("eur_rate", r.try_get::<f64, _>("eur_rate").ok())?;
-            dict.set_item("updated_at", r.try_get::<String, _>("updated_at").ok())?;
-            dict.set_item("created_at", r.try_get::<String, _>("created_at").ok())?;
-            Ok(dict.into())
-        } else {
-            Ok(py.None())
+            dict.set_item("seq", row.get::<i64, _>("seq"))?;
+            dict.set_item("table", row.get::<String, _>("tbl"))?;
+            dict.set_item("op", row.get::<String, _>("op"))?;
+            dict.set_item("id", row.get::<i64, _>("row_id"))?;
+            changes.append(dict)?;
         }
+        let result = PyDict::new(py);
+        result.set_item("seq", latest)?;
+        result.set_item("reset", reset)?;
+        result.set_item("changes", changes)?;
+        Ok(result.into())
     }
 
     // ============================================================================
     // AYAR METOTLARI
     // ============================================================================
     
-    fn get_setting(&self, key: String) -> PyResult<Option<String>> {
+    fn get_setting(&self, py: Python<'_>, key: String) -> PyResult<Option<String>> {
         let settings_pool = self.settings_pool.clone();
         
-        self.runtime.block_on(async move {
+        self.run_detached(py, async move {
             if let Some(pool) = settings_pool.read().await.as_ref() {
                 let row = sqlx::query("SELECT value FROM settings WHERE key = ?")
                     .bind(&key)
@@ -1020,11 +3078,14 @@ impl Database {
         })
     }
 
-    fn save_setting(&self, key: String, value: String) -> PyResult<()> {
+    fn save_setting(&self, py: Python<'_>, key: String, value: String) -> PyResult<()> {
         let settings_pool = self.settings_pool.clone();
+        let write_tx = self.write_tx.clone();
         
-        self.runtime.block_on(async move {
+        self.run_detached(py, async move {
             if let Some(pool) = settings_pool.read().await.as_ref() {
+                let mut tx_state = write_tx.lock().await;
+                let mut writer = writer_for(pool, "settings", &mut tx_state).await?;
                 sqlx::query(
                     r#"
                     INSERT INTO settings (key, value) VALUES (?, ?)
@@ -1033,7 +3094,7 @@ impl Database {
                 )
                 .bind(key)
                 .bind(value)
-                .execute(pool)
+                .execute(writer.conn())
                 .await
                 .map_err(|e| PyRuntimeError::new_err(format!("Failed to save setting: {}", e)))?;
 
@@ -1047,7 +3108,7 @@ impl Database {
     fn get_all_settings(&self, py: Python<'_>) -> PyResult<Py<PyAny>> {
         let settings_pool = self.settings_pool.clone();
         
-        let rows = self.runtime.block_on(async move {
+        let rows = self.run_detached(py, async move {
             if let Some(pool) = settings_pool.read().await.as_ref() {
                 sqlx::query("SELECT key, value FROM settings")
                     .fetch_all(pool)
@@ -1071,11 +3132,14 @@ impl Database {
     // DÖVİZ KURU METOTLARI
     // ============================================================================
     
-    fn save_exchange_rates(&self, usd_rate: f64, eur_rate: f64) -> PyResult<()> {
+    fn save_exchange_rates(&self, py: Python<'_>, usd_rate: f64, eur_rate: f64) -> PyResult<()> {
         let settings_pool = self.settings_pool.clone();
+        let write_tx = self.write_tx.clone();
         
-        self.runtime.block_on(async move {
+        self.run_detached(py, async move {
             if let Some(pool) = settings_pool.read().await.as_ref() {
+                let mut tx_state = write_tx.lock().await;
+                let mut writer = writer_for(pool, "settings", &mut tx_state).await?;
                 let date = Utc::now().format("%Y-%m-%d").to_string();
                 
                 sqlx::query(
@@ -1087,7 +3151,7 @@ impl Database {
                 .bind(date)
                 .bind(usd_rate)
                 .bind(eur_rate)
-                .execute(pool)
+                .execute(writer.conn())
                 .await
                 .map_err(|e| PyRuntimeError::new_err(format!("Failed to save exchange rates: {}", e)))?;
 
@@ -1098,10 +3162,10 @@ impl Database {
         })
     }
 
-    fn load_exchange_rates(&self) -> PyResult<(f64, f64)> {
+    fn load_exchange_rates(&self, py: Python<'_>) -> PyResult<(f64, f64)> {
         let settings_pool = self.settings_pool.clone();
         
-        self.runtime.block_on(async move {
+        self.run_detached(py, async move {
             if let Some(pool) = settings_pool.read().await.as_ref() {
                 let date = Utc::now().format("%Y-%m-%d").to_string();
                 
@@ -1127,11 +3191,14 @@ impl Database {
 
     // ===== GEÇMİŞ METOTLARI =====
     
-    fn add_history_record(&self, action: String, details: String) -> PyResult<()> {
+    fn add_history_record(&self, py: Python<'_>, action: String, details: String) -> PyResult<()> {
         let history_pool = self.history_pool.clone();
+        let write_tx = self.write_tx.clone();
         
-        self.runtime.block_on(async move {
+        self.run_detached(py, async move {
             if let Some(pool) = history_pool.read().await.as_ref() {
+                let mut tx_state = write_tx.lock().await;
+                let mut writer = writer_for(pool, "history", &mut tx_state).await?;
                 let timestamp = Utc::now().to_rfc3339();
                 
                 sqlx::query(
@@ -1140,7 +3207,7 @@ impl Database {
                 .bind(action)
                 .bind(details)
                 .bind(timestamp)
-                .execute(pool)
+                .execute(writer.conn())
                 .await
                 .map_err(|e| PyRuntimeError::new_err(format!("Failed to add history record: {}", e)))?;
 
@@ -1151,10 +3218,49 @@ impl Database {
         })
     }
 
+    /// Geçmiş kayıtlarını tek transaction içinde toplu ekler.
+    fn add_history_records(&self, py: Python<'_>, records: Vec<(String, String)>) -> PyResult<()> {
+        if records.is_empty() {
+            return Ok(());
+        }
+        let history_pool = self.history_pool.clone();
+        let write_tx = self.write_tx.clone();
+
+        self.run_detached(py, async move {
+            if let Some(pool) = history_pool.read().await.as_ref() {
+                let mut tx_state = write_tx.lock().await;
+                let mut writer = writer_for(pool, "history", &mut tx_state).await?;
+                let timestamp = Utc::now().to_rfc3339();
+                let mut tx = writer
+                    .conn()
+                    .begin()
+                    .await
+                    .map_err(|e| PyRuntimeError::new_err(format!("Failed to begin history batch: {}", e)))?;
+
+                for (action, details) in records {
+                    sqlx::query("INSERT INTO history (action, details, timestamp) VALUES (?, ?, ?)")
+                        .bind(action)
+                        .bind(details)
+                        .bind(timestamp.clone())
+                        .execute(&mut *tx)
+                        .await
+                        .map_err(|e| PyRuntimeError::new_err(format!("Failed to add history record: {}", e)))?;
+                }
+
+                tx.commit()
+                    .await
+                    .map_err(|e| PyRuntimeError::new_err(format!("Failed to commit history batch: {}", e)))?;
+                Ok(())
+            } else {
+                Err(PyRuntimeError::new_err("Database not initialized"))
+            }
+        })
+    }
+
     fn get_recent_history(&self, py: Python<'_>, limit: i64) -> PyResult<Py<PyAny>> {
         let history_pool = self.history_pool.clone();
         
-        let rows = self.runtime.block_on(async move {
+        let rows = self.run_detached(py, async move {
             if let Some(pool) = history_pool.read().await.as_ref() {
                 sqlx::query("SELECT * FROM history ORDER BY timestamp DESC LIMIT ?")
                     .bind(limit)
@@ -1181,7 +3287,7 @@ impl Database {
     fn get_history_by_date_range(&self, py: Python<'_>, start_date: String, end_date: String) -> PyResult<Py<PyAny>> {
         let history_pool = self.history_pool.clone();
         
-        let rows = self.runtime.block_on(async move {
+        let rows = self.run_detached(py, async move {
             if let Some(pool) = history_pool.read().await.as_ref() {
                 sqlx::query(
                     "SELECT * FROM history WHERE timestamp >= ? AND timestamp <= ? ORDER BY timestamp DESC"
@@ -1208,16 +3314,19 @@ impl Database {
         Ok(result.into())
     }
 
-    fn clear_old_history(&self, days: i64) -> PyResult<i64> {
+    fn clear_old_history(&self, py: Python<'_>, days: i64) -> PyResult<i64> {
         let history_pool = self.history_pool.clone();
+        let write_tx = self.write_tx.clone();
         
-        self.runtime.block_on(async move {
+        self.run_detached(py, async move {
             if let Some(pool) = history_pool.read().await.as_ref() {
+                let mut tx_state = write_tx.lock().await;
+                let mut writer = writer_for(pool, "history", &mut tx_state).await?;
                 let cutoff_date = (Utc::now() - chrono::Duration::days(days)).to_rfc3339();
                 
                 let result = sqlx::query("DELETE FROM history WHERE timestamp < ?")
                     .bind(cutoff_date)
-                    .execute(pool)
+                    .execute(writer.conn())
                     .await
                     .map_err(|e| PyRuntimeError::new_err(format!("Failed to clear old history: {}", e)))?;
 
@@ -1230,8 +3339,9 @@ impl Database {
 
     // ===== YILLIK GİDER METOTLARI =====
     
-    fn add_or_update_yearly_expenses(&self, year: i64, _py: Python<'_>, monthly_data: &Bound<'_, PyDict>) -> PyResult<i64> {
+    fn add_or_update_yearly_expenses(&self, year: i64, py: Python<'_>, monthly_data: &Bound<'_, PyDict>) -> PyResult<i64> {
         let invoices_pool = self.invoices_pool.clone();
+        let write_tx = self.write_tx.clone();
         
         // Aylık verileri çıkar
         let months = vec!["ocak", "subat", "mart", "nisan", "mayis", "haziran",
@@ -1245,12 +3355,14 @@ impl Database {
             monthly_amounts.push(amount);
         }
         
-        self.runtime.block_on(async move {
+        self.run_detached(py, async move {
             if let Some(pool) = invoices_pool.read().await.as_ref() {
+                let mut tx_state = write_tx.lock().await;
+                let mut writer = writer_for(pool, "invoices", &mut tx_state).await?;
                 // Yılın var olup olmadığını kontrol et
                 let check = sqlx::query("SELECT id FROM general_expenses WHERE yil = ?")
                     .bind(year)
-                    .fetch_optional(pool)
+                    .fetch_optional(writer.conn())
                     .await
                     .map_err(|e| PyRuntimeError::new_err(format!("Failed to check yearly expenses: {}", e)))?;
 
@@ -1277,7 +3389,7 @@ impl Database {
                     .bind(monthly_amounts[10])
                     .bind(monthly_amounts[11])
                     .bind(year)
-                    .execute(pool)
+                    .execute(writer.conn())
                     .await
                     .map_err(|e| PyRuntimeError::new_err(format!("Failed to update yearly expenses: {}", e)))?;
 
@@ -1304,7 +3416,7 @@ impl Database {
                     .bind(monthly_amounts[9])
                     .bind(monthly_amounts[10])
                     .bind(monthly_amounts[11])
-                    .execute(pool)
+                    .execute(writer.conn())
                     .await
                     .map_err(|e| PyRuntimeError::new_err(format!("Failed to insert yearly expenses: {}", e)))?;
 
@@ -1318,12 +3430,14 @@ impl Database {
 
     fn get_yearly_expenses(&self, py: Python<'_>, year: i64) -> PyResult<Py<PyAny>> {
         let invoices_pool = self.invoices_pool.clone();
+        let snapshots = self.snapshots.clone();
         
-        let row = self.runtime.block_on(async move {
+        let row = self.run_detached(py, async move {
             if let Some(pool) = invoices_pool.read().await.as_ref() {
+                let mut reader = reader_for(pool, &snapshots).await?;
                 sqlx::query("SELECT * FROM general_expenses WHERE yil = ?")
                     .bind(year)
-                    .fetch_optional(pool)
+                    .fetch_optional(reader.conn())
                     .await
                     .map_err(|e| PyRuntimeError::new_err(format!("Failed to get yearly expenses: {}", e)))
             } else {
@@ -1355,12 +3469,14 @@ impl Database {
 
     fn get_yearly_expenses_by_id(&self, py: Python<'_>, id: i64) -> PyResult<Py<PyAny>> {
         let invoices_pool = self.invoices_pool.clone();
+        let snapshots = self.snapshots.clone();
         
-        let row = self.runtime.block_on(async move {
+        let row = self.run_detached(py, async move {
             if let Some(pool) = invoices_pool.read().await.as_ref() {
+                let mut reader = reader_for(pool, &snapshots).await?;
                 sqlx::query("SELECT * FROM general_expenses WHERE id = ?")
                     .bind(id)
-                    .fetch_optional(pool)
+                    .fetch_optional(reader.conn())
                     .await
                     .map_err(|e| PyRuntimeError::new_err(format!("Failed to get yearly expenses by id: {}", e)))
             } else {
@@ -1390,13 +3506,15 @@ impl Database {
         }
     }
 
-    fn get_yearly_expenses_count(&self) -> PyResult<i64> {
+    fn get_yearly_expenses_count(&self, py: Python<'_>) -> PyResult<i64> {
         let invoices_pool = self.invoices_pool.clone();
+        let snapshots = self.snapshots.clone();
         
-        self.runtime.block_on(async move {
+        self.run_detached(py, async move {
             if let Some(pool) = invoices_pool.read().await.as_ref() {
+                let mut reader = reader_for(pool, &snapshots).await?;
                 let row = sqlx::query("SELECT COUNT(*) as count FROM general_expenses")
-                    .fetch_one(pool)
+                    .fetch_one(reader.conn())
                     .await
                     .map_err(|e| PyRuntimeError::new_err(format!("Failed to count yearly expenses: {}", e)))?;
 
@@ -1409,11 +3527,13 @@ impl Database {
 
     fn get_all_yearly_expenses(&self, py: Python<'_>) -> PyResult<Py<PyAny>> {
         let invoices_pool = self.invoices_pool.clone();
+        let snapshots = self.snapshots.clone();
         
-        let rows = self.runtime.block_on(async move {
+        let rows = self.run_detached(py, async move {
             if let Some(pool) = invoices_pool.read().await.as_ref() {
+                let mut reader = reader_for(pool, &snapshots).await?;
                 sqlx::query("SELECT * FROM general_expenses ORDER BY yil DESC")
-                    .fetch_all(pool)
+                    .fetch_all(reader.conn())
                     .await
                     .map_err(|e| PyRuntimeError::new_err(format!("Failed to get all yearly expenses: {}", e)))
             } else {
@@ -1445,8 +3565,9 @@ impl Database {
 
     // ===== KURUMLAR VERGİSİ METOTLARI =====
     
-    fn add_or_update_corporate_tax(&self, year: i64, _py: Python<'_>, monthly_data: &Bound<'_, PyDict>) -> PyResult<i64> {
+    fn add_or_update_corporate_tax(&self, year: i64, py: Python<'_>, monthly_data: &Bound<'_, PyDict>) -> PyResult<i64> {
         let invoices_pool = self.invoices_pool.clone();
+        let write_tx = self.write_tx.clone();
         
         // Aylık verileri çıkar
         let months = vec!["ocak", "subat", "mart", "nisan", "mayis", "haziran",
@@ -1460,12 +3581,14 @@ impl Database {
             monthly_amounts.push(amount);
         }
         
-        self.runtime.block_on(async move {
+        self.run_detached(py, async move {
             if let Some(pool) = invoices_pool.read().await.as_ref() {
+                let mut tx_state = write_tx.lock().await;
+                let mut writer = writer_for(pool, "invoices", &mut tx_state).await?;
                 // Yılın var olup olmadığını kontrol et
                 let check = sqlx::query("SELECT id FROM corporate_tax WHERE yil = ?")
                     .bind(year)
-                    .fetch_optional(pool)
+                    .fetch_optional(writer.conn())
                     .await
                     .map_err(|e| PyRuntimeError::new_err(format!("Failed to check corporate tax: {}", e)))?;
 
@@ -1492,7 +3615,7 @@ impl Database {
                     .bind(monthly_amounts[10])
                     .bind(monthly_amounts[11])
                     .bind(year)
-                    .execute(pool)
+                    .execute(writer.conn())
                     .await
                     .map_err(|e| PyRuntimeError::new_err(format!("Failed to update corporate tax: {}", e)))?;
 
@@ -1519,7 +3642,7 @@ impl Database {
                     .bind(monthly_amounts[9])
                     .bind(monthly_amounts[10])
                     .bind(monthly_amounts[11])
-                    .execute(pool)
+                    .execute(writer.conn())
                     .await
                     .map_err(|e| PyRuntimeError::new_err(format!("Failed to insert corporate tax: {}", e)))?;
 
@@ -1533,12 +3656,14 @@ impl Database {
 
     fn get_corporate_tax(&self, py: Python<'_>, year: i64) -> PyResult<Py<PyAny>> {
         let invoices_pool = self.invoices_pool.clone();
+        let snapshots = self.snapshots.clone();
         
-        let row = self.runtime.block_on(async move {
+        let row = self.run_detached(py, async move {
             if let Some(pool) = invoices_pool.read().await.as_ref() {
+                let mut reader = reader_for(pool, &snapshots).await?;
                 sqlx::query("SELECT * FROM corporate_tax WHERE yil = ?")
                     .bind(year)
-                    .fetch_optional(pool)
+                    .fetch_optional(reader.conn())
                     .await
                     .map_err(|e| PyRuntimeError::new_err(format!("Failed to get corporate tax: {}", e)))
             } else {
@@ -1569,8 +3694,130 @@ impl Database {
     }
 }
 
+// ============================================================================
+// TRANSACTION BAĞLAM YÖNETİCİSİ
+// ============================================================================
+#[pyclass]
+struct TransactionScope {
+    db: Py<Database>,
+}
+
+#[pymethods]
+impl TransactionScope {
+    fn __enter__(&self, py: Python<'_>) -> PyResult<Py<Database>> {
+        self.db.borrow(py).begin(py)?;
+        Ok(self.db.clone_ref(py))
+    }
+
+    #[pyo3(signature = (exc_type=None, _exc_value=None, _traceback=None))]
+    fn __exit__(
+        &self,
+        py: Python<'_>,
+        exc_type: Option<Bound<'_, PyAny>>,
+        _exc_value: Option<Bound<'_, PyAny>>,
+        _traceback: Option<Bound<'_, PyAny>>,
+    ) -> PyResult<bool> {
+        let db = self.db.borrow(py);
+        match exc_type {
+            Some(exc) if !exc.is_none() => db.rollback(py)?,
+            _ => db.commit(py)?,
+        }
+        Ok(false)
+    }
+}
+
+// ============================================================================
+// ANLIK GÖRÜNTÜ BAĞLAM YÖNETİCİSİ
+// ============================================================================
+impl Database {
+    /// Okuma transaction'ını açar; iç içe çağrıda yalnızca sayacı artırır.
+    fn begin_snapshot(&self, py: Python<'_>) -> PyResult<()> {
+        let invoices_pool = self.invoices_pool.clone();
+        let snapshots = self.snapshots.clone();
+
+        self.run_detached(py, async move {
+            let owner = thread::current().id();
+            if let Some(snapshot) = snapshots.lock().unwrap().get_mut(&owner) {
+                snapshot.depth += 1;
+                return Ok(());
+            }
+            if let Some(pool) = invoices_pool.read().await.as_ref() {
+                let mut tx = pool
+                    .begin()
+                    .await
+                    .map_err(|e| PyRuntimeError::new_err(format!("Failed to begin snapshot: {}", e)))?;
+                // BEGIN ertelenmiştir; görüntü ilk okumada sabitlenir
+                sqlx::query("SELECT 1 FROM sqlite_master LIMIT 1")
+                    .fetch_optional(&mut *tx)
+                    .await
+                    .map_err(|e| PyRuntimeError::new_err(format!("Failed to begin snapshot: {}", e)))?;
+                snapshots.lock().unwrap().insert(owner, ReadSnapshot { depth: 1, tx });
+                Ok(())
+            } else {
+                Err(PyRuntimeError::new_err("Database not initialized"))
+            }
+        })
+    }
+
+    /// En dıştaki snapshot kapanınca okuma transaction'ını bırakır.
+    fn end_snapshot(&self, py: Python<'_>) -> PyResult<()> {
+        let snapshots = self.snapshots.clone();
+
+        self.run_detached(py, async move {
+            let owner = thread::current().id();
+            let finished = {
+                let mut open = snapshots.lock().unwrap();
+                let depth = match open.get_mut(&owner) {
+                    Some(snapshot) => {
+                        snapshot.depth -= 1;
+                        snapshot.depth
+                    }
+                    None => return Err(PyRuntimeError::new_err("No open snapshot")),
+                };
+                if depth == 0 { open.remove(&owner) } else { None }
+            };
+            if let Some(snapshot) = finished {
+                // Yalnızca okuma yapıldı; rollback görüntüyü serbest bırakır
+                snapshot
+                    .tx
+                    .rollback()
+                    .await
+                    .map_err(|e| PyRuntimeError::new_err(format!("Failed to end snapshot: {}", e)))?;
+            }
+            Ok(())
+        })
+    }
+}
+
+#[pyclass]
+struct SnapshotScope {
+    db: Py<Database>,
+}
+
+#[pymethods]
+impl SnapshotScope {
+    fn __enter__(&self, py: Python<'_>) -> PyResult<Py<Database>> {
+        self.db.borrow(py).begin_snapshot(py)?;
+        Ok(self.db.clone_ref(py))
+    }
+
+    #[pyo3(signature = (_exc_type=None, _exc_value=None, _traceback=None))]
+    fn __exit__(
+        &self,
+        py: Python<'_>,
+        _exc_type: Option<Bound<'_, PyAny>>,
+        _exc_value: Option<Bound<'_, PyAny>>,
+        _traceback: Option<Bound<'_, PyAny>>,
+    ) -> PyResult<bool> {
+        self.db.borrow(py).end_snapshot(py)?;
+        Ok(false)
+    }
+}
+
 #[pymodule]
 fn rust_db(_py: Python, m: &Bound<'_, PyModule>) -> PyResult<()> {
     m.add_class::<Database>()?;
+    m.add_class::<TransactionScope>()?;
+    m.add_class::<SnapshotScope>()?;
     Ok(())
 }